@@ -3,6 +3,7 @@
 
 `include "is_special_float.v"
 `include "leading_one_detector.v"
+`include "pipeline_register.v"
 `include "result_rounder.v"
 
 module floating_point_adder #(
@@ -10,25 +11,60 @@ module floating_point_adder #(
     parameter int MANTISSA_WIDTH = 23,
     parameter int ROUND_TO_NEAREST_TIES_TO_EVEN = 1,  // 0: round to zero (chopping last bits), 1: round to nearest
     parameter int IGNORE_SIGN_BIT_FOR_NAN = 1,
+    // 0: combinational, 1-4: number of register stages (i.e. the latency in clock cycles). Registers are added
+    // after the following stages, in this order: align/add, normalize, unpack/special cases and round.
+    parameter int PIPELINE_STAGES = 0,
+    // Architecture of the leading one detector, see leading_one_detector.v. 0: priority scan, 1: binary tree.
+    parameter int LOD_ARCHITECTURE = 0,
     localparam int FloatBitWidth = EXPONENT_WIDTH + MANTISSA_WIDTH + 1
 ) (
+    // Only used when PIPELINE_STAGES > 0
+    input clk,
+    input reset,
+
     input [FloatBitWidth-1:0] a,
     input [FloatBitWidth-1:0] b,
-    output reg [FloatBitWidth-1:0] out,
+    output [FloatBitWidth-1:0] out,
 
     // Subtraction flag
     input subtract,
 
     // Exception flags
-    output reg underflow_flag,
-    output reg overflow_flag,
-    output reg invalid_operation_flag
+    output underflow_flag,
+    output overflow_flag,
+    output invalid_operation_flag,
+
+    // Handshake: an operation is accepted when in_valid and in_ready are both high, and its result is
+    // taken when out_valid and out_ready are both high. Tie in_valid and out_ready high if not used.
+    input in_valid,
+    output in_ready,
+    output out_valid,
+    input out_ready
 );
 
-    localparam int RoundingBits = MANTISSA_WIDTH;
-    localparam int TrueRoundingBits = RoundingBits * ROUND_TO_NEAREST_TIES_TO_EVEN;
+    // Bits below the mantissa that are kept for rounding, of which the last one is a sticky bit (set when any
+    // bit is shifted out during the alignment). A difference needs at least three of them (guard, round and sticky)
+    // to be rounded correctly. They are also kept when chopping, as the sum is only truncated after normalization.
+    localparam int RoundingBits = MANTISSA_WIDTH < 3 ? 3 : MANTISSA_WIDTH;
+    localparam int ShiftedWidth = MANTISSA_WIDTH + 1 + RoundingBits;
+
+    // Data passed on between the stages
+    localparam int UnpackedWidth = 3 + FloatBitWidth + 2 + 2 * EXPONENT_WIDTH + 2 * (MANTISSA_WIDTH + 1);
+    localparam int SummedWidth = 3 + FloatBitWidth + 1 + EXPONENT_WIDTH + MANTISSA_WIDTH + 2 + RoundingBits;
+    localparam int NormalizedWidth = 3 + FloatBitWidth + 1 + EXPONENT_WIDTH + 2 + MANTISSA_WIDTH + RoundingBits;
+    localparam int ResultWidth = FloatBitWidth + 3;
+
+    wire is_E4M3 = EXPONENT_WIDTH == 4 && MANTISSA_WIDTH == 3;
+
+    // Special pre-defined values. {MANTISSA_WIDTH-1{...}} could also have been {MANTISSA_WIDTH-1{1'bX}}
+    // but like this it explicitly supports the E4M3 variant.
+    wire [FloatBitWidth-1:0] quiet_nan = {1'b1, {EXPONENT_WIDTH{1'b1}}, 1'b1, {(MANTISSA_WIDTH - 1) {is_E4M3 ? 1'b1 : 1'b0}}};
+
+    // Signals entering stage N (i.e. the outputs of the pipeline register in front of it) are prefixed with stage_N_
 
-    // Unpack input floats
+    //
+    // Stage 1: unpack input floats and handle special cases
+    //
 
     wire a_sign, temp_b_sign, b_sign;
     wire a_implicit_leading_bit, b_implicit_leading_bit;
@@ -43,50 +79,9 @@ module floating_point_adder #(
     assign a_implicit_leading_bit = !(a_exponent == 0);
     assign b_implicit_leading_bit = !(b_exponent == 0);
 
-    // Result variables
-    reg out_sign;
-    reg [EXPONENT_WIDTH-1:0] out_exponent;
-    reg [MANTISSA_WIDTH-1:0] out_mantissa;
-
-    // Temporary variables
-    reg signed [EXPONENT_WIDTH+1-1:0] exponent_difference;
-    reg [EXPONENT_WIDTH+1-1:0] positive_exponent;  // Extra step required for taking the correct number of bits in Verilator
-    reg [EXPONENT_WIDTH-1:0] abs_exponent_difference;
-
-    reg [MANTISSA_WIDTH+1+TrueRoundingBits-1:0] a_shifted_mantissa, b_shifted_mantissa;  // TrueRoundingBits extra bits for rounding
-
-    reg signed [MANTISSA_WIDTH+2+TrueRoundingBits+1-1:0] summed_mantissa;
-    reg [MANTISSA_WIDTH+2+TrueRoundingBits-1:0] positive_summed_mantissa;
-    reg [MANTISSA_WIDTH+2+TrueRoundingBits-1:0] normalized_mantissa;
-    reg [MANTISSA_WIDTH-1:0] non_rounded_mantissa;
-
-    reg [RoundingBits-1:0] additional_mantissa_bits;
-    reg negate_exponent_update;
-    reg signed [EXPONENT_WIDTH+2-1:0] temp_exponent;
-
-    // Extra statement used to avoid WIDTHTRUNC from Verilator
-    wire [32-1:0] int_exponent_change_from_mantissa = MANTISSA_WIDTH + TrueRoundingBits - leading_one_pos;
-    // TODO: check that the used bit width is enough/correct
-    wire signed [3+$clog2(MANTISSA_WIDTH)+$clog2(TrueRoundingBits)-1:0] exponent_change_from_mantissa = int_exponent_change_from_mantissa[3+$clog2(MANTISSA_WIDTH)+$clog2(TrueRoundingBits)-1:0];
-
-    wire is_E4M3 = EXPONENT_WIDTH == 4 && MANTISSA_WIDTH == 3;
-
-    // Special pre-defined values. {MANTISSA_WIDTH-1{...}} could also have been {MANTISSA_WIDTH-1{1'bX}}
-    // but like this it explicitly supports the E4M3 variant.
-    wire [FloatBitWidth-1:0] quiet_nan = {1'b1, {EXPONENT_WIDTH{1'b1}}, 1'b1, {(MANTISSA_WIDTH - 1) {is_E4M3 ? 1'b1 : 1'b0}}};
-
-    // Leading one detection
-
-    wire [$clog2(MANTISSA_WIDTH+2+TrueRoundingBits)-1:0] leading_one_pos;
-    wire has_leading_one;
-
-    leading_one_detector #(
-        .WIDTH(MANTISSA_WIDTH + 2 + TrueRoundingBits)
-    ) leading_one_detector_summed_mantissa (
-        .value(positive_summed_mantissa),
-        .position(leading_one_pos),
-        .has_leading_one(has_leading_one)
-    );
+    // Subnormal numbers have the exponent of the smallest normal numbers, but without the implicit leading bit
+    wire [EXPONENT_WIDTH-1:0] a_aligned_exponent = a_implicit_leading_bit ? a_exponent : 1;
+    wire [EXPONENT_WIDTH-1:0] b_aligned_exponent = b_implicit_leading_bit ? b_exponent : 1;
 
     // Find special float values
 
@@ -121,180 +116,323 @@ module floating_point_adder #(
         .is_subnormal()
     );
 
-    // Rounding
-
-    reg [MANTISSA_WIDTH-1:0] rounded_mantissa;
-    reg [EXPONENT_WIDTH-1:0] rounded_exponent;
-    reg rounded_overflow_flag;
-
-    result_rounder #(
-        .EXPONENT_WIDTH(EXPONENT_WIDTH),
-        .MANTISSA_WIDTH(MANTISSA_WIDTH),
-        .ROUND_TO_NEAREST_TIES_TO_EVEN(ROUND_TO_NEAREST_TIES_TO_EVEN),
-        .ROUNDING_BITS(RoundingBits)
-    ) result_rounder_block (
-        // We need to remove the extra bits from temp_exponent, which
-        // are normally used for overflow detection.
-        .non_rounded_exponent(temp_exponent[EXPONENT_WIDTH-1:0]),
-        .non_rounded_mantissa(non_rounded_mantissa),
-        .rounding_bits(additional_mantissa_bits),
-        .rounded_exponent(rounded_exponent),
-        .rounded_mantissa(rounded_mantissa),
-        .overflow_flag(rounded_overflow_flag)
-    );
-
-    // Perform actual addition operation
+    // The result of a special case is computed here and is passed through the remaining stages
+    reg is_special_result;
+    reg [FloatBitWidth-1:0] special_out;
+    reg special_overflow_flag, special_invalid_operation_flag;
 
     always_comb begin
-        underflow_flag = 1'b0;
-        overflow_flag = 1'b0;
-        invalid_operation_flag = 1'b0;
-
-        // We set these to avoid latch inference for Verilator but in fact these are not used in this path
-        out_sign = 1'bx;
-        out_exponent = {EXPONENT_WIDTH{1'bx}};
-        out_mantissa = {MANTISSA_WIDTH{1'bx}};
-        non_rounded_mantissa = {MANTISSA_WIDTH{1'bx}};
-        positive_summed_mantissa = {(MANTISSA_WIDTH + 2 + TrueRoundingBits) {1'bx}};
-        normalized_mantissa = {(MANTISSA_WIDTH + 2 + TrueRoundingBits) {1'bx}};
-        exponent_difference = {(EXPONENT_WIDTH + 1) {1'bx}};
-        positive_exponent = {(EXPONENT_WIDTH + 1) {1'bx}};
-        abs_exponent_difference = {EXPONENT_WIDTH{1'bx}};
-        a_shifted_mantissa = {(MANTISSA_WIDTH + 1 + TrueRoundingBits) {1'bx}};
-        b_shifted_mantissa = {(MANTISSA_WIDTH + 1 + TrueRoundingBits) {1'bx}};
-        summed_mantissa = {(MANTISSA_WIDTH + 2 + TrueRoundingBits + 1) {1'bx}};
-        additional_mantissa_bits = {RoundingBits{1'bx}};
-        temp_exponent = {(EXPONENT_WIDTH + 2) {1'bx}};
-        negate_exponent_update = 1'bx;
+        is_special_result = 1'b1;
+        special_out = quiet_nan;
+        special_overflow_flag = 1'b0;
+        special_invalid_operation_flag = 1'b0;
 
         if (is_signaling_nan_a || is_signaling_nan_b || is_quiet_nan_a || is_quiet_nan_b) begin
-            // Result is QNaN due to one or both of the operands being NaN
+            // Result is QNaN due to one or both of the operands being NaN, which like every NaN result raises the
+            // invalid operation flag
 
-            out = quiet_nan;
-
-            if ((is_signaling_nan_a || is_signaling_nan_b) || ((is_quiet_nan_a && (!is_signaling_nan_b && !is_quiet_nan_b)) || (is_quiet_nan_b && (!is_signaling_nan_a && !is_quiet_nan_a)))) begin
-                invalid_operation_flag = 1'b1;
-            end
+            special_invalid_operation_flag = 1'b1;
         end else
-        // Cover the following cases:
+        // Cover the following cases (b_sign already includes the subtraction):
         // -Inf + +Inf = QNaN
         // -Inf - -Inf = QNaN
         // +Inf - +Inf = QNaN
         // +Inf + -Inf = QNaN
-        if ((is_a_infinite && is_b_infinite) && ((a_sign && !b_sign && !subtract) || (a_sign && b_sign && subtract) || (!a_sign && !b_sign && subtract) || (!a_sign && b_sign && !subtract))) begin
+        if (is_a_infinite && is_b_infinite && a_sign != b_sign) begin
             // Result is QNaN due to the fact that two opposite infinities were added
 
-            out = quiet_nan;
-
-            invalid_operation_flag = 1'b1;
+            special_invalid_operation_flag = 1'b1;
         end else
-        // Handle two special cases that otherwise are not correctly covered by the logic in the else block;
-        // -Inf + -Inf = -Inf and +Inf + +Inf = +Inf
-        if ((is_a_infinite && is_b_infinite) && !subtract && a_sign == b_sign) begin
+        // Handle the special cases that otherwise are not correctly covered by the regular addition;
+        // an infinity plus a finite number or an infinity of the same sign is that infinity
+        if (is_a_infinite || is_b_infinite) begin
             // Overflow detected
 
-            out = {a_sign, {EXPONENT_WIDTH{1'b1}}, {MANTISSA_WIDTH{1'b0}}};
+            special_out = {is_a_infinite ? a_sign : b_sign, {EXPONENT_WIDTH{1'b1}}, {MANTISSA_WIDTH{1'b0}}};
 
-            overflow_flag = 1'b1;
+            special_overflow_flag = 1'b1;
         end else
-        // Perform regular addition operation
+        // Perform regular addition operation in the next stages
         begin
-            exponent_difference = a_exponent - b_exponent;
-            out_sign = 1'b0;
+            is_special_result = 1'b0;
+        end
+    end
+
+    wire [UnpackedWidth-1:0] stage_2_data;
+    wire stage_2_valid, stage_2_ready;
+
+    pipeline_register #(
+        .WIDTH(UnpackedWidth),
+        .ENABLE(PIPELINE_STAGES >= 3)
+    ) unpacked_register (
+        .clk(clk),
+        .reset(reset),
+        .in_valid(in_valid),
+        .in_ready(in_ready),
+        .in_data({is_special_result, special_overflow_flag, special_invalid_operation_flag, special_out, a_sign, b_sign, a_aligned_exponent, b_aligned_exponent, a_implicit_leading_bit, a_mantissa, b_implicit_leading_bit, b_mantissa}),
+        .out_valid(stage_2_valid),
+        .out_ready(stage_2_ready),
+        .out_data(stage_2_data)
+    );
 
-            a_shifted_mantissa = {a_implicit_leading_bit, a_mantissa} << TrueRoundingBits;
-            b_shifted_mantissa = {b_implicit_leading_bit, b_mantissa} << TrueRoundingBits;
+    //
+    // Stage 2: align and add the mantissas
+    //
 
-            if (exponent_difference > 0) begin
-                // A exponent is bigger than B exponent
+    wire stage_2_is_special_result, stage_2_special_overflow_flag, stage_2_special_invalid_operation_flag;
+    wire [FloatBitWidth-1:0] stage_2_special_out;
+    wire stage_2_a_sign, stage_2_b_sign;
+    wire [EXPONENT_WIDTH-1:0] stage_2_a_exponent, stage_2_b_exponent;
+    wire [MANTISSA_WIDTH+1-1:0] stage_2_a_mantissa, stage_2_b_mantissa;  // Including the implicit leading bit
 
-                abs_exponent_difference = exponent_difference[EXPONENT_WIDTH-1:0];
-                out_exponent = a_exponent;
-                b_shifted_mantissa = b_shifted_mantissa >> abs_exponent_difference;
-            end else if (exponent_difference == 0) begin
-                // A exponent is equal to B exponent
+    assign {stage_2_is_special_result, stage_2_special_overflow_flag, stage_2_special_invalid_operation_flag, stage_2_special_out, stage_2_a_sign, stage_2_b_sign, stage_2_a_exponent, stage_2_b_exponent, stage_2_a_mantissa, stage_2_b_mantissa} = stage_2_data;
 
-                abs_exponent_difference = 0;
-                out_exponent = a_exponent;
-            end else begin
-                // B exponent is bigger than A exponent
+    reg out_sign;
+    reg [EXPONENT_WIDTH-1:0] out_exponent;
 
-                positive_exponent = -exponent_difference;
-                abs_exponent_difference = positive_exponent[EXPONENT_WIDTH-1:0];
-                out_exponent = b_exponent;
-                a_shifted_mantissa = a_shifted_mantissa >> abs_exponent_difference;
+    reg signed [EXPONENT_WIDTH+1-1:0] exponent_difference;
+    reg [EXPONENT_WIDTH+1-1:0] positive_exponent;  // Extra step required for taking the correct number of bits in Verilator
+    reg [EXPONENT_WIDTH-1:0] abs_exponent_difference;
+
+    reg [ShiftedWidth-1:0] a_shifted_mantissa, b_shifted_mantissa;  // RoundingBits extra bits for rounding
+    reg a_sticky, b_sticky;
+
+    reg signed [MANTISSA_WIDTH+2+RoundingBits+1-1:0] summed_mantissa;
+    reg [MANTISSA_WIDTH+2+RoundingBits-1:0] positive_summed_mantissa;
+
+    always_comb begin
+        // We set these to avoid latch inference for Verilator but in fact these are not used in every path
+        positive_exponent = {(EXPONENT_WIDTH + 1) {1'bx}};
+
+        exponent_difference = stage_2_a_exponent - stage_2_b_exponent;
+        out_sign = 1'b0;
+        a_sticky = 1'b0;
+        b_sticky = 1'b0;
+
+        a_shifted_mantissa = stage_2_a_mantissa << RoundingBits;
+        b_shifted_mantissa = stage_2_b_mantissa << RoundingBits;
+
+        if (exponent_difference > 0) begin
+            // A exponent is bigger than B exponent
+
+            abs_exponent_difference = exponent_difference[EXPONENT_WIDTH-1:0];
+            out_exponent = stage_2_a_exponent;
+            b_sticky = (b_shifted_mantissa & ~({ShiftedWidth{1'b1}} << abs_exponent_difference)) != 0;
+            b_shifted_mantissa = (b_shifted_mantissa >> abs_exponent_difference) | {{(ShiftedWidth - 1) {1'b0}}, b_sticky};
+        end else if (exponent_difference == 0) begin
+            // A exponent is equal to B exponent
+
+            abs_exponent_difference = 0;
+            out_exponent = stage_2_a_exponent;
+        end else begin
+            // B exponent is bigger than A exponent
+
+            positive_exponent = -exponent_difference;
+            abs_exponent_difference = positive_exponent[EXPONENT_WIDTH-1:0];
+            out_exponent = stage_2_b_exponent;
+            a_sticky = (a_shifted_mantissa & ~({ShiftedWidth{1'b1}} << abs_exponent_difference)) != 0;
+            a_shifted_mantissa = (a_shifted_mantissa >> abs_exponent_difference) | {{(ShiftedWidth - 1) {1'b0}}, a_sticky};
+        end
+
+        if (stage_2_a_sign == stage_2_b_sign) begin
+            summed_mantissa = a_shifted_mantissa + b_shifted_mantissa;
+            out_sign = stage_2_a_sign;
+        end else begin
+            if (stage_2_a_sign == 1'b1) begin
+                summed_mantissa = b_shifted_mantissa - a_shifted_mantissa;
+            end else
+            // Effectively: 'else if (b_sign == 1'b1)'
+            begin
+                summed_mantissa = a_shifted_mantissa - b_shifted_mantissa;
             end
 
-            if (a_sign == b_sign) begin
-                summed_mantissa = a_shifted_mantissa + b_shifted_mantissa;
-                out_sign = a_sign;
-                negate_exponent_update = 1'b0;
-            end else begin
-                if (a_sign == 1'b1) begin
-                    summed_mantissa = b_shifted_mantissa - a_shifted_mantissa;
-                end else
-                // Effectively: 'else if (b_sign == 1'b1)'
-                begin
-                    summed_mantissa = a_shifted_mantissa - b_shifted_mantissa;
-                end
-
-                if (summed_mantissa < 0) begin
-                    // Result is negative due to mantissa summation being negative
-
-                    summed_mantissa = -summed_mantissa;
-                    out_sign = 1'b1;
-                end
-
-                negate_exponent_update = 1'b1;
+            if (summed_mantissa < 0) begin
+                // Result is negative due to mantissa summation being negative
+
+                summed_mantissa = -summed_mantissa;
+                out_sign = 1'b1;
             end
+        end
 
-            // At this line, summed_mantissa is always positive
-            positive_summed_mantissa = summed_mantissa[MANTISSA_WIDTH+2+TrueRoundingBits-1:0];
+        // At this line, summed_mantissa is always positive
+        positive_summed_mantissa = summed_mantissa[MANTISSA_WIDTH+2+RoundingBits-1:0];
+    end
 
-            // Multiply with leading_one_pos to only shift if there is a leading 1
-            // Separate shift statements to handle the case of a shift with a negative amount (i.e., shift the other direction)
-            normalized_mantissa = leading_one_pos >= (MANTISSA_WIDTH + RoundingBits) ? positive_summed_mantissa >> (leading_one_pos - (MANTISSA_WIDTH + RoundingBits)) : positive_summed_mantissa << ((MANTISSA_WIDTH + RoundingBits) - leading_one_pos);
-            // In case there is no leading one, it means that the mantissa is zero (for example when a = 0)
-            // This weird if-statement with if exponent_change_from_mantissa is larger than zero is required because else the subtraction does not work correctly
-            // Furthermore, it is XORed with negate_exponent_update to make sure that the subtraction is done at the right moment, else sometimes
-            // when dealing with negative + positive numbers, the temp_exponent is not correct.
-            temp_exponent = has_leading_one ? ((exponent_change_from_mantissa >= 0) ^ negate_exponent_update ? out_exponent + exponent_change_from_mantissa : out_exponent - exponent_change_from_mantissa) : 0;
+    wire [SummedWidth-1:0] stage_3_data;
+    wire stage_3_valid, stage_3_ready;
+
+    pipeline_register #(
+        .WIDTH(SummedWidth),
+        .ENABLE(PIPELINE_STAGES >= 1)
+    ) summed_register (
+        .clk(clk),
+        .reset(reset),
+        .in_valid(stage_2_valid),
+        .in_ready(stage_2_ready),
+        .in_data({stage_2_is_special_result, stage_2_special_overflow_flag, stage_2_special_invalid_operation_flag, stage_2_special_out, out_sign, out_exponent, positive_summed_mantissa}),
+        .out_valid(stage_3_valid),
+        .out_ready(stage_3_ready),
+        .out_data(stage_3_data)
+    );
 
-            if (temp_exponent < 0) begin
-                // Underflow detected
+    //
+    // Stage 3: normalize the summed mantissa
+    //
 
-                // Note: out_sign is already set
-                out_exponent = 0;
-                out_mantissa = 0;
+    wire stage_3_is_special_result, stage_3_special_overflow_flag, stage_3_special_invalid_operation_flag;
+    wire [FloatBitWidth-1:0] stage_3_special_out;
+    wire stage_3_out_sign;
+    wire [EXPONENT_WIDTH-1:0] stage_3_out_exponent;
+    wire [MANTISSA_WIDTH+2+RoundingBits-1:0] stage_3_positive_summed_mantissa;
 
-                underflow_flag = 1'b1;
-            end else if (temp_exponent >= {EXPONENT_WIDTH{1'b1}}) begin
-                // Overflow detected
+    assign {stage_3_is_special_result, stage_3_special_overflow_flag, stage_3_special_invalid_operation_flag, stage_3_special_out, stage_3_out_sign, stage_3_out_exponent, stage_3_positive_summed_mantissa} = stage_3_data;
 
-                // Note: out_sign is already set
-                out_exponent = {EXPONENT_WIDTH{1'b1}};
-                out_mantissa = {MANTISSA_WIDTH{1'b0}};
+    reg [MANTISSA_WIDTH+2+RoundingBits-1:0] normalized_mantissa;
+    reg [MANTISSA_WIDTH-1:0] non_rounded_mantissa;
+    reg [RoundingBits-1:0] additional_mantissa_bits;
+    reg signed [EXPONENT_WIDTH+2-1:0] temp_exponent;
 
-                overflow_flag = 1'b1;
-            end else
-            // In the normal case
-            begin
-                // No overflow or underflow detected
+    // Extra statements used to avoid WIDTHTRUNC from Verilator
+    reg [32-1:0] left_shift, int_temp_exponent;
+
+    // Leading one detection
+
+    wire [$clog2(MANTISSA_WIDTH+2+RoundingBits)-1:0] leading_one_pos;
+    wire has_leading_one;
 
-                // These two values are fed into the result_rounder module
-                non_rounded_mantissa = normalized_mantissa[MANTISSA_WIDTH+TrueRoundingBits-1:TrueRoundingBits];
-                additional_mantissa_bits = normalized_mantissa[RoundingBits-1:0];
+    leading_one_detector #(
+        .WIDTH(MANTISSA_WIDTH + 2 + RoundingBits),
+        .ARCHITECTURE(LOD_ARCHITECTURE)
+    ) leading_one_detector_summed_mantissa (
+        .value(stage_3_positive_summed_mantissa),
+        .position(leading_one_pos),
+        .has_leading_one(has_leading_one)
+    );
 
-                // Then the result is rounded
-                out_mantissa = rounded_mantissa;
-                out_exponent = rounded_exponent;
-                overflow_flag = rounded_overflow_flag;
+    always_comb begin
+        left_shift = 0;
+
+        // Separate shift statements to handle the case of a shift with a negative amount (i.e., shift the other direction)
+        if (leading_one_pos >= (MANTISSA_WIDTH + RoundingBits)) begin
+            // The sum carried into the next bit
+            normalized_mantissa = stage_3_positive_summed_mantissa >> (leading_one_pos - (MANTISSA_WIDTH + RoundingBits));
+            int_temp_exponent = stage_3_out_exponent + (leading_one_pos - (MANTISSA_WIDTH + RoundingBits));
+        end else begin
+            left_shift = (MANTISSA_WIDTH + RoundingBits) - leading_one_pos;
+
+            if (left_shift >= stage_3_out_exponent) begin
+                // The result is subnormal, so it is only shifted up to the smallest normal exponent. Such a result
+                // is always exact, as the alignment shifted the operands by at most one bit.
+                normalized_mantissa = stage_3_positive_summed_mantissa << (stage_3_out_exponent - 1);
+                int_temp_exponent = 0;
+            end else begin
+                normalized_mantissa = stage_3_positive_summed_mantissa << left_shift;
+                int_temp_exponent = stage_3_out_exponent - left_shift;
             end
+        end
 
-            out = {out_sign, out_exponent, out_mantissa};
+        // In case there is no leading one, it means that the mantissa is zero (for example when a = -b)
+        temp_exponent = has_leading_one ? int_temp_exponent[EXPONENT_WIDTH+2-1:0] : 0;
+
+        // These two values are fed into the result_rounder module
+        non_rounded_mantissa = normalized_mantissa[MANTISSA_WIDTH+RoundingBits-1:RoundingBits];
+        additional_mantissa_bits = normalized_mantissa[RoundingBits-1:0];
+    end
+
+    wire [NormalizedWidth-1:0] stage_4_data;
+    wire stage_4_valid, stage_4_ready;
+
+    pipeline_register #(
+        .WIDTH(NormalizedWidth),
+        .ENABLE(PIPELINE_STAGES >= 2)
+    ) normalized_register (
+        .clk(clk),
+        .reset(reset),
+        .in_valid(stage_3_valid),
+        .in_ready(stage_3_ready),
+        .in_data({stage_3_is_special_result, stage_3_special_overflow_flag, stage_3_special_invalid_operation_flag, stage_3_special_out, stage_3_out_sign, temp_exponent, non_rounded_mantissa, additional_mantissa_bits}),
+        .out_valid(stage_4_valid),
+        .out_ready(stage_4_ready),
+        .out_data(stage_4_data)
+    );
+
+    //
+    // Stage 4: round the result and select the output
+    //
+
+    wire stage_4_is_special_result, stage_4_special_overflow_flag, stage_4_special_invalid_operation_flag;
+    wire [FloatBitWidth-1:0] stage_4_special_out;
+    wire stage_4_out_sign;
+    wire signed [EXPONENT_WIDTH+2-1:0] stage_4_temp_exponent;
+    wire [MANTISSA_WIDTH-1:0] stage_4_non_rounded_mantissa;
+    wire [RoundingBits-1:0] stage_4_additional_mantissa_bits;
+
+    assign {stage_4_is_special_result, stage_4_special_overflow_flag, stage_4_special_invalid_operation_flag, stage_4_special_out, stage_4_out_sign, stage_4_temp_exponent, stage_4_non_rounded_mantissa, stage_4_additional_mantissa_bits} = stage_4_data;
+
+    wire [MANTISSA_WIDTH-1:0] rounded_mantissa;
+    wire [EXPONENT_WIDTH-1:0] rounded_exponent;
+    wire rounded_overflow_flag;
+
+    result_rounder #(
+        .EXPONENT_WIDTH(EXPONENT_WIDTH),
+        .MANTISSA_WIDTH(MANTISSA_WIDTH),
+        .ROUND_TO_NEAREST_TIES_TO_EVEN(ROUND_TO_NEAREST_TIES_TO_EVEN),
+        .ROUNDING_BITS(RoundingBits)
+    ) result_rounder_block (
+        // We need to remove the extra bits from temp_exponent, which
+        // are normally used for overflow detection.
+        .non_rounded_exponent(stage_4_temp_exponent[EXPONENT_WIDTH-1:0]),
+        .non_rounded_mantissa(stage_4_non_rounded_mantissa),
+        .rounding_bits(stage_4_additional_mantissa_bits),
+        .rounded_exponent(rounded_exponent),
+        .rounded_mantissa(rounded_mantissa),
+        .overflow_flag(rounded_overflow_flag)
+    );
+
+    reg [FloatBitWidth-1:0] result;
+    reg result_underflow_flag, result_overflow_flag, result_invalid_operation_flag;
+
+    always_comb begin
+        result_underflow_flag = 1'b0;
+        result_overflow_flag = 1'b0;
+        result_invalid_operation_flag = 1'b0;
+
+        if (stage_4_is_special_result) begin
+            result = stage_4_special_out;
+            result_overflow_flag = stage_4_special_overflow_flag;
+            result_invalid_operation_flag = stage_4_special_invalid_operation_flag;
+        end else if (stage_4_temp_exponent >= {EXPONENT_WIDTH{1'b1}}) begin
+            // Overflow detected
+
+            result = {stage_4_out_sign, {EXPONENT_WIDTH{1'b1}}, {MANTISSA_WIDTH{1'b0}}};
+
+            result_overflow_flag = 1'b1;
+        end else
+        // In the normal case
+        begin
+            // No overflow or underflow detected, so the result is rounded
+            result = {stage_4_out_sign, rounded_exponent, rounded_mantissa};
+            result_overflow_flag = rounded_overflow_flag;
+
+            // Underflow detected when the (exact) result is subnormal
+            result_underflow_flag = stage_4_temp_exponent == 0 && stage_4_non_rounded_mantissa != 0;
         end
     end
 
+    pipeline_register #(
+        .WIDTH(ResultWidth),
+        .ENABLE(PIPELINE_STAGES >= 4)
+    ) result_register (
+        .clk(clk),
+        .reset(reset),
+        .in_valid(stage_4_valid),
+        .in_ready(stage_4_ready),
+        .in_data({result, result_underflow_flag, result_overflow_flag, result_invalid_operation_flag}),
+        .out_valid(out_valid),
+        .out_ready(out_ready),
+        .out_data({out, underflow_flag, overflow_flag, invalid_operation_flag})
+    );
+
 endmodule
 
 `endif
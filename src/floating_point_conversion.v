@@ -0,0 +1,167 @@
+`ifndef __FLOATING_POINT_CONVERSION_V__
+`define __FLOATING_POINT_CONVERSION_V__
+
+`include "is_special_float.v"
+`include "leading_one_detector.v"
+`include "result_rounder.v"
+
+module floating_point_conversion #(
+    // Format of a
+    parameter int EXPONENT_WIDTH = 8,
+    parameter int MANTISSA_WIDTH = 23,
+    // Format of out, which can be wider or narrower than the format of a in either field
+    parameter int OUT_EXPONENT_WIDTH = 5,
+    parameter int OUT_MANTISSA_WIDTH = 10,
+    parameter int ROUND_TO_NEAREST_TIES_TO_EVEN = 1,  // 0: round to zero (chopping last bits), 1: round to nearest
+    parameter int IGNORE_SIGN_BIT_FOR_NAN = 1,
+    localparam int FloatBitWidth = EXPONENT_WIDTH + MANTISSA_WIDTH + 1,
+    localparam int OutFloatBitWidth = OUT_EXPONENT_WIDTH + OUT_MANTISSA_WIDTH + 1
+) (
+    input [FloatBitWidth-1:0] a,
+    output reg [OutFloatBitWidth-1:0] out,
+
+    // Exception flags
+    output reg underflow_flag,
+    output reg overflow_flag,
+    output reg invalid_operation_flag
+);
+
+    localparam int Bias = (1 << (EXPONENT_WIDTH - 1)) - 1;
+    localparam int OutBias = (1 << (OUT_EXPONENT_WIDTH - 1)) - 1;
+
+    // Largest exponent of a finite output. E4M3 has no infinities, so its exponent of all ones holds normal
+    // numbers, except for the mantissa of all ones (its NaN).
+    localparam int MaxExponent = OUT_EXPONENT_WIDTH == 4 && OUT_MANTISSA_WIDTH == 3 ? (1 << OUT_EXPONENT_WIDTH) - 1 : (1 << OUT_EXPONENT_WIDTH) - 2;
+
+    // Bits below the output mantissa: the input mantissa bits that do not fit in the output mantissa, followed
+    // by a guard bit and a sticky bit
+    localparam int RoundingBits = (MANTISSA_WIDTH > OUT_MANTISSA_WIDTH ? MANTISSA_WIDTH - OUT_MANTISSA_WIDTH : 0) + 2;
+    localparam int AlignedWidth = OUT_MANTISSA_WIDTH + 1 + RoundingBits;
+
+    // Wide enough for the exponent of any (normalized) input in the output format
+    localparam int ExponentWidth = (EXPONENT_WIDTH > OUT_EXPONENT_WIDTH ? EXPONENT_WIDTH : OUT_EXPONENT_WIDTH) + $clog2(MANTISSA_WIDTH) + 2;
+
+    wire is_out_E4M3 = OUT_EXPONENT_WIDTH == 4 && OUT_MANTISSA_WIDTH == 3;
+
+    // Special pre-defined values, as in the adder and multiplier
+    wire [OutFloatBitWidth-1:0] quiet_nan = {1'b1, {OUT_EXPONENT_WIDTH{1'b1}}, 1'b1, {(OUT_MANTISSA_WIDTH - 1) {is_out_E4M3 ? 1'b1 : 1'b0}}};
+
+    //
+    // Unpack the input and normalize subnormal inputs, as these can be normal numbers in the output format
+    //
+
+    wire sign;
+    wire [EXPONENT_WIDTH-1:0] exponent;
+    wire [MANTISSA_WIDTH-1:0] mantissa;
+
+    assign {sign, exponent, mantissa} = a;
+
+    wire is_infinite, is_zero, is_signaling_nan, is_quiet_nan;
+
+    is_special_float #(
+        .EXPONENT_WIDTH(EXPONENT_WIDTH),
+        .MANTISSA_WIDTH(MANTISSA_WIDTH),
+        .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
+    ) is_special_float_a (
+        .a(a),
+        .is_infinite(is_infinite),
+        .is_zero(is_zero),
+        .is_subnormal(),
+        .is_signaling_nan(is_signaling_nan),
+        .is_quiet_nan(is_quiet_nan)
+    );
+
+    wire [$clog2(MANTISSA_WIDTH)-1:0] leading_one_pos;
+
+    leading_one_detector #(
+        .WIDTH(MANTISSA_WIDTH)
+    ) leading_one_detector_mantissa (
+        .value(mantissa),
+        .position(leading_one_pos),
+        .has_leading_one()
+    );
+
+    wire [32-1:0] subnormal_shift = MANTISSA_WIDTH - leading_one_pos;
+
+    reg [MANTISSA_WIDTH+1-1:0] significand;  // Including the leading one
+    reg signed [ExponentWidth-1:0] out_biased_exponent;  // Biased exponent of the leading one in the output format
+
+    always_comb begin
+        if (exponent != 0) begin
+            significand = {1'b1, mantissa};
+            out_biased_exponent = exponent - Bias + OutBias;
+        end else begin
+            significand = {1'b0, mantissa} << subnormal_shift;
+            out_biased_exponent = 1 - Bias - subnormal_shift + OutBias;
+        end
+    end
+
+    //
+    // Align the significand to the output mantissa and round it
+    //
+
+    // The leading one at the position of the implicit bit of the output, followed by the rounding bits
+    wire [AlignedWidth-1:0] aligned = {{(AlignedWidth - MANTISSA_WIDTH - 1) {1'b0}}, significand} << (AlignedWidth - MANTISSA_WIDTH - 1);
+
+    // Values below the smallest normal output are shifted right to the subnormal exponent, and the bits that
+    // are shifted out are kept in the sticky bit
+    wire [32-1:0] int_subnormal_output_shift = 1 - out_biased_exponent;
+    wire [32-1:0] subnormal_output_shift = out_biased_exponent > 0 ? 0 : (int_subnormal_output_shift > AlignedWidth ? AlignedWidth : int_subnormal_output_shift);
+
+    wire [AlignedWidth-1:0] shifted = aligned >> subnormal_output_shift;
+    wire sticky = (shifted << subnormal_output_shift) != aligned;
+
+    // One extra exponent bit, so that the rounder never detects an overflow itself: overflow is checked below
+    // against the largest finite output, which also covers E4M3
+    wire [OUT_EXPONENT_WIDTH+1-1:0] non_rounded_exponent = out_biased_exponent > 0 ? out_biased_exponent[OUT_EXPONENT_WIDTH+1-1:0] : 0;
+    wire [OUT_EXPONENT_WIDTH+1-1:0] rounded_exponent;
+    wire [OUT_MANTISSA_WIDTH-1:0] rounded_mantissa;
+
+    result_rounder #(
+        .EXPONENT_WIDTH(OUT_EXPONENT_WIDTH + 1),
+        .MANTISSA_WIDTH(OUT_MANTISSA_WIDTH),
+        .ROUND_TO_NEAREST_TIES_TO_EVEN(ROUND_TO_NEAREST_TIES_TO_EVEN),
+        .ROUNDING_BITS(RoundingBits)
+    ) result_rounder_block (
+        .non_rounded_exponent(non_rounded_exponent),
+        .non_rounded_mantissa(shifted[RoundingBits+:OUT_MANTISSA_WIDTH]),
+        .rounding_bits({shifted[RoundingBits-1:1], shifted[0] | sticky}),
+        .rounded_exponent(rounded_exponent),
+        .rounded_mantissa(rounded_mantissa),
+        .overflow_flag()
+    );
+
+    wire is_overflow = out_biased_exponent > MaxExponent || rounded_exponent > MaxExponent || (is_out_E4M3 && rounded_exponent == MaxExponent && rounded_mantissa == {OUT_MANTISSA_WIDTH{1'b1}});
+
+    //
+    // Select the output
+    //
+
+    always_comb begin
+        underflow_flag = 1'b0;
+        overflow_flag = 1'b0;
+        invalid_operation_flag = 1'b0;
+
+        if (is_signaling_nan || is_quiet_nan) begin
+            out = quiet_nan;
+
+            invalid_operation_flag = 1'b1;
+        end else if (is_infinite || (!is_zero && is_overflow)) begin
+            // Infinity, or E4M3's NaN (with the sign of the input) as E4M3 has no infinities
+
+            out = {sign, {OUT_EXPONENT_WIDTH{1'b1}}, {OUT_MANTISSA_WIDTH{is_out_E4M3}}};
+
+            overflow_flag = 1'b1;
+        end else if (is_zero) begin
+            out = {sign, {(OutFloatBitWidth - 1) {1'b0}}};
+        end else begin
+            out = {sign, rounded_exponent[OUT_EXPONENT_WIDTH-1:0], rounded_mantissa};
+
+            // The result is subnormal or zero
+            underflow_flag = rounded_exponent == 0;
+        end
+    end
+
+endmodule
+
+`endif
@@ -0,0 +1,204 @@
+`ifndef __FLOATING_POINT_DOT_PRODUCT_V__
+`define __FLOATING_POINT_DOT_PRODUCT_V__
+
+`include "floating_point_adder.v"
+`include "floating_point_multiplier.v"
+`include "is_special_float.v"
+`include "leading_one_detector.v"
+
+module floating_point_dot_product #(
+    parameter int EXPONENT_WIDTH = 8,
+    parameter int MANTISSA_WIDTH = 23,
+    parameter int N_INPUTS = 4,
+    // Format in which the products are computed and summed, which must be at least as wide as the input format
+    // in both fields. A wider format makes the products exact (for example FP16 inputs with an FP32
+    // accumulator) and reduces the rounding errors of the sum.
+    parameter int ACCUMULATOR_EXPONENT_WIDTH = EXPONENT_WIDTH,
+    parameter int ACCUMULATOR_MANTISSA_WIDTH = MANTISSA_WIDTH,
+    parameter int ROUND_TO_NEAREST_TIES_TO_EVEN = 1,  // 0: round to zero (chopping last bits), 1: round to nearest
+    parameter int IGNORE_SIGN_BIT_FOR_NAN = 1,
+    localparam int FloatBitWidth = EXPONENT_WIDTH + MANTISSA_WIDTH + 1,
+    localparam int AccumulatorBitWidth = ACCUMULATOR_EXPONENT_WIDTH + ACCUMULATOR_MANTISSA_WIDTH + 1
+) (
+    // Element i of a and b is at bits [i*FloatBitWidth+:FloatBitWidth]
+    input [N_INPUTS*FloatBitWidth-1:0] a,
+    input [N_INPUTS*FloatBitWidth-1:0] b,
+    output [AccumulatorBitWidth-1:0] out,  // In the accumulator format
+
+    // Exception flags, raised when any of the multiplications or additions raised them
+    output underflow_flag,
+    output overflow_flag,
+    output invalid_operation_flag
+);
+
+    // The N_INPUTS products are computed in parallel and summed pairwise in a balanced tree of $clog2(N_INPUTS)
+    // levels of adders. Level 0 holds the products, and node n of level l sums nodes 2n and 2n+1 of level l-1.
+    // When a level has an odd number of nodes, the last one is passed on to the next level.
+    localparam int Levels = $clog2(N_INPUTS);
+
+    // Difference between the biases of the accumulator and input formats
+    localparam int ExponentOffset = (1 << (ACCUMULATOR_EXPONENT_WIDTH - 1)) - (1 << (EXPONENT_WIDTH - 1));
+
+    wire [2*N_INPUTS*FloatBitWidth-1:0] operands = {b, a};
+    wire [2*N_INPUTS*AccumulatorBitWidth-1:0] accumulator_operands;
+
+    // All nodes of all levels, of which only the first (N_INPUTS + 2^l - 1) >> l nodes of level l are used
+    wire [(Levels+1)*N_INPUTS*AccumulatorBitWidth-1:0] partial_sums;
+    wire [(Levels+1)*N_INPUTS-1:0] partial_underflow_flags, partial_overflow_flags, partial_invalid_operation_flags;
+
+    genvar k, l, n;
+
+    generate
+        //
+        // Convert the operands to the accumulator format
+        //
+
+        for (k = 0; k < 2 * N_INPUTS; k = k + 1) begin : gen_operand
+            if (ACCUMULATOR_EXPONENT_WIDTH == EXPONENT_WIDTH && ACCUMULATOR_MANTISSA_WIDTH == MANTISSA_WIDTH) begin : gen_same_format
+                assign accumulator_operands[k*AccumulatorBitWidth+:AccumulatorBitWidth] = operands[k*FloatBitWidth+:FloatBitWidth];
+            end else begin : gen_widen
+                wire sign;
+                wire [EXPONENT_WIDTH-1:0] exponent;
+                wire [MANTISSA_WIDTH-1:0] mantissa;
+
+                assign {sign, exponent, mantissa} = operands[k*FloatBitWidth+:FloatBitWidth];
+
+                wire is_E4M3 = EXPONENT_WIDTH == 4 && MANTISSA_WIDTH == 3;
+                wire is_signaling_nan;
+
+                is_special_float #(
+                    .EXPONENT_WIDTH(EXPONENT_WIDTH),
+                    .MANTISSA_WIDTH(MANTISSA_WIDTH),
+                    .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
+                ) is_special_float_operand (
+                    .a(operands[k*FloatBitWidth+:FloatBitWidth]),
+                    .is_infinite(),
+                    .is_zero(),
+                    .is_subnormal(),
+                    .is_signaling_nan(is_signaling_nan),
+                    .is_quiet_nan()
+                );
+
+                // Infinities and NaNs keep an exponent of all ones. For E4M3, this is only the case for its NaN
+                // (S.1111.111), as the other values with this exponent are normal numbers.
+                wire keep_exponent_ones = is_E4M3 ? is_signaling_nan : exponent == {EXPONENT_WIDTH{1'b1}};
+
+                // Subnormal operands are normalized when the accumulator has a wider exponent
+                wire [$clog2(MANTISSA_WIDTH)-1:0] leading_one_pos;
+                wire has_leading_one;
+
+                leading_one_detector #(
+                    .WIDTH(MANTISSA_WIDTH)
+                ) leading_one_detector_mantissa (
+                    .value(mantissa),
+                    .position(leading_one_pos),
+                    .has_leading_one(has_leading_one)
+                );
+
+                wire [32-1:0] subnormal_shift = MANTISSA_WIDTH - leading_one_pos;
+                wire [MANTISSA_WIDTH-1:0] normalized_mantissa = mantissa << subnormal_shift;
+
+                // Exponents in the bias of the accumulator, sized before being truncated to its exponent width
+                wire [32-1:0] widened_exponent = exponent + ExponentOffset;
+                wire [32-1:0] normalized_exponent = ExponentOffset + 1 - subnormal_shift;
+
+                reg [ACCUMULATOR_EXPONENT_WIDTH-1:0] accumulator_exponent;
+                reg [ACCUMULATOR_MANTISSA_WIDTH-1:0] accumulator_mantissa;
+
+                always_comb begin
+                    accumulator_mantissa = mantissa << (ACCUMULATOR_MANTISSA_WIDTH - MANTISSA_WIDTH);
+
+                    if (keep_exponent_ones) begin
+                        accumulator_exponent = {ACCUMULATOR_EXPONENT_WIDTH{1'b1}};
+                    end else if (exponent != 0) begin
+                        accumulator_exponent = widened_exponent[ACCUMULATOR_EXPONENT_WIDTH-1:0];
+                    end else if (ACCUMULATOR_EXPONENT_WIDTH > EXPONENT_WIDTH && has_leading_one) begin
+                        accumulator_exponent = normalized_exponent[ACCUMULATOR_EXPONENT_WIDTH-1:0];
+                        accumulator_mantissa = normalized_mantissa << (ACCUMULATOR_MANTISSA_WIDTH - MANTISSA_WIDTH);
+                    end else begin
+                        // Zero, or a subnormal number that stays subnormal
+                        accumulator_exponent = 0;
+                    end
+                end
+
+                assign accumulator_operands[k*AccumulatorBitWidth+:AccumulatorBitWidth] = {sign, accumulator_exponent, accumulator_mantissa};
+            end
+        end
+
+        //
+        // Level 0: multiply
+        //
+
+        for (n = 0; n < N_INPUTS; n = n + 1) begin : gen_product
+            floating_point_multiplier #(
+                .EXPONENT_WIDTH(ACCUMULATOR_EXPONENT_WIDTH),
+                .MANTISSA_WIDTH(ACCUMULATOR_MANTISSA_WIDTH),
+                .ROUND_TO_NEAREST_TIES_TO_EVEN(ROUND_TO_NEAREST_TIES_TO_EVEN),
+                .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
+            ) floating_point_multiplier_block (
+                .clk(1'b0),
+                .reset(1'b0),
+                .a(accumulator_operands[n*AccumulatorBitWidth+:AccumulatorBitWidth]),
+                .b(accumulator_operands[(N_INPUTS+n)*AccumulatorBitWidth+:AccumulatorBitWidth]),
+                .out(partial_sums[n*AccumulatorBitWidth+:AccumulatorBitWidth]),
+                .underflow_flag(partial_underflow_flags[n]),
+                .overflow_flag(partial_overflow_flags[n]),
+                .invalid_operation_flag(partial_invalid_operation_flags[n]),
+                .in_valid(1'b1),
+                .in_ready(),
+                .out_valid(),
+                .out_ready(1'b1)
+            );
+        end
+
+        //
+        // Levels 1 to Levels: add
+        //
+
+        for (l = 1; l <= Levels; l = l + 1) begin : gen_level
+            localparam int InputNodes = (N_INPUTS + (1 << (l - 1)) - 1) >> (l - 1);
+
+            for (n = 0; n < N_INPUTS; n = n + 1) begin : gen_node
+                localparam int Offset = l * N_INPUTS + n;
+                localparam int FirstInput = (l - 1) * N_INPUTS + 2 * n;
+
+                if (2 * n + 1 < InputNodes) begin : gen_adder
+                    floating_point_adder #(
+                        .EXPONENT_WIDTH(ACCUMULATOR_EXPONENT_WIDTH),
+                        .MANTISSA_WIDTH(ACCUMULATOR_MANTISSA_WIDTH),
+                        .ROUND_TO_NEAREST_TIES_TO_EVEN(ROUND_TO_NEAREST_TIES_TO_EVEN),
+                        .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
+                    ) floating_point_adder_block (
+                        .clk(1'b0),
+                        .reset(1'b0),
+                        .a(partial_sums[FirstInput*AccumulatorBitWidth+:AccumulatorBitWidth]),
+                        .b(partial_sums[(FirstInput+1)*AccumulatorBitWidth+:AccumulatorBitWidth]),
+                        .subtract(1'b0),
+                        .out(partial_sums[Offset*AccumulatorBitWidth+:AccumulatorBitWidth]),
+                        .underflow_flag(partial_underflow_flags[Offset]),
+                        .overflow_flag(partial_overflow_flags[Offset]),
+                        .invalid_operation_flag(partial_invalid_operation_flags[Offset]),
+                        .in_valid(1'b1),
+                        .in_ready(),
+                        .out_valid(),
+                        .out_ready(1'b1)
+                    );
+                end else begin : gen_pass
+                    // The last node of a level with an odd number of nodes, or a node that is not used
+                    assign partial_sums[Offset*AccumulatorBitWidth+:AccumulatorBitWidth] = 2 * n < InputNodes ? partial_sums[FirstInput*AccumulatorBitWidth+:AccumulatorBitWidth] : '0;
+                    assign partial_underflow_flags[Offset] = 1'b0;
+                    assign partial_overflow_flags[Offset] = 1'b0;
+                    assign partial_invalid_operation_flags[Offset] = 1'b0;
+                end
+            end
+        end
+    endgenerate
+
+    assign out = partial_sums[Levels*N_INPUTS*AccumulatorBitWidth+:AccumulatorBitWidth];
+    assign underflow_flag = |partial_underflow_flags;
+    assign overflow_flag = |partial_overflow_flags;
+    assign invalid_operation_flag = |partial_invalid_operation_flags;
+
+endmodule
+
+`endif
@@ -1,7 +1,10 @@
 `ifndef __FLOATING_POINT_MULTIPLIER_V__
 `define __FLOATING_POINT_MULTIPLIER_V__
 
-`include "is_special_float.v"
+`include "mantissa_multiplier.v"
+`include "pipeline_register.v"
+`include "product_normalizer.v"
+`include "product_special_cases.v"
 `include "result_rounder.v"
 
 module floating_point_multiplier #(
@@ -9,19 +12,48 @@ module floating_point_multiplier #(
     parameter int MANTISSA_WIDTH = 23,
     parameter int ROUND_TO_NEAREST_TIES_TO_EVEN = 1,  // 0: round to zero (chopping last bits), 1: round to nearest
     parameter int IGNORE_SIGN_BIT_FOR_NAN = 1,
+    // 0: combinational, 1-4: number of register stages (i.e. the latency in clock cycles). Registers are added
+    // after the following stages, in this order: multiply, normalize, unpack/special cases and round.
+    parameter int PIPELINE_STAGES = 0,
+    // Architecture of the mantissa multiplier, see mantissa_multiplier.v. 0: behavioral (left to synthesis),
+    // 1: radix-4 Booth encoding with a Wallace tree, 2: radix-4 Booth encoding with a Dadda tree.
+    parameter int MULTIPLIER_ARCHITECTURE = 0,
     localparam int FloatBitWidth = EXPONENT_WIDTH + MANTISSA_WIDTH + 1
 ) (
+    // Only used when PIPELINE_STAGES > 0
+    input clk,
+    input reset,
+
     input [FloatBitWidth-1:0] a,
     input [FloatBitWidth-1:0] b,
-    output reg [FloatBitWidth-1:0] out,
+    output [FloatBitWidth-1:0] out,
 
     // Exception flags
-    output reg underflow_flag,
-    output reg overflow_flag,
-    output reg invalid_operation_flag
+    output underflow_flag,
+    output overflow_flag,
+    output invalid_operation_flag,
+
+    // Handshake: an operation is accepted when in_valid and in_ready are both high, and its result is
+    // taken when out_valid and out_ready are both high. Tie in_valid and out_ready high if not used.
+    input in_valid,
+    output in_ready,
+    output out_valid,
+    input out_ready
 );
 
-    // Unpack input floats
+    // Data passed on between the stages
+    localparam int UnpackedWidth = 3 + FloatBitWidth + 1 + 2 * EXPONENT_WIDTH + 2 * (MANTISSA_WIDTH + 1);
+    localparam int MultipliedWidth = 3 + FloatBitWidth + 1 + EXPONENT_WIDTH + 2 + (MANTISSA_WIDTH + 1) * 2;
+    localparam int NormalizedWidth = 3 + FloatBitWidth + 3 + EXPONENT_WIDTH + MANTISSA_WIDTH + MANTISSA_WIDTH + 1;
+    localparam int ResultWidth = FloatBitWidth + 3;
+
+    wire [EXPONENT_WIDTH-1-1:0] bias = {(EXPONENT_WIDTH - 1) {1'b1}};
+
+    // Signals entering stage N (i.e. the outputs of the pipeline register in front of it) are prefixed with stage_N_
+
+    //
+    // Stage 1: unpack input floats and handle special cases
+    //
 
     wire a_sign, b_sign;
     wire a_implicit_leading_bit, b_implicit_leading_bit;
@@ -34,63 +66,154 @@ module floating_point_multiplier #(
     assign a_implicit_leading_bit = !(a_exponent == 0);
     assign b_implicit_leading_bit = !(b_exponent == 0);
 
-    // Result variables
-    reg out_sign;
-    reg [EXPONENT_WIDTH-1:0] out_exponent;
-    reg [MANTISSA_WIDTH-1:0] out_mantissa, non_rounded_mantissa;
+    // TODO: handle subnormal numbers
+
+    // The result of a special case is computed here and is passed through the remaining stages
+    wire is_special_result;
+    wire [FloatBitWidth-1:0] special_out;
+    wire special_overflow_flag, special_invalid_operation_flag;
+
+    product_special_cases #(
+        .EXPONENT_WIDTH(EXPONENT_WIDTH),
+        .MANTISSA_WIDTH(MANTISSA_WIDTH),
+        .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
+    ) product_special_cases_block (
+        .a(a),
+        .b(b),
+        .is_special_result(is_special_result),
+        .special_out(special_out),
+        .special_overflow_flag(special_overflow_flag),
+        .special_invalid_operation_flag(special_invalid_operation_flag)
+    );
+
+    wire [UnpackedWidth-1:0] stage_2_data;
+    wire stage_2_valid, stage_2_ready;
+
+    pipeline_register #(
+        .WIDTH(UnpackedWidth),
+        .ENABLE(PIPELINE_STAGES >= 3)
+    ) unpacked_register (
+        .clk(clk),
+        .reset(reset),
+        .in_valid(in_valid),
+        .in_ready(in_ready),
+        .in_data({is_special_result, special_overflow_flag, special_invalid_operation_flag, special_out, a_sign ^ b_sign, a_exponent, b_exponent, a_implicit_leading_bit, a_mantissa, b_implicit_leading_bit, b_mantissa}),
+        .out_valid(stage_2_valid),
+        .out_ready(stage_2_ready),
+        .out_data(stage_2_data)
+    );
+
+    //
+    // Stage 2: multiply the mantissas and add the exponents
+    //
 
-    // Temporary variables
-    reg [(MANTISSA_WIDTH+1)*2-1:0] a_mul_b_mantissa;
-    reg [MANTISSA_WIDTH+1-1:0] additional_mantissa_bits;
-    reg is_halfway;
+    wire stage_2_is_special_result, stage_2_special_overflow_flag, stage_2_special_invalid_operation_flag;
+    wire [FloatBitWidth-1:0] stage_2_special_out;
+    wire stage_2_out_sign;
+    wire [EXPONENT_WIDTH-1:0] stage_2_a_exponent, stage_2_b_exponent;
+    wire [MANTISSA_WIDTH+1-1:0] stage_2_a_mantissa, stage_2_b_mantissa;  // Including the implicit leading bit
+
+    assign {stage_2_is_special_result, stage_2_special_overflow_flag, stage_2_special_invalid_operation_flag, stage_2_special_out, stage_2_out_sign, stage_2_a_exponent, stage_2_b_exponent, stage_2_a_mantissa, stage_2_b_mantissa} = stage_2_data;
+
+    wire [(MANTISSA_WIDTH+1)*2-1:0] a_mul_b_mantissa;
     reg signed [EXPONENT_WIDTH+2-1:0] a_mul_b_exponent;
-    reg [EXPONENT_WIDTH-1:0] non_rounded_exponent;
-    reg leading_one_is_MSB;
 
-    wire is_E4M3 = EXPONENT_WIDTH == 4 && MANTISSA_WIDTH == 3;
+    generate
+        // The behavioral multiplication is kept in this module, which gives the same netlist as before
+        if (MULTIPLIER_ARCHITECTURE == 0) begin : gen_behavioral_multiplier
+            assign a_mul_b_mantissa = stage_2_a_mantissa * stage_2_b_mantissa;
+        end else begin : gen_booth_multiplier
+            mantissa_multiplier #(
+                .WIDTH(MANTISSA_WIDTH + 1),
+                .ARCHITECTURE(MULTIPLIER_ARCHITECTURE)
+            ) mantissa_multiplier_block (
+                .a(stage_2_a_mantissa),
+                .b(stage_2_b_mantissa),
+                .product(a_mul_b_mantissa)
+            );
+        end
+    endgenerate
 
-    // TODO: figure out how to support NaN for E2M3, E3M2 and E2M1 formats,
-    // which all do not have NaNs defined.
+    always_comb begin
+        a_mul_b_exponent = stage_2_a_exponent + stage_2_b_exponent - bias;
+    end
 
-    // Special pre-defined values. {MANTISSA_WIDTH-1{...}} could also have been {MANTISSA_WIDTH-1{1'bX}}
-    // but like this it explicitly supports the E4M3 variant.
-    wire [FloatBitWidth-1:0] quiet_nan = {1'b1, {EXPONENT_WIDTH{1'b1}}, 1'b1, {(MANTISSA_WIDTH - 1) {is_E4M3 ? 1'b1 : 1'b0}}};
-    wire [EXPONENT_WIDTH-1-1:0] bias = {(EXPONENT_WIDTH - 1) {1'b1}};
+    wire [MultipliedWidth-1:0] stage_3_data;
+    wire stage_3_valid, stage_3_ready;
+
+    pipeline_register #(
+        .WIDTH(MultipliedWidth),
+        .ENABLE(PIPELINE_STAGES >= 1)
+    ) multiplied_register (
+        .clk(clk),
+        .reset(reset),
+        .in_valid(stage_2_valid),
+        .in_ready(stage_2_ready),
+        .in_data({stage_2_is_special_result, stage_2_special_overflow_flag, stage_2_special_invalid_operation_flag, stage_2_special_out, stage_2_out_sign, a_mul_b_exponent, a_mul_b_mantissa}),
+        .out_valid(stage_3_valid),
+        .out_ready(stage_3_ready),
+        .out_data(stage_3_data)
+    );
+
+    //
+    // Stage 3: normalize the product and detect underflow and overflow
+    //
 
-    // Find special float values
+    wire stage_3_is_special_result, stage_3_special_overflow_flag, stage_3_special_invalid_operation_flag;
+    wire [FloatBitWidth-1:0] stage_3_special_out;
+    wire stage_3_out_sign;
+    wire signed [EXPONENT_WIDTH+2-1:0] stage_3_a_mul_b_exponent;
+    wire [(MANTISSA_WIDTH+1)*2-1:0] stage_3_a_mul_b_mantissa;
 
-    wire is_a_infinite, is_b_infinite;
-    wire is_a_zero, is_b_zero;
-    wire is_signaling_nan_a, is_signaling_nan_b;
-    wire is_quiet_nan_a, is_quiet_nan_b;
+    assign {stage_3_is_special_result, stage_3_special_overflow_flag, stage_3_special_invalid_operation_flag, stage_3_special_out, stage_3_out_sign, stage_3_a_mul_b_exponent, stage_3_a_mul_b_mantissa} = stage_3_data;
 
-    is_special_float #(
+    wire is_underflow, is_overflow;
+    wire [EXPONENT_WIDTH-1:0] non_rounded_exponent;
+    wire [MANTISSA_WIDTH-1:0] non_rounded_mantissa;
+    wire [MANTISSA_WIDTH+1-1:0] additional_mantissa_bits;
+
+    product_normalizer #(
         .EXPONENT_WIDTH(EXPONENT_WIDTH),
-        .MANTISSA_WIDTH(MANTISSA_WIDTH),
-        .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
-    ) is_special_float_a (
-        .a(a),
-        .is_infinite(is_a_infinite),
-        .is_zero(is_a_zero),
-        .is_signaling_nan(is_signaling_nan_a),
-        .is_quiet_nan(is_quiet_nan_a),
-        .is_subnormal()
+        .MANTISSA_WIDTH(MANTISSA_WIDTH)
+    ) product_normalizer_block (
+        .a_mul_b_mantissa(stage_3_a_mul_b_mantissa),
+        .a_mul_b_exponent(stage_3_a_mul_b_exponent),
+        .is_underflow(is_underflow),
+        .is_overflow(is_overflow),
+        .non_rounded_exponent(non_rounded_exponent),
+        .non_rounded_mantissa(non_rounded_mantissa),
+        .additional_mantissa_bits(additional_mantissa_bits)
     );
 
-    is_special_float #(
-        .EXPONENT_WIDTH(EXPONENT_WIDTH),
-        .MANTISSA_WIDTH(MANTISSA_WIDTH),
-        .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
-    ) is_special_float_b (
-        .a(b),
-        .is_infinite(is_b_infinite),
-        .is_zero(is_b_zero),
-        .is_signaling_nan(is_signaling_nan_b),
-        .is_quiet_nan(is_quiet_nan_b),
-        .is_subnormal()
+    wire [NormalizedWidth-1:0] stage_4_data;
+    wire stage_4_valid, stage_4_ready;
+
+    pipeline_register #(
+        .WIDTH(NormalizedWidth),
+        .ENABLE(PIPELINE_STAGES >= 2)
+    ) normalized_register (
+        .clk(clk),
+        .reset(reset),
+        .in_valid(stage_3_valid),
+        .in_ready(stage_3_ready),
+        .in_data({stage_3_is_special_result, stage_3_special_overflow_flag, stage_3_special_invalid_operation_flag, stage_3_special_out, stage_3_out_sign, is_underflow, is_overflow, non_rounded_exponent, non_rounded_mantissa, additional_mantissa_bits}),
+        .out_valid(stage_4_valid),
+        .out_ready(stage_4_ready),
+        .out_data(stage_4_data)
     );
 
-    // Rounding
+    //
+    // Stage 4: round the result and select the output
+    //
+
+    wire stage_4_is_special_result, stage_4_special_overflow_flag, stage_4_special_invalid_operation_flag;
+    wire [FloatBitWidth-1:0] stage_4_special_out;
+    wire stage_4_out_sign, stage_4_is_underflow, stage_4_is_overflow;
+    wire [EXPONENT_WIDTH-1:0] stage_4_non_rounded_exponent;
+    wire [MANTISSA_WIDTH-1:0] stage_4_non_rounded_mantissa;
+    wire [MANTISSA_WIDTH+1-1:0] stage_4_additional_mantissa_bits;
+
+    assign {stage_4_is_special_result, stage_4_special_overflow_flag, stage_4_special_invalid_operation_flag, stage_4_special_out, stage_4_out_sign, stage_4_is_underflow, stage_4_is_overflow, stage_4_non_rounded_exponent, stage_4_non_rounded_mantissa, stage_4_additional_mantissa_bits} = stage_4_data;
 
     wire [MANTISSA_WIDTH-1:0] rounded_mantissa;
     wire [EXPONENT_WIDTH-1:0] rounded_exponent;
@@ -102,105 +225,61 @@ module floating_point_multiplier #(
         .ROUND_TO_NEAREST_TIES_TO_EVEN(ROUND_TO_NEAREST_TIES_TO_EVEN),
         .ROUNDING_BITS(MANTISSA_WIDTH + 1)
     ) result_rounder_block (
-        .non_rounded_exponent(non_rounded_exponent),
-        .non_rounded_mantissa(non_rounded_mantissa),
-        .rounding_bits(additional_mantissa_bits),
+        .non_rounded_exponent(stage_4_non_rounded_exponent),
+        .non_rounded_mantissa(stage_4_non_rounded_mantissa),
+        .rounding_bits(stage_4_additional_mantissa_bits),
         .rounded_exponent(rounded_exponent),
         .rounded_mantissa(rounded_mantissa),
         .overflow_flag(rounded_overflow_flag)
     );
 
-    // Perform actual multiplication operation
+    reg [FloatBitWidth-1:0] result;
+    reg result_underflow_flag, result_overflow_flag, result_invalid_operation_flag;
 
     always_comb begin
-        underflow_flag = 1'b0;
-        overflow_flag = 1'b0;
-        invalid_operation_flag = 1'b0;
-
-        // We set these to avoid latch inference for Verilators but in fact these are not used in this path
-        out_sign = 1'bx;
-        out_exponent = {EXPONENT_WIDTH{1'bx}};
-        out_mantissa = {MANTISSA_WIDTH{1'bx}};
-        non_rounded_mantissa = {MANTISSA_WIDTH{1'bx}};
-        a_mul_b_mantissa = {((MANTISSA_WIDTH + 1) * 2) {1'bx}};
-        additional_mantissa_bits = {(MANTISSA_WIDTH + 1) {1'bx}};
-        is_halfway = 1'bx;
-        a_mul_b_exponent = {(EXPONENT_WIDTH + 2) {1'bx}};
-        non_rounded_exponent = {EXPONENT_WIDTH{1'bx}};
-        leading_one_is_MSB = 1'bx;
-
-        // TODO: handle subnormal numbers
-        // TODO: make sure that all operations of special values are readily handled by the current code
-
-        if (is_signaling_nan_a || is_signaling_nan_b || is_quiet_nan_a || is_quiet_nan_b) begin
-            // Result is QNaN due to one or both of the operands being NaN
-
-            out = quiet_nan;
-
-            if ((is_signaling_nan_a || is_signaling_nan_b) || ((is_quiet_nan_a && (!is_signaling_nan_b && !is_quiet_nan_b)) || (is_quiet_nan_b && (!is_signaling_nan_a && !is_quiet_nan_a)))) begin
-                invalid_operation_flag = 1'b1;
-            end
-        end else if ((is_a_zero && is_b_infinite) || (is_b_zero && is_a_infinite)) begin
-            // Result is QNaN due to one of the operands being zero and the other being infinite
-
-            out = quiet_nan;
-
-            invalid_operation_flag = 1'b1;
-        end else begin
-            // Result is probably not QNaN
-
-            out_sign = a_sign ^ b_sign;
-            a_mul_b_mantissa = {a_implicit_leading_bit, a_mantissa} * {b_implicit_leading_bit, b_mantissa};
-            a_mul_b_exponent = a_exponent + b_exponent - bias;
-
-            leading_one_is_MSB = a_mul_b_mantissa[(MANTISSA_WIDTH+1)*2-1];
-
-            // If the exponent is negative (first condition), the number is out of the IEEE 754
-            // single precision normalized numbers range; in this case the output is signaled to 0
-            // and an underflow flag is asserted. In the second case, the exponent is zero and it
-            // cannot be compensated by normalization, so there is also an underflow.
-            if (a_mul_b_exponent < 0 || (a_mul_b_exponent[EXPONENT_WIDTH+1-1:0] == 0 && leading_one_is_MSB == 1'b0)) begin
-                // Underflow detected
-
-                // Note: out_sign is already set
-                out_exponent = 0;
-                out_mantissa = 0;
-
-                underflow_flag = 1'b1;
-            end else
-            // If overflow is detected. Overflow is present when the resulting exponent is equal to
-            // or larger than 111...111 (all ones value with the same width as the exponent). For FP32,
-            // this value is 255. Overflow can also occur when the exponent is equal to 111...110 and
-            // +1 will be done for normalization, leading to 111...111: again, overflow.
-            if (a_mul_b_exponent[EXPONENT_WIDTH+1-1:0] >= {EXPONENT_WIDTH{1'b1}} || (a_mul_b_exponent[EXPONENT_WIDTH-1:0] == ({EXPONENT_WIDTH{1'b1}} - 1) && leading_one_is_MSB)) begin
-                // Overflow detected
-
-                // Note: out_sign is already set
-                out_exponent = {EXPONENT_WIDTH{1'b1}};
-                out_mantissa = {MANTISSA_WIDTH{1'b0}};
-
-                overflow_flag = 1'b1;
-            end else
-            // In the normal case
-            begin
-                // No overflow or underflow detected
-
-                // Note: out_sign is already set
-                // Handle the special case where one of the inputs is zero: the output exponent
-                // should then also be explicitly set to 0.
-                non_rounded_exponent = (is_a_zero || is_b_zero) ? 0 : a_mul_b_exponent[EXPONENT_WIDTH-1:0] + (leading_one_is_MSB ? 1 : 0);
-                non_rounded_mantissa = leading_one_is_MSB ? a_mul_b_mantissa[2*MANTISSA_WIDTH:MANTISSA_WIDTH+1] : a_mul_b_mantissa[2*MANTISSA_WIDTH-1:MANTISSA_WIDTH];
-                additional_mantissa_bits = leading_one_is_MSB ? a_mul_b_mantissa[MANTISSA_WIDTH:0] : a_mul_b_mantissa[MANTISSA_WIDTH-1:0] << 1;
-
-                // Then the result is rounded
-                out_mantissa = rounded_mantissa;
-                out_exponent = rounded_exponent;
-                overflow_flag = rounded_overflow_flag;
-            end
-
-            out = {out_sign, out_exponent, out_mantissa};
+        result_underflow_flag = 1'b0;
+        result_overflow_flag = 1'b0;
+        result_invalid_operation_flag = 1'b0;
+
+        if (stage_4_is_special_result) begin
+            result = stage_4_special_out;
+            result_overflow_flag = stage_4_special_overflow_flag;
+            result_invalid_operation_flag = stage_4_special_invalid_operation_flag;
+        end else if (stage_4_is_underflow) begin
+            // Underflow detected
+
+            result = {stage_4_out_sign, {EXPONENT_WIDTH{1'b0}}, {MANTISSA_WIDTH{1'b0}}};
+
+            result_underflow_flag = 1'b1;
+        end else if (stage_4_is_overflow) begin
+            // Overflow detected
+
+            result = {stage_4_out_sign, {EXPONENT_WIDTH{1'b1}}, {MANTISSA_WIDTH{1'b0}}};
+
+            result_overflow_flag = 1'b1;
+        end else
+        // In the normal case
+        begin
+            // No overflow or underflow detected, so the result is rounded
+            result = {stage_4_out_sign, rounded_exponent, rounded_mantissa};
+            result_overflow_flag = rounded_overflow_flag;
         end
     end
+
+    pipeline_register #(
+        .WIDTH(ResultWidth),
+        .ENABLE(PIPELINE_STAGES >= 4)
+    ) result_register (
+        .clk(clk),
+        .reset(reset),
+        .in_valid(stage_4_valid),
+        .in_ready(stage_4_ready),
+        .in_data({result, result_underflow_flag, result_overflow_flag, result_invalid_operation_flag}),
+        .out_valid(out_valid),
+        .out_ready(out_ready),
+        .out_data({out, underflow_flag, overflow_flag, invalid_operation_flag})
+    );
+
 endmodule
 
 `endif
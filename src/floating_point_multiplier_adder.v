@@ -1,46 +1,281 @@
 `ifndef __FLOATING_POINT_MULTIPLIER_ADDER_V__
 `define __FLOATING_POINT_MULTIPLIER_ADDER_V__
 
-`include "floating_point_adder.v"
-`include "floating_point_multiplier.v"
+`include "is_special_float.v"
+`include "leading_one_detector.v"
+`include "result_rounder.v"
 
+// Fused multiply-add: out = a_1 * a_2 + b, rounded only once. The full 2 * (MANTISSA_WIDTH + 1) bit
+// product is kept, the addend is aligned against it, and the sum is normalized and rounded in one pass.
 module floating_point_multiplier_adder #(
     parameter int EXPONENT_WIDTH = 8,
     parameter int MANTISSA_WIDTH = 23,
     parameter int ROUND_TO_NEAREST_TIES_TO_EVEN = 1,  // 0: round to zero (chopping last bits), 1: round to nearest
     parameter int IGNORE_SIGN_BIT_FOR_NAN = 1,
+    // Architecture of the leading one detector, see leading_one_detector.v. 0: priority scan, 1: binary tree.
+    parameter int LOD_ARCHITECTURE = 0,
     localparam int FloatBitWidth = EXPONENT_WIDTH + MANTISSA_WIDTH + 1
 ) (
     input [FloatBitWidth-1:0] a_1,
     input [FloatBitWidth-1:0] a_2,
     input [FloatBitWidth-1:0] b,
-    output [FloatBitWidth-1:0] out
+    output reg [FloatBitWidth-1:0] out,
+
+    // Exception flags
+    output reg underflow_flag,
+    output reg overflow_flag,
+    output reg invalid_operation_flag
 );
 
-    wire [FloatBitWidth-1:0] multiplication_result;
+    localparam int ProductWidth = (MANTISSA_WIDTH + 1) * 2;
+
+    // Layout of the sum, from LSB to MSB: a sticky bit, two guard bits, the product, two empty bits and
+    // the non-shifted addend. The empty bits keep a product that lies completely below the addend from
+    // changing anything but the rounding bits.
+    localparam int SumWidth = 3 * MANTISSA_WIDTH + 8;
+    localparam int ProductPosition = 3;
+    localparam int AddendPosition = ProductPosition + ProductWidth + 2;
+
+    // Signed width of the exponents and bit positions that are computed below
+    localparam int ExponentWidth = EXPONENT_WIDTH + $clog2(SumWidth) + 3;
+    localparam int Bias = (1 << (EXPONENT_WIDTH - 1)) - 1;
+    localparam int ExponentOnes = (1 << EXPONENT_WIDTH) - 1;
+
+    wire is_E4M3 = EXPONENT_WIDTH == 4 && MANTISSA_WIDTH == 3;
+
+    // Special pre-defined values. {MANTISSA_WIDTH-1{...}} could also have been {MANTISSA_WIDTH-1{1'bX}}
+    // but like this it explicitly supports the E4M3 variant.
+    wire [FloatBitWidth-1:0] quiet_nan = {1'b1, {EXPONENT_WIDTH{1'b1}}, 1'b1, {(MANTISSA_WIDTH - 1) {is_E4M3 ? 1'b1 : 1'b0}}};
+
+    // Unpack input floats
+
+    wire a_1_sign, a_2_sign, b_sign;
+    wire [EXPONENT_WIDTH-1:0] a_1_exponent, a_2_exponent, b_exponent;
+    wire [MANTISSA_WIDTH-1:0] a_1_mantissa, a_2_mantissa, b_mantissa;
+
+    assign {a_1_sign, a_1_exponent, a_1_mantissa} = a_1;
+    assign {a_2_sign, a_2_exponent, a_2_mantissa} = a_2;
+    assign {b_sign, b_exponent, b_mantissa} = b;
 
-    floating_point_multiplier #(
+    // Subnormal numbers have the same exponent as the smallest normal numbers, but no implicit leading bit
+    wire signed [ExponentWidth-1:0] a_1_true_exponent = a_1_exponent == 0 ? 1 : {{(ExponentWidth - EXPONENT_WIDTH) {1'b0}}, a_1_exponent};
+    wire signed [ExponentWidth-1:0] a_2_true_exponent = a_2_exponent == 0 ? 1 : {{(ExponentWidth - EXPONENT_WIDTH) {1'b0}}, a_2_exponent};
+    wire signed [ExponentWidth-1:0] b_true_exponent = b_exponent == 0 ? 1 : {{(ExponentWidth - EXPONENT_WIDTH) {1'b0}}, b_exponent};
+
+    wire product_sign = a_1_sign ^ a_2_sign;
+
+    // Find special float values
+
+    wire is_a_1_infinite, is_a_2_infinite, is_b_infinite;
+    wire is_a_1_zero, is_a_2_zero, is_b_zero, is_b_subnormal;
+    wire is_signaling_nan_a_1, is_signaling_nan_a_2, is_signaling_nan_b;
+    wire is_quiet_nan_a_1, is_quiet_nan_a_2, is_quiet_nan_b;
+
+    is_special_float #(
         .EXPONENT_WIDTH(EXPONENT_WIDTH),
         .MANTISSA_WIDTH(MANTISSA_WIDTH),
-        .ROUND_TO_NEAREST_TIES_TO_EVEN(ROUND_TO_NEAREST_TIES_TO_EVEN),
         .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
-    ) multiplier (
+    ) is_special_float_a_1 (
         .a(a_1),
-        .b(a_2),
-        .out(multiplication_result)
+        .is_infinite(is_a_1_infinite),
+        .is_zero(is_a_1_zero),
+        .is_signaling_nan(is_signaling_nan_a_1),
+        .is_quiet_nan(is_quiet_nan_a_1),
+        .is_subnormal()
     );
 
-    floating_point_adder #(
+    is_special_float #(
         .EXPONENT_WIDTH(EXPONENT_WIDTH),
         .MANTISSA_WIDTH(MANTISSA_WIDTH),
-        .ROUND_TO_NEAREST_TIES_TO_EVEN(ROUND_TO_NEAREST_TIES_TO_EVEN),
         .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
-    ) adder (
-        .a(multiplication_result),
-        .b(b),
-        .out(out)
+    ) is_special_float_a_2 (
+        .a(a_2),
+        .is_infinite(is_a_2_infinite),
+        .is_zero(is_a_2_zero),
+        .is_signaling_nan(is_signaling_nan_a_2),
+        .is_quiet_nan(is_quiet_nan_a_2),
+        .is_subnormal()
     );
 
+    is_special_float #(
+        .EXPONENT_WIDTH(EXPONENT_WIDTH),
+        .MANTISSA_WIDTH(MANTISSA_WIDTH),
+        .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
+    ) is_special_float_b (
+        .a(b),
+        .is_infinite(is_b_infinite),
+        .is_zero(is_b_zero),
+        .is_signaling_nan(is_signaling_nan_b),
+        .is_quiet_nan(is_quiet_nan_b),
+        .is_subnormal(is_b_subnormal)
+    );
+
+    wire is_product_infinite = is_a_1_infinite || is_a_2_infinite;
+    wire is_product_zero = is_a_1_zero || is_a_2_zero;
+    wire is_nan_operand = is_signaling_nan_a_1 || is_signaling_nan_a_2 || is_signaling_nan_b || is_quiet_nan_a_1 || is_quiet_nan_a_2 || is_quiet_nan_b;
+    wire is_zero_times_infinity = (is_a_1_zero && is_a_2_infinite) || (is_a_2_zero && is_a_1_infinite);
+    wire is_infinity_difference = is_product_infinite && is_b_infinite && (product_sign != b_sign);
+
+    // Multiply the mantissas, without rounding the product
+
+    wire [ProductWidth-1:0] product = {a_1_exponent != 0, a_1_mantissa} * {a_2_exponent != 0, a_2_mantissa};
+
+    // Align the addend against the product. The shift is the difference between the position of the addend
+    // in the sum and the position where it should be for its bits to line up with the bits of the product.
+    // An addend that is much larger than the product is not shifted at all (addend_shift < 0). The product
+    // then ends up closer to the addend than it should be, which is fine as it only affects the rounding bits.
+
+    wire signed [ExponentWidth-1:0] addend_shift = MANTISSA_WIDTH + 4 + a_1_true_exponent + a_2_true_exponent - b_true_exponent - Bias;
+
+    reg [SumWidth-1:0] non_shifted_addend, aligned_addend, shifted_out_addend_bits;
+    reg [SumWidth+1-1:0] aligned_product;
+    reg signed [SumWidth+1-1:0] summed;
+    reg [SumWidth-1:0] summed_magnitude;
+    reg out_sign;
+
+    always_comb begin
+        non_shifted_addend = {{(SumWidth - MANTISSA_WIDTH - 1) {1'b0}}, b_exponent != 0, b_mantissa} << AddendPosition;
+
+        if (addend_shift <= 0) begin
+            aligned_addend = non_shifted_addend;
+            shifted_out_addend_bits = 0;
+        end else if (addend_shift >= SumWidth) begin
+            aligned_addend = 0;
+            shifted_out_addend_bits = non_shifted_addend;
+        end else begin
+            aligned_addend = non_shifted_addend >> addend_shift;
+            shifted_out_addend_bits = non_shifted_addend << (SumWidth - addend_shift);
+        end
+
+        // All addend bits below the guard bits are collapsed into the sticky bit
+        aligned_addend[0] = aligned_addend[0] || shifted_out_addend_bits != 0;
+        aligned_product = {{(SumWidth + 1 - ProductWidth - ProductPosition) {1'b0}}, product, {ProductPosition{1'b0}}};
+
+        out_sign = product_sign;
+
+        if (product_sign == b_sign) begin
+            summed = aligned_product + aligned_addend;
+        end else begin
+            summed = aligned_product - aligned_addend;
+
+            if (summed < 0) begin
+                summed = -summed;
+                out_sign = b_sign;
+            end
+        end
+
+        summed_magnitude = summed[SumWidth-1:0];
+
+        // An exact zero is positive, unless both the product and the addend are negative
+        if (summed_magnitude == 0) begin
+            out_sign = product_sign && b_sign;
+        end
+    end
+
+    // Normalize the sum
+
+    wire [$clog2(SumWidth)-1:0] leading_one_pos;
+    wire has_leading_one;
+
+    leading_one_detector #(
+        .WIDTH(SumWidth),
+        .ARCHITECTURE(LOD_ARCHITECTURE)
+    ) leading_one_detector_summed (
+        .value(summed_magnitude),
+        .position(leading_one_pos),
+        .has_leading_one(has_leading_one)
+    );
+
+    // Biased exponent of the leading one. If the addend was not shifted while it should have been shifted
+    // to the left, the bits of the sum are worth more than the bits of the product.
+    wire signed [ExponentWidth-1:0] addend_shift_correction = addend_shift < 0 ? -addend_shift : 0;
+    wire signed [ExponentWidth-1:0] leading_one_exponent = a_1_true_exponent + a_2_true_exponent - Bias - 2 * MANTISSA_WIDTH - ProductPosition + $signed({1'b0, leading_one_pos}) + addend_shift_correction;
+
+    // Position in the sum of the least significant bit of the result: MANTISSA_WIDTH bits below the leading
+    // one for normal results, or the position of the least significant bit of subnormal numbers otherwise
+    wire is_normal_result = leading_one_exponent >= 1;
+    wire signed [ExponentWidth-1:0] subnormal_lsb_position = ProductPosition + 1 + Bias + MANTISSA_WIDTH - a_1_true_exponent - a_2_true_exponent - addend_shift_correction;
+    wire signed [ExponentWidth-1:0] result_lsb_position = is_normal_result ? $signed({1'b0, leading_one_pos}) - MANTISSA_WIDTH : subnormal_lsb_position;
+
+    reg [SumWidth-1:0] normalized_mantissa, remaining_bits;
+    reg [2-1:0] rounding_bits;
+
+    always_comb begin
+        rounding_bits = 2'b00;
+        remaining_bits = 0;
+
+        if (result_lsb_position <= 0) begin
+            normalized_mantissa = summed_magnitude << -result_lsb_position;
+        end else if (result_lsb_position > SumWidth) begin
+            normalized_mantissa = 0;
+            rounding_bits[0] = summed_magnitude != 0;
+        end else begin
+            normalized_mantissa = summed_magnitude >> result_lsb_position;
+            remaining_bits = summed_magnitude << (SumWidth - result_lsb_position);
+
+            // The bit just below the result is the round bit, all bits below it form the sticky bit
+            rounding_bits = {remaining_bits[SumWidth-1], remaining_bits[SumWidth-1-1:0] != 0};
+        end
+    end
+
+    // Round the result. Subnormal results have an exponent of zero; when they are rounded up to the smallest
+    // normal number, the rounder increments their exponent to one.
+
+    wire [MANTISSA_WIDTH-1:0] rounded_mantissa;
+    wire [EXPONENT_WIDTH-1:0] rounded_exponent;
+    wire rounded_overflow_flag;
+
+    result_rounder #(
+        .EXPONENT_WIDTH(EXPONENT_WIDTH),
+        .MANTISSA_WIDTH(MANTISSA_WIDTH),
+        .ROUND_TO_NEAREST_TIES_TO_EVEN(ROUND_TO_NEAREST_TIES_TO_EVEN),
+        .ROUNDING_BITS(2)
+    ) result_rounder_block (
+        .non_rounded_exponent(is_normal_result ? leading_one_exponent[EXPONENT_WIDTH-1:0] : {EXPONENT_WIDTH{1'b0}}),
+        .non_rounded_mantissa(normalized_mantissa[MANTISSA_WIDTH-1:0]),
+        .rounding_bits(rounding_bits),
+        .rounded_exponent(rounded_exponent),
+        .rounded_mantissa(rounded_mantissa),
+        .overflow_flag(rounded_overflow_flag)
+    );
+
+    always_comb begin
+        underflow_flag = 1'b0;
+        overflow_flag = 1'b0;
+        invalid_operation_flag = 1'b0;
+
+        if (is_nan_operand || is_zero_times_infinity || is_infinity_difference) begin
+            // Result is QNaN
+
+            out = quiet_nan;
+            invalid_operation_flag = 1'b1;
+        end else if (is_product_infinite || is_b_infinite) begin
+            out = {is_product_infinite ? product_sign : b_sign, {EXPONENT_WIDTH{1'b1}}, {MANTISSA_WIDTH{1'b0}}};
+            overflow_flag = 1'b1;
+        end else if (is_product_zero) begin
+            // The result is the addend itself. This case is handled separately, as the exponent of a zero
+            // product can be too large for a small addend to be aligned against it.
+
+            out = is_b_zero ? {product_sign && b_sign, {(FloatBitWidth - 1) {1'b0}}} : b;
+            underflow_flag = is_b_subnormal;
+        end else if (!has_leading_one) begin
+            // Exact zero
+
+            out = {out_sign, {EXPONENT_WIDTH{1'b0}}, {MANTISSA_WIDTH{1'b0}}};
+        end else if (leading_one_exponent >= ExponentOnes) begin
+            // Overflow detected
+
+            out = {out_sign, {EXPONENT_WIDTH{1'b1}}, {MANTISSA_WIDTH{1'b0}}};
+            overflow_flag = 1'b1;
+        end else begin
+            out = {out_sign, rounded_exponent, rounded_mantissa};
+            overflow_flag = rounded_overflow_flag;
+
+            // The result is tiny (after rounding), while the exact result is not zero
+            underflow_flag = rounded_exponent == 0;
+        end
+    end
+
 endmodule
 
 `endif
@@ -0,0 +1,368 @@
+`ifndef __FLOATING_POINT_SIMD_ADDER_V__
+`define __FLOATING_POINT_SIMD_ADDER_V__
+
+`include "is_special_float.v"
+`include "leading_one_detector.v"
+`include "result_rounder.v"
+`include "segmented_shifter.v"
+
+module floating_point_simd_adder #(
+    parameter int EXPONENT_WIDTH = 8,
+    parameter int MANTISSA_WIDTH = 23,
+    // Format of the two lanes when format is 1. Their widths must add up to half of the width of the full format.
+    parameter int HALF_EXPONENT_WIDTH = 5,
+    parameter int HALF_MANTISSA_WIDTH = 10,
+    // Format of the four lanes when format is 2. Their widths must add up to a quarter of the width of the full
+    // format.
+    parameter int QUARTER_EXPONENT_WIDTH = 5,
+    parameter int QUARTER_MANTISSA_WIDTH = 2,
+    parameter int ROUND_TO_NEAREST_TIES_TO_EVEN = 1,  // 0: round to zero (chopping last bits), 1: round to nearest
+    parameter int IGNORE_SIGN_BIT_FOR_NAN = 1,
+    localparam int FloatBitWidth = EXPONENT_WIDTH + MANTISSA_WIDTH + 1
+) (
+    // 0: one full addition, 1: two half additions, 2 (or 3): four quarter additions. Lane i of a, b and out is at
+    // bits [i*LaneBitWidth+:LaneBitWidth].
+    input [1:0] format,
+
+    input [FloatBitWidth-1:0] a,
+    input [FloatBitWidth-1:0] b,
+    output [FloatBitWidth-1:0] out,
+
+    // Subtraction flags, bit i belongs to lane i (unused lanes are ignored)
+    input [3:0] subtract,
+
+    // Exception flags, bit i belongs to lane i (unused lanes are 0)
+    output [3:0] underflow_flag,
+    output [3:0] overflow_flag,
+    output [3:0] invalid_operation_flag
+);
+
+    function automatic int maximum(input int x, input int y);
+        maximum = x > y ? x : y;
+    endfunction
+
+    // Same rounding bits as floating_point_adder, including a sticky bit
+    function automatic int get_rounding_bits(input int mantissa_width);
+        get_rounding_bits = maximum(mantissa_width, 3);
+    endfunction
+
+    function automatic int get_summed_width(input int mantissa_width);
+        get_summed_width = mantissa_width + 2 + get_rounding_bits(mantissa_width);
+    endfunction
+
+    // All lanes share a single segmented datapath for the alignment shift, the addition and the normalization
+    // shift. Every segment holds the summed mantissa of a lane plus one bit, which is used during normalization
+    // and as the carry (or borrow) bit between the lanes in the addition.
+    localparam int QuarterSegmentWidth = maximum(get_summed_width(QUARTER_MANTISSA_WIDTH) + 1, maximum((get_summed_width(HALF_MANTISSA_WIDTH) + 2) / 2, (get_summed_width(MANTISSA_WIDTH) + 4) / 4));
+    localparam int AdderWidth = 4 * QuarterSegmentWidth;
+    localparam int ShiftAmountWidth = $clog2(AdderWidth + 1);
+
+    wire [1:0] segments_log2 = format > 2 ? 2 : format;
+
+    // Operands and results of the lanes of every format, which are selected with segments_log2. The small
+    // operand (the one with the smallest magnitude) of every lane is aligned to the big one.
+    wire [3*AdderWidth-1:0] format_big_mantissas, format_small_mantissas, format_sticky_bits, format_subtraction_masks, format_summed_masks;
+    wire [3*4*ShiftAmountWidth-1:0] format_alignment_shifts, format_normalization_shifts;
+    wire [3-1:0] format_carry_in;
+    wire [3*FloatBitWidth-1:0] format_out;
+    wire [3*4-1:0] format_underflow_flag, format_overflow_flag, format_invalid_operation_flag;
+
+    wire [AdderWidth-1:0] aligned_small_mantissas;
+
+    segmented_shifter #(
+        .WIDTH(AdderWidth),
+        .AMOUNT_WIDTH(ShiftAmountWidth),
+        .LEFT(0)
+    ) alignment_shifter (
+        .segments_log2(segments_log2),
+        .value(format_small_mantissas[segments_log2*AdderWidth+:AdderWidth]),
+        .amounts(format_alignment_shifts[segments_log2*4*ShiftAmountWidth+:4*ShiftAmountWidth]),
+        .shifted(aligned_small_mantissas)
+    );
+
+    // The sticky bits of the lanes are set in the least significant bit of the aligned small operands. A lane that
+    // subtracts adds the inverted small operand plus one. The one comes from the carry in for the first lane, and
+    // from the top bits of the segment below it (which are both set) for the other lanes.
+    wire [AdderWidth-1:0] summed_mantissas = format_big_mantissas[segments_log2*AdderWidth+:AdderWidth] + ((aligned_small_mantissas | format_sticky_bits[segments_log2*AdderWidth+:AdderWidth]) ^ format_subtraction_masks[segments_log2*AdderWidth+:AdderWidth]) + format_carry_in[segments_log2];
+
+    wire [AdderWidth-1:0] normalized_mantissas;
+
+    segmented_shifter #(
+        .WIDTH(AdderWidth),
+        .AMOUNT_WIDTH(ShiftAmountWidth),
+        .LEFT(1)
+    ) normalization_shifter (
+        .segments_log2(segments_log2),
+        .value(summed_mantissas & format_summed_masks[segments_log2*AdderWidth+:AdderWidth]),
+        .amounts(format_normalization_shifts[segments_log2*4*ShiftAmountWidth+:4*ShiftAmountWidth]),
+        .shifted(normalized_mantissas)
+    );
+
+    genvar f, i;
+
+    generate
+        for (f = 0; f < 3; f = f + 1) begin : gen_format
+            localparam int LaneExponentWidth = f == 0 ? EXPONENT_WIDTH : (f == 1 ? HALF_EXPONENT_WIDTH : QUARTER_EXPONENT_WIDTH);
+            localparam int LaneMantissaWidth = f == 0 ? MANTISSA_WIDTH : (f == 1 ? HALF_MANTISSA_WIDTH : QUARTER_MANTISSA_WIDTH);
+            localparam int LaneBitWidth = LaneExponentWidth + LaneMantissaWidth + 1;
+            localparam int Lanes = 1 << f;
+            localparam int SegmentWidth = AdderWidth / Lanes;
+
+            localparam int RoundingBits = get_rounding_bits(LaneMantissaWidth);
+            localparam int ShiftedWidth = LaneMantissaWidth + 1 + RoundingBits;
+            localparam int SummedWidth = get_summed_width(LaneMantissaWidth);
+
+            // Whether the lanes subtract, with an extra (zero) bit above the last lane
+            wire [Lanes+1-1:0] effective_subtractions;
+
+            assign effective_subtractions[Lanes] = 1'b0;
+            assign format_carry_in[f] = effective_subtractions[0];
+
+            for (i = 0; i < Lanes; i = i + 1) begin : gen_lane
+                // Same as floating_point_adder, for a single lane
+
+                wire is_E4M3 = LaneExponentWidth == 4 && LaneMantissaWidth == 3;
+
+                wire [LaneBitWidth-1:0] quiet_nan = {1'b1, {LaneExponentWidth{1'b1}}, 1'b1, {(LaneMantissaWidth - 1) {is_E4M3 ? 1'b1 : 1'b0}}};
+
+                //
+                // Unpack input floats and handle special cases
+                //
+
+                wire [LaneBitWidth-1:0] lane_a = a[i*LaneBitWidth+:LaneBitWidth];
+                wire [LaneBitWidth-1:0] lane_b = b[i*LaneBitWidth+:LaneBitWidth];
+                wire lane_subtract = subtract[i];
+
+                wire a_sign, temp_b_sign, b_sign;
+                wire a_implicit_leading_bit, b_implicit_leading_bit;
+                wire [LaneExponentWidth-1:0] a_exponent, b_exponent;
+                wire [LaneMantissaWidth-1:0] a_mantissa, b_mantissa;
+
+                assign {a_sign, a_exponent, a_mantissa} = lane_a;
+                assign {temp_b_sign, b_exponent, b_mantissa} = lane_b;
+
+                assign b_sign = lane_subtract ? ~temp_b_sign : temp_b_sign;
+
+                assign a_implicit_leading_bit = !(a_exponent == 0);
+                assign b_implicit_leading_bit = !(b_exponent == 0);
+
+                // Subnormal numbers have the exponent of the smallest normal numbers, but without the implicit leading bit
+                wire [LaneExponentWidth-1:0] a_aligned_exponent = a_implicit_leading_bit ? a_exponent : 1;
+                wire [LaneExponentWidth-1:0] b_aligned_exponent = b_implicit_leading_bit ? b_exponent : 1;
+
+                wire is_a_infinite, is_b_infinite;
+                wire is_a_zero, is_b_zero;
+                wire is_signaling_nan_a, is_signaling_nan_b;
+                wire is_quiet_nan_a, is_quiet_nan_b;
+
+                is_special_float #(
+                    .EXPONENT_WIDTH(LaneExponentWidth),
+                    .MANTISSA_WIDTH(LaneMantissaWidth),
+                    .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
+                ) is_special_float_a (
+                    .a(lane_a),
+                    .is_infinite(is_a_infinite),
+                    .is_zero(is_a_zero),
+                    .is_signaling_nan(is_signaling_nan_a),
+                    .is_quiet_nan(is_quiet_nan_a),
+                    .is_subnormal()
+                );
+
+                is_special_float #(
+                    .EXPONENT_WIDTH(LaneExponentWidth),
+                    .MANTISSA_WIDTH(LaneMantissaWidth),
+                    .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
+                ) is_special_float_b (
+                    .a(lane_b),
+                    .is_infinite(is_b_infinite),
+                    .is_zero(is_b_zero),
+                    .is_signaling_nan(is_signaling_nan_b),
+                    .is_quiet_nan(is_quiet_nan_b),
+                    .is_subnormal()
+                );
+
+                reg is_special_result;
+                reg [LaneBitWidth-1:0] special_out;
+                reg special_overflow_flag, special_invalid_operation_flag;
+
+                always_comb begin
+                    is_special_result = 1'b1;
+                    special_out = quiet_nan;
+                    special_overflow_flag = 1'b0;
+                    special_invalid_operation_flag = 1'b0;
+
+                    if (is_signaling_nan_a || is_signaling_nan_b || is_quiet_nan_a || is_quiet_nan_b) begin
+                        // Result is QNaN due to one or both of the operands being NaN
+
+                        special_invalid_operation_flag = 1'b1;
+                    end else if (is_a_infinite && is_b_infinite && a_sign != b_sign) begin
+                        // Result is QNaN due to the fact that two opposite infinities were added
+
+                        special_invalid_operation_flag = 1'b1;
+                    end else if (is_a_infinite || is_b_infinite) begin
+                        // Overflow detected
+
+                        special_out = {is_a_infinite ? a_sign : b_sign, {LaneExponentWidth{1'b1}}, {LaneMantissaWidth{1'b0}}};
+
+                        special_overflow_flag = 1'b1;
+                    end else begin
+                        is_special_result = 1'b0;
+                    end
+                end
+
+                //
+                // Align and add the mantissas (in segment i of the shared datapath)
+                //
+
+                wire signed [LaneExponentWidth+1-1:0] exponent_difference = a_aligned_exponent - b_aligned_exponent;
+                wire [LaneMantissaWidth+1-1:0] a_full_mantissa = {a_implicit_leading_bit, a_mantissa};
+                wire [LaneMantissaWidth+1-1:0] b_full_mantissa = {b_implicit_leading_bit, b_mantissa};
+
+                // The big operand has the largest exponent, or the largest mantissa if the exponents are equal
+                wire is_a_big = exponent_difference > 0 || (exponent_difference == 0 && a_full_mantissa >= b_full_mantissa);
+                wire is_equal = exponent_difference == 0 && a_full_mantissa == b_full_mantissa;
+
+                wire [LaneExponentWidth+1-1:0] positive_exponent = -exponent_difference;
+                wire [LaneExponentWidth-1:0] abs_exponent_difference = exponent_difference > 0 ? exponent_difference[LaneExponentWidth-1:0] : positive_exponent[LaneExponentWidth-1:0];
+
+                wire [ShiftedWidth-1:0] big_mantissa = (is_a_big ? a_full_mantissa : b_full_mantissa) << RoundingBits;
+                wire [ShiftedWidth-1:0] small_mantissa = (is_a_big ? b_full_mantissa : a_full_mantissa) << RoundingBits;
+
+                // Set when any bit of the small operand is shifted out during the alignment
+                wire small_sticky = (small_mantissa & ~({ShiftedWidth{1'b1}} << abs_exponent_difference)) != 0;
+
+                wire out_exponent_is_a = exponent_difference >= 0;
+                wire [LaneExponentWidth-1:0] out_exponent = out_exponent_is_a ? a_aligned_exponent : b_aligned_exponent;
+
+                wire effective_subtraction = a_sign != b_sign;
+
+                // With equal signs, the sign of a. Otherwise, the sign of the big operand, unless the result is zero.
+                wire out_sign = !effective_subtraction ? a_sign : (is_equal ? 1'b0 : (is_a_big ? a_sign : b_sign));
+
+                // The top bit of the segment is set when the next lane subtracts
+                wire [SegmentWidth-1:0] next_lane_carry = {effective_subtractions[i+1], {(SegmentWidth - 1) {1'b0}}};
+
+                assign effective_subtractions[i] = effective_subtraction;
+
+                assign format_big_mantissas[f*AdderWidth+i*SegmentWidth+:SegmentWidth] = next_lane_carry | big_mantissa;
+                assign format_small_mantissas[f*AdderWidth+i*SegmentWidth+:SegmentWidth] = small_mantissa;
+                assign format_sticky_bits[f*AdderWidth+i*SegmentWidth+:SegmentWidth] = small_sticky;
+                assign format_subtraction_masks[f*AdderWidth+i*SegmentWidth+:SegmentWidth] = next_lane_carry | {SummedWidth{effective_subtraction}};
+                assign format_summed_masks[f*AdderWidth+i*SegmentWidth+:SegmentWidth] = {SummedWidth{1'b1}};
+                assign format_alignment_shifts[(f*4+i)*ShiftAmountWidth+:ShiftAmountWidth] = abs_exponent_difference >= ShiftedWidth ? ShiftedWidth : abs_exponent_difference;
+
+                // The difference of the two operands is always positive, as the small operand is subtracted
+                wire [SummedWidth-1:0] positive_summed_mantissa = summed_mantissas[i*SegmentWidth+:SummedWidth];
+
+                //
+                // Normalize the summed mantissa
+                //
+
+                wire [$clog2(SummedWidth)-1:0] leading_one_pos;
+                wire has_leading_one;
+
+                leading_one_detector #(
+                    .WIDTH(SummedWidth)
+                ) leading_one_detector_summed_mantissa (
+                    .value(positive_summed_mantissa),
+                    .position(leading_one_pos),
+                    .has_leading_one(has_leading_one)
+                );
+
+                reg [SummedWidth-1:0] normalized_mantissa;
+                reg [LaneMantissaWidth-1:0] non_rounded_mantissa;
+                reg [RoundingBits-1:0] additional_mantissa_bits;
+                reg signed [LaneExponentWidth+2-1:0] temp_exponent;
+
+                // A subnormal result is only shifted up to the smallest normal exponent, as in floating_point_adder
+                wire is_subnormal_result = leading_one_pos < LaneMantissaWidth + RoundingBits && LaneMantissaWidth + RoundingBits - leading_one_pos >= out_exponent;
+
+                // Extra statements used to avoid WIDTHTRUNC from Verilator
+                wire [32-1:0] int_temp_exponent = out_exponent + leading_one_pos - (LaneMantissaWidth + RoundingBits);
+
+                // The left and right shifts of floating_point_adder are done as a single left shift of the summed
+                // mantissa with a zero bit above it, of which the top SummedWidth bits are the normalized mantissa
+                wire [32-1:0] int_normalization_shift = is_subnormal_result ? out_exponent : LaneMantissaWidth + RoundingBits + 1 - leading_one_pos;
+
+                assign format_normalization_shifts[(f*4+i)*ShiftAmountWidth+:ShiftAmountWidth] = int_normalization_shift > SummedWidth + 1 ? SummedWidth + 1 : int_normalization_shift[ShiftAmountWidth-1:0];
+
+                always_comb begin
+                    normalized_mantissa = normalized_mantissas[i*SegmentWidth+1+:SummedWidth];
+
+                    temp_exponent = has_leading_one && !is_subnormal_result ? int_temp_exponent[LaneExponentWidth+2-1:0] : 0;
+
+                    non_rounded_mantissa = normalized_mantissa[LaneMantissaWidth+RoundingBits-1:RoundingBits];
+                    additional_mantissa_bits = normalized_mantissa[RoundingBits-1:0];
+                end
+
+                //
+                // Round the result and select the output
+                //
+
+                wire [LaneMantissaWidth-1:0] rounded_mantissa;
+                wire [LaneExponentWidth-1:0] rounded_exponent;
+                wire rounded_overflow_flag;
+
+                result_rounder #(
+                    .EXPONENT_WIDTH(LaneExponentWidth),
+                    .MANTISSA_WIDTH(LaneMantissaWidth),
+                    .ROUND_TO_NEAREST_TIES_TO_EVEN(ROUND_TO_NEAREST_TIES_TO_EVEN),
+                    .ROUNDING_BITS(RoundingBits)
+                ) result_rounder_block (
+                    .non_rounded_exponent(temp_exponent[LaneExponentWidth-1:0]),
+                    .non_rounded_mantissa(non_rounded_mantissa),
+                    .rounding_bits(additional_mantissa_bits),
+                    .rounded_exponent(rounded_exponent),
+                    .rounded_mantissa(rounded_mantissa),
+                    .overflow_flag(rounded_overflow_flag)
+                );
+
+                reg [LaneBitWidth-1:0] result;
+                reg result_underflow_flag, result_overflow_flag, result_invalid_operation_flag;
+
+                always_comb begin
+                    result_underflow_flag = 1'b0;
+                    result_overflow_flag = 1'b0;
+                    result_invalid_operation_flag = 1'b0;
+
+                    if (is_special_result) begin
+                        result = special_out;
+                        result_overflow_flag = special_overflow_flag;
+                        result_invalid_operation_flag = special_invalid_operation_flag;
+                    end else if (temp_exponent >= {LaneExponentWidth{1'b1}}) begin
+                        result = {out_sign, {LaneExponentWidth{1'b1}}, {LaneMantissaWidth{1'b0}}};
+
+                        result_overflow_flag = 1'b1;
+                    end else begin
+                        result = {out_sign, rounded_exponent, rounded_mantissa};
+                        result_overflow_flag = rounded_overflow_flag;
+
+                        // The (exact) result is subnormal
+                        result_underflow_flag = temp_exponent == 0 && non_rounded_mantissa != 0;
+                    end
+                end
+
+                assign format_out[f*FloatBitWidth+i*LaneBitWidth+:LaneBitWidth] = result;
+                assign format_underflow_flag[f*4+i] = result_underflow_flag;
+                assign format_overflow_flag[f*4+i] = result_overflow_flag;
+                assign format_invalid_operation_flag[f*4+i] = result_invalid_operation_flag;
+            end
+
+            for (i = Lanes; i < 4; i = i + 1) begin : gen_unused_lane
+                assign format_alignment_shifts[(f*4+i)*ShiftAmountWidth+:ShiftAmountWidth] = '0;
+                assign format_normalization_shifts[(f*4+i)*ShiftAmountWidth+:ShiftAmountWidth] = '0;
+                assign format_underflow_flag[f*4+i] = 1'b0;
+                assign format_overflow_flag[f*4+i] = 1'b0;
+                assign format_invalid_operation_flag[f*4+i] = 1'b0;
+            end
+        end
+    endgenerate
+
+    assign out = format_out[segments_log2*FloatBitWidth+:FloatBitWidth];
+    assign underflow_flag = format_underflow_flag[segments_log2*4+:4];
+    assign overflow_flag = format_overflow_flag[segments_log2*4+:4];
+    assign invalid_operation_flag = format_invalid_operation_flag[segments_log2*4+:4];
+
+endmodule
+
+`endif
@@ -0,0 +1,222 @@
+`ifndef __FLOATING_POINT_SIMD_MULTIPLIER_V__
+`define __FLOATING_POINT_SIMD_MULTIPLIER_V__
+
+`include "product_normalizer.v"
+`include "product_special_cases.v"
+`include "result_rounder.v"
+`include "segmented_multiplier.v"
+
+module floating_point_simd_multiplier #(
+    parameter int EXPONENT_WIDTH = 8,
+    parameter int MANTISSA_WIDTH = 23,
+    // Format of the two lanes when format is 1. Their widths must add up to half of the width of the full format.
+    parameter int HALF_EXPONENT_WIDTH = 5,
+    parameter int HALF_MANTISSA_WIDTH = 10,
+    // Format of the four lanes when format is 2. Their widths must add up to a quarter of the width of the full
+    // format.
+    parameter int QUARTER_EXPONENT_WIDTH = 5,
+    parameter int QUARTER_MANTISSA_WIDTH = 2,
+    parameter int ROUND_TO_NEAREST_TIES_TO_EVEN = 1,  // 0: round to zero (chopping last bits), 1: round to nearest
+    parameter int IGNORE_SIGN_BIT_FOR_NAN = 1,
+    localparam int FloatBitWidth = EXPONENT_WIDTH + MANTISSA_WIDTH + 1
+) (
+    // 0: one full multiplication, 1: two half multiplications, 2 (or 3): four quarter multiplications. Lane i
+    // of a, b and out is at bits [i*LaneBitWidth+:LaneBitWidth].
+    input [1:0] format,
+
+    input [FloatBitWidth-1:0] a,
+    input [FloatBitWidth-1:0] b,
+    output [FloatBitWidth-1:0] out,
+
+    // Exception flags, bit i belongs to lane i (unused lanes are 0)
+    output [3:0] underflow_flag,
+    output [3:0] overflow_flag,
+    output [3:0] invalid_operation_flag
+);
+
+    function automatic int maximum(input int x, input int y);
+        maximum = x > y ? x : y;
+    endfunction
+
+    // All lanes share a single segmented mantissa multiplier. Its segments are wide enough for the mantissas
+    // (including the implicit leading bit) of the lanes of every format.
+    localparam int QuarterSegmentWidth = maximum(QUARTER_MANTISSA_WIDTH + 1, maximum((HALF_MANTISSA_WIDTH + 2) / 2, (MANTISSA_WIDTH + 4) / 4));
+    localparam int MultiplierWidth = 4 * QuarterSegmentWidth;
+
+    wire [1:0] segments_log2 = format > 2 ? 2 : format;
+
+    // Mantissas and results of the lanes of every format, which are selected with segments_log2
+    wire [3*MultiplierWidth-1:0] format_a_mantissas, format_b_mantissas;
+    wire [3*FloatBitWidth-1:0] format_out;
+    wire [3*4-1:0] format_underflow_flag, format_overflow_flag, format_invalid_operation_flag;
+
+    wire [2*MultiplierWidth-1:0] a_mul_b_mantissas;
+
+    segmented_multiplier #(
+        .WIDTH(MultiplierWidth)
+    ) segmented_multiplier_block (
+        .segments_log2(segments_log2),
+        .a(format_a_mantissas[segments_log2*MultiplierWidth+:MultiplierWidth]),
+        .b(format_b_mantissas[segments_log2*MultiplierWidth+:MultiplierWidth]),
+        .product(a_mul_b_mantissas)
+    );
+
+    genvar f, i;
+
+    generate
+        for (f = 0; f < 3; f = f + 1) begin : gen_format
+            localparam int LaneExponentWidth = f == 0 ? EXPONENT_WIDTH : (f == 1 ? HALF_EXPONENT_WIDTH : QUARTER_EXPONENT_WIDTH);
+            localparam int LaneMantissaWidth = f == 0 ? MANTISSA_WIDTH : (f == 1 ? HALF_MANTISSA_WIDTH : QUARTER_MANTISSA_WIDTH);
+            localparam int LaneBitWidth = LaneExponentWidth + LaneMantissaWidth + 1;
+            localparam int Lanes = 1 << f;
+            localparam int SegmentWidth = MultiplierWidth / Lanes;
+
+            for (i = 0; i < Lanes; i = i + 1) begin : gen_lane
+                // Same as floating_point_multiplier, for a single lane, of which only the mantissa multiplication
+                // is done in the shared multiplier
+
+                wire [LaneExponentWidth-1-1:0] bias = {(LaneExponentWidth - 1) {1'b1}};
+
+                //
+                // Unpack input floats and handle special cases
+                //
+
+                wire [LaneBitWidth-1:0] lane_a = a[i*LaneBitWidth+:LaneBitWidth];
+                wire [LaneBitWidth-1:0] lane_b = b[i*LaneBitWidth+:LaneBitWidth];
+
+                wire a_sign, b_sign;
+                wire a_implicit_leading_bit, b_implicit_leading_bit;
+                wire [LaneExponentWidth-1:0] a_exponent, b_exponent;
+                wire [LaneMantissaWidth-1:0] a_mantissa, b_mantissa;
+
+                assign {a_sign, a_exponent, a_mantissa} = lane_a;
+                assign {b_sign, b_exponent, b_mantissa} = lane_b;
+
+                assign a_implicit_leading_bit = !(a_exponent == 0);
+                assign b_implicit_leading_bit = !(b_exponent == 0);
+
+                wire is_special_result;
+                wire [LaneBitWidth-1:0] special_out;
+                wire special_overflow_flag, special_invalid_operation_flag;
+
+                product_special_cases #(
+                    .EXPONENT_WIDTH(LaneExponentWidth),
+                    .MANTISSA_WIDTH(LaneMantissaWidth),
+                    .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
+                ) product_special_cases_block (
+                    .a(lane_a),
+                    .b(lane_b),
+                    .is_special_result(is_special_result),
+                    .special_out(special_out),
+                    .special_overflow_flag(special_overflow_flag),
+                    .special_invalid_operation_flag(special_invalid_operation_flag)
+                );
+
+                wire out_sign = a_sign ^ b_sign;
+
+                //
+                // Multiply the mantissas (in segment i of the shared multiplier) and add the exponents
+                //
+
+                assign format_a_mantissas[f*MultiplierWidth+i*SegmentWidth+:SegmentWidth] = {a_implicit_leading_bit, a_mantissa};
+                assign format_b_mantissas[f*MultiplierWidth+i*SegmentWidth+:SegmentWidth] = {b_implicit_leading_bit, b_mantissa};
+
+                wire [(LaneMantissaWidth+1)*2-1:0] a_mul_b_mantissa = a_mul_b_mantissas[2*i*SegmentWidth+:(LaneMantissaWidth+1)*2];
+                reg signed [LaneExponentWidth+2-1:0] a_mul_b_exponent;
+
+                always_comb begin
+                    a_mul_b_exponent = a_exponent + b_exponent - bias;
+                end
+
+                //
+                // Normalize the product and detect underflow and overflow
+                //
+
+                wire is_underflow, is_overflow;
+                wire [LaneExponentWidth-1:0] non_rounded_exponent;
+                wire [LaneMantissaWidth-1:0] non_rounded_mantissa;
+                wire [LaneMantissaWidth+1-1:0] additional_mantissa_bits;
+
+                product_normalizer #(
+                    .EXPONENT_WIDTH(LaneExponentWidth),
+                    .MANTISSA_WIDTH(LaneMantissaWidth)
+                ) product_normalizer_block (
+                    .a_mul_b_mantissa(a_mul_b_mantissa),
+                    .a_mul_b_exponent(a_mul_b_exponent),
+                    .is_underflow(is_underflow),
+                    .is_overflow(is_overflow),
+                    .non_rounded_exponent(non_rounded_exponent),
+                    .non_rounded_mantissa(non_rounded_mantissa),
+                    .additional_mantissa_bits(additional_mantissa_bits)
+                );
+
+                //
+                // Round the result and select the output
+                //
+
+                wire [LaneMantissaWidth-1:0] rounded_mantissa;
+                wire [LaneExponentWidth-1:0] rounded_exponent;
+                wire rounded_overflow_flag;
+
+                result_rounder #(
+                    .EXPONENT_WIDTH(LaneExponentWidth),
+                    .MANTISSA_WIDTH(LaneMantissaWidth),
+                    .ROUND_TO_NEAREST_TIES_TO_EVEN(ROUND_TO_NEAREST_TIES_TO_EVEN),
+                    .ROUNDING_BITS(LaneMantissaWidth + 1)
+                ) result_rounder_block (
+                    .non_rounded_exponent(non_rounded_exponent),
+                    .non_rounded_mantissa(non_rounded_mantissa),
+                    .rounding_bits(additional_mantissa_bits),
+                    .rounded_exponent(rounded_exponent),
+                    .rounded_mantissa(rounded_mantissa),
+                    .overflow_flag(rounded_overflow_flag)
+                );
+
+                reg [LaneBitWidth-1:0] result;
+                reg result_underflow_flag, result_overflow_flag, result_invalid_operation_flag;
+
+                always_comb begin
+                    result_underflow_flag = 1'b0;
+                    result_overflow_flag = 1'b0;
+                    result_invalid_operation_flag = 1'b0;
+
+                    if (is_special_result) begin
+                        result = special_out;
+                        result_overflow_flag = special_overflow_flag;
+                        result_invalid_operation_flag = special_invalid_operation_flag;
+                    end else if (is_underflow) begin
+                        result = {out_sign, {LaneExponentWidth{1'b0}}, {LaneMantissaWidth{1'b0}}};
+
+                        result_underflow_flag = 1'b1;
+                    end else if (is_overflow) begin
+                        result = {out_sign, {LaneExponentWidth{1'b1}}, {LaneMantissaWidth{1'b0}}};
+
+                        result_overflow_flag = 1'b1;
+                    end else begin
+                        result = {out_sign, rounded_exponent, rounded_mantissa};
+                        result_overflow_flag = rounded_overflow_flag;
+                    end
+                end
+
+                assign format_out[f*FloatBitWidth+i*LaneBitWidth+:LaneBitWidth] = result;
+                assign format_underflow_flag[f*4+i] = result_underflow_flag;
+                assign format_overflow_flag[f*4+i] = result_overflow_flag;
+                assign format_invalid_operation_flag[f*4+i] = result_invalid_operation_flag;
+            end
+
+            for (i = Lanes; i < 4; i = i + 1) begin : gen_unused_lane
+                assign format_underflow_flag[f*4+i] = 1'b0;
+                assign format_overflow_flag[f*4+i] = 1'b0;
+                assign format_invalid_operation_flag[f*4+i] = 1'b0;
+            end
+        end
+    endgenerate
+
+    assign out = format_out[segments_log2*FloatBitWidth+:FloatBitWidth];
+    assign underflow_flag = format_underflow_flag[segments_log2*4+:4];
+    assign overflow_flag = format_overflow_flag[segments_log2*4+:4];
+    assign invalid_operation_flag = format_invalid_operation_flag[segments_log2*4+:4];
+
+endmodule
+
+`endif
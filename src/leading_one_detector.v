@@ -1,41 +1,90 @@
 `ifndef __LEADING_ONE_DETECTOR_V__
 `define __LEADING_ONE_DETECTOR_V__
 
+// Icarus Verilog and Yosys do not support break statements. Icarus is detected automatically; tools that define
+// none of their own macros (such as Yosys in synthesis.py) pass -DLEADING_ONE_DETECTOR_NO_BREAK.
+`ifdef __ICARUS__
+`define LEADING_ONE_DETECTOR_NO_BREAK
+`endif
+
 module leading_one_detector #(
-    parameter int WIDTH = 8
+    parameter int WIDTH = 8,
+    // 0: priority scan from the MSB down, 1: binary tree of log2(WIDTH) levels, which has a shorter critical
+    // path for wide inputs. Both give the same position; for an input without ones, the position is undefined.
+    parameter int ARCHITECTURE = 0
 ) (
     input [WIDTH-1:0] value,
     output reg [$clog2(WIDTH)-1:0] position,
     output reg has_leading_one
 );
 
-    integer i;
+    localparam int PositionWidth = $clog2(WIDTH);
 
-    // Required to support Icarus Verilog
-    reg stop_bit;
+    generate
+        if (ARCHITECTURE == 1) begin : gen_tree
+            // The input is padded to a power of two and reduced pairwise in log2(WIDTH) levels. After level
+            // l, node n covers bits [n * 2^(l+1) +: 2^(l+1)] of the input, and holds whether that part has a
+            // one and, if so, the position of its leading one relative to the start of the part. The nodes
+            // are stored in place: node n of a level only reads nodes 2n and 2n+1 of the previous level.
+            localparam int PaddedWidth = 1 << PositionWidth;
 
-    always_comb begin
-        position = {$clog2(WIDTH) {1'bx}};
-        has_leading_one = value != 0;
-        stop_bit = 1'b0;
+            reg [PaddedWidth-1:0] node_has_one;
+            reg [PaddedWidth*PositionWidth-1:0] node_position;
 
-        for (i = WIDTH - 1; i >= 0; i = i - 1) begin
-            if (value[i] == 1'b1 && stop_bit == 1'b0) begin
-                // Index selection to avoid the error:
-                // "Operator ASSIGN expects 5 bits on the Assign RHS, but Assign RHS's VARREF 'i' generates 32 bits."
-                // from Verilator.
-                position = i[$clog2(WIDTH)-1:0];
+            integer level, node;
 
-                $display("Found leading one at position %d", position);
+            always_comb begin
+                node_has_one = '0;
+                node_has_one[WIDTH-1:0] = value;
+                node_position = '0;
 
-`ifdef __ICARUS__
-                stop_bit = 1'b1;
+                for (level = 0; level < PositionWidth; level = level + 1) begin
+                    for (node = 0; node < (PaddedWidth >> (level + 1)); node = node + 1) begin
+                        if (node_has_one[2*node+1]) begin
+                            // Leading one is in the upper half
+                            node_position[node*PositionWidth+:PositionWidth] = node_position[(2*node+1)*PositionWidth+:PositionWidth];
+                            node_position[node*PositionWidth+level] = 1'b1;
+                        end else begin
+                            node_position[node*PositionWidth+:PositionWidth] = node_position[2*node*PositionWidth+:PositionWidth];
+                        end
+
+                        node_has_one[node] = node_has_one[2*node+1] || node_has_one[2*node];
+                    end
+                end
+
+                position = node_position[PositionWidth-1:0];
+                has_leading_one = node_has_one[0];
+            end
+        end else begin : gen_priority_scan
+            integer i;
+
+            // Required to support Icarus Verilog
+            reg stop_bit;
+
+            always_comb begin
+                position = {$clog2(WIDTH) {1'bx}};
+                has_leading_one = value != 0;
+                stop_bit = 1'b0;
+
+                for (i = WIDTH - 1; i >= 0; i = i - 1) begin
+                    if (value[i] == 1'b1 && stop_bit == 1'b0) begin
+                        // Index selection to avoid the error:
+                        // "Operator ASSIGN expects 5 bits on the Assign RHS, but Assign RHS's VARREF 'i' generates 32 bits."
+                        // from Verilator.
+                        position = i[$clog2(WIDTH)-1:0];
+
+                        $display("Found leading one at position %d", position);
+
+`ifdef LEADING_ONE_DETECTOR_NO_BREAK
+                        stop_bit = 1'b1;
 `else
-                break;
+                        break;
 `endif
+                    end
+                end
             end
         end
-    end
+    endgenerate
 
 endmodule
 
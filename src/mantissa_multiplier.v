@@ -0,0 +1,305 @@
+`ifndef __MANTISSA_MULTIPLIER_V__
+`define __MANTISSA_MULTIPLIER_V__
+
+module mantissa_multiplier #(
+    parameter int WIDTH = 24,
+    // 0: behavioral (a * b, of which the architecture is left to synthesis), 1: radix-4 Booth encoding with a
+    // Wallace tree, 2: radix-4 Booth encoding with a Dadda tree. All architectures give the same product.
+    parameter int ARCHITECTURE = 0
+) (
+    input [WIDTH-1:0] a,
+    input [WIDTH-1:0] b,
+    output [2*WIDTH-1:0] product
+);
+
+    localparam int ProductWidth = 2 * WIDTH;
+
+    // Radix-4 Booth encoding: b (extended with a zero sign bit) is split into overlapping groups of
+    // three bits, each of which selects a partial product of 0, +-a or +-2a. Partial product i is
+    // weighted by 4^i, so there are WIDTH / 2 + 1 of them instead of WIDTH.
+    localparam int PartialProducts = WIDTH / 2 + 1;
+
+    // Bits per column height or adder count in the packed vectors of the functions below, which is
+    // enough for a WIDTH of about 500
+    localparam int CountWidth = 8;
+
+    // A negative partial product is the inverse of its magnitude, plus a one (the negate bit) in its
+    // lowest column. Instead of sign extending the partial products, the sign bit s of each one is
+    // inverted, which adds 2^(WIDTH+1) when s is 0 instead of subtracting it when s is 1. This is
+    // corrected by adding the constant -2^(WIDTH+1) for every partial product.
+    function automatic [ProductWidth-1:0] sign_constant();
+        integer i;
+
+        sign_constant = '0;
+
+        for (i = 0; i < PartialProducts; i = i + 1) begin
+            sign_constant = sign_constant - ({{(ProductWidth - 1) {1'b0}}, 1'b1} << (WIDTH + 1 + 2 * i));
+        end
+    endfunction
+
+    localparam [ProductWidth-1:0] SignConstant = sign_constant();
+
+    // The reduction tree is planned by the functions below. Constant functions are slow to evaluate
+    // in Yosys, so the whole plan is computed in a few calls, which return the heights of and the
+    // adders in every column packed in vectors (CountWidth bits per number).
+
+    // Number of bits per column before the first reduction stage: partial product i covers columns
+    // 2i to 2i+WIDTH+1, every even column holds the negate bit of one, and the set bits of the sign
+    // constant add one more
+    function automatic [ProductWidth*CountWidth-1:0] initial_heights();
+        integer column, first_partial_product, last_partial_product;
+
+        for (column = 0; column < ProductWidth; column = column + 1) begin
+            first_partial_product = column > WIDTH ? (column - WIDTH) / 2 : 0;
+            last_partial_product = column / 2 < PartialProducts - 1 ? column / 2 : PartialProducts - 1;
+
+            initial_heights[column*CountWidth+:CountWidth] = last_partial_product - first_partial_product + 1 + (column % 2 == 0 && column / 2 < PartialProducts) + SignConstant[column];
+        end
+    endfunction
+
+    function automatic integer max_height(input [ProductWidth*CountWidth-1:0] heights);
+        integer column;
+
+        max_height = 0;
+
+        for (column = 0; column < ProductWidth; column = column + 1) begin
+            if (heights[column*CountWidth+:CountWidth] > max_height) begin
+                max_height = heights[column*CountWidth+:CountWidth];
+            end
+        end
+    endfunction
+
+    // Number of full adders (lower CountWidth bits) and half adders (upper CountWidth bits) per column in a
+    // reduction stage with the given column heights. A Wallace tree reduces every column as much as it
+    // can: every three bits go into a full adder, and two remaining bits into a half adder. A Dadda tree
+    // only reduces the columns to the largest number of the sequence 2, 3, 4, 6, 9, 13, ... below the
+    // highest column, which takes as many stages but fewer adders.
+    function automatic [ProductWidth*2*CountWidth-1:0] stage_adders(input [ProductWidth*CountWidth-1:0] heights);
+        integer column, height, highest, full, half, carries, target, excess;
+
+        highest = max_height(heights);
+        target = 2;
+
+        while (target * 3 / 2 < highest) begin
+            target = target * 3 / 2;
+        end
+
+        carries = 0;
+
+        for (column = 0; column < ProductWidth; column = column + 1) begin
+            height = heights[column*CountWidth+:CountWidth];
+
+            if (ARCHITECTURE == 1) begin
+                full = height / 3;
+                half = height % 3 == 2;
+            end else begin
+                // The carries of the previous column also end up in this column after the stage
+                excess = height + carries - target;
+                full = excess > 0 ? excess / 2 : 0;
+                half = excess > 0 ? excess % 2 : 0;
+            end
+
+            stage_adders[column*2*CountWidth+:CountWidth] = full;
+            stage_adders[column*2*CountWidth+CountWidth+:CountWidth] = half;
+            carries = full + half;
+        end
+    endfunction
+
+    // Every full adder takes three bits of its column and every half adder two, and both put back a sum
+    // in it and a carry in the next column
+    function automatic [ProductWidth*CountWidth-1:0] next_heights(input [ProductWidth*CountWidth-1:0] heights, input [ProductWidth*2*CountWidth-1:0] adders);
+        integer column, full, half, carries;
+
+        carries = 0;
+
+        for (column = 0; column < ProductWidth; column = column + 1) begin
+            full = adders[column*2*CountWidth+:CountWidth];
+            half = adders[column*2*CountWidth+CountWidth+:CountWidth];
+
+            next_heights[column*CountWidth+:CountWidth] = heights[column*CountWidth+:CountWidth] - 2 * full - half + carries;
+            carries = full + half;
+        end
+    endfunction
+
+    function automatic integer reduction_stages();
+        reg [ProductWidth*CountWidth-1:0] heights;
+
+        heights = initial_heights();
+        reduction_stages = 0;
+
+        while (ARCHITECTURE != 0 && max_height(heights) > 2) begin
+            heights = next_heights(heights, stage_adders(heights));
+            reduction_stages = reduction_stages + 1;
+        end
+    endfunction
+
+    localparam int Stages = reduction_stages();
+
+    // Heights of the columns before every stage, and after the last one
+    function automatic [(Stages+1)*ProductWidth*CountWidth-1:0] reduction_heights();
+        integer stage;
+        reg [ProductWidth*CountWidth-1:0] heights;
+
+        heights = initial_heights();
+
+        for (stage = 0; stage <= Stages; stage = stage + 1) begin
+            reduction_heights[stage*ProductWidth*CountWidth+:ProductWidth*CountWidth] = heights;
+
+            if (stage < Stages) begin
+                heights = next_heights(heights, stage_adders(heights));
+            end
+        end
+    endfunction
+
+    // Adders of every stage, and none after the last one
+    function automatic [(Stages+1)*ProductWidth*2*CountWidth-1:0] reduction_adders();
+        integer stage;
+        reg [ProductWidth*CountWidth-1:0] heights;
+        reg [ProductWidth*2*CountWidth-1:0] adders;
+
+        heights = initial_heights();
+
+        for (stage = 0; stage <= Stages; stage = stage + 1) begin
+            adders = stage < Stages ? stage_adders(heights) : '0;
+            reduction_adders[stage*ProductWidth*2*CountWidth+:ProductWidth*2*CountWidth] = adders;
+            heights = next_heights(heights, adders);
+        end
+    endfunction
+
+    generate
+        if (ARCHITECTURE == 1 || ARCHITECTURE == 2) begin : gen_booth
+            localparam [(Stages+1)*ProductWidth*CountWidth-1:0] Heights = reduction_heights();
+            localparam [(Stages+1)*ProductWidth*2*CountWidth-1:0] Adders = reduction_adders();
+            localparam int MaxHeight = max_height(Heights[ProductWidth*CountWidth-1:0]);
+
+            // Bit j of column c before stage s (and after stage s-1) is column_bits[(s*ProductWidth+c)*MaxHeight+j]
+            wire [(Stages+1)*ProductWidth*MaxHeight-1:0] column_bits;
+
+            //
+            // Booth encoding
+            //
+
+            wire [2*PartialProducts:0] b_extended = {{(2 * PartialProducts - WIDTH) {1'b0}}, b, 1'b0};
+
+            genvar i, c, j, s;
+
+            for (i = 0; i < PartialProducts; i = i + 1) begin : gen_partial_product
+                wire [2:0] group = b_extended[2*i+:3];
+
+                // 001 and 010: +a, 011: +2a, 100: -2a, 101 and 110: -a, 000 and 111: 0
+                wire is_one = group[1] ^ group[0];
+                wire is_two = group == 3'b011 || group == 3'b100;
+                wire negate = group[2];
+
+                wire [WIDTH:0] magnitude = is_one ? {1'b0, a} : (is_two ? {a, 1'b0} : '0);
+                wire [WIDTH+1:0] partial_product = negate ? ~{1'b0, magnitude} : {1'b0, magnitude};
+            end
+
+            // Every column holds its partial product bits, its negate bit and its bit of the sign constant,
+            // in that order
+            for (c = 0; c < ProductWidth; c = c + 1) begin : gen_initial_column
+                localparam int FirstPartialProduct = c > WIDTH ? (c - WIDTH) / 2 : 0;
+                localparam int PartialProductBits = (c / 2 < PartialProducts - 1 ? c / 2 : PartialProducts - 1) - FirstPartialProduct + 1;
+                localparam int HasNegateBit = c % 2 == 0 && c / 2 < PartialProducts;
+
+                for (j = 0; j < PartialProductBits; j = j + 1) begin : gen_partial_product_bit
+                    localparam int Position = c - 2 * (FirstPartialProduct + j);
+
+                    if (Position == WIDTH + 1) begin : gen_sign
+                        assign column_bits[c*MaxHeight+j] = ~gen_partial_product[FirstPartialProduct+j].partial_product[Position];
+                    end else begin : gen_bit
+                        assign column_bits[c*MaxHeight+j] = gen_partial_product[FirstPartialProduct+j].partial_product[Position];
+                    end
+                end
+
+                if (HasNegateBit) begin : gen_negate_bit
+                    assign column_bits[c*MaxHeight+PartialProductBits] = gen_partial_product[c/2].negate;
+                end
+
+                if (SignConstant[c]) begin : gen_sign_constant
+                    assign column_bits[c*MaxHeight+PartialProductBits+HasNegateBit] = 1'b1;
+                end
+            end
+
+            //
+            // Reduction tree
+            //
+
+            for (s = 0; s < Stages; s = s + 1) begin : gen_stage
+                for (c = 0; c < ProductWidth; c = c + 1) begin : gen_column
+                    localparam int HeightOffset = (s * ProductWidth + c) * CountWidth;
+                    localparam int AdderOffset = (s * ProductWidth + c) * 2 * CountWidth;
+
+                    localparam int Height = Heights[HeightOffset+:CountWidth];
+                    localparam int FullAdders = Adders[AdderOffset+:CountWidth];
+                    localparam int HalfAdders = Adders[AdderOffset+CountWidth+:CountWidth];
+
+                    // After the stage, the next column first holds the sums of its adders and the bits that it
+                    // did not reduce, followed by the carries of this column
+                    localparam int NextColumnKeptBits = Heights[HeightOffset+CountWidth+:CountWidth] - 2 * Adders[AdderOffset+2*CountWidth+:CountWidth] - Adders[AdderOffset+3*CountWidth+:CountWidth];
+
+                    localparam int InOffset = (s * ProductWidth + c) * MaxHeight;
+                    localparam int OutOffset = ((s + 1) * ProductWidth + c) * MaxHeight;
+                    localparam int CarryOffset = ((s + 1) * ProductWidth + c + 1) * MaxHeight + NextColumnKeptBits;
+
+                    for (j = 0; j < FullAdders; j = j + 1) begin : gen_full_adder
+                        wire x = column_bits[InOffset+3*j];
+                        wire y = column_bits[InOffset+3*j+1];
+                        wire z = column_bits[InOffset+3*j+2];
+
+                        assign column_bits[OutOffset+j] = x ^ y ^ z;
+
+                        // The carries out of the most significant column are dropped
+                        if (c + 1 < ProductWidth) begin : gen_carry
+                            assign column_bits[CarryOffset+j] = (x & y) | (x & z) | (y & z);
+                        end
+                    end
+
+                    for (j = 0; j < HalfAdders; j = j + 1) begin : gen_half_adder
+                        wire x = column_bits[InOffset+3*FullAdders+2*j];
+                        wire y = column_bits[InOffset+3*FullAdders+2*j+1];
+
+                        assign column_bits[OutOffset+FullAdders+j] = x ^ y;
+
+                        if (c + 1 < ProductWidth) begin : gen_carry
+                            assign column_bits[CarryOffset+FullAdders+j] = x & y;
+                        end
+                    end
+
+                    for (j = 3 * FullAdders + 2 * HalfAdders; j < Height; j = j + 1) begin : gen_kept_bit
+                        assign column_bits[OutOffset+j-2*FullAdders-HalfAdders] = column_bits[InOffset+j];
+                    end
+                end
+            end
+
+            //
+            // Carry-propagate addition of the two remaining rows
+            //
+
+            wire [ProductWidth-1:0] sum_row, carry_row;
+
+            for (c = 0; c < ProductWidth; c = c + 1) begin : gen_final_column
+                localparam int Height = Heights[(Stages*ProductWidth+c)*CountWidth+:CountWidth];
+
+                if (Height > 0) begin : gen_sum
+                    assign sum_row[c] = column_bits[(Stages*ProductWidth+c)*MaxHeight];
+                end else begin : gen_no_sum
+                    assign sum_row[c] = 1'b0;
+                end
+
+                if (Height > 1) begin : gen_carry
+                    assign carry_row[c] = column_bits[(Stages*ProductWidth+c)*MaxHeight+1];
+                end else begin : gen_no_carry
+                    assign carry_row[c] = 1'b0;
+                end
+            end
+
+            assign product = sum_row + carry_row;
+        end else begin : gen_behavioral
+            assign product = a * b;
+        end
+    endgenerate
+
+endmodule
+
+`endif
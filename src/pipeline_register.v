@@ -0,0 +1,50 @@
+`ifndef __PIPELINE_REGISTER_V__
+`define __PIPELINE_REGISTER_V__
+
+module pipeline_register #(
+    parameter int WIDTH = 8,
+    parameter int ENABLE = 1  // 0: combinational pass-through, 1: register with valid/ready handshake
+) (
+    input clk,
+    input reset,
+
+    input in_valid,
+    output in_ready,
+    input [WIDTH-1:0] in_data,
+
+    output out_valid,
+    input out_ready,
+    output [WIDTH-1:0] out_data
+);
+
+    generate
+        if (ENABLE == 1) begin : gen_register
+            reg valid;
+            reg [WIDTH-1:0] data;
+
+            // New data can be accepted when the register is empty or when its data is taken in the same cycle
+            assign in_ready = !valid || out_ready;
+            assign out_valid = valid;
+            assign out_data = data;
+
+            always_ff @(posedge clk) begin
+                if (reset) begin
+                    valid <= 1'b0;
+                end else if (in_ready) begin
+                    valid <= in_valid;
+                end
+
+                if (in_ready && in_valid) begin
+                    data <= in_data;
+                end
+            end
+        end else begin : gen_pass_through
+            assign in_ready = out_ready;
+            assign out_valid = in_valid;
+            assign out_data = in_data;
+        end
+    endgenerate
+
+endmodule
+
+`endif
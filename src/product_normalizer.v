@@ -0,0 +1,45 @@
+`ifndef __PRODUCT_NORMALIZER_V__
+`define __PRODUCT_NORMALIZER_V__
+
+// Normalizes the product of two mantissas (including their implicit leading bits) and detects underflow and
+// overflow. Shared by floating_point_multiplier and the lanes of floating_point_simd_multiplier.
+module product_normalizer #(
+    parameter int EXPONENT_WIDTH = 8,
+    parameter int MANTISSA_WIDTH = 23
+) (
+    input [(MANTISSA_WIDTH+1)*2-1:0] a_mul_b_mantissa,
+    // Sum of the exponents minus the bias
+    input signed [EXPONENT_WIDTH+2-1:0] a_mul_b_exponent,
+
+    output reg is_underflow,
+    output reg is_overflow,
+    output reg [EXPONENT_WIDTH-1:0] non_rounded_exponent,
+    output reg [MANTISSA_WIDTH-1:0] non_rounded_mantissa,
+    output reg [MANTISSA_WIDTH+1-1:0] additional_mantissa_bits
+);
+
+    reg leading_one_is_MSB;
+
+    always_comb begin
+        leading_one_is_MSB = a_mul_b_mantissa[(MANTISSA_WIDTH+1)*2-1];
+
+        // If the exponent is negative (first condition), the number is out of the IEEE 754
+        // single precision normalized numbers range; in this case the output is signaled to 0
+        // and an underflow flag is asserted. In the second case, the exponent is zero and it
+        // cannot be compensated by normalization, so there is also an underflow.
+        is_underflow = a_mul_b_exponent < 0 || (a_mul_b_exponent[EXPONENT_WIDTH+1-1:0] == 0 && leading_one_is_MSB == 1'b0);
+
+        // If overflow is detected. Overflow is present when the resulting exponent is equal to
+        // or larger than 111...111 (all ones value with the same width as the exponent). For FP32,
+        // this value is 255. Overflow can also occur when the exponent is equal to 111...110 and
+        // +1 will be done for normalization, leading to 111...111: again, overflow.
+        is_overflow = a_mul_b_exponent[EXPONENT_WIDTH+1-1:0] >= {EXPONENT_WIDTH{1'b1}} || (a_mul_b_exponent[EXPONENT_WIDTH-1:0] == ({EXPONENT_WIDTH{1'b1}} - 1) && leading_one_is_MSB);
+
+        non_rounded_exponent = a_mul_b_exponent[EXPONENT_WIDTH-1:0] + (leading_one_is_MSB ? 1 : 0);
+        non_rounded_mantissa = leading_one_is_MSB ? a_mul_b_mantissa[2*MANTISSA_WIDTH:MANTISSA_WIDTH+1] : a_mul_b_mantissa[2*MANTISSA_WIDTH-1:MANTISSA_WIDTH];
+        additional_mantissa_bits = leading_one_is_MSB ? a_mul_b_mantissa[MANTISSA_WIDTH:0] : a_mul_b_mantissa[MANTISSA_WIDTH-1:0] << 1;
+    end
+
+endmodule
+
+`endif
@@ -0,0 +1,101 @@
+`ifndef __PRODUCT_SPECIAL_CASES_V__
+`define __PRODUCT_SPECIAL_CASES_V__
+
+`include "is_special_float.v"
+
+// Handles the products that are not computed by multiplying the mantissas: NaN, infinite and zero operands.
+// Shared by floating_point_multiplier and the lanes of floating_point_simd_multiplier.
+module product_special_cases #(
+    parameter int EXPONENT_WIDTH = 8,
+    parameter int MANTISSA_WIDTH = 23,
+    parameter int IGNORE_SIGN_BIT_FOR_NAN = 1,
+    localparam int FloatBitWidth = EXPONENT_WIDTH + MANTISSA_WIDTH + 1
+) (
+    input [FloatBitWidth-1:0] a,
+    input [FloatBitWidth-1:0] b,
+
+    output reg is_special_result,
+    output reg [FloatBitWidth-1:0] special_out,
+    output reg special_overflow_flag,
+    output reg special_invalid_operation_flag
+);
+
+    wire is_E4M3 = EXPONENT_WIDTH == 4 && MANTISSA_WIDTH == 3;
+
+    // TODO: figure out how to support NaN for E2M3, E3M2 and E2M1 formats,
+    // which all do not have NaNs defined.
+
+    // Special pre-defined values. {MANTISSA_WIDTH-1{...}} could also have been {MANTISSA_WIDTH-1{1'bX}}
+    // but like this it explicitly supports the E4M3 variant.
+    wire [FloatBitWidth-1:0] quiet_nan = {1'b1, {EXPONENT_WIDTH{1'b1}}, 1'b1, {(MANTISSA_WIDTH - 1) {is_E4M3 ? 1'b1 : 1'b0}}};
+
+    wire out_sign = a[FloatBitWidth-1] ^ b[FloatBitWidth-1];
+
+    // Find special float values
+
+    wire is_a_infinite, is_b_infinite;
+    wire is_a_zero, is_b_zero;
+    wire is_signaling_nan_a, is_signaling_nan_b;
+    wire is_quiet_nan_a, is_quiet_nan_b;
+
+    is_special_float #(
+        .EXPONENT_WIDTH(EXPONENT_WIDTH),
+        .MANTISSA_WIDTH(MANTISSA_WIDTH),
+        .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
+    ) is_special_float_a (
+        .a(a),
+        .is_infinite(is_a_infinite),
+        .is_zero(is_a_zero),
+        .is_signaling_nan(is_signaling_nan_a),
+        .is_quiet_nan(is_quiet_nan_a),
+        .is_subnormal()
+    );
+
+    is_special_float #(
+        .EXPONENT_WIDTH(EXPONENT_WIDTH),
+        .MANTISSA_WIDTH(MANTISSA_WIDTH),
+        .IGNORE_SIGN_BIT_FOR_NAN(IGNORE_SIGN_BIT_FOR_NAN)
+    ) is_special_float_b (
+        .a(b),
+        .is_infinite(is_b_infinite),
+        .is_zero(is_b_zero),
+        .is_signaling_nan(is_signaling_nan_b),
+        .is_quiet_nan(is_quiet_nan_b),
+        .is_subnormal()
+    );
+
+    always_comb begin
+        is_special_result = 1'b1;
+        special_out = quiet_nan;
+        special_overflow_flag = 1'b0;
+        special_invalid_operation_flag = 1'b0;
+
+        if (is_signaling_nan_a || is_signaling_nan_b || is_quiet_nan_a || is_quiet_nan_b) begin
+            // Result is QNaN due to one or both of the operands being NaN, which like every NaN result raises the
+            // invalid operation flag
+
+            special_invalid_operation_flag = 1'b1;
+        end else if ((is_a_zero && is_b_infinite) || (is_b_zero && is_a_infinite)) begin
+            // Result is QNaN due to one of the operands being zero and the other being infinite
+
+            special_invalid_operation_flag = 1'b1;
+        end else if (is_a_infinite || is_b_infinite) begin
+            // An infinity times a finite non-zero number or an infinity is an infinity
+
+            special_out = {out_sign, {EXPONENT_WIDTH{1'b1}}, {MANTISSA_WIDTH{1'b0}}};
+
+            special_overflow_flag = 1'b1;
+        end else if (is_a_zero || is_b_zero) begin
+            // A zero times a finite number is an (exact) zero, so it does not underflow
+
+            special_out = {out_sign, {EXPONENT_WIDTH{1'b0}}, {MANTISSA_WIDTH{1'b0}}};
+        end else begin
+            // Result is computed by multiplying the mantissas
+
+            is_special_result = 1'b0;
+        end
+    end
+
+endmodule
+
+`endif
@@ -0,0 +1,38 @@
+`ifndef __SEGMENTED_MULTIPLIER_V__
+`define __SEGMENTED_MULTIPLIER_V__
+
+module segmented_multiplier #(
+    parameter int WIDTH = 24  // Must be a multiple of 4
+) (
+    // 0: one WIDTH bits multiplication, 1: two of WIDTH / 2 bits, 2: four of WIDTH / 4 bits. Segment i of a and
+    // b (bits [i*SegmentWidth+:SegmentWidth]) is multiplied into segment i of the product (bits
+    // [2*i*SegmentWidth+:2*SegmentWidth]).
+    input [1:0] segments_log2,
+    input [WIDTH-1:0] a,
+    input [WIDTH-1:0] b,
+    output reg [2*WIDTH-1:0] product
+);
+
+    // All partial products of a WIDTH x WIDTH multiplication are summed, except for the ones of which the bits
+    // of a and b are in different segments, as these would end up in the product segment of another lane.
+    // Only the partial products are masked, so all segments share the same adder tree.
+
+    reg [WIDTH-1:0] partial_product;
+
+    integer i, j;
+
+    always_comb begin
+        product = '0;
+
+        for (j = 0; j < WIDTH; j = j + 1) begin
+            for (i = 0; i < WIDTH; i = i + 1) begin
+                partial_product[i] = a[i] && b[j] && (segments_log2 == 0 || (segments_log2 == 1 && i / (WIDTH / 2) == j / (WIDTH / 2)) || (segments_log2 == 2 && i / (WIDTH / 4) == j / (WIDTH / 4)));
+            end
+
+            product = product + ({{WIDTH{1'b0}}, partial_product} << j);
+        end
+    end
+
+endmodule
+
+`endif
@@ -0,0 +1,54 @@
+`ifndef __SEGMENTED_SHIFTER_V__
+`define __SEGMENTED_SHIFTER_V__
+
+module segmented_shifter #(
+    parameter int WIDTH = 48,  // Must be a multiple of 4
+    parameter int AMOUNT_WIDTH = 6,
+    parameter int LEFT = 0  // 0: shift right, 1: shift left
+) (
+    // 0: one segment of WIDTH bits, 1: two of WIDTH / 2 bits, 2: four of WIDTH / 4 bits. Every segment is
+    // shifted by its own amount, and is filled with zeroes.
+    input [1:0] segments_log2,
+    input [WIDTH-1:0] value,
+    input [4*AMOUNT_WIDTH-1:0] amounts,  // Amount of segment i: amounts[i*AMOUNT_WIDTH+:AMOUNT_WIDTH]
+    output [WIDTH-1:0] shifted
+);
+
+    // Logarithmic shifter: stage s shifts the segments of which bit s of the amount is set by 2^s bits. A bit
+    // that would come from another segment (or from outside of the value) is replaced by a zero.
+    wire [(AMOUNT_WIDTH+1)*WIDTH-1:0] stage_values;
+
+    assign stage_values[WIDTH-1:0] = value;
+
+    genvar s, p, f;
+
+    generate
+        for (s = 0; s < AMOUNT_WIDTH; s = s + 1) begin : gen_stage
+            for (p = 0; p < WIDTH; p = p + 1) begin : gen_bit
+                localparam int Source = LEFT == 1 ? p - (1 << s) : p + (1 << s);
+
+                // Shift enable and shifted bit of every segment size
+                wire [2:0] shift, source;
+
+                for (f = 0; f < 3; f = f + 1) begin : gen_segments
+                    localparam int SegmentWidth = WIDTH >> f;
+
+                    assign shift[f] = amounts[(p/SegmentWidth)*AMOUNT_WIDTH+s];
+
+                    if (Source >= 0 && Source < WIDTH && Source / SegmentWidth == p / SegmentWidth) begin : gen_source
+                        assign source[f] = stage_values[s*WIDTH+Source];
+                    end else begin : gen_zero
+                        assign source[f] = 1'b0;
+                    end
+                end
+
+                assign stage_values[(s+1)*WIDTH+p] = shift[segments_log2] ? source[segments_log2] : stage_values[s*WIDTH+p];
+            end
+        end
+    endgenerate
+
+    assign shifted = stage_values[AMOUNT_WIDTH*WIDTH+:WIDTH];
+
+endmodule
+
+`endif
@@ -0,0 +1,225 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+
+import cocotb
+from cocotb_test.simulator import Verilator
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / "sim_build" / "cache"
+DEFAULT_MAX_CACHE_SIZE = 4 * 1024 ** 3  # 4 GiB
+
+# Written into a build directory once Verilator and make have both finished successfully,
+# so that interrupted or failed builds are never reused
+BUILD_COMPLETE_MARKER = ".build_complete"
+
+INCLUDE_PATTERN = re.compile(r'^\s*`include\s+"([^"]+)"', re.MULTILINE)
+
+
+def get_transitive_sources(sources: List[str], include_dirs: Optional[List[str]] = None) -> List[Path]:
+    """Returns the given sources together with all files they (transitively) `include."""
+
+    include_dirs = [Path(d).resolve() for d in include_dirs or []]
+    found = []
+    to_visit = [Path(s).resolve() for s in sources]
+
+    while to_visit:
+        source = to_visit.pop()
+
+        if source in found:
+            continue
+
+        found.append(source)
+
+        for include in INCLUDE_PATTERN.findall(source.read_text()):
+            candidates = [directory / include for directory in [source.parent] + include_dirs]
+            existing = [c for c in candidates if c.is_file()]
+
+            if not existing:
+                raise FileNotFoundError(f"Could not find included file {include} (included from {source})")
+
+            to_visit.append(existing[0].resolve())
+
+    return sorted(found)
+
+
+def get_simulator_version(simulator: str) -> str:
+    try:
+        return subprocess.run([simulator, "--version"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def get_build_key(sources: List[Path], toplevel: str, parameters: Optional[dict], compile_args: List[str], simulator: str) -> str:
+    key = hashlib.sha256()
+
+    for source in sources:
+        key.update(source.name.encode())
+        key.update(hashlib.sha256(source.read_bytes()).digest())
+
+    description = {
+        "toplevel": toplevel,
+        "parameters": {str(name): str(value) for name, value in (parameters or {}).items()},
+        "compile_args": sorted(compile_args),
+        "simulator": simulator,
+        "simulator_version": get_simulator_version(simulator),
+        "cocotb_version": cocotb.__version__,
+    }
+
+    key.update(json.dumps(description, sort_keys=True).encode())
+
+    return key.hexdigest()[:32]
+
+
+def is_build_complete(build_dir: Path) -> bool:
+    return (Path(build_dir) / BUILD_COMPLETE_MARKER).is_file()
+
+
+def get_lock_file(build_dir: Path) -> Path:
+    return Path(build_dir).parent / f"{Path(build_dir).name}.lock"
+
+
+@contextmanager
+def build_lock(build_dir: Path, shared: bool = False):
+    """Inter-process lock on a build directory.
+
+    An exclusive lock is held while building, so that parallel runs never build the same model at once.
+    A shared lock is held while simulating, so that the build is not evicted while it is in use.
+    """
+
+    build_dir = Path(build_dir)
+    build_dir.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(get_lock_file(build_dir), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_directory_size(directory: Path) -> int:
+    return sum(f.stat().st_size for f in Path(directory).rglob("*") if f.is_file())
+
+
+def evict_builds(cache_dir: Path = DEFAULT_CACHE_DIR, max_size: int = DEFAULT_MAX_CACHE_SIZE, keep: Optional[Path] = None):
+    """Removes the least recently used builds until the cache is at most max_size bytes."""
+
+    cache_dir = Path(cache_dir)
+
+    if not cache_dir.is_dir():
+        return
+
+    builds = []
+
+    for build_dir in cache_dir.iterdir():
+        if not build_dir.is_dir():
+            continue
+
+        marker = build_dir / BUILD_COMPLETE_MARKER
+        last_used = marker.stat().st_mtime if marker.is_file() else build_dir.stat().st_mtime
+
+        builds.append((last_used, build_dir, get_directory_size(build_dir)))
+
+    total_size = sum(size for _, _, size in builds)
+
+    for _, build_dir, size in sorted(builds, key=lambda build: build[0]):
+        if total_size <= max_size:
+            break
+
+        if keep is not None and build_dir.resolve() == Path(keep).resolve():
+            continue
+
+        with open(get_lock_file(build_dir), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Build is being created or used by another process
+                continue
+
+            shutil.rmtree(build_dir, ignore_errors=True)
+            total_size -= size
+
+
+class CachedVerilator(Verilator):
+    """Verilator runner that skips Verilation and compilation when its sim_build directory already contains a complete build.
+
+    The simulation itself runs in work_dir and writes its results to results_file (if given), so that
+    several simulations can share one build directory at the same time.
+    """
+
+    def __init__(self, *argv, results_file: Optional[str] = None, **kwargs):
+        super().__init__(*argv, **kwargs)
+
+        self.results_file = None if results_file is None else os.path.abspath(results_file)
+
+    def run(self):
+        __tracebackhide__ = True  # Hide the traceback when using PyTest.
+
+        if self.compile_only:
+            self.set_env()
+            self.execute(self.build_command())
+
+            return None
+
+        if self.results_file is None:
+            return super().run()
+
+        os.makedirs(os.path.dirname(self.results_file), exist_ok=True)
+
+        if os.path.isfile(self.results_file):
+            os.remove(self.results_file)
+
+        self.set_env()
+        self.env["COCOTB_RESULTS_FILE"] = self.results_file
+        self.execute(self.build_command())
+
+        if not os.path.isfile(self.results_file):
+            raise SystemExit("ERROR: Simulation terminated abnormally. Cocotb results file not found.")
+
+        failed = 0
+
+        for tc in ET.parse(self.results_file).iter("testcase"):
+            for _ in tc.iter("failure"):
+                self.logger.error(f'Failed: {tc.get("classname")}::{tc.get("name")}')
+                failed += 1
+
+        if failed:
+            raise SystemExit(f"FAILED {failed} tests.")
+
+        self.logger.info(f"Results file: {self.results_file}")
+
+        return self.results_file
+
+    def build_command(self):
+        cmd = super().build_command()
+
+        if is_build_complete(self.sim_dir):
+            self.logger.info(f"Reusing cached build: {self.sim_dir}")
+
+            # Drop the 'verilator' and 'make' commands, only run the existing model
+            return cmd[2:]
+
+        return cmd
+
+    def execute(self, cmds):
+        __tracebackhide__ = True  # Hide the traceback when using PyTest.
+
+        for cmd in cmds:
+            super().execute([cmd])
+
+            if cmd[0] == "make":
+                (Path(self.sim_dir) / BUILD_COMPLETE_MARKER).touch()
+
+        if is_build_complete(self.sim_dir):
+            # Mark as recently used for the eviction policy
+            os.utime(Path(self.sim_dir) / BUILD_COMPLETE_MARKER, (time.time(), time.time()))
@@ -0,0 +1,225 @@
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from build_cache import BUILD_COMPLETE_MARKER, DEFAULT_CACHE_DIR, DEFAULT_MAX_CACHE_SIZE, build_lock, evict_builds, get_build_key, get_transitive_sources, is_build_complete
+from lanes import MODULE_PORTS, WRAPPERS_DIR, get_parameter_lines, write_generated_file
+from performance import write_run_performance
+from utils import get_build_jobs, get_run_dir
+
+SOURCE_DIR = Path(__file__).resolve().parent / ".." / "src"
+
+# Number of vectors per simulator invocation. Larger regressions are split into chunks of this size,
+# which all reuse the same build.
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+BULK_COMPILE_ARGS = ["-Wno-WIDTHEXPAND", "-Wno-WIDTHTRUNC", "-Wno-UNOPTFLAT"]
+
+
+def get_bulk_testbench_name(module_name: str) -> str:
+    return f"{module_name}_bulk_tb"
+
+
+def generate_bulk_testbench(module_name: str) -> Path:
+    """Generates a self-contained testbench that reads the stimulus for every input port of the module
+    from <DIRECTORY>/<port>.hex with $readmemh, applies the first N_VECTORS vectors one by one and writes
+    every output port to <DIRECTORY>/<port>.hex with $writememh. DIRECTORY and N_VECTORS are plusargs.
+
+    Returns the path of the generated Verilog file."""
+
+    if module_name not in MODULE_PORTS:
+        raise ValueError(f"No bulk testbench can be generated for module {module_name}, supported modules are: {', '.join(MODULE_PORTS)}")
+
+    testbench_name = get_bulk_testbench_name(module_name)
+    ports = MODULE_PORTS[module_name]
+    all_ports = {**ports["inputs"], **ports["outputs"]}
+
+    def port_range(width):
+        return "" if width == "1" else f"[{width}-1:0] "
+
+    declaration_lines = []
+
+    for name, width in ports["inputs"].items():
+        declaration_lines.append(f"    reg {port_range(width)}{name};")
+
+    for name, width in ports["outputs"].items():
+        declaration_lines.append(f"    wire {port_range(width)}{name};")
+
+    for name, width in all_ports.items():
+        declaration_lines.append(f"    reg {port_range(width)}{name}_memory[0:MAX_VECTORS-1];")
+
+    guard = f"__{testbench_name.upper()}_V__"
+
+    verilog = "\n".join([
+        f"`ifndef {guard}",
+        f"`define {guard}",
+        "",
+        f"`include \"{module_name}.v\"",
+        "",
+        "// Generated by test/bulk.py, do not edit",
+        f"module {testbench_name} #(",
+        ",\n".join(get_parameter_lines(module_name, {"MAX_VECTORS": DEFAULT_CHUNK_SIZE})),
+        ");",
+        "",
+        *declaration_lines,
+        "",
+        "    string directory;",
+        "    integer n_vectors;",
+        "    integer i;",
+        "",
+        f"    {module_name} #(",
+        ",\n".join(f"        .{name}({name})" for name in ports["parameters"]),
+        "    ) dut (",
+        ",\n".join([f"        .{name}({name})" for name in all_ports] + [f"        .{name}({value})" for name, value in ports["tie_offs"].items()]),
+        "    );",
+        "",
+        "    initial begin",
+        "        if (!$value$plusargs(\"DIRECTORY=%s\", directory)) $fatal(1, \"Missing +DIRECTORY=<stimulus directory>\");",
+        "        if (!$value$plusargs(\"N_VECTORS=%d\", n_vectors)) $fatal(1, \"Missing +N_VECTORS=<number of vectors>\");",
+        "        if (n_vectors < 1 || n_vectors > MAX_VECTORS) $fatal(1, \"N_VECTORS must be between 1 and MAX_VECTORS\");",
+        "",
+        *[f"        $readmemh({{directory, \"/{name}.hex\"}}, {name}_memory, 0, n_vectors - 1);" for name in ports["inputs"]],
+        "",
+        "        for (i = 0; i < n_vectors; i = i + 1) begin",
+        *[f"            {name} = {name}_memory[i];" for name in ports["inputs"]],
+        "            #1;",
+        *[f"            {name}_memory[i] = {name};" for name in ports["outputs"]],
+        "        end",
+        "",
+        *[f"        $writememh({{directory, \"/{name}.hex\"}}, {name}_memory, 0, n_vectors - 1);" for name in ports["outputs"]],
+        "        $finish;",
+        "    end",
+        "",
+        "endmodule",
+        "",
+        "`endif",
+        "",
+    ])
+
+    return write_generated_file(WRAPPERS_DIR / f"{testbench_name}.v", verilog)
+
+
+def _get_build_configuration(module_name: str, parameters: Optional[dict], compile_args: Optional[List[str]], chunk_size: int, cache_dir: Path):
+    testbench_name = get_bulk_testbench_name(module_name)
+    testbench_file = generate_bulk_testbench(module_name)
+    parameters = {**(parameters or {}), "MAX_VECTORS": str(chunk_size)}
+    compile_args = BULK_COMPILE_ARGS + (compile_args or [])
+
+    sources = get_transitive_sources([str(testbench_file)], [str(SOURCE_DIR)])
+    build_dir = Path(cache_dir) / get_build_key(sources, testbench_name, parameters, compile_args, "verilator")
+
+    return testbench_name, testbench_file, parameters, compile_args, build_dir
+
+
+def get_bulk_build_dir(module_name: str, parameters: Optional[dict] = None, compile_args: Optional[List[str]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE, cache_dir: Path = DEFAULT_CACHE_DIR) -> Path:
+    """Returns the directory in the build cache of the bulk testbench of a module."""
+
+    return _get_build_configuration(module_name, parameters, compile_args, chunk_size, cache_dir)[-1]
+
+
+def build_bulk_testbench(module_name: str, parameters: Optional[dict] = None, compile_args: Optional[List[str]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE, cache_dir: Path = DEFAULT_CACHE_DIR) -> Path:
+    """Builds the bulk testbench of a module with Verilator (or reuses a cached build) and returns the simulation executable."""
+
+    testbench_name, testbench_file, parameters, compile_args, build_dir = _get_build_configuration(module_name, parameters, compile_args, chunk_size, cache_dir)
+
+    with build_lock(build_dir):
+        if not is_build_complete(build_dir):
+            # An explicit -j would override the one in $MAKEFLAGS
+            build_jobs = [] if "MAKEFLAGS" in os.environ else ["--build-jobs", str(get_build_jobs())]
+            subprocess.run(
+                ["verilator", "--binary", *build_jobs, "-Mdir", str(build_dir), "--top-module", testbench_name, "-o", testbench_name, f"+incdir+{SOURCE_DIR.resolve()}"]
+                + compile_args
+                + [f"-G{name}={value}" for name, value in parameters.items()]
+                + [str(testbench_file)],
+                check=True, stdout=subprocess.DEVNULL
+            )
+
+            (build_dir / BUILD_COMPLETE_MARKER).touch()
+
+    evict_builds(cache_dir, DEFAULT_MAX_CACHE_SIZE, keep=build_dir)
+
+    return build_dir / testbench_name
+
+
+def _as_words(values) -> np.ndarray:
+    # Ports wider than 64 bits are passed as object arrays of Python integers
+    values = np.asarray(values)
+
+    return values if values.dtype == object else values.astype(np.uint64)
+
+
+def write_memory_file(path: Path, values: np.ndarray):
+    path.write_text("\n".join(map("{:x}".format, _as_words(values).tolist())) + "\n")
+
+
+def read_memory_file(path: Path) -> np.ndarray:
+    lines = [line.strip() for line in path.read_text().splitlines()]
+    words = [line for line in lines if line and not line.startswith("//") and not line.startswith("@")]
+
+    try:
+        values = [int(word, 16) for word in words]
+    except ValueError:
+        raise ValueError(f"Response file {path} contains unknown (X/Z) values")
+
+    return np.array(values, dtype=object if any(value >> 64 for value in values) else np.uint64)
+
+
+def run_bulk_regression(module_name: str, inputs: Dict[str, np.ndarray], parameters: Optional[dict] = None, compile_args: Optional[List[str]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE, golden_model_time: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """Simulates all vectors in inputs (one array per input port) and returns the responses of every output port.
+    The time the caller spent in the golden model of these vectors (see performance.timed) is reported with the
+    performance of the run."""
+
+    build_start = time.time()
+    cached_build = is_build_complete(get_bulk_build_dir(module_name, parameters, compile_args, chunk_size))
+    executable = build_bulk_testbench(module_name, parameters, compile_args, chunk_size)
+    build_time = time.time() - build_start
+
+    ports = MODULE_PORTS[module_name]
+    total = len(next(iter(inputs.values())))
+    responses = {name: [] for name in ports["outputs"]}
+
+    run_dir = get_run_dir(get_bulk_testbench_name(module_name), parameters)
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    # Time spent in the simulator versus in writing the stimulus and reading the responses
+    simulation_start = time.time()
+    simulator_time = 0.0
+
+    with build_lock(executable.parent, shared=True):
+        for start in range(0, total, chunk_size):
+            stop = min(start + chunk_size, total)
+
+            with tempfile.TemporaryDirectory(prefix="chunk_", dir=run_dir) as directory:
+                for name in ports["inputs"]:
+                    write_memory_file(Path(directory) / f"{name}.hex", inputs[name][start:stop])
+
+                # The RTL may $display on every evaluation, which is not of interest here
+                chunk_start = time.time()
+                subprocess.run([str(executable), f"+DIRECTORY={directory}", f"+N_VECTORS={stop - start}"], check=True, stdout=subprocess.DEVNULL)
+                simulator_time += time.time() - chunk_start
+
+                for name in ports["outputs"]:
+                    responses[name].append(read_memory_file(Path(directory) / f"{name}.hex"))
+
+    simulation_time = time.time() - simulation_start
+    write_run_performance(run_dir, None, simulation_start, simulation_time, build_time, cached_build, {"vectors": total, "golden_model_time": golden_model_time, "simulator_time": simulator_time, "python_time": simulation_time - simulator_time})
+
+    return {name: np.concatenate(chunks) for name, chunks in responses.items()}
+
+
+def assert_responses(inputs: Dict[str, np.ndarray], responses: Dict[str, np.ndarray], expected: Dict[str, np.ndarray], module_name: str):
+    """Compares the responses with the expected values (only for the outputs present in expected) and reports the first mismatch."""
+
+    for name, values in expected.items():
+        mismatches = np.flatnonzero(responses[name] != _as_words(values))
+
+        if len(mismatches) > 0:
+            i = mismatches[0]
+            message = ", ".join(f"{n}={hex(int(v[i]))}" for n, v in inputs.items())
+
+            assert False, f"{module_name}: {name} is not correct for {message}: expected {hex(int(values[i]))}, got {hex(int(responses[name][i]))} ({len(mismatches)} of {len(values)} vectors mismatch)"
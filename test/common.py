@@ -1,3 +1,5 @@
+from typing import Optional
+
 import numpy as np
 
 
@@ -22,68 +24,407 @@ def is_IEEE_half_precision_float(dut):
     return False
 
 
-def get_bin_from_float(value, bits, flt, integer):
-    return f'{{:0{bits}b}}'.format(flt(value).view(integer).item())
+def assert_flags(dut, flags, message):
+    assert dut.underflow_flag.value == flags[0], f"Underflow flag is not correct for {message}"
+    assert dut.overflow_flag.value == flags[1], f"Overflow flag is not correct for {message}"
+    assert dut.invalid_operation_flag.value == flags[2], f"Invalid operation flag is not correct for {message}"
 
 
-def smallest_float_value_with_denormals(exponent_bits: int, mantissa_bits: int) -> float:
-    return 1/(2**mantissa_bits)*2**-(2**(exponent_bits-1)-2)
+# Vectorized golden model
+#
+# The functions below operate on NumPy arrays of raw float encodings (stored as uint64) for any
+# format with EXPONENT_WIDTH + MANTISSA_WIDTH + 1 <= 64 bits. All arithmetic is done exactly on the
+# integer significands, after which the result is rounded once, either to nearest (ties to even) or by
+# chopping the extra bits. Apart from the conversion in floats_to_bits, no floats or strings are involved.
+#
+# Conventions (matching the RTL):
+#   - NaN results are always the canonical quiet NaN of the library ({1, 1...1, 1, 0...0})
+#   - Results that are infinite (including infinite operands) raise the overflow flag
+#   - Results that are NaN raise the invalid operation flag
+#   - Results of which the exact value is non-zero but of which the rounded value is subnormal or zero
+#     raise the underflow flag. With flush_to_zero=True these results are also replaced by a signed zero.
+#   - Overflow always results in a (signed) infinity, also when chopping bits
 
+_GUARD_BITS = 3
 
-def get_bin_from_float_operation(a, b, op, bits, exponent_bits, mantissa_bits):
-    if bits == 32:
-        flt = np.float32
-        integer = np.uint32
-    elif bits == 64:
-        flt = np.float64
-        integer = np.uint64
-    elif bits == 16:
-        flt = np.float16
-        integer = np.uint16
-    else:
-        raise ValueError("Bits must be 32, 64, or 16")
-    
-    if op == '+':
-        result = flt(a) + flt(b)
-    elif op == '-':
-        result = flt(a) - flt(b)
-    elif op == '*':
-        result = flt(a) * flt(b)
-    else:
-        raise ValueError("Operation must be +, -, or *")
-    
-    a_bin = get_bin_from_float(a, bits, flt, integer)
-    b_bin = get_bin_from_float(b, bits, flt, integer)
-    result_bin = get_bin_from_float(result, bits, flt, integer)
-    
-    smallest_float = smallest_float_value_with_denormals(exponent_bits, mantissa_bits)
+# Relation of the exact result to the representable values around it, as returned with return_rounding_class=True.
+# The rounding class is independent of the rounding mode, and is "exact" for special (NaN and infinite) results.
+ROUNDING_CLASSES = ["exact", "below_half", "tie", "above_half"]
 
-    underflow_flag = False
-    overflow_flag = False
-    invalid_operation_flag = False
 
-    if result == np.inf or result == -np.inf:
-        overflow_flag = True
-    elif result == np.nan:
-        invalid_operation_flag = True
-    elif op == "*" and (a != 0.0 and b != 0 and result == 0):
-        underflow_flag = True
-    elif abs(result) <= smallest_float:
-        # TODO: this does not work for FP64, as Python uses 64-bit floats (on almost all systems)...
+def _as_uint64(values):
+    return np.asarray(values, dtype=np.uint64)
 
-        underflow_flag = True
 
-        if op == "*" and underflow_flag:
-            sign = int(a_bin[0]) ^ int(b_bin[0])
-            result_bin = f"{sign}{'0' * (bits - 1)}"
+def _bit_length(values):
+    values = _as_uint64(values).copy()
+    length = np.zeros(values.shape, dtype=np.int64)
 
-    return (a_bin, b_bin, result_bin), result, (underflow_flag, overflow_flag, invalid_operation_flag)
+    for shift in [32, 16, 8, 4, 2, 1]:
+        has_high_bits = values >= (np.uint64(1) << np.uint64(shift))
+        values = np.where(has_high_bits, values >> np.uint64(shift), values)
+        length += has_high_bits * shift
 
+    return length + (values != 0)
 
-def assert_flags(dut, flags, message):
-    assert dut.underflow_flag.value == flags[0], f"Underflow flag is not correct for {message}"
-    assert dut.overflow_flag.value == flags[1], f"Overflow flag is not correct for {message}"
-    assert dut.invalid_operation_flag.value == flags[2], f"Invalid operation flag is not correct for {message}"
 
+def _shift_left(values, amount):
+    amount = np.asarray(amount, dtype=np.int64)
+
+    return np.where(amount < 64, _as_uint64(values) << np.clip(amount, 0, 63).astype(np.uint64), np.uint64(0))
+
+
+def _shift_right(values, amount):
+    amount = np.asarray(amount, dtype=np.int64)
+
+    return np.where(amount < 64, _as_uint64(values) >> np.clip(amount, 0, 63).astype(np.uint64), np.uint64(0))
+
+
+def _low_bits_mask(amount):
+    amount = np.asarray(amount, dtype=np.int64)
+
+    return np.where(amount >= 64, np.uint64(0xFFFFFFFFFFFFFFFF), _shift_left(1, amount) - np.uint64(1))
+
+
+def _shift_right_jam(values, amount):
+    # Shift right while OR-ing all shifted out bits into the least significant bit (sticky bit)
+    values = _as_uint64(values)
+    sticky = (values & _low_bits_mask(amount)) != 0
+
+    return _shift_right(values, amount) | sticky.astype(np.uint64)
+
+
+def _multiply_128(a, b):
+    # Full 64 x 64 -> 128 bit multiplication, returned as (high, low) 64 bit words
+    low_mask = np.uint64(0xFFFFFFFF)
+    half = np.uint64(32)
+
+    a_low, a_high = a & low_mask, a >> half
+    b_low, b_high = b & low_mask, b >> half
+
+    low_low = a_low * b_low
+    low_high = a_low * b_high
+    high_low = a_high * b_low
+    high_high = a_high * b_high
+
+    middle = (low_low >> half) + (low_high & low_mask) + (high_low & low_mask)
+
+    low = (middle << half) | (low_low & low_mask)
+    high = high_high + (low_high >> half) + (high_low >> half) + (middle >> half)
+
+    return high, low
+
+
+def _check_float_format(exponent_bits: int, mantissa_bits: int):
+    if exponent_bits < 2 or mantissa_bits < 1:
+        raise ValueError("Exponent width must be at least 2 and mantissa width at least 1")
+
+    if exponent_bits + mantissa_bits + 1 > 64 or mantissa_bits + 1 + _GUARD_BITS + 1 > 64:
+        raise ValueError(f"Float format with exponent width {exponent_bits} and mantissa width {mantissa_bits} does not fit in 64 bits")
+
+
+def get_quiet_nan(exponent_bits: int, mantissa_bits: int) -> int:
+    return ((1 << (exponent_bits + 2)) - 1) << (mantissa_bits - 1)
+
+
+def unpack_floats(values, exponent_bits: int, mantissa_bits: int):
+    values = _as_uint64(values)
+
+    sign = (values >> np.uint64(exponent_bits + mantissa_bits)) & np.uint64(1)
+    exponent = ((values >> np.uint64(mantissa_bits)) & np.uint64((1 << exponent_bits) - 1)).astype(np.int64)
+    mantissa = values & np.uint64((1 << mantissa_bits) - 1)
+
+    return sign, exponent, mantissa
+
+
+def pack_floats(sign, exponent, mantissa, exponent_bits: int, mantissa_bits: int):
+    return (_as_uint64(sign) << np.uint64(exponent_bits + mantissa_bits)) | (np.asarray(exponent).astype(np.uint64) << np.uint64(mantissa_bits)) | _as_uint64(mantissa)
+
+
+def _decode_floats(values, exponent_bits: int, mantissa_bits: int):
+    # Returns the sign, the integer significand and the exponent of its least significant bit,
+    # such that abs(value) == significand * 2**lsb_exponent for finite values
+    sign, exponent, mantissa = unpack_floats(values, exponent_bits, mantissa_bits)
+    bias = (1 << (exponent_bits - 1)) - 1
+    exponent_ones = (1 << exponent_bits) - 1
+
+    significand = mantissa | ((exponent != 0).astype(np.uint64) << np.uint64(mantissa_bits))
+    lsb_exponent = np.maximum(exponent, 1) - bias - mantissa_bits
+
+    is_nan = (exponent == exponent_ones) & (mantissa != 0)
+    is_infinite = (exponent == exponent_ones) & (mantissa == 0)
+    is_zero = (exponent == 0) & (mantissa == 0)
+
+    return sign, significand, lsb_exponent, is_nan, is_infinite, is_zero
+
+
+def _round_and_pack(sign, significand, lsb_exponent, exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int, flush_to_zero: bool):
+    # Rounds the (non-negative) value significand * 2**lsb_exponent, of which the least significant
+    # bit may hold a sticky bit, to the given format. Returns the encodings, the underflow and overflow flags
+    # and the rounding class (an index into ROUNDING_CLASSES).
+    bias = (1 << (exponent_bits - 1)) - 1
+    exponent_ones = (1 << exponent_bits) - 1
+    infinity = np.uint64(exponent_ones << mantissa_bits)
+
+    significand = _as_uint64(significand)
+    length = _bit_length(significand)
+    is_exact_zero = significand == 0
+
+    # Either normalize to MANTISSA_WIDTH + 1 bits, or align to the smallest (subnormal) exponent
+    shift = np.maximum(length - (mantissa_bits + 1), (1 - bias - mantissa_bits) - lsb_exponent)
+
+    # Shifting out more bits than the significand has never causes rounding up
+    right_shift = np.clip(shift, 0, length + 1)
+    kept = np.where(shift > 0, _shift_right(significand, right_shift), _shift_left(significand, -shift))
+
+    remainder = significand & _low_bits_mask(right_shift)
+    halfway = _shift_left(1, right_shift - 1)
+    rounding_class = np.select([(shift <= 0) | (remainder == 0), remainder < halfway, remainder == halfway], [0, 1, 2], 3)
+
+    if round_to_nearest_ties_to_even:
+        round_up = (shift > 0) & ((remainder > halfway) | ((remainder == halfway) & ((kept & np.uint64(1)) == 1)))
+        kept = kept + round_up.astype(np.uint64)
+
+    # Adding the significand (including its implicit bit) to the exponent field lets a rounding carry
+    # propagate into the exponent, and turns subnormals that round up into normal numbers
+    exponent_field = lsb_exponent + shift + mantissa_bits + bias - 1
+    is_overflow = exponent_field >= exponent_ones
+    magnitude = (np.where(is_overflow, 0, exponent_field).astype(np.uint64) << np.uint64(mantissa_bits)) + kept
+
+    is_overflow = (is_overflow | (magnitude >= infinity)) & ~is_exact_zero
+    magnitude = np.where(is_overflow, infinity, magnitude)
+    magnitude = np.where(is_exact_zero, np.uint64(0), magnitude)
+
+    is_underflow = ~is_exact_zero & (magnitude < np.uint64(1 << mantissa_bits))
+
+    if flush_to_zero:
+        magnitude = np.where(is_underflow, np.uint64(0), magnitude)
+
+    out = (_as_uint64(sign) << np.uint64(exponent_bits + mantissa_bits)) | magnitude
+
+    return out, is_underflow, is_overflow, rounding_class
+
+
+def _finish_special_cases(out, underflow_flag, overflow_flag, is_nan, is_infinite, infinite_sign, exponent_bits: int, mantissa_bits: int):
+    exponent_ones = (1 << exponent_bits) - 1
+    infinity = (_as_uint64(infinite_sign) << np.uint64(exponent_bits + mantissa_bits)) | np.uint64(exponent_ones << mantissa_bits)
+
+    out = np.where(is_infinite, infinity, out)
+    out = np.where(is_nan, np.uint64(get_quiet_nan(exponent_bits, mantissa_bits)), out)
+
+    underflow_flag = underflow_flag & ~is_nan & ~is_infinite
+    overflow_flag = (overflow_flag | is_infinite) & ~is_nan
+    invalid_operation_flag = is_nan
+
+    return out, underflow_flag, overflow_flag, invalid_operation_flag
+
+
+def _with_rounding_class(results, rounding_class, is_special):
+    return (*results, np.where(is_special, 0, rounding_class))
+
+
+def float_add_reference(a, b, subtract, exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int = 1, flush_to_zero: bool = False, return_rounding_class: bool = False):
+    _check_float_format(exponent_bits, mantissa_bits)
+
+    a, b = np.broadcast_arrays(_as_uint64(a), _as_uint64(b))
+    subtract = np.broadcast_to(np.asarray(subtract, dtype=bool), a.shape)
+
+    a_sign, a_significand, a_lsb_exponent, a_is_nan, a_is_infinite, _ = _decode_floats(a, exponent_bits, mantissa_bits)
+    b_sign, b_significand, b_lsb_exponent, b_is_nan, b_is_infinite, _ = _decode_floats(b, exponent_bits, mantissa_bits)
+    b_sign = b_sign ^ subtract.astype(np.uint64)
+
+    # Order the operands on magnitude, such that x is the operand with the largest magnitude.
+    # Within a single format, a larger magnitude implies a larger or equal exponent.
+    a_is_larger = (a_lsb_exponent > b_lsb_exponent) | ((a_lsb_exponent == b_lsb_exponent) & (a_significand >= b_significand))
+
+    x_sign = np.where(a_is_larger, a_sign, b_sign)
+    y_sign = np.where(a_is_larger, b_sign, a_sign)
+    x_significand = np.where(a_is_larger, a_significand, b_significand) << np.uint64(_GUARD_BITS)
+    y_significand = np.where(a_is_larger, b_significand, a_significand) << np.uint64(_GUARD_BITS)
+    exponent_difference = np.abs(a_lsb_exponent - b_lsb_exponent)
+    lsb_exponent = np.maximum(a_lsb_exponent, b_lsb_exponent) - _GUARD_BITS
+
+    y_significand = _shift_right_jam(y_significand, np.minimum(exponent_difference, mantissa_bits + _GUARD_BITS + 2))
+
+    is_effective_subtraction = x_sign != y_sign
+    summed_significand = np.where(is_effective_subtraction, x_significand - y_significand, x_significand + y_significand)
+
+    # An exact zero is positive, unless both operands were negative (zeroes)
+    out_sign = np.where(summed_significand == 0, x_sign & y_sign, x_sign)
+
+    out, underflow_flag, overflow_flag, rounding_class = _round_and_pack(out_sign, summed_significand, lsb_exponent, exponent_bits, mantissa_bits, round_to_nearest_ties_to_even, flush_to_zero)
+
+    is_nan = a_is_nan | b_is_nan | (a_is_infinite & b_is_infinite & (a_sign != b_sign))
+    is_infinite = a_is_infinite | b_is_infinite
+
+    results = _finish_special_cases(out, underflow_flag, overflow_flag, is_nan, is_infinite, np.where(a_is_infinite, a_sign, b_sign), exponent_bits, mantissa_bits)
+
+    return _with_rounding_class(results, rounding_class, is_nan | is_infinite) if return_rounding_class else results
+
+
+def float_multiply_reference(a, b, exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int = 1, flush_to_zero: bool = False, return_rounding_class: bool = False):
+    _check_float_format(exponent_bits, mantissa_bits)
+
+    a, b = np.broadcast_arrays(_as_uint64(a), _as_uint64(b))
+
+    a_sign, a_significand, a_lsb_exponent, a_is_nan, a_is_infinite, a_is_zero = _decode_floats(a, exponent_bits, mantissa_bits)
+    b_sign, b_significand, b_lsb_exponent, b_is_nan, b_is_infinite, b_is_zero = _decode_floats(b, exponent_bits, mantissa_bits)
+    out_sign = a_sign ^ b_sign
+
+    # Exact 2 * (MANTISSA_WIDTH + 1) bit product, reduced to MANTISSA_WIDTH + 1 + _GUARD_BITS bits
+    # plus a sticky bit so that it fits into 64 bits again
+    high, low = _multiply_128(a_significand, b_significand)
+    high_length = _bit_length(high)
+    product_length = np.where(high_length > 0, high_length + 64, _bit_length(low))
+    shift = np.maximum(product_length - (mantissa_bits + 1 + _GUARD_BITS), 0)
+
+    high_part = np.where(shift > 64, _shift_right(high, shift - 64), _shift_left(high, 64 - shift))
+    high_part = np.where(shift == 0, np.uint64(0), high_part)
+    sticky = ((low & _low_bits_mask(shift)) != 0) | ((shift > 64) & ((high & _low_bits_mask(shift - 64)) != 0))
+    product = high_part | _shift_right(low, shift) | sticky.astype(np.uint64)
+
+    out, underflow_flag, overflow_flag, rounding_class = _round_and_pack(out_sign, product, a_lsb_exponent + b_lsb_exponent + shift, exponent_bits, mantissa_bits, round_to_nearest_ties_to_even, flush_to_zero)
+
+    is_nan = a_is_nan | b_is_nan | (a_is_infinite & b_is_zero) | (b_is_infinite & a_is_zero)
+    is_infinite = a_is_infinite | b_is_infinite
+
+    results = _finish_special_cases(out, underflow_flag, overflow_flag, is_nan, is_infinite, out_sign, exponent_bits, mantissa_bits)
+
+    return _with_rounding_class(results, rounding_class, is_nan | is_infinite) if return_rounding_class else results
+
+
+def is_unsupported_product(a, b, exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int = 1):
+    # The products for which floating_point_multiplier differs from float_multiply_reference with flush_to_zero:
+    # subnormal operands times a non-zero finite number, and products that only round up to the smallest normal
+    # number, which it flushes to zero as it detects tininess before rounding (these underflow when chopped)
+    a, b = np.broadcast_arrays(_as_uint64(a), _as_uint64(b))
+
+    def is_subnormal(values):
+        _, exponent, mantissa = unpack_floats(values, exponent_bits, mantissa_bits)
+        return (exponent == 0) & (mantissa != 0)
+
+    def is_finite_non_zero(values):
+        _, _, _, is_nan, is_infinite, is_zero = _decode_floats(values, exponent_bits, mantissa_bits)
+        return ~(is_nan | is_infinite | is_zero)
+
+    _, underflow_flag, _, _ = float_multiply_reference(a, b, exponent_bits, mantissa_bits, round_to_nearest_ties_to_even, flush_to_zero=True)
+    _, chopped_underflow_flag, _, _ = float_multiply_reference(a, b, exponent_bits, mantissa_bits, 0, flush_to_zero=True)
+
+    return (is_subnormal(a) & is_finite_non_zero(b)) | (is_subnormal(b) & is_finite_non_zero(a)) | (chopped_underflow_flag & ~underflow_flag)
+
+
+def float_fused_multiply_add_reference(a, b, c, exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int = 1, flush_to_zero: bool = False, return_rounding_class: bool = False):
+    # a * b + c, rounded once
+    _check_float_format(exponent_bits, mantissa_bits)
+
+    a, b, c = np.broadcast_arrays(_as_uint64(a), _as_uint64(b), _as_uint64(c))
+
+    a_sign, a_significand, a_lsb_exponent, a_is_nan, a_is_infinite, a_is_zero = _decode_floats(a, exponent_bits, mantissa_bits)
+    b_sign, b_significand, b_lsb_exponent, b_is_nan, b_is_infinite, b_is_zero = _decode_floats(b, exponent_bits, mantissa_bits)
+    c_sign, c_significand, c_lsb_exponent, c_is_nan, c_is_infinite, _ = _decode_floats(c, exponent_bits, mantissa_bits)
+    product_sign = a_sign ^ b_sign
+
+    # The exact sum can be thousands of bits wide (FP64), so it is computed with Python integers,
+    # on the least significant bit of either the product or the addend
+    product_lsb_exponent = a_lsb_exponent + b_lsb_exponent
+    lsb_exponent = np.minimum(product_lsb_exponent, c_lsb_exponent)
+
+    product = a_significand.astype(object) * b_significand.astype(object)
+    product = np.where(product_sign == 1, -product, product) << (product_lsb_exponent - lsb_exponent).astype(object)
+    addend = c_significand.astype(object)
+    addend = np.where(c_sign == 1, -addend, addend) << (c_lsb_exponent - lsb_exponent).astype(object)
+
+    summed = product + addend
+    magnitude = np.abs(summed)
+
+    # An exact zero is positive, unless both the product and the addend are negative
+    out_sign = np.where(summed == 0, product_sign & c_sign, (summed < 0).astype(np.uint64))
+
+    # Reduce to MANTISSA_WIDTH + 1 + _GUARD_BITS bits plus a sticky bit, so that it fits into 64 bits again
+    length = np.frompyfunc(int.bit_length, 1, 1)(magnitude).astype(np.int64)
+    shift = np.maximum(length - (mantissa_bits + 1 + _GUARD_BITS), 0).astype(object)
+    sticky = (magnitude & ((1 << shift) - 1)) != 0
+    significand = (magnitude >> shift).astype(np.uint64) | sticky.astype(np.uint64)
+
+    out, underflow_flag, overflow_flag, rounding_class = _round_and_pack(out_sign, significand, lsb_exponent + shift.astype(np.int64), exponent_bits, mantissa_bits, round_to_nearest_ties_to_even, flush_to_zero)
+
+    is_product_infinite = a_is_infinite | b_is_infinite
+    is_nan = a_is_nan | b_is_nan | c_is_nan | (a_is_infinite & b_is_zero) | (b_is_infinite & a_is_zero) | (is_product_infinite & c_is_infinite & (product_sign != c_sign))
+    is_infinite = is_product_infinite | c_is_infinite
+
+    results = _finish_special_cases(out, underflow_flag, overflow_flag, is_nan, is_infinite, np.where(is_product_infinite, product_sign, c_sign), exponent_bits, mantissa_bits)
+
+    return _with_rounding_class(results, rounding_class, is_nan | is_infinite) if return_rounding_class else results
+
+
+def float_dot_product_reference(a, b, exponent_bits: int, mantissa_bits: int, accumulator_exponent_bits: Optional[int] = None, accumulator_mantissa_bits: Optional[int] = None, round_to_nearest_ties_to_even: int = 1, flush_to_zero: bool = False):
+    # sum(a[..., i] * b[..., i]) over the last axis, computed exactly and rounded once to the accumulator
+    # format (the input format by default)
+    accumulator_exponent_bits = exponent_bits if accumulator_exponent_bits is None else accumulator_exponent_bits
+    accumulator_mantissa_bits = mantissa_bits if accumulator_mantissa_bits is None else accumulator_mantissa_bits
+
+    _check_float_format(exponent_bits, mantissa_bits)
+    _check_float_format(accumulator_exponent_bits, accumulator_mantissa_bits)
+
+    a, b = np.broadcast_arrays(_as_uint64(a), _as_uint64(b))
+
+    a_sign, a_significand, a_lsb_exponent, a_is_nan, a_is_infinite, a_is_zero = _decode_floats(a, exponent_bits, mantissa_bits)
+    b_sign, b_significand, b_lsb_exponent, b_is_nan, b_is_infinite, b_is_zero = _decode_floats(b, exponent_bits, mantissa_bits)
+    product_sign = a_sign ^ b_sign
+
+    # Like in float_fused_multiply_add_reference, the exact sum is computed with Python integers, on the least
+    # significant bit of the smallest product
+    product_lsb_exponent = a_lsb_exponent + b_lsb_exponent
+    lsb_exponent = np.min(product_lsb_exponent, axis=-1)
+
+    products = a_significand.astype(object) * b_significand.astype(object)
+    products = np.where(product_sign == 1, -products, products) << (product_lsb_exponent - lsb_exponent[..., None]).astype(object)
+
+    summed = products.sum(axis=-1)
+    magnitude = np.abs(summed)
+
+    # An exact zero is positive, unless all products are negative
+    out_sign = np.where(summed == 0, np.all(product_sign == 1, axis=-1), (summed < 0).astype(bool)).astype(np.uint64)
+
+    # Reduce to MANTISSA_WIDTH + 1 + _GUARD_BITS bits plus a sticky bit, so that it fits into 64 bits again
+    length = np.frompyfunc(int.bit_length, 1, 1)(magnitude).astype(np.int64)
+    shift = np.maximum(length - (accumulator_mantissa_bits + 1 + _GUARD_BITS), 0).astype(object)
+    sticky = (magnitude & ((1 << shift) - 1)) != 0
+    significand = (magnitude >> shift).astype(np.uint64) | sticky.astype(np.uint64)
+
+    out, underflow_flag, overflow_flag, _ = _round_and_pack(out_sign, significand, lsb_exponent + shift.astype(np.int64), accumulator_exponent_bits, accumulator_mantissa_bits, round_to_nearest_ties_to_even, flush_to_zero)
+
+    is_product_nan = a_is_nan | b_is_nan | (a_is_infinite & b_is_zero) | (b_is_infinite & a_is_zero)
+    is_product_infinite = (a_is_infinite | b_is_infinite) & ~is_product_nan
+    has_positive_infinity = np.any(is_product_infinite & (product_sign == 0), axis=-1)
+    has_negative_infinity = np.any(is_product_infinite & (product_sign == 1), axis=-1)
+
+    is_nan = np.any(is_product_nan, axis=-1) | (has_positive_infinity & has_negative_infinity)
+    is_infinite = has_positive_infinity | has_negative_infinity
+
+    return _finish_special_cases(out, underflow_flag, overflow_flag, is_nan, is_infinite, has_negative_infinity.astype(np.uint64), accumulator_exponent_bits, accumulator_mantissa_bits)
+
+
+def float_convert_reference(a, exponent_bits: int, mantissa_bits: int, out_exponent_bits: int, out_mantissa_bits: int, round_to_nearest_ties_to_even: int = 1, flush_to_zero: bool = False):
+    # a converted to the output format, rounded once
+    _check_float_format(exponent_bits, mantissa_bits)
+    _check_float_format(out_exponent_bits, out_mantissa_bits)
+
+    sign, significand, lsb_exponent, is_nan, is_infinite, _ = _decode_floats(_as_uint64(a), exponent_bits, mantissa_bits)
+
+    out, underflow_flag, overflow_flag, _ = _round_and_pack(sign, significand, lsb_exponent, out_exponent_bits, out_mantissa_bits, round_to_nearest_ties_to_even, flush_to_zero)
+
+    return _finish_special_cases(out, underflow_flag, overflow_flag, is_nan, is_infinite, sign, out_exponent_bits, out_mantissa_bits)
+
+
+def floats_to_bits(values, exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int = 1):
+    # Converts (Python or NumPy) floats to raw encodings of any format by rounding their exact FP64 value
+    _check_float_format(exponent_bits, mantissa_bits)
+
+    values = np.asarray(values, dtype=np.float64)
+    sign, significand, lsb_exponent, is_nan, is_infinite, _ = _decode_floats(values.view(np.uint64), 11, 52)
+
+    out, _, _, _ = _round_and_pack(sign, significand, lsb_exponent, exponent_bits, mantissa_bits, round_to_nearest_ties_to_even, False)
+    out, _, _, _ = _finish_special_cases(out, False, False, is_nan, is_infinite, sign, exponent_bits, mantissa_bits)
 
-print(smallest_float_value_with_denormals(8, 23))
\ No newline at end of file
+    return out
@@ -0,0 +1,25 @@
+import time
+
+from performance import PERFORMANCE_FILE_PATTERN, merge_performance
+from utils import RUNS_DIR, merge_results
+
+
+def pytest_sessionstart(session):
+    session.config._simulation_start_time = time.time()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # With pytest-xdist, only the controller process merges the results of all workers
+    if hasattr(session.config, "workerinput"):
+        return
+
+    start_time = session.config._simulation_start_time
+    results_files = [str(f) for f in RUNS_DIR.rglob("*results.xml") if f.stat().st_mtime >= start_time]
+
+    if results_files:
+        merge_results(sorted(results_files))
+
+    performance_files = [str(f) for f in RUNS_DIR.rglob(PERFORMANCE_FILE_PATTERN) if f.stat().st_mtime >= start_time]
+
+    if performance_files:
+        merge_performance(sorted(performance_files))
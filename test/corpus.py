@@ -0,0 +1,124 @@
+import fcntl
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+CORPUS_DIR = Path(__file__).resolve().parent / "sim_build" / "corpus"
+
+# Generated stimulus and expected responses, one directory of .npy files per key, which are memory mapped when reused
+GOLDEN_VECTORS_DIR = CORPUS_DIR / "golden"
+
+# Every vector that ever failed, per (test module, parameter set), which the simulations check before anything else
+REGRESSIONS_DIR = CORPUS_DIR / "regressions"
+
+# Sources of the golden models and the stimulus, of which every change invalidates the stored golden vectors
+GOLDEN_MODEL_SOURCES = [Path(__file__).resolve().parent / name for name in ["common.py", "stimulus.py"]]
+
+# Environment variable through which a simulation finds its regression corpus
+REGRESSION_CORPUS_FILE_ENV = "REGRESSION_CORPUS_FILE"
+
+
+def get_golden_vectors_key(module_name: str, exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int, generator: Callable, parameters: Optional[dict], seed: Optional[int]) -> str:
+    """Returns the key of a set of golden vectors. Besides the format, the name of the generator and the seed,
+    it holds a hash of the source of the generator, of its parameters (such as the number of vectors) and of the
+    golden model sources, so that the vectors are generated again whenever any of these changes."""
+
+    digest = hashlib.sha256(inspect.getsource(generator).encode())
+    digest.update(json.dumps(parameters or {}, sort_keys=True).encode())
+
+    for source in GOLDEN_MODEL_SOURCES:
+        digest.update(source.read_bytes())
+
+    return f"{module_name}/E{exponent_bits}M{mantissa_bits}_R{round_to_nearest_ties_to_even}/{generator.__name__}_{digest.hexdigest()[:16]}_seed{seed}"
+
+
+def load_golden_vectors(key: str, generate: Callable[[], Dict[str, np.ndarray]], corpus_dir: Path = GOLDEN_VECTORS_DIR) -> Dict[str, np.ndarray]:
+    """Returns the arrays stored under key (memory mapped, read only), or generates, stores and returns them
+    when they were not stored yet. Arrays of Python integers (ports wider than 64 bits) can not be stored."""
+
+    directory = Path(corpus_dir) / key
+
+    # The directory is only created by the rename below, so it is always complete
+    if directory.is_dir():
+        return {path.stem: np.load(path, mmap_mode="r") for path in sorted(directory.glob("*.npy"))}
+
+    arrays = {name: np.asarray(values) for name, values in generate().items()}
+
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    temporary_directory = Path(tempfile.mkdtemp(prefix=f".{directory.name}_", dir=directory.parent))
+
+    for name, values in arrays.items():
+        np.save(temporary_directory / f"{name}.npy", values, allow_pickle=False)
+
+    try:
+        temporary_directory.rename(directory)
+    except OSError:
+        # Another process stored the same vectors in the meantime
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+
+    return arrays
+
+
+def get_regression_corpus_file(module_name: str, parameters_name: str, corpus_dir: Path = REGRESSIONS_DIR) -> Path:
+    return Path(corpus_dir) / module_name / f"{parameters_name}.json"
+
+
+@contextmanager
+def _corpus_lock(corpus_file: Path):
+    # Simulations of the same module and parameter set (on different simulators) may add vectors at the same time
+    corpus_file.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(corpus_file.with_name(f"{corpus_file.name}.lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_regression_vectors(corpus_file: Optional[Path] = None) -> List[dict]:
+    """Returns the vectors in a regression corpus, by default the one of the running simulation."""
+
+    if corpus_file is None:
+        corpus_file = os.getenv(REGRESSION_CORPUS_FILE_ENV)
+
+    if corpus_file is None or not Path(corpus_file).is_file():
+        return []
+
+    return json.loads(Path(corpus_file).read_text())
+
+
+def add_regression_vectors(corpus_file: Path, vectors: List[dict]) -> int:
+    """Adds failing vectors (as recorded by waveforms.FailureRecorder) to a regression corpus, skipping the ones
+    with the same inputs as a vector that is already in it. Returns the number of vectors that were added."""
+
+    corpus_file = Path(corpus_file)
+
+    with _corpus_lock(corpus_file):
+        corpus = read_regression_vectors(corpus_file)
+        known_inputs = {json.dumps(vector["inputs"], sort_keys=True) for vector in corpus}
+        added = 0
+
+        for vector in vectors:
+            inputs = json.dumps(vector["inputs"], sort_keys=True)
+
+            if inputs not in known_inputs:
+                known_inputs.add(inputs)
+                corpus.append(vector)
+                added += 1
+
+        if added:
+            temporary_file = corpus_file.with_name(f".{corpus_file.name}.tmp")
+            temporary_file.write_text(json.dumps(corpus, indent=2) + "\n")
+            temporary_file.replace(corpus_file)
+
+    return added
@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from bulk import DEFAULT_CHUNK_SIZE, build_bulk_testbench, get_bulk_build_dir, run_bulk_regression
+from common import float_add_reference, float_fused_multiply_add_reference, float_multiply_reference, is_unsupported_product
+from lanes import MODULE_PORTS, write_generated_file
+from performance import timed
+from utils import get_parameters_name
+
+CHECKPOINTS_DIR = Path(__file__).resolve().parent / "sim_build" / "exhaustive"
+
+# Number of mismatches of which the details are stored per shard
+MAX_STORED_MISMATCHES = 64
+
+
+def _expected_adder(inputs, exp_bits, mant_bits, round_to_nearest):
+    out, underflow_flags, overflow_flags, invalid_operation_flags = float_add_reference(inputs["a"], inputs["b"], inputs["subtract"], exp_bits, mant_bits, round_to_nearest)
+
+    return {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags}, None
+
+
+def _expected_multiplier(inputs, exp_bits, mant_bits, round_to_nearest):
+    a, b = inputs["a"], inputs["b"]
+    out, underflow_flags, overflow_flags, invalid_operation_flags = float_multiply_reference(a, b, exp_bits, mant_bits, round_to_nearest, flush_to_zero=True)
+
+    # Subnormal operands and products that only round up to the smallest normal number are not supported
+    is_unsupported = is_unsupported_product(a, b, exp_bits, mant_bits, round_to_nearest)
+
+    return {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags}, ~is_unsupported
+
+
+def _expected_multiplier_adder(inputs, exp_bits, mant_bits, round_to_nearest):
+    out, underflow_flags, overflow_flags, invalid_operation_flags = float_fused_multiply_add_reference(inputs["a_1"], inputs["a_2"], inputs["b"], exp_bits, mant_bits, round_to_nearest)
+
+    return {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags}, None
+
+
+# Golden model per module, returning the expected value of every checked output and which vectors are supported by
+# the module (None if all are)
+EXPECTED_OUTPUTS = {
+    "floating_point_adder": _expected_adder,
+    "floating_point_multiplier": _expected_multiplier,
+    "floating_point_multiplier_adder": _expected_multiplier_adder,
+}
+
+
+def get_total_vectors(module_name: str, float_width: int) -> int:
+    """Returns the size of the complete input space of a module, where single bit inputs (such as subtract) are enumerated as well."""
+
+    input_widths = [float_width if width == "FloatBitWidth" else int(width) for width in MODULE_PORTS[module_name]["inputs"].values()]
+
+    return 1 << sum(input_widths)
+
+
+def get_shard_inputs(module_name: str, float_width: int, shard: int, shard_size: int) -> Dict[str, np.ndarray]:
+    """Returns the inputs of a shard. A vector index is split into the input ports, of which the last port holds the least significant bits."""
+
+    indices = np.arange(shard * shard_size, (shard + 1) * shard_size, dtype=np.uint64)
+    inputs = {}
+    shift = 0
+
+    for name, width in reversed(list(MODULE_PORTS[module_name]["inputs"].items())):
+        width = float_width if width == "FloatBitWidth" else int(width)
+        inputs[name] = (indices >> np.uint64(shift)) & np.uint64((1 << width) - 1)
+        shift += width
+
+    return dict(reversed(list(inputs.items())))
+
+
+def get_checkpoint_dir(module_name: str, parameters: dict, shard_size: int, checkpoints_dir: Path = CHECKPOINTS_DIR) -> Path:
+    # The checkpoints are only valid for the build they were simulated with, so changing the sources starts a new sweep
+    build_dir = get_bulk_build_dir(module_name, parameters, chunk_size=min(shard_size, DEFAULT_CHUNK_SIZE))
+
+    return Path(checkpoints_dir) / module_name / get_parameters_name({**parameters, "SHARD_SIZE": shard_size}) / build_dir.name
+
+
+def get_shard_file(checkpoint_dir: Path, shard: int) -> Path:
+    return checkpoint_dir / f"shard_{shard:08d}.json"
+
+
+def run_shard(module_name: str, parameters: dict, shard: int, shard_size: int, checkpoint_dir: Path) -> dict:
+    """Simulates all vectors of a shard, compares them with the golden model and checkpoints the outcome."""
+
+    exp_bits = int(parameters["EXPONENT_WIDTH"])
+    mant_bits = int(parameters["MANTISSA_WIDTH"])
+    round_to_nearest = int(parameters.get("ROUND_TO_NEAREST_TIES_TO_EVEN", 1))
+
+    inputs = get_shard_inputs(module_name, exp_bits + mant_bits + 1, shard, shard_size)
+    (expected, is_supported), golden_model_time = timed(EXPECTED_OUTPUTS[module_name], inputs, exp_bits, mant_bits, round_to_nearest)
+    responses = run_bulk_regression(module_name, inputs, parameters, chunk_size=min(shard_size, DEFAULT_CHUNK_SIZE), golden_model_time=golden_model_time)
+
+    is_supported = np.ones(shard_size, dtype=bool) if is_supported is None else is_supported
+    is_mismatch = np.zeros(shard_size, dtype=bool)
+
+    for name, values in expected.items():
+        is_mismatch |= responses[name] != np.asarray(values, dtype=np.uint64)
+
+    # Known unsupported cases are simulated, but not compared
+    is_mismatch &= is_supported
+
+    mismatches = []
+
+    for i in np.flatnonzero(is_mismatch)[:MAX_STORED_MISMATCHES]:
+        mismatches.append({
+            "inputs": {name: hex(int(values[i])) for name, values in inputs.items()},
+            "expected": {name: hex(int(values[i])) for name, values in expected.items()},
+            "actual": {name: hex(int(responses[name][i])) for name in expected},
+        })
+
+    outcome = {"shard": shard, "vectors": shard_size, "unsupported_vectors": int(shard_size - is_supported.sum()), "mismatch_count": int(is_mismatch.sum()), "mismatches": mismatches}
+
+    # Only completed shards are checkpointed, so an interrupted sweep resumes with the unfinished shards
+    write_generated_file(get_shard_file(checkpoint_dir, shard), json.dumps(outcome, indent=2))
+
+    return outcome
+
+
+def _run_shard_job(arguments):
+    return run_shard(*arguments)
+
+
+def run_exhaustive(module_name: str, parameters: dict, shard_size: int = DEFAULT_CHUNK_SIZE, max_workers: Optional[int] = None, max_shards: Optional[int] = None, checkpoints_dir: Path = CHECKPOINTS_DIR) -> dict:
+    """Verifies a module for every possible input, split into deterministic shards that are run by a pool of
+    worker processes. Shards that were completed by an earlier (interrupted) run are not simulated again.
+
+    Returns a summary with the number of checked vectors and all checkpointed mismatches."""
+
+    if module_name not in EXPECTED_OUTPUTS:
+        raise ValueError(f"Exhaustive verification is not supported for module {module_name}, supported modules are: {', '.join(EXPECTED_OUTPUTS)}")
+
+    float_width = int(parameters["EXPONENT_WIDTH"]) + int(parameters["MANTISSA_WIDTH"]) + 1
+    total_vectors = get_total_vectors(module_name, float_width)
+    shard_size = min(shard_size, total_vectors)
+
+    if total_vectors % shard_size != 0:
+        raise ValueError("Shard size must be a power of two")
+
+    checkpoint_dir = get_checkpoint_dir(module_name, parameters, shard_size, checkpoints_dir)
+    shards = range(total_vectors // shard_size)
+    remaining = [shard for shard in shards if not get_shard_file(checkpoint_dir, shard).is_file()]
+
+    if max_shards is not None:
+        remaining = remaining[:max_shards]
+
+    if remaining:
+        # Build once before starting the workers, so that they do not all wait on the same build
+        build_bulk_testbench(module_name, parameters, chunk_size=min(shard_size, DEFAULT_CHUNK_SIZE))
+
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            list(executor.map(_run_shard_job, [(module_name, parameters, shard, shard_size, checkpoint_dir) for shard in remaining]))
+
+    outcomes = [json.loads(get_shard_file(checkpoint_dir, shard).read_text()) for shard in shards if get_shard_file(checkpoint_dir, shard).is_file()]
+
+    return {
+        "total_vectors": total_vectors,
+        "checked_vectors": sum(outcome["vectors"] for outcome in outcomes),
+        "unsupported_vectors": sum(outcome["unsupported_vectors"] for outcome in outcomes),
+        "completed_shards": len(outcomes),
+        "total_shards": len(shards),
+        "mismatch_count": sum(outcome["mismatch_count"] for outcome in outcomes),
+        "mismatches": [mismatch for outcome in outcomes for mismatch in outcome["mismatches"]],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exhaustively verify a floating point module for a small format, for example FP8 (E5M2) or FP16.")
+    parser.add_argument("module_name", choices=list(EXPECTED_OUTPUTS))
+    parser.add_argument("--exponent-width", type=int, required=True)
+    parser.add_argument("--mantissa-width", type=int, required=True)
+    parser.add_argument("--round-to-nearest-ties-to-even", type=int, default=1, choices=[0, 1])
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-shards", type=int, default=None, help="Only run this many (remaining) shards, to spread a sweep over several sessions")
+    args = parser.parse_args()
+
+    summary = run_exhaustive(args.module_name,
+                             {"EXPONENT_WIDTH": str(args.exponent_width), "MANTISSA_WIDTH": str(args.mantissa_width), "ROUND_TO_NEAREST_TIES_TO_EVEN": str(args.round_to_nearest_ties_to_even)},
+                             args.shard_size, args.workers, args.max_shards)
+
+    print(f"Checked {summary['checked_vectors']} of {summary['total_vectors']} vectors ({summary['completed_shards']}/{summary['total_shards']} shards), {summary['mismatch_count']} mismatches, {summary['unsupported_vectors']} unsupported vectors not compared")
+
+    for mismatch in summary["mismatches"][:10]:
+        print(mismatch)
@@ -0,0 +1,235 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from cocotb.triggers import Timer
+
+from performance import get_recorder
+
+WRAPPERS_DIR = Path(__file__).resolve().parent / "sim_build" / "wrappers"
+
+FLOAT_PARAMETERS = {
+    "EXPONENT_WIDTH": 8,
+    "MANTISSA_WIDTH": 23,
+    "ROUND_TO_NEAREST_TIES_TO_EVEN": 1,
+    "IGNORE_SIGN_BIT_FOR_NAN": 1,
+}
+
+FLAG_PORTS = {"underflow_flag": "1", "overflow_flag": "1", "invalid_operation_flag": "1"}
+
+# The SIMD modules have the lane formats of their half and quarter modes as extra parameters, and a flag bit per lane
+SIMD_PARAMETERS = {
+    "EXPONENT_WIDTH": 8,
+    "MANTISSA_WIDTH": 23,
+    "HALF_EXPONENT_WIDTH": 5,
+    "HALF_MANTISSA_WIDTH": 10,
+    "QUARTER_EXPONENT_WIDTH": 5,
+    "QUARTER_MANTISSA_WIDTH": 2,
+    "ROUND_TO_NEAREST_TIES_TO_EVEN": 1,
+    "IGNORE_SIGN_BIT_FOR_NAN": 1,
+}
+
+SIMD_FLAG_PORTS = {"underflow_flag": "4", "overflow_flag": "4", "invalid_operation_flag": "4"}
+
+# Clock and handshake ports of the (optionally pipelined) cores, which are tied off in the generated
+# wrappers as these always use the combinational version (PIPELINE_STAGES = 0)
+HANDSHAKE_TIE_OFFS = {"clk": "1'b0", "reset": "1'b0", "in_valid": "1'b1", "in_ready": "", "out_valid": "", "out_ready": "1'b1"}
+
+# Parameters (with their defaults) and ports of the modules that can be wrapped, with the port widths as
+# Verilog expressions. FloatBitWidth is available in modules that have the FLOAT_PARAMETERS.
+MODULE_PORTS = {
+    "floating_point_adder": {
+        "parameters": {**FLOAT_PARAMETERS, "LOD_ARCHITECTURE": 0},
+        "inputs": {"a": "FloatBitWidth", "b": "FloatBitWidth", "subtract": "1"},
+        "outputs": {"out": "FloatBitWidth", **FLAG_PORTS},
+        "tie_offs": HANDSHAKE_TIE_OFFS,
+    },
+    "floating_point_multiplier": {
+        "parameters": {**FLOAT_PARAMETERS, "MULTIPLIER_ARCHITECTURE": 0},
+        "inputs": {"a": "FloatBitWidth", "b": "FloatBitWidth"},
+        "outputs": {"out": "FloatBitWidth", **FLAG_PORTS},
+        "tie_offs": HANDSHAKE_TIE_OFFS,
+    },
+    "floating_point_conversion": {
+        "parameters": {**FLOAT_PARAMETERS, "OUT_EXPONENT_WIDTH": 5, "OUT_MANTISSA_WIDTH": 10},
+        "inputs": {"a": "FloatBitWidth"},
+        "outputs": {"out": "OUT_EXPONENT_WIDTH+OUT_MANTISSA_WIDTH+1", **FLAG_PORTS},
+        "tie_offs": {},
+    },
+    "floating_point_dot_product": {
+        "parameters": {**FLOAT_PARAMETERS, "N_INPUTS": 4, "ACCUMULATOR_EXPONENT_WIDTH": 8, "ACCUMULATOR_MANTISSA_WIDTH": 23},
+        "inputs": {"a": "N_INPUTS*FloatBitWidth", "b": "N_INPUTS*FloatBitWidth"},
+        "outputs": {"out": "ACCUMULATOR_EXPONENT_WIDTH+ACCUMULATOR_MANTISSA_WIDTH+1", **FLAG_PORTS},
+        "tie_offs": {},
+    },
+    "floating_point_multiplier_adder": {
+        "parameters": {**FLOAT_PARAMETERS, "LOD_ARCHITECTURE": 0},
+        "inputs": {"a_1": "FloatBitWidth", "a_2": "FloatBitWidth", "b": "FloatBitWidth"},
+        "outputs": {"out": "FloatBitWidth", **FLAG_PORTS},
+        "tie_offs": {},
+    },
+    "floating_point_simd_adder": {
+        "parameters": SIMD_PARAMETERS,
+        "inputs": {"format": "2", "a": "FloatBitWidth", "b": "FloatBitWidth", "subtract": "4"},
+        "outputs": {"out": "FloatBitWidth", **SIMD_FLAG_PORTS},
+        "tie_offs": {},
+    },
+    "floating_point_simd_multiplier": {
+        "parameters": SIMD_PARAMETERS,
+        "inputs": {"format": "2", "a": "FloatBitWidth", "b": "FloatBitWidth"},
+        "outputs": {"out": "FloatBitWidth", **SIMD_FLAG_PORTS},
+        "tie_offs": {},
+    },
+    "leading_one_detector": {
+        "parameters": {"WIDTH": 8, "ARCHITECTURE": 0},
+        "inputs": {"value": "WIDTH"},
+        "outputs": {"position": "$clog2(WIDTH)", "has_leading_one": "1"},
+        "tie_offs": {},
+    },
+    "mantissa_multiplier": {
+        "parameters": {"WIDTH": 24, "ARCHITECTURE": 0},
+        "inputs": {"a": "WIDTH", "b": "WIDTH"},
+        "outputs": {"product": "2*WIDTH"},
+        "tie_offs": {},
+    },
+}
+
+
+def get_parameter_lines(module_name: str, extra_parameters: Optional[Dict[str, object]] = None) -> List[str]:
+    """Returns the parameter declarations of a generated top level of the given module, without separators."""
+
+    parameters = {**MODULE_PORTS[module_name]["parameters"], **(extra_parameters or {})}
+    lines = [f"    parameter int {name} = {value}" for name, value in parameters.items()]
+
+    if "EXPONENT_WIDTH" in parameters:
+        lines.append("    localparam int FloatBitWidth = EXPONENT_WIDTH + MANTISSA_WIDTH + 1")
+
+    return lines
+
+
+def get_lanes_module_name(module_name: str) -> str:
+    return f"{module_name}_lanes"
+
+
+def generate_lanes_wrapper(module_name: str) -> Path:
+    """Generates a top level that instantiates LANES copies of the given module, of which all
+    ports are concatenated into wide buses (lane i occupies bits [i*width +: width]).
+
+    Returns the path of the generated Verilog file."""
+
+    if module_name not in MODULE_PORTS:
+        raise ValueError(f"No lane wrapper can be generated for module {module_name}, supported modules are: {', '.join(MODULE_PORTS)}")
+
+    wrapper_name = get_lanes_module_name(module_name)
+    ports = MODULE_PORTS[module_name]
+
+
+    def bus_range(width):
+        return "[LANES-1:0]" if width == "1" else f"[LANES*{width}-1:0]"
+
+    def lane_slice(width):
+        return "[i]" if width == "1" else f"[i*{width}+:{width}]"
+
+    port_lines = [f"    input {bus_range(width)} {name}" for name, width in ports["inputs"].items()]
+    port_lines += [f"    output {bus_range(width)} {name}" for name, width in ports["outputs"].items()]
+
+    connection_lines = [f"                .{name}({name}{lane_slice(width)})" for name, width in {**ports["inputs"], **ports["outputs"]}.items()]
+    connection_lines += [f"                .{name}({value})" for name, value in ports["tie_offs"].items()]
+
+    guard = f"__{wrapper_name.upper()}_V__"
+
+    verilog = "\n".join([
+        f"`ifndef {guard}",
+        f"`define {guard}",
+        "",
+        f"`include \"{module_name}.v\"",
+        "",
+        "// Generated by test/lanes.py, do not edit",
+        f"module {wrapper_name} #(",
+        ",\n".join(get_parameter_lines(module_name, {"LANES": 16})),
+        ") (",
+        ",\n".join(port_lines),
+        ");",
+        "",
+        "    genvar i;",
+        "",
+        "    generate",
+        "        for (i = 0; i < LANES; i = i + 1) begin : gen_lane",
+        f"            {module_name} #(",
+        ",\n".join(f"                .{name}({name})" for name in ports["parameters"]),
+        "            ) lane (",
+        ",\n".join(connection_lines),
+        "            );",
+        "        end",
+        "    endgenerate",
+        "",
+        "endmodule",
+        "",
+        "`endif",
+        "",
+    ])
+
+    return write_generated_file(WRAPPERS_DIR / f"{wrapper_name}.v", verilog)
+
+
+def write_generated_file(path: Path, contents: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write atomically, as parallel runs may generate the same file at the same time
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, suffix=path.suffix, delete=False) as f:
+        f.write(contents)
+
+    os.replace(f.name, path)
+
+    return path
+
+
+def pack_lanes(values, width: int) -> int:
+    packed = 0
+
+    for i, value in enumerate(np.asarray(values, dtype=np.uint64).tolist()):
+        packed |= value << (i * width)
+
+    return packed
+
+
+def unpack_lanes(packed: int, width: int, lanes: int):
+    mask = (1 << width) - 1
+
+    return np.array([(packed >> (i * width)) & mask for i in range(lanes)], dtype=np.uint64)
+
+
+async def check_lanes(dut, inputs: Dict[str, np.ndarray], expected: Dict[str, np.ndarray], widths: Optional[Dict[str, int]] = None):
+    """Drives all vectors in inputs through a lanes wrapper, LANES vectors per simulation step, and
+    compares the outputs with the expected values. Only the outputs present in expected are checked.
+
+    Ports that are not FloatBitWidth wide (such as flags and subtract) must be listed in widths."""
+
+    lanes = int(dut.LANES)
+    float_width = int(dut.EXPONENT_WIDTH) + int(dut.MANTISSA_WIDTH) + 1
+    widths = widths or {}
+    total = len(next(iter(inputs.values())))
+
+    for start in range(0, total, lanes):
+        stop = min(start + lanes, total)
+
+        for name, values in inputs.items():
+            # Unused lanes at the end of the last batch are driven with zeroes
+            chunk = np.zeros(lanes, dtype=np.uint64)
+            chunk[:stop - start] = values[start:stop]
+            getattr(dut, name).value = pack_lanes(chunk, widths.get(name, float_width))
+
+        with get_recorder().simulator(vectors=stop - start):
+            await Timer(1, units="ns")
+
+        for name, values in expected.items():
+            actual = unpack_lanes(getattr(dut, name).value.integer, widths.get(name, float_width), lanes)[:stop - start]
+            mismatches = np.flatnonzero(actual != np.asarray(values[start:stop], dtype=np.uint64))
+
+            if len(mismatches) > 0:
+                i = start + mismatches[0]
+                message = ", ".join(f"{n}={hex(int(v[i]))}" for n, v in inputs.items())
+
+                assert False, f"{name} is not correct for {message}: expected {hex(int(values[i]))}, got {hex(int(actual[mismatches[0]]))} ({len(mismatches)} mismatching lanes in this batch)"
@@ -0,0 +1,284 @@
+import argparse
+import atexit
+import json
+import os
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+RUNS_DIR = Path(__file__).resolve().parent / "sim_build" / "runs"
+MERGED_PERFORMANCE_FILE = Path(__file__).resolve().parent / "sim_build" / "performance.json"
+
+# Written next to results.xml in every run directory: by the simulation itself (vectors and the time spent
+# in the golden model and waiting on the simulator) and by the process that started it (everything else). The
+# latter is written per process (see get_performance_file), and all of them are merged into performance.json.
+SIMULATION_PERFORMANCE_FILE_NAME = "simulation_performance.json"
+PERFORMANCE_FILE_NAME = "performance.json"
+PERFORMANCE_FILE_PATTERN = "performance_*.json"
+
+# Relative change of a metric between two runs that is reported as a regression. Timings are noisy, so
+# this is a lot larger than the tolerance of the synthesis benchmark.
+DEFAULT_TOLERANCE = 0.2
+
+# Timings below this (in both runs) are ignored when comparing, as their relative changes are meaningless
+MIN_COMPARED_TIME = 0.5
+
+# Metrics that are compared between runs, with whether a higher value is better
+COMPARED_METRICS = {"vectors_per_second": True, "build_time": False, "startup_time": False}
+
+# The parts of a run that can be the bottleneck
+TIME_METRICS = ["build_time", "startup_time", "golden_model_time", "simulator_time", "python_time"]
+
+# Metrics that are added up when several processes simulated the same run
+SUMMED_METRICS = ["vectors", "simulation_time", "test_time", *TIME_METRICS]
+
+
+class SimulationRecorder:
+    """Accumulates, inside a cocotb simulation, the number of vectors that were applied, the time spent in the
+    golden model and the time spent waiting on the simulator. The totals are written when the simulation ends."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.vectors = 0
+        self.golden_model_time = 0.0
+        self.simulator_time = 0.0
+
+    @contextmanager
+    def golden_model(self):
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.golden_model_time += time.perf_counter() - start
+
+    @contextmanager
+    def simulator(self, vectors: int = 0):
+        """Times an await on the simulator, which applies the given number of vectors."""
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.simulator_time += time.perf_counter() - start
+            self.vectors += vectors
+
+    def save(self):
+        _write_atomically(self.path, json.dumps({"vectors": self.vectors, "golden_model_time": self.golden_model_time, "simulator_time": self.simulator_time}, indent=2) + "\n")
+
+
+def timed(function: Callable, *args, **kwargs) -> Tuple[Any, float]:
+    """Calls function and returns its result and the time it took, to time the golden model of a simulation that
+    does not use cocotb (see bulk.run_bulk_regression)."""
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+
+    return result, time.perf_counter() - start
+
+
+_recorder: Optional[SimulationRecorder] = None
+
+
+def get_recorder() -> SimulationRecorder:
+    """Returns the recorder of the running simulation, which writes its totals next to the cocotb results file."""
+
+    global _recorder
+
+    if _recorder is None:
+        results_file = os.getenv("COCOTB_RESULTS_FILE")
+        directory = Path(results_file).parent if results_file else Path.cwd()
+
+        _recorder = SimulationRecorder(directory / SIMULATION_PERFORMANCE_FILE_NAME)
+        atexit.register(_recorder.save)
+
+    return _recorder
+
+
+def get_performance_file(run_dir: Path) -> Path:
+    """Returns the performance file of this process in a run directory. Processes that simulate the same module
+    and parameters at the same time (pytest-xdist workers, or the shards of an exhaustive sweep) share the run
+    directory, so each of them writes its own file."""
+
+    return Path(run_dir) / PERFORMANCE_FILE_PATTERN.replace("*", str(os.getpid()))
+
+
+def _write_atomically(path: Path, contents: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, suffix=path.suffix, delete=False) as f:
+        f.write(contents)
+
+    os.replace(f.name, path)
+
+
+def _read_test_times(results_file: Path) -> dict:
+    if not results_file.is_file():
+        return {}
+
+    return {test_case.get("name"): float(test_case.get("time", 0)) for test_case in ET.parse(results_file).iter("testcase")}
+
+
+def write_run_performance(run_dir: Path, results_file: Optional[Path], simulation_start: float, simulation_time: float, build_time: Optional[float] = None, cached_build: Optional[bool] = None, measured: Optional[dict] = None) -> dict:
+    """Combines the timings measured around a simulation with the ones recorded inside it and writes them to
+    the performance file of this process in the run directory. simulation_start is a time.time() timestamp, to ignore the totals of
+    earlier simulations. The time outside of the tests is reported as startup time.
+
+    Simulations without cocotb (results_file is None) pass their vectors and timings in measured instead."""
+
+    test_times = _read_test_times(Path(results_file)) if results_file else {}
+    test_time = sum(test_times.values())
+
+    performance = {
+        "build_time": build_time,
+        "cached_build": cached_build,
+        "simulation_time": simulation_time,
+        "startup_time": max(simulation_time - test_time, 0.0) if test_times else None,
+        "test_time": test_time if test_times else None,
+        "tests": test_times,
+        "vectors": None,
+        "golden_model_time": None,
+        "simulator_time": None,
+        "python_time": None,
+        **(measured or {}),
+    }
+
+    simulation_performance_file = Path(results_file).parent / SIMULATION_PERFORMANCE_FILE_NAME if results_file else None
+
+    if simulation_performance_file and simulation_performance_file.is_file() and simulation_performance_file.stat().st_mtime >= simulation_start:
+        recorded = json.loads(simulation_performance_file.read_text())
+        performance.update(recorded)
+
+        # Driving the inputs and checking the outputs
+        performance["python_time"] = max(test_time - recorded["golden_model_time"] - recorded["simulator_time"], 0.0)
+
+    # Without tests, all vectors are applied during the simulation time
+    active_time = test_time if test_times else simulation_time
+    performance["vectors_per_second"] = performance["vectors"] / active_time if performance["vectors"] and active_time > 0 else None
+
+    _write_atomically(get_performance_file(run_dir), json.dumps(performance, indent=2) + "\n")
+
+    return performance
+
+
+def get_bottleneck(performance: dict) -> Optional[str]:
+    times = {metric: performance.get(metric) for metric in TIME_METRICS if performance.get(metric) is not None}
+
+    return max(times, key=times.get) if times else None
+
+
+def combine_performance(performances: List[dict]) -> dict:
+    """Combines the performance of several processes that simulated the same run: their vectors and times are
+    added up, and a build is only reported as cached when it was cached for all of them."""
+
+    if len(performances) == 1:
+        return performances[0]
+
+    combined = {"cached_build": all(performance.get("cached_build") for performance in performances), "tests": {}}
+
+    for metric in SUMMED_METRICS:
+        values = [performance[metric] for performance in performances if performance.get(metric) is not None]
+        combined[metric] = sum(values) if values else None
+
+    for performance in performances:
+        for test, test_time in performance.get("tests", {}).items():
+            combined["tests"][test] = combined["tests"].get(test, 0.0) + test_time
+
+    active_time = combined["test_time"] if combined["test_time"] else combined["simulation_time"]
+    combined["vectors_per_second"] = combined["vectors"] / active_time if combined["vectors"] and active_time else None
+
+    return combined
+
+
+def merge_performance(performance_files: List[str], output_file: Path = MERGED_PERFORMANCE_FILE) -> Path:
+    """Merges the performance files of several runs into a single report, keyed by module and parameter set."""
+
+    performances = {}
+
+    for performance_file in performance_files:
+        run_dir = Path(performance_file).resolve().parent
+        name = str(run_dir.relative_to(RUNS_DIR)) if run_dir.is_relative_to(RUNS_DIR) else str(run_dir)
+
+        performances.setdefault(name, []).append(json.loads(Path(performance_file).read_text()))
+
+    results = {name: combine_performance(performances[name]) for name in sorted(performances)}
+
+    output_file = Path(output_file)
+    _write_atomically(output_file, json.dumps({"results": results}, indent=2) + "\n")
+
+    return output_file
+
+
+def compare_runs(report: dict, reference: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[dict]:
+    """Returns all compared metrics that got more than tolerance (relative) worse with respect to the reference
+    run. Runs that are only in one of both reports are ignored, and so are builds that were cached in either."""
+
+    regressions = []
+
+    for name, result in report["results"].items():
+        if name not in reference["results"]:
+            continue
+
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            expected, actual = reference["results"][name].get(metric), result.get(metric)
+
+            if expected is None or actual is None:
+                continue
+
+            if metric == "build_time" and (result.get("cached_build") or reference["results"][name].get("cached_build")):
+                continue
+
+            if metric.endswith("_time") and max(expected, actual) < MIN_COMPARED_TIME:
+                continue
+
+            if (actual < expected * (1 - tolerance)) if higher_is_better else (actual > expected * (1 + tolerance)):
+                regressions.append({"run": name, "metric": metric, "reference": expected, "actual": actual})
+
+    return regressions
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return "-"
+
+    if isinstance(value, int):
+        return str(value)
+
+    return f"{value:.0f}" if value >= 100 else f"{value:.2f}"
+
+
+def format_report(report: dict) -> str:
+    columns = ["vectors", "vectors_per_second", *TIME_METRICS]
+    width = max([len(name) for name in report["results"]] + [len("run")])
+    lines = [f"{'run':<{width}} " + " ".join(f"{column:>18}" for column in columns) + "  bottleneck"]
+
+    for name, result in report["results"].items():
+        values = " ".join(f"{_format_value(result.get(column)):>18}" for column in columns)
+        lines.append(f"{name:<{width}} {values}  {get_bottleneck(result) or '-'}")
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the simulation performance of a test run and compare it with the one of an earlier run.")
+    parser.add_argument("report", type=Path, nargs="?", default=MERGED_PERFORMANCE_FILE, help="Merged performance report of a test run")
+    parser.add_argument("--reference", type=Path, default=None, help="Report of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Relative change of a metric that is reported as a regression")
+    args = parser.parse_args()
+
+    report = json.loads(args.report.read_text())
+
+    print(format_report(report))
+
+    if args.reference:
+        regressions = compare_runs(report, json.loads(args.reference.read_text()), args.tolerance)
+
+        for regression in regressions:
+            print(f"Regression in {regression['run']}: {regression['metric']} went from {_format_value(regression['reference'])} to {_format_value(regression['actual'])}")
+
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,93 @@
+import random
+from typing import Dict
+
+import cocotb
+import numpy as np
+from cocotb.clock import Clock
+from cocotb.triggers import FallingEdge, RisingEdge, Timer
+
+from performance import get_recorder
+
+CLOCK_PERIOD_NS = 10
+
+# Maximum number of cycles per operation before a stream is considered stuck
+MAX_CYCLES_PER_OPERATION = 100
+
+
+async def start_pipeline(dut):
+    """Starts the clock and resets a pipelined module. Returns at the first falling edge after the reset."""
+
+    cocotb.start_soon(Clock(dut.clk, CLOCK_PERIOD_NS, units="ns").start())
+
+    dut.reset.value = 1
+    dut.in_valid.value = 0
+    dut.out_ready.value = 0
+
+    for _ in range(2):
+        await RisingEdge(dut.clk)
+
+    dut.reset.value = 0
+
+    await FallingEdge(dut.clk)
+
+
+async def stream_operations(dut, inputs: Dict[str, np.ndarray], expected: Dict[str, np.ndarray], valid_probability: float = 1.0, ready_probability: float = 1.0, seed: int = 0) -> dict:
+    """Streams all operations in inputs through a module with a valid/ready handshake, at most one per
+    cycle, and checks that the results arrive in order and match expected. Inputs are driven at the falling
+    edge and the handshake is sampled just after, such that every transfer happens at the next rising edge.
+
+    With probabilities below 1, in_valid and out_ready are randomly deasserted to test stalls.
+    Returns the latency per operation (in cycles) and the throughput while results were coming out."""
+
+    rng = random.Random(seed)
+    total = len(next(iter(inputs.values())))
+
+    issue_cycles = []
+    result_cycles = []
+    cycle = 0
+
+    while len(result_cycles) < total:
+        assert cycle < MAX_CYCLES_PER_OPERATION * total, f"Pipeline is stuck after {len(issue_cycles)} issued and {len(result_cycles)} received operations"
+
+        results_before = len(result_cycles)
+
+        in_valid = len(issue_cycles) < total and rng.random() < valid_probability
+
+        if in_valid:
+            for name, values in inputs.items():
+                getattr(dut, name).value = int(values[len(issue_cycles)])
+
+        dut.in_valid.value = int(in_valid)
+        dut.out_ready.value = int(rng.random() < ready_probability)
+
+        with get_recorder().simulator():
+            await Timer(1, units="ns")
+
+        if in_valid and dut.in_ready.value == 1:
+            issue_cycles.append(cycle)
+
+        if dut.out_valid.value == 1 and dut.out_ready.value == 1:
+            i = len(result_cycles)
+
+            assert i < len(issue_cycles), "Result came out before its operation was issued"
+
+            for name, values in expected.items():
+                message = ", ".join(f"{n}={hex(int(v[i]))}" for n, v in inputs.items())
+
+                assert getattr(dut, name).value == int(values[i]), f"{name} is not correct for {message}: expected {hex(int(values[i]))}, got {hex(getattr(dut, name).value.integer)}"
+
+            result_cycles.append(cycle)
+
+        # Every operation is counted as a vector once its result came out
+        with get_recorder().simulator(vectors=len(result_cycles) - results_before):
+            await FallingEdge(dut.clk)
+
+        cycle += 1
+
+    latencies = np.array(result_cycles) - np.array(issue_cycles)
+
+    return {
+        "min_latency": int(latencies.min()),
+        "max_latency": int(latencies.max()),
+        "throughput": total / (result_cycles[-1] - result_cycles[0] + 1),
+    }
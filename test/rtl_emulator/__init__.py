@@ -0,0 +1,19 @@
+"""Bit-accurate software emulation of the RTL modules in src/.
+
+Every function mirrors the module with the same name, including its parameters, and operates on NumPy
+arrays of raw float encodings. Unlike the golden model in common.py, which follows IEEE 754, the emulator
+reproduces the exact behavior of the RTL, for example its handling of subnormal numbers, chopping and the
+special values of E4M3. Only NumPy is required.
+"""
+
+from .conversion import decode_floats, encode_floats
+from .floating_point_adder import floating_point_adder
+from .floating_point_conversion import floating_point_conversion
+from .floating_point_dot_product import floating_point_dot_product
+from .floating_point_multiplier import floating_point_multiplier
+from .floating_point_multiplier_adder import floating_point_multiplier_adder
+from .floating_point_simd_adder import floating_point_simd_adder
+from .floating_point_simd_multiplier import floating_point_simd_multiplier
+from .is_special_float import get_quiet_nan, is_special_float
+from .matmul import matmul
+from .result_rounder import result_rounder
@@ -0,0 +1,87 @@
+import numpy as np
+
+# Helpers for the datapath of the emulated modules. Datapaths that fit in 64 bits are emulated with
+# uint64 arrays; wider datapaths (for example the aligned mantissas of the FP64 adder) use object arrays
+# of Python integers, such that all arithmetic stays exact.
+
+
+def clog2(value: int) -> int:
+    """Same as $clog2 in Verilog, where $clog2(0) = 0."""
+
+    return max(value - 1, 0).bit_length()
+
+
+def is_wide(width: int) -> bool:
+    return width > 64
+
+
+def as_words(values, wide: bool):
+    values = np.asarray(values, dtype=np.uint64)
+
+    return values.astype(object) if wide else values
+
+
+def const(value: int, wide: bool):
+    return value if wide else np.uint64(value)
+
+
+def to_uint64(values):
+    return np.asarray(values).astype(np.uint64)
+
+
+def shift_left(values, amount, width: int, wide: bool):
+    """(values << amount) truncated to width bits, as when assigning a shift to a width bits wide reg."""
+
+    # Negative amounts only occur for lanes of which the result is discarded by np.where
+    amount = np.maximum(np.asarray(amount, dtype=np.int64), 0)
+    mask = (1 << width) - 1
+
+    if wide:
+        return (values << amount.astype(object)) & mask
+
+    shifted = values << np.clip(amount, 0, 63).astype(np.uint64)
+
+    return np.where(amount < 64, shifted & np.uint64(mask), np.uint64(0))
+
+
+def shift_right(values, amount, wide: bool):
+    amount = np.maximum(np.asarray(amount, dtype=np.int64), 0)
+
+    if wide:
+        return values >> amount.astype(object)
+
+    return np.where(amount < 64, values >> np.clip(amount, 0, 63).astype(np.uint64), np.uint64(0))
+
+
+def bit_length(values, wide: bool):
+    if wide:
+        return np.frompyfunc(int.bit_length, 1, 1)(values).astype(np.int64)
+
+    values = np.asarray(values, dtype=np.uint64).copy()
+    length = np.zeros(values.shape, dtype=np.int64)
+
+    for shift in [32, 16, 8, 4, 2, 1]:
+        has_high_bits = values >= (np.uint64(1) << np.uint64(shift))
+        values = np.where(has_high_bits, values >> np.uint64(shift), values)
+        length += has_high_bits * shift
+
+    return length + (values != 0)
+
+
+def unpack(values, exponent_width: int, mantissa_width: int):
+    """Splits raw float encodings into sign, exponent (both int64) and mantissa (uint64)."""
+
+    values = np.asarray(values, dtype=np.uint64)
+
+    sign = (values >> np.uint64(exponent_width + mantissa_width)).astype(np.int64) & 1
+    exponent = (values >> np.uint64(mantissa_width)).astype(np.int64) & ((1 << exponent_width) - 1)
+    mantissa = values & np.uint64((1 << mantissa_width) - 1)
+
+    return sign, exponent, mantissa
+
+
+def pack(sign, exponent, mantissa, exponent_width: int, mantissa_width: int):
+    sign = np.asarray(sign).astype(np.uint64)
+    exponent = np.asarray(exponent).astype(np.uint64)
+
+    return (sign << np.uint64(exponent_width + mantissa_width)) | (exponent << np.uint64(mantissa_width)) | to_uint64(mantissa)
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+def simd_lanes(lane_operation, format, lane_formats, a, b):
+    """Emulates the lanes of a SIMD module, of which the format is selected per value by format (0: one lane, 1: two
+    lanes, 2 or 3: four lanes). lane_formats holds the (exponent width, mantissa width) of the lanes of every format.
+
+    lane_operation(lane_a, lane_b, lane, exponent_width, mantissa_width) returns the results of a single lane, which
+    are packed into (out, underflow_flag, overflow_flag, invalid_operation_flag), where bit i of a flag belongs to
+    lane i."""
+
+    a, b, format = np.broadcast_arrays(np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64), np.asarray(format, dtype=np.int64))
+    segments_log2 = np.minimum(format, 2)
+
+    out = np.zeros(a.shape, dtype=np.uint64)
+    flags = [np.zeros(a.shape, dtype=np.uint64) for _ in range(3)]
+
+    for f, (exponent_width, mantissa_width) in enumerate(lane_formats):
+        width = exponent_width + mantissa_width + 1
+        mask = np.uint64((1 << width) - 1)
+        selected = segments_log2 == f
+
+        for lane in range(1 << f):
+            shift = np.uint64(lane * width)
+            lane_out, *lane_flags = lane_operation((a >> shift) & mask, (b >> shift) & mask, lane, exponent_width, mantissa_width)
+
+            out |= np.where(selected, np.asarray(lane_out, dtype=np.uint64) << shift, np.uint64(0))
+
+            for flag, lane_flag in zip(flags, lane_flags):
+                flag |= np.where(selected, np.asarray(lane_flag).astype(np.uint64) << np.uint64(lane), np.uint64(0))
+
+    return (out, *flags)
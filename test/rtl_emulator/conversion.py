@@ -0,0 +1,49 @@
+import numpy as np
+
+from ._bits import pack, unpack
+from .is_special_float import get_quiet_nan
+
+
+def encode_floats(values, exponent_width: int, mantissa_width: int):
+    """Rounds (to nearest, ties to even) NumPy floats to the raw encodings of a format with at most 11 exponent
+    and 52 mantissa bits. Values that are too large become infinite and NaNs become the quiet NaN of the modules."""
+
+    E, M = exponent_width, mantissa_width
+    bias = (1 << (E - 1)) - 1
+
+    values = np.asarray(values, dtype=np.float64)
+    sign = np.signbit(values).astype(np.int64)
+    magnitude = np.abs(np.where(np.isfinite(values), values, 0.0))
+
+    _, exponent = np.frexp(magnitude)
+    unbiased_exponent = np.maximum(exponent - 1, 1 - bias)
+
+    # Scaling by a power of two and rounding to an integer is exact, np.rint rounds ties to even
+    significand = np.rint(np.ldexp(magnitude, M - unbiased_exponent)).astype(np.int64)
+
+    carry = significand >> (M + 1)
+    significand >>= carry
+    unbiased_exponent = unbiased_exponent + carry
+
+    biased_exponent = np.where(significand >= (1 << M), unbiased_exponent + bias, 0)
+    is_infinite = np.isinf(values) | (biased_exponent >= (1 << E) - 1)
+
+    out = pack(sign, np.where(is_infinite, (1 << E) - 1, biased_exponent), np.where(is_infinite, 0, significand & ((1 << M) - 1)), E, M)
+
+    return np.where(np.isnan(values), np.uint64(get_quiet_nan(E, M)), out)
+
+
+def decode_floats(bits, exponent_width: int, mantissa_width: int):
+    """Converts raw encodings to float64 (exact for formats with at most 11 exponent and 52 mantissa bits).
+    All encodings with an all ones exponent are decoded as IEEE 754 infinities and NaNs."""
+
+    E, M = exponent_width, mantissa_width
+    bias = (1 << (E - 1)) - 1
+
+    sign, exponent, mantissa = unpack(bits, E, M)
+
+    significand = mantissa.astype(np.float64) + np.where(exponent != 0, float(1 << M), 0.0)
+    magnitude = np.ldexp(significand, np.maximum(exponent, 1) - bias - M)
+    magnitude = np.where(exponent == (1 << E) - 1, np.where(mantissa == 0, np.inf, np.nan), magnitude)
+
+    return np.where(sign == 1, -magnitude, magnitude)
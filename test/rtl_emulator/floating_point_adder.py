@@ -0,0 +1,107 @@
+import numpy as np
+
+from ._bits import as_words, bit_length, const, is_wide, pack, shift_left, shift_right, to_uint64, unpack
+from .is_special_float import get_quiet_nan, is_nan, is_special_float
+from .result_rounder import result_rounder
+
+
+def floating_point_adder(a, b, subtract, exponent_width: int = 8, mantissa_width: int = 23, round_to_nearest_ties_to_even: int = 1, ignore_sign_bit_for_nan: int = 1):
+    """Emulates floating_point_adder.v for arrays of raw float encodings.
+
+    Returns (out, underflow_flag, overflow_flag, invalid_operation_flag)."""
+
+    E, M = exponent_width, mantissa_width
+    rounding_bits = max(M, 3)
+    shifted_width = M + 1 + rounding_bits
+    summed_width = M + 2 + rounding_bits
+    wide = is_wide(summed_width + 1)
+
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64))
+    subtract = np.broadcast_to(np.asarray(subtract, dtype=np.int64), a.shape)
+
+    a_sign, a_exponent, a_mantissa = unpack(a, E, M)
+    temp_b_sign, b_exponent, b_mantissa = unpack(b, E, M)
+    b_sign = temp_b_sign ^ subtract
+
+    special_a = is_special_float(a, E, M, ignore_sign_bit_for_nan)
+    special_b = is_special_float(b, E, M, ignore_sign_bit_for_nan)
+
+    # Alignment; subnormal numbers have the exponent of the smallest normal numbers, but no implicit leading bit
+
+    a_implicit_leading_bit = (a_exponent != 0).astype(np.uint64)
+    b_implicit_leading_bit = (b_exponent != 0).astype(np.uint64)
+    a_exponent = np.maximum(a_exponent, 1)
+    b_exponent = np.maximum(b_exponent, 1)
+
+    exponent_difference = a_exponent - b_exponent
+    out_exponent = np.where(exponent_difference >= 0, a_exponent, b_exponent)
+
+    a_shifted_mantissa = shift_left(as_words((a_implicit_leading_bit << np.uint64(M)) | a_mantissa, wide), rounding_bits, summed_width, wide)
+    b_shifted_mantissa = shift_left(as_words((b_implicit_leading_bit << np.uint64(M)) | b_mantissa, wide), rounding_bits, summed_width, wide)
+
+    # The bits that are shifted out set the sticky bit (the least significant bit)
+    def align(mantissa, amount):
+        shifted = shift_right(mantissa, amount, wide)
+        sticky = (shift_left(shifted, amount, shifted_width, wide) != mantissa).astype(np.uint64)
+
+        return shifted | as_words(sticky, wide)
+
+    a_shifted_mantissa = np.where(exponent_difference < 0, align(a_shifted_mantissa, -exponent_difference), a_shifted_mantissa)
+    b_shifted_mantissa = np.where(exponent_difference > 0, align(b_shifted_mantissa, exponent_difference), b_shifted_mantissa)
+
+    # Summation; for operands with different signs, the first operand is the positive one
+
+    same_sign = a_sign == b_sign
+    first = np.where(a_sign == 1, b_shifted_mantissa, a_shifted_mantissa)
+    second = np.where(a_sign == 1, a_shifted_mantissa, b_shifted_mantissa)
+    is_negative = ~same_sign & (first < second)
+
+    positive_summed_mantissa = np.where(same_sign, a_shifted_mantissa + b_shifted_mantissa, np.where(is_negative, second - first, first - second))
+    out_sign = np.where(same_sign, a_sign, is_negative.astype(np.int64))
+
+    # Normalization; a subnormal result is only shifted up to the smallest normal exponent
+
+    has_leading_one = positive_summed_mantissa != const(0, wide)
+    leading_one_pos = np.maximum(bit_length(positive_summed_mantissa, wide) - 1, 0)
+
+    target_pos = M + rounding_bits
+    left_shift = np.minimum(target_pos - leading_one_pos, out_exponent - 1)
+    normalized_mantissa = np.where(leading_one_pos >= target_pos,
+                                   shift_right(positive_summed_mantissa, leading_one_pos - target_pos, wide),
+                                   shift_left(positive_summed_mantissa, np.maximum(left_shift, 0), summed_width, wide))
+
+    is_subnormal = (leading_one_pos < target_pos) & (target_pos - leading_one_pos >= out_exponent)
+    temp_exponent = np.where(is_subnormal | ~has_leading_one, 0, out_exponent + leading_one_pos - target_pos)
+
+    is_overflow = temp_exponent >= (1 << E) - 1
+
+    # Rounding
+
+    mantissa_mask = const((1 << M) - 1, wide)
+    non_rounded_mantissa = to_uint64(shift_right(normalized_mantissa, rounding_bits, wide) & mantissa_mask)
+    additional_mantissa_bits = to_uint64(normalized_mantissa & const((1 << rounding_bits) - 1, wide))
+
+    rounded_exponent, rounded_mantissa, rounded_overflow = result_rounder(temp_exponent & ((1 << E) - 1), non_rounded_mantissa, additional_mantissa_bits, E, M, round_to_nearest_ties_to_even, rounding_bits)
+
+    out_exponent = np.where(is_overflow, (1 << E) - 1, rounded_exponent)
+    out_mantissa = np.where(is_overflow, np.uint64(0), rounded_mantissa)
+
+    out = pack(out_sign, out_exponent, out_mantissa, E, M)
+    underflow = ~is_overflow & (temp_exponent == 0) & (non_rounded_mantissa != 0)
+    overflow = is_overflow | rounded_overflow
+
+    # Special cases, in reverse order of priority; every NaN result raises the invalid operation flag
+
+    is_infinite = special_a["is_infinite"] | special_b["is_infinite"]
+    is_infinite_difference = special_a["is_infinite"] & special_b["is_infinite"] & (a_sign != b_sign)
+
+    quiet_nan = np.uint64(get_quiet_nan(E, M))
+    infinity = pack(np.where(special_a["is_infinite"], a_sign, b_sign), (1 << E) - 1, 0, E, M)
+
+    is_invalid = is_nan(special_a) | is_nan(special_b) | is_infinite_difference
+
+    out = np.where(is_invalid, quiet_nan, np.where(is_infinite, infinity, out))
+    underflow = np.where(is_invalid | is_infinite, False, underflow)
+    overflow = np.where(is_invalid, False, np.where(is_infinite, True, overflow))
+
+    return out, underflow, overflow, is_invalid
@@ -0,0 +1,61 @@
+import numpy as np
+
+from ._bits import as_words, bit_length, const, is_wide, pack, shift_left, shift_right, to_uint64, unpack
+from .is_special_float import get_quiet_nan, is_E4M3, is_special_float
+from .result_rounder import result_rounder
+
+
+def floating_point_conversion(a, exponent_width: int = 8, mantissa_width: int = 23, out_exponent_width: int = 5, out_mantissa_width: int = 10, round_to_nearest_ties_to_even: int = 1, ignore_sign_bit_for_nan: int = 1):
+    """Emulates floating_point_conversion.v for arrays of raw float encodings.
+
+    Returns (out, underflow_flag, overflow_flag, invalid_operation_flag), with out in the output format."""
+
+    E, M, OE, OM = exponent_width, mantissa_width, out_exponent_width, out_mantissa_width
+    bias, out_bias = (1 << (E - 1)) - 1, (1 << (OE - 1)) - 1
+    max_exponent = (1 << OE) - 1 if is_E4M3(OE, OM) else (1 << OE) - 2
+
+    rounding_bits = max(M - OM, 0) + 2
+    aligned_width = OM + 1 + rounding_bits
+    wide = is_wide(aligned_width)
+
+    a = np.asarray(a, dtype=np.uint64)
+
+    sign, exponent, mantissa = unpack(a, E, M)
+    special = is_special_float(a, E, M, ignore_sign_bit_for_nan)
+
+    # Subnormal inputs are normalized
+    subnormal_shift = M + 1 - bit_length(mantissa, False)
+    significand = np.where(exponent != 0, mantissa | np.uint64(1 << M), shift_left(mantissa, subnormal_shift, M + 1, False))
+    out_biased_exponent = np.where(exponent != 0, exponent - bias, 1 - bias - subnormal_shift) + out_bias
+
+    aligned = shift_left(as_words(significand, wide), aligned_width - M - 1, aligned_width, wide)
+
+    subnormal_output_shift = np.where(out_biased_exponent > 0, 0, np.minimum(1 - out_biased_exponent, aligned_width))
+    shifted = shift_right(aligned, subnormal_output_shift, wide)
+    sticky = (shift_left(shifted, subnormal_output_shift, aligned_width, wide) != aligned).astype(bool)
+
+    non_rounded_exponent = np.where(out_biased_exponent > 0, out_biased_exponent & ((1 << (OE + 1)) - 1), 0)
+    non_rounded_mantissa = to_uint64((shifted >> const(rounding_bits, wide)) & const((1 << OM) - 1, wide))
+    additional_mantissa_bits = to_uint64(shifted & const((1 << rounding_bits) - 1, wide)) | sticky.astype(np.uint64)
+
+    rounded_exponent, rounded_mantissa, _ = result_rounder(non_rounded_exponent, non_rounded_mantissa, additional_mantissa_bits, OE + 1, OM, round_to_nearest_ties_to_even, rounding_bits)
+
+    is_overflow = (out_biased_exponent > max_exponent) | (rounded_exponent > max_exponent)
+
+    if is_E4M3(OE, OM):
+        is_overflow |= (rounded_exponent == max_exponent) & (rounded_mantissa == np.uint64((1 << OM) - 1))
+
+    # Special cases, in reverse order of priority
+
+    is_nan = special["is_signaling_nan"] | special["is_quiet_nan"]
+    is_zero = special["is_zero"]
+    is_infinite_result = ~is_nan & (special["is_infinite"] | (~is_zero & is_overflow))
+
+    out = pack(sign, rounded_exponent & ((1 << OE) - 1), rounded_mantissa, OE, OM)
+    out = np.where(is_zero, pack(sign, 0, 0, OE, OM), out)
+    out = np.where(is_infinite_result, pack(sign, (1 << OE) - 1, (1 << OM) - 1 if is_E4M3(OE, OM) else 0, OE, OM), out)
+    out = np.where(is_nan, np.uint64(get_quiet_nan(OE, OM)), out)
+
+    underflow = ~is_nan & ~is_infinite_result & ~is_zero & (rounded_exponent == 0)
+
+    return out, underflow, is_infinite_result, is_nan
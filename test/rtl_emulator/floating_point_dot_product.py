@@ -0,0 +1,65 @@
+import numpy as np
+
+from ._bits import bit_length, pack, unpack
+from .floating_point_adder import floating_point_adder
+from .floating_point_multiplier import floating_point_multiplier
+from .is_special_float import is_E4M3, is_special_float
+
+
+def _widen(values, exponent_width: int, mantissa_width: int, accumulator_exponent_width: int, accumulator_mantissa_width: int, ignore_sign_bit_for_nan: int):
+    """Converts raw float encodings to the (wider) accumulator format, as the gen_widen blocks of
+    floating_point_dot_product.v do."""
+
+    E, M, AE, AM = exponent_width, mantissa_width, accumulator_exponent_width, accumulator_mantissa_width
+    exponent_offset = (1 << (AE - 1)) - (1 << (E - 1))
+
+    sign, exponent, mantissa = unpack(values, E, M)
+
+    if is_E4M3(E, M):
+        keep_exponent_ones = is_special_float(values, E, M, ignore_sign_bit_for_nan)["is_signaling_nan"]
+    else:
+        keep_exponent_ones = exponent == (1 << E) - 1
+
+    subnormal_shift = M + 1 - bit_length(mantissa, False)
+    normalize = (AE > E) & (exponent == 0) & (mantissa != 0)
+    normalized_mantissa = (mantissa << np.clip(subnormal_shift, 0, 63).astype(np.uint64)) & np.uint64((1 << M) - 1)
+
+    accumulator_exponent = np.select([keep_exponent_ones, exponent != 0, normalize], [(1 << AE) - 1, exponent + exponent_offset, exponent_offset + 1 - subnormal_shift], 0)
+    accumulator_mantissa = np.where(normalize, normalized_mantissa, mantissa) << np.uint64(AM - M)
+
+    return pack(sign, accumulator_exponent, accumulator_mantissa, AE, AM)
+
+
+def floating_point_dot_product(a, b, exponent_width: int = 8, mantissa_width: int = 23, accumulator_exponent_width=None, accumulator_mantissa_width=None, round_to_nearest_ties_to_even: int = 1, ignore_sign_bit_for_nan: int = 1):
+    """Emulates floating_point_dot_product.v for arrays of raw float encodings, of which the last axis holds the
+    N_INPUTS elements. The accumulator format defaults to the input format.
+
+    Returns (out, underflow_flag, overflow_flag, invalid_operation_flag), with out in the accumulator format."""
+
+    AE = exponent_width if accumulator_exponent_width is None else accumulator_exponent_width
+    AM = mantissa_width if accumulator_mantissa_width is None else accumulator_mantissa_width
+
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64))
+
+    if (AE, AM) != (exponent_width, mantissa_width):
+        a = _widen(a, exponent_width, mantissa_width, AE, AM, ignore_sign_bit_for_nan)
+        b = _widen(b, exponent_width, mantissa_width, AE, AM, ignore_sign_bit_for_nan)
+
+    out, underflow, overflow, invalid = floating_point_multiplier(a, b, AE, AM, round_to_nearest_ties_to_even, ignore_sign_bit_for_nan)
+    nodes = [out[..., n] for n in range(out.shape[-1])]
+    underflow, overflow, invalid = underflow.any(axis=-1), overflow.any(axis=-1), invalid.any(axis=-1)
+
+    # Balanced tree: node n of a level sums nodes 2n and 2n+1 of the level below, and the last node of a level with
+    # an odd number of nodes is passed on
+    while len(nodes) > 1:
+        next_nodes = []
+
+        for n in range(0, len(nodes) - 1, 2):
+            summed, node_underflow, node_overflow, node_invalid = floating_point_adder(nodes[n], nodes[n + 1], 0, AE, AM, round_to_nearest_ties_to_even, ignore_sign_bit_for_nan)
+
+            next_nodes.append(summed)
+            underflow, overflow, invalid = underflow | node_underflow, overflow | node_overflow, invalid | node_invalid
+
+        nodes = next_nodes + nodes[len(nodes) - len(nodes) % 2:]
+
+    return nodes[0], underflow, overflow, invalid
@@ -0,0 +1,64 @@
+import numpy as np
+
+from ._bits import as_words, const, is_wide, pack, shift_left, to_uint64, unpack
+from .is_special_float import get_quiet_nan, is_nan, is_special_float
+from .result_rounder import result_rounder
+
+
+def floating_point_multiplier(a, b, exponent_width: int = 8, mantissa_width: int = 23, round_to_nearest_ties_to_even: int = 1, ignore_sign_bit_for_nan: int = 1):
+    """Emulates floating_point_multiplier.v for arrays of raw float encodings.
+
+    Returns (out, underflow_flag, overflow_flag, invalid_operation_flag)."""
+
+    E, M = exponent_width, mantissa_width
+    product_width = 2 * (M + 1)
+    wide = is_wide(product_width)
+
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64))
+
+    a_sign, a_exponent, a_mantissa = unpack(a, E, M)
+    b_sign, b_exponent, b_mantissa = unpack(b, E, M)
+
+    special_a = is_special_float(a, E, M, ignore_sign_bit_for_nan)
+    special_b = is_special_float(b, E, M, ignore_sign_bit_for_nan)
+
+    out_sign = a_sign ^ b_sign
+
+    # Subnormal operands are multiplied without their (zero) implicit leading bit and without any normalization
+    a_mul_b_mantissa = as_words(((a_exponent != 0).astype(np.uint64) << np.uint64(M)) | a_mantissa, wide) * as_words(((b_exponent != 0).astype(np.uint64) << np.uint64(M)) | b_mantissa, wide)
+    a_mul_b_exponent = a_exponent + b_exponent - ((1 << (E - 1)) - 1)
+
+    leading_one_is_MSB = (a_mul_b_mantissa >> const(product_width - 1, wide)) == const(1, wide)
+
+    is_underflow = (a_mul_b_exponent < 0) | ((a_mul_b_exponent == 0) & ~leading_one_is_MSB)
+    is_overflow = ~is_underflow & ((a_mul_b_exponent >= (1 << E) - 1) | (((a_mul_b_exponent & ((1 << E) - 1)) == (1 << E) - 2) & leading_one_is_MSB))
+
+    # Rounding
+
+    non_rounded_exponent = (a_mul_b_exponent + leading_one_is_MSB) & ((1 << E) - 1)
+
+    mantissa_mask = const((1 << M) - 1, wide)
+    non_rounded_mantissa = to_uint64(np.where(leading_one_is_MSB, (a_mul_b_mantissa >> const(M + 1, wide)) & mantissa_mask, (a_mul_b_mantissa >> const(M, wide)) & mantissa_mask))
+    additional_mantissa_bits = to_uint64(np.where(leading_one_is_MSB, a_mul_b_mantissa & const((1 << (M + 1)) - 1, wide), shift_left(a_mul_b_mantissa & mantissa_mask, 1, M + 1, wide)))
+
+    rounded_exponent, rounded_mantissa, rounded_overflow = result_rounder(non_rounded_exponent, non_rounded_mantissa, additional_mantissa_bits, E, M, round_to_nearest_ties_to_even, M + 1)
+
+    out_exponent = np.where(is_underflow, 0, np.where(is_overflow, (1 << E) - 1, rounded_exponent))
+    out_mantissa = np.where(is_underflow | is_overflow, np.uint64(0), rounded_mantissa)
+
+    out = pack(out_sign, out_exponent, out_mantissa, E, M)
+    overflow = is_overflow | (~is_underflow & ~is_overflow & rounded_overflow)
+
+    # Special cases (see product_special_cases.v), in reverse order of priority; every NaN result raises the
+    # invalid operation flag
+
+    is_zero = special_a["is_zero"] | special_b["is_zero"]
+    is_infinite = special_a["is_infinite"] | special_b["is_infinite"]
+    is_nan_result = is_nan(special_a) | is_nan(special_b) | (is_zero & is_infinite)
+
+    out = np.where(is_zero | is_infinite, pack(out_sign, np.where(is_infinite, (1 << E) - 1, 0), 0, E, M), out)
+    out = np.where(is_nan_result, np.uint64(get_quiet_nan(E, M)), out)
+    underflow = is_underflow & ~is_nan_result & ~is_zero & ~is_infinite
+    overflow = np.where(is_nan_result | is_zero, False, is_infinite | overflow)
+
+    return out, underflow, overflow, is_nan_result
@@ -0,0 +1,117 @@
+import numpy as np
+
+from ._bits import as_words, bit_length, const, is_wide, pack, shift_left, shift_right, to_uint64, unpack
+from .is_special_float import get_quiet_nan, is_special_float
+from .result_rounder import result_rounder
+
+
+def floating_point_multiplier_adder(a_1, a_2, b, exponent_width: int = 8, mantissa_width: int = 23, round_to_nearest_ties_to_even: int = 1, ignore_sign_bit_for_nan: int = 1):
+    """Emulates floating_point_multiplier_adder.v: out = a_1 * a_2 + b, rounded only once.
+
+    Returns (out, underflow_flag, overflow_flag, invalid_operation_flag)."""
+
+    E, M = exponent_width, mantissa_width
+    bias = (1 << (E - 1)) - 1
+    exponent_ones = (1 << E) - 1
+
+    # Layout of the sum, see the module
+    sum_width = 3 * M + 8
+    product_position = 3
+    addend_position = product_position + 2 * (M + 1) + 2
+    wide = is_wide(sum_width + 1)
+
+    a_1, a_2, b = np.broadcast_arrays(np.asarray(a_1, dtype=np.uint64), np.asarray(a_2, dtype=np.uint64), np.asarray(b, dtype=np.uint64))
+
+    a_1_sign, a_1_exponent, a_1_mantissa = unpack(a_1, E, M)
+    a_2_sign, a_2_exponent, a_2_mantissa = unpack(a_2, E, M)
+    b_sign, b_exponent, b_mantissa = unpack(b, E, M)
+
+    special_a_1 = is_special_float(a_1, E, M, ignore_sign_bit_for_nan)
+    special_a_2 = is_special_float(a_2, E, M, ignore_sign_bit_for_nan)
+    special_b = is_special_float(b, E, M, ignore_sign_bit_for_nan)
+
+    a_1_true_exponent = np.maximum(a_1_exponent, 1)
+    a_2_true_exponent = np.maximum(a_2_exponent, 1)
+    b_true_exponent = np.maximum(b_exponent, 1)
+
+    product_sign = a_1_sign ^ a_2_sign
+
+    # Multiplication and alignment
+
+    product = as_words(((a_1_exponent != 0).astype(np.uint64) << np.uint64(M)) | a_1_mantissa, wide) * as_words(((a_2_exponent != 0).astype(np.uint64) << np.uint64(M)) | a_2_mantissa, wide)
+    aligned_product = shift_left(product, product_position, sum_width + 1, wide)
+
+    addend_shift = M + 4 + a_1_true_exponent + a_2_true_exponent - b_true_exponent - bias
+    shift_amount = np.clip(addend_shift, 0, sum_width)
+
+    non_shifted_addend = shift_left(as_words(((b_exponent != 0).astype(np.uint64) << np.uint64(M)) | b_mantissa, wide), addend_position, sum_width, wide)
+    aligned_addend = shift_right(non_shifted_addend, shift_amount, wide)
+    is_addend_bit_shifted_out = shift_left(aligned_addend, shift_amount, sum_width, wide) != non_shifted_addend
+    aligned_addend = np.where(is_addend_bit_shifted_out, aligned_addend | const(1, wide), aligned_addend)
+
+    # Summation
+
+    same_sign = product_sign == b_sign
+    is_negative = ~same_sign & (aligned_product < aligned_addend)
+
+    summed_magnitude = np.where(same_sign, aligned_product + aligned_addend, np.where(is_negative, aligned_addend - aligned_product, aligned_product - aligned_addend))
+    has_leading_one = summed_magnitude != const(0, wide)
+    out_sign = np.where(has_leading_one, np.where(is_negative, b_sign, product_sign), product_sign & b_sign)
+
+    # Normalization
+
+    leading_one_pos = np.maximum(bit_length(summed_magnitude, wide) - 1, 0)
+    addend_shift_correction = np.maximum(-addend_shift, 0)
+    leading_one_exponent = a_1_true_exponent + a_2_true_exponent - bias - 2 * M - product_position + leading_one_pos + addend_shift_correction
+
+    is_normal_result = leading_one_exponent >= 1
+    subnormal_lsb_position = product_position + 1 + bias + M - a_1_true_exponent - a_2_true_exponent - addend_shift_correction
+    result_lsb_position = np.where(is_normal_result, leading_one_pos - M, subnormal_lsb_position)
+
+    normalized_mantissa = np.where(result_lsb_position <= 0, shift_left(summed_magnitude, -result_lsb_position, sum_width, wide), shift_right(summed_magnitude, result_lsb_position, wide))
+
+    # The bit just below the result is the round bit, all bits below it form the sticky bit
+    round_bit = (result_lsb_position > 0) & (to_uint64(shift_right(summed_magnitude, result_lsb_position - 1, wide) & const(1, wide)) == 1)
+    sticky_bit = (result_lsb_position > 1) & (shift_left(summed_magnitude, sum_width - (result_lsb_position - 1), sum_width, wide) != const(0, wide))
+    rounding_bits = (round_bit.astype(np.uint64) << np.uint64(1)) | sticky_bit.astype(np.uint64)
+
+    # Rounding
+
+    non_rounded_exponent = np.where(is_normal_result, leading_one_exponent & exponent_ones, 0)
+    non_rounded_mantissa = to_uint64(normalized_mantissa & const((1 << M) - 1, wide))
+
+    rounded_exponent, rounded_mantissa, rounded_overflow = result_rounder(non_rounded_exponent, non_rounded_mantissa, rounding_bits, E, M, round_to_nearest_ties_to_even, 2)
+
+    is_overflow = leading_one_exponent >= exponent_ones
+
+    out = np.where(is_overflow, pack(out_sign, exponent_ones, 0, E, M), pack(out_sign, rounded_exponent, rounded_mantissa, E, M))
+    underflow = ~is_overflow & (rounded_exponent == 0)
+    overflow = is_overflow | rounded_overflow
+
+    out = np.where(has_leading_one, out, pack(out_sign, 0, 0, E, M))
+    underflow = underflow & has_leading_one
+    overflow = overflow & has_leading_one
+
+    # Special cases, in reverse order of priority
+
+    is_product_zero = special_a_1["is_zero"] | special_a_2["is_zero"]
+    out = np.where(is_product_zero, np.where(special_b["is_zero"], pack(product_sign & b_sign, 0, 0, E, M), b), out)
+    underflow = np.where(is_product_zero, special_b["is_subnormal"], underflow)
+    overflow = overflow & ~is_product_zero
+
+    is_product_infinite = special_a_1["is_infinite"] | special_a_2["is_infinite"]
+    is_infinite = is_product_infinite | special_b["is_infinite"]
+    out = np.where(is_infinite, pack(np.where(is_product_infinite, product_sign, b_sign), exponent_ones, 0, E, M), out)
+    underflow = underflow & ~is_infinite
+    overflow = overflow | is_infinite
+
+    is_nan_operand = np.logical_or.reduce([special[name] for special in [special_a_1, special_a_2, special_b] for name in ["is_signaling_nan", "is_quiet_nan"]])
+    is_zero_times_infinity = (special_a_1["is_zero"] & special_a_2["is_infinite"]) | (special_a_2["is_zero"] & special_a_1["is_infinite"])
+    is_infinity_difference = is_product_infinite & special_b["is_infinite"] & (product_sign != b_sign)
+    invalid = is_nan_operand | is_zero_times_infinity | is_infinity_difference
+
+    out = np.where(invalid, np.uint64(get_quiet_nan(E, M)), out)
+    underflow = underflow & ~invalid
+    overflow = overflow & ~invalid
+
+    return out, underflow, overflow, invalid
@@ -0,0 +1,19 @@
+import numpy as np
+
+from ._simd import simd_lanes
+from .floating_point_adder import floating_point_adder
+
+
+def floating_point_simd_adder(a, b, subtract, format, exponent_width: int = 8, mantissa_width: int = 23, half_exponent_width: int = 5, half_mantissa_width: int = 10, quarter_exponent_width: int = 5, quarter_mantissa_width: int = 2, round_to_nearest_ties_to_even: int = 1, ignore_sign_bit_for_nan: int = 1):
+    """Emulates floating_point_simd_adder.v for arrays of raw (packed) float encodings, where every lane is added
+    as floating_point_adder.v would. Bit i of subtract selects a subtraction in lane i.
+
+    Returns (out, underflow_flag, overflow_flag, invalid_operation_flag), where bit i of a flag belongs to lane i."""
+
+    lane_formats = [(exponent_width, mantissa_width), (half_exponent_width, half_mantissa_width), (quarter_exponent_width, quarter_mantissa_width)]
+    subtract = np.asarray(subtract, dtype=np.int64)
+
+    def add_lane(lane_a, lane_b, lane, E, M):
+        return floating_point_adder(lane_a, lane_b, (subtract >> lane) & 1, E, M, round_to_nearest_ties_to_even, ignore_sign_bit_for_nan)
+
+    return simd_lanes(add_lane, format, lane_formats, a, b)
@@ -0,0 +1,16 @@
+from ._simd import simd_lanes
+from .floating_point_multiplier import floating_point_multiplier
+
+
+def floating_point_simd_multiplier(a, b, format, exponent_width: int = 8, mantissa_width: int = 23, half_exponent_width: int = 5, half_mantissa_width: int = 10, quarter_exponent_width: int = 5, quarter_mantissa_width: int = 2, round_to_nearest_ties_to_even: int = 1, ignore_sign_bit_for_nan: int = 1):
+    """Emulates floating_point_simd_multiplier.v for arrays of raw (packed) float encodings, where every lane is
+    multiplied as floating_point_multiplier.v would.
+
+    Returns (out, underflow_flag, overflow_flag, invalid_operation_flag), where bit i of a flag belongs to lane i."""
+
+    lane_formats = [(exponent_width, mantissa_width), (half_exponent_width, half_mantissa_width), (quarter_exponent_width, quarter_mantissa_width)]
+
+    def multiply_lane(lane_a, lane_b, lane, E, M):
+        return floating_point_multiplier(lane_a, lane_b, E, M, round_to_nearest_ties_to_even, ignore_sign_bit_for_nan)
+
+    return simd_lanes(multiply_lane, format, lane_formats, a, b)
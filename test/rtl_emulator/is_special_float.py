@@ -0,0 +1,60 @@
+from typing import Dict
+
+import numpy as np
+
+from ._bits import unpack
+
+
+def is_E4M3(exponent_width: int, mantissa_width: int) -> bool:
+    return exponent_width == 4 and mantissa_width == 3
+
+
+def has_no_special_values(exponent_width: int, mantissa_width: int) -> bool:
+    """E2M3, E3M2 and E2M1 have no infinities and NaNs."""
+
+    return (exponent_width, mantissa_width) in [(2, 3), (3, 2), (2, 1)]
+
+
+def get_quiet_nan(exponent_width: int, mantissa_width: int) -> int:
+    """The NaN that is output by the modules: {1, 1...1, 1, 0...0}, or all ones for E4M3."""
+
+    trailing_bits = (1 << (mantissa_width - 1)) - 1 if is_E4M3(exponent_width, mantissa_width) else 0
+
+    return (1 << (exponent_width + mantissa_width)) | (((1 << (exponent_width + 1)) - 1) << (mantissa_width - 1)) | trailing_bits
+
+
+def is_special_float(a, exponent_width: int, mantissa_width: int, ignore_sign_bit_for_nan: int = 1) -> Dict[str, np.ndarray]:
+    """Emulates is_special_float.v; returns a boolean array per output port."""
+
+    sign, exponent, mantissa = unpack(a, exponent_width, mantissa_width)
+
+    is_exponent_ones = exponent == (1 << exponent_width) - 1
+    is_mantissa_zero = mantissa == 0
+    is_mantissa_ones = mantissa == np.uint64((1 << mantissa_width) - 1)
+    is_mantissa_msb_set = (mantissa >> np.uint64(mantissa_width - 1)) == 1
+    is_nan_sign = (sign == 1) | bool(ignore_sign_bit_for_nan)
+
+    no_special_values = has_no_special_values(exponent_width, mantissa_width)
+    e4m3 = is_E4M3(exponent_width, mantissa_width)
+    false = np.zeros(np.shape(sign), dtype=bool)
+
+    if no_special_values:
+        is_signaling_nan = false
+    elif e4m3:
+        is_signaling_nan = is_exponent_ones & is_mantissa_ones
+    else:
+        is_signaling_nan = is_nan_sign & is_exponent_ones & is_mantissa_msb_set
+
+    return {
+        "is_infinite": false if no_special_values or e4m3 else is_exponent_ones & is_mantissa_zero,
+        "is_zero": (exponent == 0) & is_mantissa_zero,
+        "is_subnormal": (exponent == 0) & ~is_mantissa_zero,
+        "is_signaling_nan": is_signaling_nan,
+        "is_quiet_nan": false if no_special_values or e4m3 else is_nan_sign & is_exponent_ones & ~is_mantissa_msb_set & ~is_mantissa_zero,
+    }
+
+
+def is_nan(special: Dict[str, np.ndarray]) -> np.ndarray:
+    """Returns whether an operand is NaN, given the outputs of is_special_float for it."""
+
+    return special["is_signaling_nan"] | special["is_quiet_nan"]
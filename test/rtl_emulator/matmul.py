@@ -0,0 +1,22 @@
+import numpy as np
+
+from .floating_point_multiplier_adder import floating_point_multiplier_adder
+
+
+def matmul(a, b, exponent_width: int = 8, mantissa_width: int = 23, round_to_nearest_ties_to_even: int = 1, ignore_sign_bit_for_nan: int = 1, accumulator=None):
+    """Multiplies two matrices of raw float encodings as a chain of floating_point_multiplier_adder modules would:
+    every output element is accumulated in order, acc = a[i, k] * b[k, j] + acc, starting from accumulator
+    (positive zero by default). All output elements are emulated at the same time, one k at a time."""
+
+    a = np.asarray(a, dtype=np.uint64)
+    b = np.asarray(b, dtype=np.uint64)
+
+    if a.ndim != 2 or b.ndim != 2 or a.shape[1] != b.shape[0]:
+        raise ValueError(f"Cannot multiply matrices with shapes {a.shape} and {b.shape}")
+
+    out = np.zeros((a.shape[0], b.shape[1]), dtype=np.uint64) if accumulator is None else np.array(accumulator, dtype=np.uint64)
+
+    for k in range(a.shape[1]):
+        out, _, _, _ = floating_point_multiplier_adder(a[:, k, None], b[None, k, :], out, exponent_width, mantissa_width, round_to_nearest_ties_to_even, ignore_sign_bit_for_nan)
+
+    return out
@@ -0,0 +1,27 @@
+import numpy as np
+
+
+def result_rounder(non_rounded_exponent, non_rounded_mantissa, rounding_bits, exponent_width: int, mantissa_width: int, round_to_nearest_ties_to_even: int, n_rounding_bits: int):
+    """Emulates result_rounder.v; returns the rounded exponent (int64), mantissa (uint64) and overflow flag."""
+
+    exponent = np.asarray(non_rounded_exponent, dtype=np.int64)
+    mantissa = np.asarray(non_rounded_mantissa, dtype=np.uint64)
+    overflow = np.zeros(np.shape(exponent), dtype=bool)
+
+    if round_to_nearest_ties_to_even != 1:
+        return exponent, mantissa, overflow
+
+    rounding_bits = np.asarray(rounding_bits, dtype=np.uint64)
+    is_halfway = rounding_bits == np.uint64(1 << (n_rounding_bits - 1))
+    round_up = np.where(is_halfway, (mantissa & np.uint64(1)) == 1, (rounding_bits >> np.uint64(n_rounding_bits - 1)) == 1)
+
+    rounded_mantissa = (mantissa + np.uint64(1)) & np.uint64((1 << mantissa_width) - 1)
+    mantissa_overflow = round_up & (rounded_mantissa == 0)
+
+    rounded_exponent = (exponent + 1) & ((1 << exponent_width) - 1)
+    overflow = mantissa_overflow & (rounded_exponent == (1 << exponent_width) - 1)
+
+    mantissa = np.where(round_up, rounded_mantissa, mantissa)
+    exponent = np.where(mantissa_overflow, rounded_exponent, exponent)
+
+    return exponent, np.where(overflow, np.uint64(0), mantissa), overflow
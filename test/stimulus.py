@@ -0,0 +1,417 @@
+"""Coverage-directed stimulus for the floating point modules.
+
+Operands are built directly on their bit fields (sign, exponent and mantissa patterns such as ties and long
+carry chains) for any format. Every candidate vector is classified into functional coverage bins with the
+golden model, and only vectors that hit a bin that is not full yet are kept. Generation stops once every bin
+has been hit target_hits times, so that the rare corners get as many simulated vectors as the common paths.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from common import ROUNDING_CLASSES, float_add_reference, float_multiply_reference, pack_floats, unpack_floats
+
+OPERAND_CLASSES = ["zero", "subnormal", "normal", "max_exponent", "infinity", "quiet_nan", "signaling_nan"]
+RESULT_CLASSES = ["zero", "subnormal", "normal", "max_exponent", "overflow", "infinity", "nan"]
+
+# Finite results that are rounded, per module. Additions and subtractions with a subnormal result are always exact.
+ROUNDED_RESULT_CLASSES = {
+    "floating_point_adder": ["normal", "max_exponent", "overflow"],
+    "floating_point_multiplier": ["subnormal", "normal", "max_exponent", "overflow"],
+}
+
+# Changes of the exponent field caused by rounding up (only with ROUND_TO_NEAREST_TIES_TO_EVEN = 1)
+ROUNDING_INCREMENTS = {
+    "floating_point_adder": ["mantissa", "exponent", "to_infinity"],
+    "floating_point_multiplier": ["mantissa", "exponent", "to_infinity", "subnormal_to_normal"],
+}
+
+DEFAULT_TARGET_HITS = 20
+DEFAULT_BATCH_SIZE = 4096
+DEFAULT_MAX_CANDIDATES = 1 << 22
+
+# Generation stops early after this many batches without a single selected vector, as some bins cannot be
+# reached in very narrow formats (for example products that are above half an ULP with a single mantissa bit)
+DEFAULT_MAX_IDLE_BATCHES = 8
+
+
+class CoverageModel:
+    """Functional coverage: families of named bins, of which every bin should be hit target_hits times."""
+
+    def __init__(self, families: Dict[str, List[str]], target_hits: int = DEFAULT_TARGET_HITS):
+        self.families = families
+        self.target_hits = target_hits
+        self.hits = {name: np.zeros(len(labels), dtype=np.int64) for name, labels in families.items()}
+
+    def select(self, bins: Dict[str, np.ndarray]) -> np.ndarray:
+        """Takes the bin (an index into the labels of the family, or -1 if not applicable) of every vector in
+        every family. Returns a mask of the vectors that hit a bin that is not full yet, and counts their hits."""
+
+        total = len(next(iter(bins.values())))
+        selected = np.zeros(total, dtype=bool)
+
+        for name, labels in bins.items():
+            # Rank of every vector among the earlier vectors with the same bin
+            order = np.argsort(labels, kind="stable")
+            sorted_labels = labels[order]
+            rank = np.empty(total, dtype=np.int64)
+            rank[order] = np.arange(total) - np.searchsorted(sorted_labels, sorted_labels, side="left")
+
+            selected |= (labels >= 0) & (rank < self.target_hits - self.hits[name][np.maximum(labels, 0)])
+
+        for name, labels in bins.items():
+            np.add.at(self.hits[name], labels[selected & (labels >= 0)], 1)
+
+        return selected
+
+    def is_full(self) -> bool:
+        return all((hits >= self.target_hits).all() for hits in self.hits.values())
+
+    def get_holes(self) -> List[str]:
+        """Returns the bins that were never hit, as <family>/<bin>."""
+
+        return [f"{name}/{label}" for name, labels in self.families.items() for label, hits in zip(labels, self.hits[name]) if hits == 0]
+
+    def get_coverage(self) -> float:
+        """Returns the fraction of bins that were hit at least once."""
+
+        hits = np.concatenate(list(self.hits.values()))
+
+        return float((hits > 0).mean())
+
+    def report(self) -> str:
+        lines = [f"Functional coverage {self.get_coverage():.1%} ({self.target_hits} hits per bin requested)"]
+
+        for name, labels in self.families.items():
+            full = int((self.hits[name] >= self.target_hits).sum())
+            lines.append(f"  {name}: {full}/{len(labels)} bins full")
+
+        holes = self.get_holes()
+
+        if holes:
+            lines.append(f"  holes: {', '.join(holes)}")
+
+        return "\n".join(lines)
+
+
+def get_operand_classes(mantissa_bits: int) -> List[str]:
+    # With a single mantissa bit, the only NaN is the quiet one
+    return OPERAND_CLASSES if mantissa_bits > 1 else [name for name in OPERAND_CLASSES if name != "signaling_nan"]
+
+
+def classify_operands(values, exponent_bits: int, mantissa_bits: int) -> np.ndarray:
+    """Returns the class of every encoding, as an index into OPERAND_CLASSES."""
+
+    _, exponent, mantissa = unpack_floats(values, exponent_bits, mantissa_bits)
+    exponent_ones = (1 << exponent_bits) - 1
+    is_quiet = (mantissa >> np.uint64(mantissa_bits - 1)) == 1
+
+    return np.select(
+        [exponent == 0, exponent < exponent_ones - 1, exponent == exponent_ones - 1, mantissa == 0, is_quiet],
+        [np.where(mantissa == 0, 0, 1), 2, 3, 4, 5],
+        6,
+    )
+
+
+def _random_mantissas(rng, total: int, mantissa_bits: int) -> np.ndarray:
+    # Random bits, all zeroes, all ones, a one with only zeroes below it (a tie once these bits are shifted
+    # out) or a random bit with only ones below it (a long carry chain when rounding)
+    mantissa = rng.integers(0, 1 << mantissa_bits, total, dtype=np.uint64)
+    one_hot = np.uint64(1) << rng.integers(0, mantissa_bits, total).astype(np.uint64)
+    pattern = rng.integers(0, 5, total)
+
+    return np.select(
+        [pattern == 1, pattern == 2, pattern == 3, pattern == 4],
+        [np.uint64(0), np.uint64((1 << mantissa_bits) - 1), (mantissa & ~((one_hot << np.uint64(1)) - np.uint64(1))) | one_hot, (mantissa & ~(one_hot - np.uint64(1))) | (one_hot - np.uint64(1))],
+        mantissa,
+    )
+
+
+def make_operands(rng, classes: np.ndarray, exponent_bits: int, mantissa_bits: int) -> np.ndarray:
+    """Returns a random encoding of the given class (an index into OPERAND_CLASSES) for every element of classes."""
+
+    total = len(classes)
+    exponent_ones = (1 << exponent_bits) - 1
+    quiet_bit = np.uint64(1 << (mantissa_bits - 1))
+
+    sign = rng.integers(0, 2, total, dtype=np.uint64)
+    mantissa = _random_mantissas(rng, total, mantissa_bits)
+    exponent = np.select([classes <= 1, classes == 2, classes == 3], [0, rng.integers(1, exponent_ones - 1, total), exponent_ones - 1], exponent_ones)
+
+    mantissa = np.select(
+        [(classes == 0) | (classes == 4), classes == 1, classes == 5, classes == 6],
+        [np.uint64(0), np.maximum(mantissa, np.uint64(1)), mantissa | quiet_bit, np.maximum(mantissa & (quiet_bit - np.uint64(1)), np.uint64(1))],
+        mantissa,
+    )
+
+    return pack_floats(sign, exponent, mantissa, exponent_bits, mantissa_bits)
+
+
+def _leading_one_exponents(values, exponent_bits: int, mantissa_bits: int) -> np.ndarray:
+    # Biased exponent of the leading one, which is below 1 for subnormals
+    _, exponent, mantissa = unpack_floats(values, exponent_bits, mantissa_bits)
+    mantissa_length = np.frexp(mantissa.astype(np.float64))[1]
+
+    return np.where(exponent > 0, exponent, mantissa_length - mantissa_bits)
+
+
+def _get_interval_labels(boundaries: List[int]) -> Tuple[List[int], List[str]]:
+    # Bins [boundaries[i], boundaries[i + 1]) and [boundaries[-1], inf), without empty bins
+    boundaries = sorted(set(boundaries))
+    labels = [str(lo) if hi == lo + 1 else f"{lo}..{hi - 1}" for lo, hi in zip(boundaries, boundaries[1:])] + [f"{boundaries[-1]}+"]
+
+    return boundaries, labels
+
+
+def _get_alignment_boundaries(mantissa_bits: int) -> List[int]:
+    # Exponent differences up to the point where the smaller operand only contributes to the sticky bit
+    return [0, 1, 2, 3, mantissa_bits + 1, mantissa_bits + 2, mantissa_bits + 3, mantissa_bits + 4]
+
+
+def _get_exponent_sum_boundaries(exponent_bits: int, mantissa_bits: int) -> List[int]:
+    # Biased exponent of the product: completely underflowing, subnormal, the smallest normal exponent,
+    # normal, the largest exponent (which may overflow when normalizing or rounding) and overflowing
+    exponent_ones = (1 << exponent_bits) - 1
+
+    return [-(1 << exponent_bits), -mantissa_bits, 1, 2, exponent_ones - 1, exponent_ones]
+
+
+def get_families(module_name: str, exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int = 1) -> Dict[str, List[str]]:
+    """Returns the coverage bins of a module for the given format, per family."""
+
+    operand_classes = get_operand_classes(mantissa_bits)
+    families = {
+        "operands": [f"{a}*{b}" if module_name == "floating_point_multiplier" else f"{a}+{b}" for a in operand_classes for b in operand_classes],
+        "result": RESULT_CLASSES,
+        "rounding": [f"{rounding}/{result}" for rounding in ROUNDING_CLASSES for result in ROUNDED_RESULT_CLASSES[module_name]],
+    }
+
+    if module_name == "floating_point_adder":
+        _, shifts = _get_interval_labels(_get_alignment_boundaries(mantissa_bits))
+        families["alignment"] = [f"{operation}/{shift}" for operation in ["addition", "subtraction"] for shift in shifts]
+        families["normalization"] = ["+1", "0", "-1", f"-2..-{mantissa_bits + 1}", "zero"]
+    else:
+        families["exponent_sum"] = _get_interval_labels(_get_exponent_sum_boundaries(exponent_bits, mantissa_bits))[1][1:]
+
+    if round_to_nearest_ties_to_even:
+        families["rounding_increment"] = ROUNDING_INCREMENTS[module_name]
+
+    return families
+
+
+def _classify_results(module_name: str, out, rounding_class, truncated_out, is_finite_operation, exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int) -> Dict[str, np.ndarray]:
+    result_class = np.array([0, 1, 2, 3, 5, 6, 6])[classify_operands(out, exponent_bits, mantissa_bits)]
+    result_class = np.where((result_class == 5) & is_finite_operation, 4, result_class)
+
+    rounded_results = [RESULT_CLASSES.index(name) for name in ROUNDED_RESULT_CLASSES[module_name]]
+    rounded_result_index = np.searchsorted(rounded_results, result_class)
+    is_rounded_result = np.isin(result_class, rounded_results) & is_finite_operation
+
+    bins = {
+        "result": result_class,
+        "rounding": np.where(is_rounded_result, rounding_class * len(rounded_results) + np.minimum(rounded_result_index, len(rounded_results) - 1), -1),
+    }
+
+    if round_to_nearest_ties_to_even:
+        _, exponent, _ = unpack_floats(out, exponent_bits, mantissa_bits)
+        _, truncated_exponent, _ = unpack_floats(truncated_out, exponent_bits, mantissa_bits)
+        exponent_ones = (1 << exponent_bits) - 1
+
+        increment = np.select(
+            [exponent == truncated_exponent, exponent == exponent_ones, truncated_exponent == 0],
+            [0, 2, 3],
+            1,
+        )
+        increments = ROUNDING_INCREMENTS[module_name]
+
+        bins["rounding_increment"] = np.where(is_finite_operation & (out != truncated_out) & (increment < len(increments)), increment, -1)
+
+    return bins
+
+
+def classify_adder(inputs: Dict[str, np.ndarray], exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int = 1) -> Dict[str, np.ndarray]:
+    """Returns the coverage bin of every vector of the adder in every family of get_families."""
+
+    a, b, subtract = inputs["a"], inputs["b"], inputs["subtract"]
+    operand_count = len(get_operand_classes(mantissa_bits))
+
+    a_class, b_class = classify_operands(a, exponent_bits, mantissa_bits), classify_operands(b, exponent_bits, mantissa_bits)
+    a_sign, a_exponent, _ = unpack_floats(a, exponent_bits, mantissa_bits)
+    b_sign, b_exponent, _ = unpack_floats(b, exponent_bits, mantissa_bits)
+
+    out, _, _, _, rounding_class = float_add_reference(a, b, subtract, exponent_bits, mantissa_bits, round_to_nearest_ties_to_even, return_rounding_class=True)
+    truncated_out = float_add_reference(a, b, subtract, exponent_bits, mantissa_bits, 0)[0]
+
+    is_finite_operation = (a_class <= 3) & (b_class <= 3)
+    is_nonzero_operation = is_finite_operation & (a_class != 0) & (b_class != 0)
+    is_effective_subtraction = (a_sign ^ b_sign ^ np.asarray(subtract, dtype=np.uint64)) == 1
+
+    boundaries, shifts = _get_interval_labels(_get_alignment_boundaries(mantissa_bits))
+    shift = np.abs(np.maximum(a_exponent, 1) - np.maximum(b_exponent, 1))
+    alignment = is_effective_subtraction * len(shifts) + np.digitize(shift, boundaries) - 1
+
+    out_class = classify_operands(out, exponent_bits, mantissa_bits)
+    normalization = _leading_one_exponents(out, exponent_bits, mantissa_bits) - np.maximum(_leading_one_exponents(a, exponent_bits, mantissa_bits), _leading_one_exponents(b, exponent_bits, mantissa_bits))
+    normalization = np.where(out_class == 0, 4, np.select([normalization >= 1, normalization == 0, normalization == -1], [0, 1, 2], 3))
+
+    return {
+        "operands": a_class * operand_count + b_class,
+        "alignment": np.where(is_nonzero_operation, alignment, -1),
+        "normalization": np.where(is_nonzero_operation & (out_class <= 3), normalization, -1),
+        **_classify_results("floating_point_adder", out, rounding_class, truncated_out, is_finite_operation, exponent_bits, mantissa_bits, round_to_nearest_ties_to_even),
+    }
+
+
+def classify_multiplier(inputs: Dict[str, np.ndarray], exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int = 1) -> Dict[str, np.ndarray]:
+    """Returns the coverage bin of every vector of the multiplier in every family of get_families."""
+
+    a, b = inputs["a"], inputs["b"]
+    operand_count = len(get_operand_classes(mantissa_bits))
+    bias = (1 << (exponent_bits - 1)) - 1
+
+    a_class, b_class = classify_operands(a, exponent_bits, mantissa_bits), classify_operands(b, exponent_bits, mantissa_bits)
+    _, a_exponent, _ = unpack_floats(a, exponent_bits, mantissa_bits)
+    _, b_exponent, _ = unpack_floats(b, exponent_bits, mantissa_bits)
+
+    out, _, _, _, rounding_class = float_multiply_reference(a, b, exponent_bits, mantissa_bits, round_to_nearest_ties_to_even, return_rounding_class=True)
+    truncated_out = float_multiply_reference(a, b, exponent_bits, mantissa_bits, 0)[0]
+
+    is_finite_operation = (a_class <= 3) & (b_class <= 3)
+    is_nonzero_operation = is_finite_operation & (a_class != 0) & (b_class != 0)
+
+    boundaries, _ = _get_interval_labels(_get_exponent_sum_boundaries(exponent_bits, mantissa_bits))
+    exponent_sum = np.maximum(a_exponent, 1) + np.maximum(b_exponent, 1) - bias
+
+    return {
+        "operands": a_class * operand_count + b_class,
+        "exponent_sum": np.where(is_nonzero_operation, np.digitize(exponent_sum, boundaries) - 2, -1),
+        **_classify_results("floating_point_multiplier", out, rounding_class, truncated_out, is_finite_operation, exponent_bits, mantissa_bits, round_to_nearest_ties_to_even),
+    }
+
+
+def _random_classes(rng, total: int, mantissa_bits: int) -> np.ndarray:
+    return rng.integers(0, len(get_operand_classes(mantissa_bits)), total)
+
+
+def _finite_operands(rng, total: int, exponent, exponent_bits: int, mantissa_bits: int) -> np.ndarray:
+    # Operands with the given exponent fields, which are clipped to the finite range
+    exponent = np.clip(exponent, 0, (1 << exponent_bits) - 2)
+    sign = rng.integers(0, 2, total, dtype=np.uint64)
+
+    return pack_floats(sign, exponent, _random_mantissas(rng, total, mantissa_bits), exponent_bits, mantissa_bits)
+
+
+def generate_adder_candidates(rng, total: int, exponent_bits: int, mantissa_bits: int) -> Dict[str, np.ndarray]:
+    exponent_ones = (1 << exponent_bits) - 1
+    magnitude_mask = np.uint64((1 << (exponent_bits + mantissa_bits)) - 1)
+    sign_bit = np.uint64(1 << (exponent_bits + mantissa_bits))
+
+    # Random operand classes
+    a = make_operands(rng, _random_classes(rng, total, mantissa_bits), exponent_bits, mantissa_bits)
+    b = make_operands(rng, _random_classes(rng, total, mantissa_bits), exponent_bits, mantissa_bits)
+    subtract = rng.integers(0, 2, total, dtype=np.uint64)
+
+    # Finite operands with a given difference of their exponents, where the smaller one often has a tie
+    # pattern in exactly the bits that are shifted out
+    aligned_a_exponent = rng.integers(1, exponent_ones, total)
+    shift = rng.integers(0, mantissa_bits + 6, total)
+    aligned_a = _finite_operands(rng, total, aligned_a_exponent, exponent_bits, mantissa_bits)
+    aligned_b = _finite_operands(rng, total, aligned_a_exponent - shift, exponent_bits, mantissa_bits)
+    tie_bits = np.uint64(1) << np.clip(shift - 1, 0, mantissa_bits - 1).astype(np.uint64)
+    shifted_out_mask = (tie_bits << np.uint64(1)) - np.uint64(1)
+    aligned_b = np.where((rng.random(total) < 0.5) & (shift >= 1) & (shift <= mantissa_bits), (aligned_b & ~shifted_out_mask) | tie_bits, aligned_b)
+
+    # Operands within a few ULPs of each other with an effective subtraction, which cancel (almost) completely
+    cancelling_a = _finite_operands(rng, total, rng.integers(0, exponent_ones, total), exponent_bits, mantissa_bits)
+    cancelling_b = np.clip((cancelling_a & magnitude_mask).astype(np.int64) + rng.integers(-3, 4, total), 0, (exponent_ones << mantissa_bits) - 1).astype(np.uint64) | (cancelling_a & sign_bit)
+
+    # Operands close to the largest and the smallest exponent
+    edge_exponents = np.array([0, 1, 2, exponent_ones - 2, exponent_ones - 1])
+    edge_a = _finite_operands(rng, total, rng.choice(edge_exponents, total), exponent_bits, mantissa_bits)
+    edge_b = _finite_operands(rng, total, rng.choice(edge_exponents, total), exponent_bits, mantissa_bits)
+
+    recipe = rng.integers(0, 4, total)
+
+    return {
+        "a": np.choose(recipe, [a, aligned_a, cancelling_a, edge_a]),
+        "b": np.choose(recipe, [b, aligned_b, cancelling_b, edge_b]),
+        "subtract": np.where(recipe == 2, 1, subtract).astype(np.uint64),
+    }
+
+
+def generate_multiplier_candidates(rng, total: int, exponent_bits: int, mantissa_bits: int) -> Dict[str, np.ndarray]:
+    exponent_ones = (1 << exponent_bits) - 1
+    bias = (1 << (exponent_bits - 1)) - 1
+
+    # Random operand classes
+    a = make_operands(rng, _random_classes(rng, total, mantissa_bits), exponent_bits, mantissa_bits)
+    b = make_operands(rng, _random_classes(rng, total, mantissa_bits), exponent_bits, mantissa_bits)
+
+    # Finite operands of which the exponents add up to a given (biased) exponent of the product, from
+    # completely underflowing to overflowing. Half of them are at the edges of the subnormal and the
+    # overflowing range, which would be rare for wide exponents.
+    edge_exponent_sums = np.array([-mantissa_bits - 1, -mantissa_bits, 0, 1, 2, exponent_ones - 2, exponent_ones - 1, exponent_ones])
+    exponent_sum = np.where(rng.random(total) < 0.5, rng.integers(-mantissa_bits - 3, exponent_ones + 2, total), rng.choice(edge_exponent_sums, total))
+    lowest = np.maximum(1, exponent_sum + bias - (exponent_ones - 1))
+    highest = np.maximum(np.minimum(exponent_ones - 1, exponent_sum + bias - 1), lowest)
+    a_exponent = lowest + (rng.random(total) * (highest - lowest + 1)).astype(np.int64)
+    b_exponent = exponent_sum + bias - a_exponent
+
+    scaled_a = _finite_operands(rng, total, a_exponent, exponent_bits, mantissa_bits)
+    scaled_b = _finite_operands(rng, total, b_exponent, exponent_bits, mantissa_bits)
+
+    # Significands chosen for their rounding: 1.1b times an odd significand below 4/3 is exactly halfway
+    # between two representable values, (1 + d ulp) times (2 - 2d ulp) is just below 2 and rounds up to it
+    # for small d, and a power of two times a random significand is exact, unless the result is subnormal
+    # and the shifted out bits of the significand are rounded
+    mantissa_mask = np.uint64((1 << mantissa_bits) - 1)
+    odd_mantissa = rng.integers(0, max((1 << mantissa_bits) // 6, 1), total).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+    small_mantissa = rng.integers(1, (1 << max(mantissa_bits // 2 - 2, 0)) + 1, total).astype(np.uint64)
+    pattern = rng.integers(0, 3, total)
+
+    a_mantissa = np.choose(pattern, [np.minimum(odd_mantissa, mantissa_mask), small_mantissa, scaled_a & mantissa_mask])
+    b_mantissa = np.choose(pattern, [np.uint64(1 << (mantissa_bits - 1)), np.uint64(1 << mantissa_bits) - np.uint64(2) * small_mantissa, np.uint64(0)])
+
+    rounding_a = (scaled_a & ~mantissa_mask) | a_mantissa
+    rounding_b = (scaled_b & ~mantissa_mask) | b_mantissa
+
+    recipe = rng.integers(0, 3, total)
+
+    return {
+        "a": np.choose(recipe, [a, scaled_a, rounding_a]),
+        "b": np.choose(recipe, [b, scaled_b, rounding_b]),
+    }
+
+
+COVERAGE_MODULES: Dict[str, Tuple[Callable, Callable]] = {
+    "floating_point_adder": (generate_adder_candidates, classify_adder),
+    "floating_point_multiplier": (generate_multiplier_candidates, classify_multiplier),
+}
+
+
+def generate_directed_stimulus(module_name: str, exponent_bits: int, mantissa_bits: int, round_to_nearest_ties_to_even: int = 1, target_hits: int = DEFAULT_TARGET_HITS, batch_size: int = DEFAULT_BATCH_SIZE, max_candidates: int = DEFAULT_MAX_CANDIDATES, max_idle_batches: int = DEFAULT_MAX_IDLE_BATCHES, seed: Optional[int] = 0) -> Tuple[Dict[str, np.ndarray], CoverageModel]:
+    """Generates candidate vectors in batches until every coverage bin is full (or max_candidates were
+    generated, or max_idle_batches batches in a row added nothing), and returns the vectors that were kept
+    (one array per input port) and the coverage model, of which the holes are the bins that were not reached."""
+
+    if module_name not in COVERAGE_MODULES:
+        raise ValueError(f"No coverage model for module {module_name}, supported modules are: {', '.join(COVERAGE_MODULES)}")
+
+    generate_candidates, classify = COVERAGE_MODULES[module_name]
+    coverage = CoverageModel(get_families(module_name, exponent_bits, mantissa_bits, round_to_nearest_ties_to_even), target_hits)
+    rng = np.random.default_rng(seed)
+
+    selected = []
+    generated = 0
+    idle_batches = 0
+
+    while not coverage.is_full() and generated < max_candidates and idle_batches < max_idle_batches:
+        candidates = generate_candidates(rng, batch_size, exponent_bits, mantissa_bits)
+        is_selected = coverage.select(classify(candidates, exponent_bits, mantissa_bits, round_to_nearest_ties_to_even))
+
+        selected.append({name: values[is_selected] for name, values in candidates.items()})
+        generated += batch_size
+        idle_batches = 0 if is_selected.any() else idle_batches + 1
+
+    return {name: np.concatenate([batch[name] for batch in selected]) for name in selected[0]}, coverage
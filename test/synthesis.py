@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from lanes import write_generated_file
+from utils import get_parameters_name
+
+SOURCE_DIR = Path(__file__).resolve().parent / ".." / "src"
+SYNTHESIS_DIR = Path(__file__).resolve().parent / "sim_build" / "synthesis"
+RESULTS_FILE = SYNTHESIS_DIR / "results.json"
+BASELINE_FILE = Path(__file__).resolve().parent / "synthesis_baseline.json"
+
+MODULES = ["floating_point_adder", "floating_point_conversion", "floating_point_dot_product", "floating_point_multiplier", "floating_point_multiplier_adder", "floating_point_simd_adder", "floating_point_simd_multiplier", "leading_one_detector", "mantissa_multiplier"]
+
+# (EXPONENT_WIDTH, MANTISSA_WIDTH) pairs: FP8 (E5M2 and E4M3), FP16, BF16 and FP32
+FORMATS = [(5, 2), (4, 3), (5, 10), (8, 7), (8, 23)]
+ROUNDING_MODES = [1, 0]
+LEADING_ONE_DETECTOR_ARCHITECTURES = [0, 1]
+MULTIPLIER_ARCHITECTURES = [0, 1, 2]
+
+# Formats of the half and quarter lanes of the SIMD modules, for each full format that is split into lanes
+SIMD_LANE_FORMATS = {(8, 23): [((5, 10), (5, 2)), ((8, 7), (4, 3))]}
+
+# Accumulator formats of the dot product, for each input format that it is synthesized for, and its number of inputs
+DOT_PRODUCT_ACCUMULATOR_FORMATS = {(5, 2): [(5, 10)], (4, 3): [(5, 10)], (5, 10): [(8, 23)]}
+DOT_PRODUCT_INPUTS = 4
+
+# Output formats of the conversion, for each input format: between the storage formats and the compute formats
+CONVERSION_OUTPUT_FORMATS = {(5, 2): [(5, 10)], (4, 3): [(5, 10)], (5, 10): [(8, 23), (5, 2), (4, 3)], (8, 7): [(8, 23)], (8, 23): [(5, 10), (8, 7)]}
+
+LUT_SIZE = 6
+
+# Relative increase of a metric with respect to the baseline that is reported as a regression
+DEFAULT_TOLERANCE = 0.02
+
+METRICS = ["cells", "luts", "gate_depth", "lut_depth"]
+
+
+def get_yosys_command() -> List[str]:
+    """Returns the Yosys executable: $YOSYS, yowasp-yosys (pinned in requirements.txt, which the baseline was
+    created with) or yosys (for example from the oss-cad-suite)."""
+
+    for command in [os.getenv("YOSYS"), "yowasp-yosys", "yosys"]:
+        if command and shutil.which(command):
+            return [command]
+
+    raise FileNotFoundError("Yosys was not found, install yowasp-yosys (see requirements.txt) or the oss-cad-suite, or point $YOSYS to it")
+
+
+def get_yosys_version() -> str:
+    """Returns the version number of Yosys, for example 0.70; builds of the same version give the same results."""
+
+    output = subprocess.run(get_yosys_command() + ["-V"], capture_output=True, text=True, check=True).stdout
+
+    return re.search(r"Yosys (\S+)", output).group(1)
+
+
+def get_configurations(modules: Optional[List[str]] = None, formats: Optional[List[tuple]] = None, rounding_modes: Optional[List[int]] = None) -> List[dict]:
+    """Returns the module and parameters of every benchmark in the matrix. The leading one detector has the
+    width of the one in the adder for that format, and is synthesized in both architectures. The mantissa multiplier has the width of the one in the multiplier for that
+    format, and is synthesized in all architectures. The SIMD modules are only synthesized for the formats in
+    SIMD_LANE_FORMATS, with each of their lane formats, and the dot product only for the formats in
+    DOT_PRODUCT_ACCUMULATOR_FORMATS, with each of their accumulator formats. The conversion is synthesized
+    with each of the output formats in CONVERSION_OUTPUT_FORMATS."""
+
+    configurations = []
+
+    for module_name in modules or MODULES:
+        for exp_bits, mant_bits in formats or FORMATS:
+            for round_to_nearest in rounding_modes or ROUNDING_MODES:
+                if module_name == "leading_one_detector":
+                    width = str(mant_bits + 2 + max(mant_bits, 3))
+                    parameter_sets = [{"WIDTH": width, "ARCHITECTURE": str(architecture)} for architecture in LEADING_ONE_DETECTOR_ARCHITECTURES]
+                elif module_name == "mantissa_multiplier":
+                    parameter_sets = [{"WIDTH": str(mant_bits + 1), "ARCHITECTURE": str(architecture)} for architecture in MULTIPLIER_ARCHITECTURES]
+                elif module_name in ["floating_point_simd_adder", "floating_point_simd_multiplier"]:
+                    parameter_sets = [
+                        {"EXPONENT_WIDTH": str(exp_bits), "MANTISSA_WIDTH": str(mant_bits), "HALF_EXPONENT_WIDTH": str(half[0]), "HALF_MANTISSA_WIDTH": str(half[1]), "QUARTER_EXPONENT_WIDTH": str(quarter[0]), "QUARTER_MANTISSA_WIDTH": str(quarter[1]), "ROUND_TO_NEAREST_TIES_TO_EVEN": str(round_to_nearest)}
+                        for half, quarter in SIMD_LANE_FORMATS.get((exp_bits, mant_bits), [])
+                    ]
+                elif module_name == "floating_point_dot_product":
+                    parameter_sets = [
+                        {"EXPONENT_WIDTH": str(exp_bits), "MANTISSA_WIDTH": str(mant_bits), "N_INPUTS": str(DOT_PRODUCT_INPUTS), "ACCUMULATOR_EXPONENT_WIDTH": str(accumulator[0]), "ACCUMULATOR_MANTISSA_WIDTH": str(accumulator[1]), "ROUND_TO_NEAREST_TIES_TO_EVEN": str(round_to_nearest)}
+                        for accumulator in DOT_PRODUCT_ACCUMULATOR_FORMATS.get((exp_bits, mant_bits), [])
+                    ]
+                elif module_name == "floating_point_conversion":
+                    parameter_sets = [
+                        {"EXPONENT_WIDTH": str(exp_bits), "MANTISSA_WIDTH": str(mant_bits), "OUT_EXPONENT_WIDTH": str(out_format[0]), "OUT_MANTISSA_WIDTH": str(out_format[1]), "ROUND_TO_NEAREST_TIES_TO_EVEN": str(round_to_nearest)}
+                        for out_format in CONVERSION_OUTPUT_FORMATS.get((exp_bits, mant_bits), [])
+                    ]
+                else:
+                    parameter_sets = [{"EXPONENT_WIDTH": str(exp_bits), "MANTISSA_WIDTH": str(mant_bits), "ROUND_TO_NEAREST_TIES_TO_EVEN": str(round_to_nearest)}]
+
+                for parameters in parameter_sets:
+                    configuration = {"module": module_name, "parameters": parameters}
+
+                    if configuration not in configurations:
+                        configurations.append(configuration)
+
+    return configurations
+
+
+def get_configuration_name(configuration: dict) -> str:
+    return f"{configuration['module']}/{get_parameters_name(configuration['parameters'])}"
+
+
+def get_synthesis_script(module_name: str, parameters: dict) -> str:
+    # Reports are written to the working directory, which is the run directory of the configuration
+    chparams = " ".join(f"-set {name} {value}" for name, value in parameters.items())
+
+    # Yosys does not support break statements, so the alternative of the leading one detector without them is used
+    return "\n".join([
+        f"read_verilog -sv -defer -DLEADING_ONE_DETECTOR_NO_BREAK -I{SOURCE_DIR} {SOURCE_DIR / (module_name + '.v')}",
+        f"chparam {chparams} {module_name}",
+        f"hierarchy -top {module_name}",
+        f"synth -flatten -top {module_name}",
+        "delete t:$scopeinfo",
+        "tee -q -o gates.json stat -json",
+        "tee -q -o gates_ltp.txt ltp -noff",
+        f"abc -lut {LUT_SIZE}",
+        "opt_clean",
+        "tee -q -o luts.json stat -json",
+        "tee -q -o luts_ltp.txt ltp -noff",
+    ]) + "\n"
+
+
+def _read_cell_count(path: Path) -> int:
+    return json.loads(path.read_text())["design"]["num_cells"]
+
+
+def _read_longest_path(path: Path) -> int:
+    match = re.search(r"Longest topological path in \S+ \(length=(\d+)\)", path.read_text())
+
+    if not match:
+        raise RuntimeError(f"Could not find the longest path in {path}")
+
+    return int(match.group(1))
+
+
+def synthesize(configuration: dict) -> dict:
+    """Synthesizes one configuration to generic gates and to LUTs, and returns their counts and the longest
+    combinational path (logic depth) in both netlists."""
+
+    run_dir = SYNTHESIS_DIR / "runs" / get_configuration_name(configuration)
+    write_generated_file(run_dir / "synth.ys", get_synthesis_script(configuration["module"], configuration["parameters"]))
+
+    result = subprocess.run(get_yosys_command() + ["-q", "-l", "yosys.log", "synth.ys"], cwd=run_dir, capture_output=True, text=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"Synthesis of {get_configuration_name(configuration)} failed, see {run_dir / 'yosys.log'}:\n{result.stderr}")
+
+    return {
+        **configuration,
+        "cells": _read_cell_count(run_dir / "gates.json"),
+        "luts": _read_cell_count(run_dir / "luts.json"),
+        "gate_depth": _read_longest_path(run_dir / "gates_ltp.txt"),
+        "lut_depth": _read_longest_path(run_dir / "luts_ltp.txt"),
+    }
+
+
+def run_synthesis(configurations: List[dict], max_workers: Optional[int] = None, results_file: Path = RESULTS_FILE) -> dict:
+    """Synthesizes all configurations in parallel and writes the results to results_file."""
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        results = list(executor.map(synthesize, configurations))
+
+    report = {"yosys": get_yosys_version(), "lut_size": LUT_SIZE, "results": {get_configuration_name(result): result for result in results}}
+
+    write_generated_file(Path(results_file), json.dumps(report, indent=2) + "\n")
+
+    return report
+
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[dict]:
+    """Returns all metrics that grew more than tolerance (relative) with respect to the baseline.
+    Configurations that are not in the baseline are ignored."""
+
+    regressions = []
+
+    for name, result in report["results"].items():
+        if name not in baseline["results"]:
+            continue
+
+        for metric in METRICS:
+            expected = baseline["results"][name][metric]
+
+            if result[metric] > expected * (1 + tolerance):
+                regressions.append({"configuration": name, "metric": metric, "baseline": expected, "actual": result[metric]})
+
+    return regressions
+
+
+def format_report(report: dict, baseline: Optional[dict] = None) -> str:
+    width = max(len(name) for name in report["results"])
+    lines = [f"{'configuration':<{width}} " + " ".join(f"{metric:>16}" for metric in METRICS)]
+
+    for name, result in report["results"].items():
+        columns = []
+
+        for metric in METRICS:
+            column = str(result[metric])
+
+            if baseline and name in baseline["results"] and baseline["results"][name][metric] != result[metric]:
+                column += f" ({result[metric] - baseline['results'][name][metric]:+d})"
+
+            columns.append(f"{column:>16}")
+
+        lines.append(f"{name:<{width}} " + " ".join(columns))
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthesize the floating point modules with Yosys and compare their area and logic depth with a stored baseline.")
+    parser.add_argument("--modules", nargs="+", choices=MODULES, default=MODULES)
+    parser.add_argument("--formats", nargs="+", default=[f"E{e}M{m}" for e, m in FORMATS], help="Formats as E<exponent width>M<mantissa width>, for example E5M2")
+    parser.add_argument("--rounding-modes", nargs="+", type=int, choices=[0, 1], default=ROUNDING_MODES)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--results-file", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--baseline-file", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Relative increase of a metric that is reported as a regression")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline (merged with the existing one)")
+    args = parser.parse_args()
+
+    formats = [tuple(int(width) for width in re.fullmatch(r"E(\d+)M(\d+)", name).groups()) for name in args.formats]
+    report = run_synthesis(get_configurations(args.modules, formats, args.rounding_modes), args.workers, args.results_file)
+    baseline = json.loads(args.baseline_file.read_text()) if args.baseline_file.is_file() else None
+
+    print(format_report(report, baseline))
+    print(f"Results written to {args.results_file}")
+
+    if args.update_baseline:
+        merged = {**report, "results": {**(baseline["results"] if baseline else {}), **report["results"]}}
+        write_generated_file(args.baseline_file, json.dumps(merged, indent=2) + "\n")
+
+        print(f"Baseline updated in {args.baseline_file}")
+    elif baseline:
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+
+        for regression in regressions:
+            print(f"Regression in {regression['configuration']}: {regression['metric']} went from {regression['baseline']} to {regression['actual']}")
+
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pytest
+
+from bulk import assert_responses, run_bulk_regression
+from common import floats_to_bits, float_add_reference, float_fused_multiply_add_reference, float_multiply_reference
+from performance import timed
+
+# Can be raised to 10^7-10^8 for long regressions, for example: BULK_VECTORS=10000000 pytest test_bulk_regression.py
+TOTAL_VECTORS = int(os.getenv("BULK_VECTORS", 1000*1000))
+POWERS = [-300, -12, -6, -3, 0, 6, 12, 24]
+
+FORMATS = [{"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}, {"EXPONENT_WIDTH": "11", "MANTISSA_WIDTH": "52", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}]
+# The adders normalize with a leading one detector, so they are also checked with its binary tree architecture
+ADDER_FORMATS = FORMATS + [{**parameters, "LOD_ARCHITECTURE": "1"} for parameters in FORMATS]
+
+
+def random_floats(rng, exp_bits, mant_bits, powers):
+    # Uniformly distributed values within the decade band below each of the given powers
+    powers = np.asarray(powers, dtype=np.float64)
+    values = rng.uniform(10.0 ** (powers - 1), 10.0 ** powers) * rng.choice([-1.0, 1.0], len(powers))
+
+    return floats_to_bits(values, exp_bits, mant_bits)
+
+
+def get_format(parameters):
+    return int(parameters["EXPONENT_WIDTH"]), int(parameters["MANTISSA_WIDTH"]), int(parameters["ROUND_TO_NEAREST_TIES_TO_EVEN"])
+
+
+@pytest.mark.parametrize("parameters", ADDER_FORMATS)
+def test_floating_point_adder_bulk(parameters):
+    exp_bits, mant_bits, round_to_nearest = get_format(parameters)
+    rng = np.random.default_rng(0)
+
+    inputs = {
+        "a": random_floats(rng, exp_bits, mant_bits, rng.choice(POWERS, TOTAL_VECTORS)),
+        "b": random_floats(rng, exp_bits, mant_bits, rng.choice(POWERS, TOTAL_VECTORS)),
+        "subtract": rng.integers(0, 2, TOTAL_VECTORS, dtype=np.uint64),
+    }
+
+    (out, underflow_flags, overflow_flags, invalid_operation_flags), golden_model_time = timed(float_add_reference, inputs["a"], inputs["b"], inputs["subtract"], exp_bits, mant_bits, round_to_nearest)
+    responses = run_bulk_regression("floating_point_adder", inputs, parameters, golden_model_time=golden_model_time)
+
+    assert_responses(inputs, responses, {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags}, "floating_point_adder")
+
+
+@pytest.mark.parametrize("parameters", FORMATS)
+def test_floating_point_multiplier_bulk(parameters):
+    exp_bits, mant_bits, round_to_nearest = get_format(parameters)
+    rng = np.random.default_rng(0)
+
+    # Like in test_random_floats, both operands come from the same band, as the multiplier does not
+    # support subnormal operands (yet)
+    powers = rng.choice(POWERS, TOTAL_VECTORS)
+
+    inputs = {
+        "a": random_floats(rng, exp_bits, mant_bits, powers),
+        "b": random_floats(rng, exp_bits, mant_bits, powers),
+    }
+
+    (out, underflow_flags, overflow_flags, invalid_operation_flags), golden_model_time = timed(float_multiply_reference, inputs["a"], inputs["b"], exp_bits, mant_bits, round_to_nearest, flush_to_zero=True)
+
+    responses = run_bulk_regression("floating_point_multiplier", inputs, parameters, golden_model_time=golden_model_time)
+
+    assert_responses(inputs, responses, {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags}, "floating_point_multiplier")
+
+
+@pytest.mark.parametrize("parameters", ADDER_FORMATS)
+def test_floating_point_multiplier_adder_bulk(parameters):
+    exp_bits, mant_bits, round_to_nearest = get_format(parameters)
+    rng = np.random.default_rng(0)
+
+    inputs = {
+        "a_1": random_floats(rng, exp_bits, mant_bits, rng.choice(POWERS, TOTAL_VECTORS)),
+        "a_2": random_floats(rng, exp_bits, mant_bits, rng.choice(POWERS, TOTAL_VECTORS)),
+        "b": random_floats(rng, exp_bits, mant_bits, rng.choice(POWERS, TOTAL_VECTORS)),
+    }
+
+    # For half of the vectors, the addend is within a few ULPs of the negated product, which causes massive
+    # cancellation where a product that is rounded before the addition would give a completely different result
+    product, _, _, _ = float_multiply_reference(inputs["a_1"], inputs["a_2"], exp_bits, mant_bits, round_to_nearest)
+    is_cancelling = rng.random(TOTAL_VECTORS) < 0.5
+    cancelling_addend = (product ^ np.uint64(1 << (exp_bits + mant_bits))) + rng.integers(-2, 3, TOTAL_VECTORS).astype(np.uint64)
+    inputs["b"] = np.where(is_cancelling, cancelling_addend & np.uint64((1 << (exp_bits + mant_bits + 1)) - 1), inputs["b"])
+
+    (out, underflow_flags, overflow_flags, invalid_operation_flags), golden_model_time = timed(float_fused_multiply_add_reference, inputs["a_1"], inputs["a_2"], inputs["b"], exp_bits, mant_bits, round_to_nearest)
+    responses = run_bulk_regression("floating_point_multiplier_adder", inputs, parameters, golden_model_time=golden_model_time)
+
+    assert_responses(inputs, responses, {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags}, "floating_point_multiplier_adder")
@@ -0,0 +1,64 @@
+import numpy as np
+
+from corpus import add_regression_vectors, get_golden_vectors_key, get_regression_corpus_file, load_golden_vectors, read_regression_vectors
+
+
+def test_golden_vectors_are_generated_once(tmp_path):
+    calls = []
+
+    def generate():
+        calls.append(1)
+
+        return {"a": np.arange(10, dtype=np.uint64), "flags": np.array([True, False]), "report": np.array("coverage")}
+
+    key = get_golden_vectors_key("floating_point_adder", 5, 10, 1, generate, {"vectors": 10}, 0)
+    generated = load_golden_vectors(key, generate, tmp_path)
+    stored = load_golden_vectors(key, generate, tmp_path)
+
+    assert len(calls) == 1
+    assert set(stored) == set(generated)
+
+    for name in generated:
+        assert isinstance(stored[name], np.memmap)
+        assert stored[name].dtype == generated[name].dtype
+        np.testing.assert_array_equal(stored[name], generated[name])
+
+    # Other parameters of the generator do not reuse the vectors
+    load_golden_vectors(get_golden_vectors_key("floating_point_adder", 5, 10, 1, generate, {"vectors": 20}, 0), generate, tmp_path)
+
+    assert len(calls) == 2
+
+
+def test_golden_vectors_key_depends_on_generator_source():
+    def generate():
+        return {"a": np.arange(10)}
+
+    def generate_more():
+        return {"a": np.arange(20)}
+
+    generate_more.__name__ = generate.__name__
+
+    assert get_golden_vectors_key("floating_point_adder", 5, 10, 1, generate, None, 0) != get_golden_vectors_key("floating_point_adder", 5, 10, 1, generate_more, None, 0)
+
+
+def test_regression_vectors(tmp_path):
+    corpus_file = get_regression_corpus_file("floating_point_adder", "default", tmp_path)
+
+    assert read_regression_vectors(corpus_file) == []
+
+    vector = {"inputs": {"a": 1, "b": 1 << 63}, "message": "vector", "expected": {"out": 0, "flags": [0, 0, 0]}}
+
+    assert add_regression_vectors(corpus_file, [vector]) == 1
+
+    # Vectors with the same inputs are only kept once
+    assert add_regression_vectors(corpus_file, [dict(vector, message="again")]) == 0
+    assert read_regression_vectors(corpus_file) == [vector]
+
+    # No vector is ever dropped, and the ones that fail again are not added twice
+    assert add_regression_vectors(corpus_file, [dict(vector, inputs={"a": i, "b": 0}) for i in range(2000)]) == 2000
+    assert add_regression_vectors(corpus_file, [dict(vector, inputs={"a": i, "b": 0}) for i in range(2000)]) == 0
+
+    vectors = read_regression_vectors(corpus_file)
+
+    assert len(vectors) == 2001
+    assert vectors[0] == vector
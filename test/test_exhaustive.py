@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from exhaustive import run_exhaustive
+
+# FP16 (2^32 pairs, 2^33 for the adder) takes hours and is therefore only run when requested,
+# preferably from the command line: python exhaustive.py floating_point_multiplier --exponent-width 5 --mantissa-width 10
+FORMATS = [{"EXPONENT_WIDTH": "5", "MANTISSA_WIDTH": "2", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}, {"EXPONENT_WIDTH": "5", "MANTISSA_WIDTH": "2", "ROUND_TO_NEAREST_TIES_TO_EVEN": "0"}]
+
+if os.getenv("EXHAUSTIVE_FP16"):
+    FORMATS.append({"EXPONENT_WIDTH": "5", "MANTISSA_WIDTH": "10", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"})
+
+# With three operands, 6 and 7 bit formats are the largest that can be enumerated in a regular test run
+# (2^18 and 2^21 vectors). FP8 (2^24 vectors) can be run from the command line.
+MULTIPLIER_ADDER_FORMATS = [{"EXPONENT_WIDTH": "4", "MANTISSA_WIDTH": "1", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}, {"EXPONENT_WIDTH": "4", "MANTISSA_WIDTH": "1", "ROUND_TO_NEAREST_TIES_TO_EVEN": "0"}, {"EXPONENT_WIDTH": "3", "MANTISSA_WIDTH": "3", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}]
+
+def check_summary(summary):
+    assert summary["checked_vectors"] == summary["total_vectors"], f"Only {summary['checked_vectors']} of {summary['total_vectors']} vectors were checked"
+    assert summary["mismatch_count"] == 0, f"{summary['mismatch_count']} mismatches, for example: {summary['mismatches'][:3]}"
+
+
+@pytest.mark.parametrize("parameters", FORMATS)
+def test_floating_point_adder_exhaustive(parameters):
+    check_summary(run_exhaustive("floating_point_adder", parameters))
+
+
+@pytest.mark.parametrize("parameters", FORMATS)
+def test_floating_point_multiplier_exhaustive(parameters):
+    # Subnormal operands and products that round up to the smallest normal number are not supported, and are
+    # therefore not compared (see exhaustive._expected_multiplier)
+    summary = run_exhaustive("floating_point_multiplier", parameters)
+
+    check_summary(summary)
+    assert summary["unsupported_vectors"] < summary["total_vectors"] // 4
+
+
+@pytest.mark.parametrize("parameters", MULTIPLIER_ADDER_FORMATS)
+def test_floating_point_multiplier_adder_exhaustive(parameters):
+    check_summary(run_exhaustive("floating_point_multiplier_adder", parameters))
+
+
+def test_exhaustive_sweep_resumes(tmp_path):
+    parameters = FORMATS[0]
+
+    partial = run_exhaustive("floating_point_multiplier", parameters, shard_size=1 << 14, max_shards=1, checkpoints_dir=tmp_path)
+    assert partial["completed_shards"] == 1 and partial["checked_vectors"] == 1 << 14
+
+    # Only the remaining shards are simulated, of which the results are combined with the checkpointed shard
+    full = run_exhaustive("floating_point_multiplier", parameters, shard_size=1 << 14, checkpoints_dir=tmp_path)
+    assert full["completed_shards"] == full["total_shards"] == 4
+    assert full["checked_vectors"] == full["total_vectors"] == 1 << 16
@@ -1,16 +1,20 @@
 import pytest
 
-from utils import run_module_test
+from utils import SIMULATOR_PARAMS, run_module_test
 
 @pytest.mark.parametrize("parameters", [{"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}, {"EXPONENT_WIDTH": "11", "MANTISSA_WIDTH": "52", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}])
-def test_floating_point_adder(parameters):
+# The same vectors are checked on every installed simulator
+@pytest.mark.parametrize("simulator", SIMULATOR_PARAMS)
+def test_floating_point_adder(parameters, simulator):
     run_module_test("floating_point_adder",
                 parameters=parameters,
+                simulator=simulator,
+                # 10000 random floats per format, for which a faster simulation pays off
+                build_profile="fast_run",
                 include_src_dir=True,
                 # Dont fail on UNOPTFLAT due to the fact that Verilator thinks there is a loop in the design, while there is not.
-                compile_args=['-Wno-UNOPTFLAT', '-Wno-WIDTHTRUNC'],
-                create_vcd=True)
+                compile_args=['-Wno-UNOPTFLAT', '-Wno-WIDTHTRUNC'])
 
 
 if __name__ == "__main__":
-    test_floating_point_adder({"EXPONENT_WIDTH": "5", "MANTISSA_WIDTH": "10", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"})
+    test_floating_point_adder({"EXPONENT_WIDTH": "5", "MANTISSA_WIDTH": "10", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}, "verilator")
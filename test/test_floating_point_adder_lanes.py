@@ -0,0 +1,17 @@
+import pytest
+
+from lanes import generate_lanes_wrapper
+from utils import run_module_test
+
+@pytest.mark.parametrize("parameters", [{"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1", "LANES": "32"}, {"EXPONENT_WIDTH": "11", "MANTISSA_WIDTH": "52", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1", "LANES": "32"}])
+def test_floating_point_adder_lanes(parameters):
+    run_module_test("floating_point_adder_lanes",
+                file_name=str(generate_lanes_wrapper("floating_point_adder")),
+                parameters=parameters,
+                include_src_dir=True,
+                # Dont fail on UNOPTFLAT due to the fact that Verilator thinks there is a loop in the design, while there is not.
+                compile_args=['-Wno-UNOPTFLAT', '-Wno-WIDTHTRUNC'])
+
+
+if __name__ == "__main__":
+    test_floating_point_adder_lanes({"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1", "LANES": "32"})
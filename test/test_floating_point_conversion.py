@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pytest
+
+from bulk import assert_responses, run_bulk_regression
+from common import float_convert_reference
+from performance import timed
+from rtl_emulator import floating_point_conversion, get_quiet_nan
+
+VECTORS = int(os.getenv("BULK_VECTORS", 1 << 16))
+
+FP32, FP16, BF16, E5M2, E4M3 = (8, 23), (5, 10), (8, 7), (5, 2), (4, 3)
+
+# Source and destination formats of the conversions between narrow storage formats and wide compute formats, in both
+# directions. 8 and 16 bit sources are checked exhaustively, FP32 sources with random encodings.
+CONVERSIONS = [(FP16, FP32), (FP16, BF16), (FP16, E5M2), (FP16, E4M3), (BF16, FP32), (BF16, FP16), (E5M2, FP16), (E5M2, FP32), (E4M3, FP16), (E4M3, FP32), (E5M2, E4M3), (E4M3, E5M2), (FP32, FP16), (FP32, BF16), (FP32, E4M3)]
+
+PARAMETERS = [
+    {"EXPONENT_WIDTH": str(source[0]), "MANTISSA_WIDTH": str(source[1]), "OUT_EXPONENT_WIDTH": str(destination[0]), "OUT_MANTISSA_WIDTH": str(destination[1]), "ROUND_TO_NEAREST_TIES_TO_EVEN": round_to_nearest}
+    for source, destination in CONVERSIONS
+    for round_to_nearest in ["1", "0"]
+]
+
+
+def get_parameters_id(parameters):
+    return "E{EXPONENT_WIDTH}M{MANTISSA_WIDTH}_to_E{OUT_EXPONENT_WIDTH}M{OUT_MANTISSA_WIDTH}_R{ROUND_TO_NEAREST_TIES_TO_EVEN}".format(**parameters)
+
+
+def get_emulator_parameters(parameters):
+    return [int(parameters[name]) for name in ["EXPONENT_WIDTH", "MANTISSA_WIDTH", "OUT_EXPONENT_WIDTH", "OUT_MANTISSA_WIDTH", "ROUND_TO_NEAREST_TIES_TO_EVEN"]]
+
+
+def get_conversion_inputs(rng, exp_bits: int, mant_bits: int):
+    """Every encoding of sources up to 16 bits, and random encodings (which include all special values) plus every
+    power of two and its neighbours for wider sources."""
+
+    width = exp_bits + mant_bits + 1
+
+    if width <= 16:
+        return np.arange(1 << width, dtype=np.uint64)
+
+    exponents = np.arange(1 << exp_bits, dtype=np.uint64) << np.uint64(mant_bits)
+    powers_of_two = np.concatenate([exponents, exponents + np.uint64(1), exponents - np.uint64(1)]) & np.uint64((1 << (width - 1)) - 1)
+
+    return np.concatenate([rng.integers(0, 1 << width, VECTORS, dtype=np.uint64), powers_of_two, powers_of_two | np.uint64(1 << (width - 1))])
+
+
+@pytest.mark.parametrize("parameters", PARAMETERS, ids=get_parameters_id)
+def test_floating_point_conversion(parameters):
+    rng = np.random.default_rng(0)
+
+    exp_bits, mant_bits, out_exp_bits, out_mant_bits, round_to_nearest = get_emulator_parameters(parameters)
+    inputs = {"a": get_conversion_inputs(rng, exp_bits, mant_bits)}
+
+    (out, underflow_flags, overflow_flags, invalid_operation_flags), golden_model_time = timed(floating_point_conversion, inputs["a"], *get_emulator_parameters(parameters))
+    responses = run_bulk_regression("floating_point_conversion", inputs, parameters, golden_model_time=golden_model_time)
+
+    assert_responses(inputs, responses, {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags}, "floating_point_conversion")
+
+    if (4, 3) in [(exp_bits, mant_bits), (out_exp_bits, out_mant_bits)]:
+        # The exact reference decodes and encodes an all ones exponent as IEEE 754 infinities and NaNs
+        return
+
+    # The conversion rounds once, so it must equal the exactly rounded value
+    expected_out, expected_underflow_flags, expected_overflow_flags, expected_invalid_operation_flags = float_convert_reference(inputs["a"], exp_bits, mant_bits, out_exp_bits, out_mant_bits, round_to_nearest)
+
+    np.testing.assert_array_equal(out, expected_out)
+    np.testing.assert_array_equal(underflow_flags, expected_underflow_flags)
+    np.testing.assert_array_equal(overflow_flags, expected_overflow_flags)
+    np.testing.assert_array_equal(invalid_operation_flags, expected_invalid_operation_flags)
+
+
+@pytest.mark.parametrize("narrow, wide", [(E4M3, FP16), (E5M2, FP16), (FP16, FP32), (BF16, FP32)], ids=str)
+def test_floating_point_conversion_round_trip(narrow, wide):
+    # Widening is exact, so narrowing again gives every encoding back, except for NaNs, which become the quiet NaN
+    exp_bits, mant_bits = narrow
+    a = np.arange(1 << (exp_bits + mant_bits + 1), dtype=np.uint64)
+
+    widen = {"EXPONENT_WIDTH": str(exp_bits), "MANTISSA_WIDTH": str(mant_bits), "OUT_EXPONENT_WIDTH": str(wide[0]), "OUT_MANTISSA_WIDTH": str(wide[1]), "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}
+    narrow_parameters = {"EXPONENT_WIDTH": str(wide[0]), "MANTISSA_WIDTH": str(wide[1]), "OUT_EXPONENT_WIDTH": str(exp_bits), "OUT_MANTISSA_WIDTH": str(mant_bits), "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}
+
+    widened = run_bulk_regression("floating_point_conversion", {"a": a}, widen)
+    narrowed = run_bulk_regression("floating_point_conversion", {"a": widened["out"]}, narrow_parameters)
+
+    _, _, _, is_nan = floating_point_conversion(a, exp_bits, mant_bits, *wide)
+
+    np.testing.assert_array_equal(narrowed["out"], np.where(is_nan, np.uint64(get_quiet_nan(exp_bits, mant_bits)), a))
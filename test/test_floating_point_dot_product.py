@@ -0,0 +1,122 @@
+import os
+
+import numpy as np
+import pytest
+
+from bulk import assert_responses, run_bulk_regression
+from common import float_dot_product_reference, floats_to_bits
+from performance import timed
+from rtl_emulator import decode_floats, floating_point_dot_product
+from utils import run_module_test
+
+VECTORS = int(os.getenv("BULK_VECTORS", 1 << 16))
+
+# FP32 with an even and odd number of inputs (with and without rounding), a single input, and FP16, E5M2 and
+# E4M3 inputs with a wider accumulator
+PARAMETERS = [
+    {"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "N_INPUTS": "4", "ACCUMULATOR_EXPONENT_WIDTH": "8", "ACCUMULATOR_MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"},
+    {"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "N_INPUTS": "5", "ACCUMULATOR_EXPONENT_WIDTH": "8", "ACCUMULATOR_MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"},
+    {"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "N_INPUTS": "5", "ACCUMULATOR_EXPONENT_WIDTH": "8", "ACCUMULATOR_MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "0"},
+    {"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "N_INPUTS": "1", "ACCUMULATOR_EXPONENT_WIDTH": "8", "ACCUMULATOR_MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"},
+    {"EXPONENT_WIDTH": "5", "MANTISSA_WIDTH": "10", "N_INPUTS": "8", "ACCUMULATOR_EXPONENT_WIDTH": "8", "ACCUMULATOR_MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"},
+    {"EXPONENT_WIDTH": "5", "MANTISSA_WIDTH": "2", "N_INPUTS": "8", "ACCUMULATOR_EXPONENT_WIDTH": "5", "ACCUMULATOR_MANTISSA_WIDTH": "10", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"},
+    {"EXPONENT_WIDTH": "4", "MANTISSA_WIDTH": "3", "N_INPUTS": "8", "ACCUMULATOR_EXPONENT_WIDTH": "5", "ACCUMULATOR_MANTISSA_WIDTH": "10", "ROUND_TO_NEAREST_TIES_TO_EVEN": "0"},
+]
+
+
+def get_parameters_id(parameters):
+    return "E{EXPONENT_WIDTH}M{MANTISSA_WIDTH}_N{N_INPUTS}_E{ACCUMULATOR_EXPONENT_WIDTH}M{ACCUMULATOR_MANTISSA_WIDTH}_R{ROUND_TO_NEAREST_TIES_TO_EVEN}".format(**parameters)
+
+
+def get_emulator_parameters(parameters):
+    return [int(parameters[name]) for name in ["EXPONENT_WIDTH", "MANTISSA_WIDTH", "ACCUMULATOR_EXPONENT_WIDTH", "ACCUMULATOR_MANTISSA_WIDTH", "ROUND_TO_NEAREST_TIES_TO_EVEN"]]
+
+
+def pack_elements(elements, width: int):
+    # Element i goes to bits [i*width+:width], as Python integers as the vectors are often wider than 64 bits
+    elements = elements.astype(object)
+
+    return sum(elements[:, i] << (i * width) for i in range(elements.shape[-1]))
+
+
+def random_dot_product_inputs(rng, parameters):
+    """Random vectors of N_INPUTS elements: a quarter has random encodings (which includes all special values), the
+    rest are random floats of which the magnitudes span a large part of the input format."""
+
+    exp_bits, mant_bits = int(parameters["EXPONENT_WIDTH"]), int(parameters["MANTISSA_WIDTH"])
+    shape = (VECTORS, int(parameters["N_INPUTS"]))
+    width = exp_bits + mant_bits + 1
+
+    # Powers of two up to a quarter of the exponent range, so that most sums stay finite
+    max_power = (1 << (exp_bits - 1)) // 4
+
+    operands = []
+
+    for _ in range(2):
+        values = rng.uniform(-1, 1, shape) * np.exp2(rng.integers(-max_power, max_power + 1, shape))
+        random_encodings = rng.integers(0, 1 << width, shape, dtype=np.uint64)
+
+        operands.append(np.where(rng.random(shape) < 0.25, random_encodings, floats_to_bits(values, exp_bits, mant_bits)))
+
+    return operands
+
+
+@pytest.mark.parametrize("parameters", [PARAMETERS[0], PARAMETERS[4]])
+def test_floating_point_dot_product(parameters):
+    run_module_test("floating_point_dot_product",
+                parameters=parameters,
+                include_src_dir=True,
+                # Dont fail on UNOPTFLAT due to the fact that Verilator thinks there is a loop in the design, while there is not.
+                compile_args=['-Wno-UNOPTFLAT', '-Wno-WIDTHTRUNC'])
+
+
+@pytest.mark.parametrize("parameters", PARAMETERS, ids=get_parameters_id)
+def test_floating_point_dot_product_bulk(parameters):
+    rng = np.random.default_rng(0)
+
+    exp_bits, mant_bits, acc_exp_bits, acc_mant_bits, round_to_nearest = get_emulator_parameters(parameters)
+    width = exp_bits + mant_bits + 1
+
+    a, b = random_dot_product_inputs(rng, parameters)
+    inputs = {"a": pack_elements(a, width), "b": pack_elements(b, width)}
+
+    (out, underflow_flags, overflow_flags, invalid_operation_flags), golden_model_time = timed(floating_point_dot_product, a, b, *get_emulator_parameters(parameters))
+    responses = run_bulk_regression("floating_point_dot_product", inputs, parameters, golden_model_time=golden_model_time)
+
+    assert_responses(inputs, responses, {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags}, "floating_point_dot_product")
+
+    # Every product and every level of the adder tree rounds once, so when no flag is raised, the result differs
+    # from the exact dot product by at most (levels + 1) * u * sum(|a_i * b_i|) (with u = 2^-(ACCUMULATOR_MANTISSA_WIDTH
+    # + 1) when rounding to nearest and u = 2^-ACCUMULATOR_MANTISSA_WIDTH when chopping), plus the rounding of the exact
+    # dot product itself. The rounded sum of the magnitudes of the products bounds the sum of magnitudes to within one
+    # rounding step.
+    levels = int(np.ceil(np.log2(int(parameters["N_INPUTS"]))))
+    unit_roundoff = 2.0 ** -(acc_mant_bits + round_to_nearest)
+
+    sign_mask = np.uint64(1 << (width - 1))
+    exact, *_ = float_dot_product_reference(a, b, exp_bits, mant_bits, acc_exp_bits, acc_mant_bits)
+    magnitudes, *_ = float_dot_product_reference(a & ~sign_mask, b & ~sign_mask, exp_bits, mant_bits, acc_exp_bits, acc_mant_bits)
+
+    # Only the vectors of which all elements are zero or normal numbers are checked: the multiplier does not match
+    # the exact reference for infinite operands and for subnormal operands (which stay subnormal when the exponent is
+    # not widened), and the exact reference decodes the E4M3 numbers with an all ones exponent as IEEE 754 infinities
+    # and NaNs. All other vectors are only compared with the emulator.
+    exponent_mask = np.uint64(((1 << exp_bits) - 1) << mant_bits)
+    mantissa_mask = np.uint64((1 << mant_bits) - 1)
+
+    def is_checked(elements):
+        exponent = elements & exponent_mask
+        return (exponent != exponent_mask) & ((exponent != 0) | ((elements & mantissa_mask) == 0) | (exp_bits != acc_exp_bits))
+
+    checked = ~(underflow_flags | overflow_flags | invalid_operation_flags) & np.all(is_checked(a) & is_checked(b), axis=-1)
+
+    with np.errstate(invalid="ignore"):
+        # Differences of infinities in the vectors that are not checked
+        error = np.abs(decode_floats(out, acc_exp_bits, acc_mant_bits) - decode_floats(exact, acc_exp_bits, acc_mant_bits))
+        bound = (levels + 2) * unit_roundoff * (1 + unit_roundoff) ** (levels + 2) * decode_floats(magnitudes, acc_exp_bits, acc_mant_bits)
+
+    assert np.all(error[checked] <= bound[checked]), f"{np.count_nonzero(error[checked] > bound[checked])} results exceed the error bound of the adder tree"
+
+
+if __name__ == "__main__":
+    test_floating_point_dot_product(PARAMETERS[0])
@@ -1,14 +1,21 @@
 import pytest
 
-from utils import run_module_test
+from utils import SIMULATOR_PARAMS, run_module_test
 
-@pytest.mark.parametrize("parameters", [{"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}, {"EXPONENT_WIDTH": "11", "MANTISSA_WIDTH": "52", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}])
-def test_floating_point_multiplier(parameters):
+# The Booth architectures of the mantissa multiplier (1: Wallace tree, 2: Dadda tree) must give the same results
+@pytest.mark.parametrize("parameters", [{"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}, {"EXPONENT_WIDTH": "11", "MANTISSA_WIDTH": "52", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}]
+                         + [{"EXPONENT_WIDTH": e, "MANTISSA_WIDTH": m, "ROUND_TO_NEAREST_TIES_TO_EVEN": "1", "MULTIPLIER_ARCHITECTURE": str(a)} for e, m in [("8", "23"), ("11", "52")] for a in [1, 2]])
+# The same vectors are checked on every installed simulator
+@pytest.mark.parametrize("simulator", SIMULATOR_PARAMS)
+def test_floating_point_multiplier(parameters, simulator):
     run_module_test("floating_point_multiplier",
                 parameters=parameters,
+                simulator=simulator,
+                # 100000 random floats per power, for which a faster simulation pays off
+                build_profile="fast_run",
                 include_src_dir=True,
                 # Dont fail on UNOPTFLAT due to the fact that Verilator thinks there is a loop in the design, while there is not.
                 compile_args=['-Wno-UNOPTFLAT'])
 
 if __name__ == "__main__":
-    test_floating_point_multiplier({"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"})
+    test_floating_point_multiplier({"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1"}, "verilator")
@@ -0,0 +1,24 @@
+import pytest
+
+from utils import run_module_test
+
+# The pipelined modules, which are all checked by tests/floating_point_pipelined_tests.py
+MODULES = ["floating_point_adder", "floating_point_multiplier"]
+
+
+@pytest.mark.parametrize("module_name", MODULES)
+@pytest.mark.parametrize("parameters", [{"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1", "PIPELINE_STAGES": str(stages)} for stages in range(5)] + [{"EXPONENT_WIDTH": "11", "MANTISSA_WIDTH": "52", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1", "PIPELINE_STAGES": "2"}])
+def test_floating_point_pipelined(module_name, parameters):
+    run_module_test(module_name,
+                test_module="floating_point_pipelined",
+                parameters=parameters,
+                include_src_dir=True,
+                # Short simulations, of which the build takes most of the time
+                build_profile="fast_build",
+                # Dont fail on UNOPTFLAT due to the fact that Verilator thinks there is a loop in the design, while there is not.
+                compile_args=['-Wno-UNOPTFLAT', '-Wno-WIDTHTRUNC'])
+
+
+if __name__ == "__main__":
+    for module_name in MODULES:
+        test_floating_point_pipelined(module_name, {"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "ROUND_TO_NEAREST_TIES_TO_EVEN": "1", "PIPELINE_STAGES": "4"})
@@ -0,0 +1,146 @@
+import os
+
+import numpy as np
+import pytest
+
+from bulk import assert_responses, run_bulk_regression
+from common import float_add_reference, float_multiply_reference
+from performance import timed
+from rtl_emulator import floating_point_simd_adder, floating_point_simd_multiplier
+
+VECTORS = int(os.getenv("BULK_VECTORS", 1 << 16))
+
+# FP32 that is split into FP16 and E5M2 lanes, and into BF16 and E4M3 lanes, with and without rounding
+PARAMETERS = [
+    {"EXPONENT_WIDTH": "8", "MANTISSA_WIDTH": "23", "HALF_EXPONENT_WIDTH": str(half[0]), "HALF_MANTISSA_WIDTH": str(half[1]), "QUARTER_EXPONENT_WIDTH": str(quarter[0]), "QUARTER_MANTISSA_WIDTH": str(quarter[1]), "ROUND_TO_NEAREST_TIES_TO_EVEN": round_to_nearest}
+    for half, quarter in [((5, 10), (5, 2)), ((8, 7), (4, 3))]
+    for round_to_nearest in ["1", "0"]
+]
+
+
+def get_lane_formats(parameters):
+    return [(int(parameters[f"{prefix}EXPONENT_WIDTH"]), int(parameters[f"{prefix}MANTISSA_WIDTH"])) for prefix in ["", "HALF_", "QUARTER_"]]
+
+
+def get_emulator_parameters(parameters):
+    return [int(parameters[name]) for name in ["EXPONENT_WIDTH", "MANTISSA_WIDTH", "HALF_EXPONENT_WIDTH", "HALF_MANTISSA_WIDTH", "QUARTER_EXPONENT_WIDTH", "QUARTER_MANTISSA_WIDTH", "ROUND_TO_NEAREST_TIES_TO_EVEN"]]
+
+
+def random_simd_inputs(rng, parameters):
+    """Random packed operands in every format (0, 1, 2 and 3, which is the same as 2), such that the format changes
+    between consecutive operations. Per lane, b is either random or a with its low exponent and mantissa bits
+    flipped, which gives operands with (almost) the same magnitude (and thus cancellation in the adder)."""
+
+    format = rng.integers(0, 4, VECTORS, dtype=np.uint64)
+    a = np.zeros(VECTORS, dtype=np.uint64)
+    b = np.zeros(VECTORS, dtype=np.uint64)
+
+    for f, (exp_bits, mant_bits) in enumerate(get_lane_formats(parameters)):
+        width = exp_bits + mant_bits + 1
+        selected = np.minimum(format, 2) == f
+
+        for lane in range(1 << f):
+            lane_a = rng.integers(0, 1 << width, VECTORS, dtype=np.uint64)
+            lane_b = np.where(rng.random(VECTORS) < 0.5, rng.integers(0, 1 << width, VECTORS, dtype=np.uint64), lane_a ^ rng.integers(0, 1 << (mant_bits + 2), VECTORS, dtype=np.uint64))
+
+            a |= np.where(selected, lane_a << np.uint64(lane * width), np.uint64(0))
+            b |= np.where(selected, lane_b << np.uint64(lane * width), np.uint64(0))
+
+    return {"format": format, "a": a, "b": b}
+
+
+# Lane formats that numpy implements, of which the arithmetic rounds to nearest, ties to even
+NUMPY_TYPES = {(8, 23): (np.float32, np.uint32), (5, 10): (np.float16, np.uint16)}
+
+
+def get_lanes(inputs, responses, parameters):
+    """Yields the format and the operands and result of every lane, for the operations of which the format has that lane."""
+
+    for f, (exp_bits, mant_bits) in enumerate(get_lane_formats(parameters)):
+        width = exp_bits + mant_bits + 1
+        selected = np.minimum(inputs["format"], 2) == f
+
+        for lane in range(1 << f):
+            def get_lane(values):
+                return (values[selected] >> np.uint64(lane * width)) & np.uint64((1 << width) - 1)
+
+            yield exp_bits, mant_bits, lane, selected, get_lane(inputs["a"]), get_lane(inputs["b"]), get_lane(responses["out"])
+
+
+def check_lanes(inputs, responses, parameters, numpy_operation, reference_operation, get_unsupported=None):
+    """Checks the result of every lane with numpy, or with the exact golden model for the formats and rounding mode
+    that numpy does not implement, independently of the RTL emulator."""
+
+    round_to_nearest = int(parameters["ROUND_TO_NEAREST_TIES_TO_EVEN"])
+
+    for exp_bits, mant_bits, lane, selected, a, b, out in get_lanes(inputs, responses, parameters):
+        if (exp_bits, mant_bits) == (4, 3):
+            # The exact reference decodes and encodes an all ones exponent as IEEE 754 infinities and NaNs
+            continue
+
+        if round_to_nearest and (exp_bits, mant_bits) in NUMPY_TYPES:
+            float_type, bits_type = NUMPY_TYPES[(exp_bits, mant_bits)]
+
+            with np.errstate(all="ignore"):
+                expected = numpy_operation(a.astype(bits_type).view(float_type), b.astype(bits_type).view(float_type), lane, selected)
+
+            # The NaNs of numpy have a different sign and payload
+            is_correct = (expected.view(bits_type).astype(np.uint64) == out) | (np.isnan(expected) & np.isnan(out.astype(bits_type).view(float_type)))
+        else:
+            is_correct = reference_operation(a, b, lane, selected, exp_bits, mant_bits, round_to_nearest)[0] == out
+
+        if get_unsupported is not None:
+            is_correct |= get_unsupported(a, b, exp_bits, mant_bits)
+
+        mismatches = np.flatnonzero(~is_correct)
+
+        assert len(mismatches) == 0, f"lane {lane} (E{exp_bits}M{mant_bits}) is not correct for a={hex(int(a[mismatches[0]]))}, b={hex(int(b[mismatches[0]]))}: got {hex(int(out[mismatches[0]]))} ({len(mismatches)} mismatches)"
+
+
+def get_expected(out, underflow_flags, overflow_flags, invalid_operation_flags):
+    return {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags}
+
+
+@pytest.mark.parametrize("parameters", PARAMETERS)
+def test_floating_point_simd_adder(parameters):
+    rng = np.random.default_rng(0)
+
+    inputs = random_simd_inputs(rng, parameters)
+    inputs["subtract"] = rng.integers(0, 16, VECTORS, dtype=np.uint64)
+
+    expected, golden_model_time = timed(floating_point_simd_adder, inputs["a"], inputs["b"], inputs["subtract"], inputs["format"], *get_emulator_parameters(parameters))
+    responses = run_bulk_regression("floating_point_simd_adder", inputs, parameters, golden_model_time=golden_model_time)
+
+    assert_responses(inputs, responses, get_expected(*expected), "floating_point_simd_adder")
+
+    def get_lane_subtract(lane, selected):
+        return (inputs["subtract"][selected] >> np.uint64(lane)) & np.uint64(1)
+
+    check_lanes(inputs, responses, parameters,
+                lambda a, b, lane, selected: np.where(get_lane_subtract(lane, selected) == 1, a - b, a + b),
+                lambda a, b, lane, selected, *float_format: float_add_reference(a, b, get_lane_subtract(lane, selected), *float_format))
+
+
+@pytest.mark.parametrize("parameters", PARAMETERS)
+def test_floating_point_simd_multiplier(parameters):
+    rng = np.random.default_rng(0)
+
+    inputs = random_simd_inputs(rng, parameters)
+
+    expected, golden_model_time = timed(floating_point_simd_multiplier, inputs["a"], inputs["b"], inputs["format"], *get_emulator_parameters(parameters))
+    responses = run_bulk_regression("floating_point_simd_multiplier", inputs, parameters, golden_model_time=golden_model_time)
+
+    assert_responses(inputs, responses, get_expected(*expected), "floating_point_simd_multiplier")
+
+    # The multiplier does not support subnormal operands, and flushes products of which the exact magnitude is
+    # below the smallest normal number to zero (also those that round up to it)
+    def get_unsupported(a, b, exp_bits, mant_bits):
+        is_subnormal = [((x >> np.uint64(mant_bits)) & np.uint64((1 << exp_bits) - 1) == 0) & (x & np.uint64((1 << (exp_bits + mant_bits)) - 1) != 0) for x in [a, b]]
+        _, is_tiny, _, _ = float_multiply_reference(a, b, exp_bits, mant_bits, round_to_nearest_ties_to_even=0)
+
+        return is_subnormal[0] | is_subnormal[1] | is_tiny
+
+    check_lanes(inputs, responses, parameters,
+                lambda a, b, lane, selected: a * b,
+                lambda a, b, lane, selected, *float_format: float_multiply_reference(a, b, *float_format, flush_to_zero=True),
+                get_unsupported)
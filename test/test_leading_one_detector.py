@@ -1,17 +1,57 @@
+import random
+
+import numpy as np
 import pytest
 
+from bulk import assert_responses, run_bulk_regression
 from utils import run_module_test
 
 BASE_WIDTH = 8
 WIDTHS = [3, 4, 6, BASE_WIDTH, 16]
 
+# 0: priority scan, 1: binary tree
+ARCHITECTURES = [0, 1]
+
+# Widths that are too wide to test exhaustively (the mantissa sums of FP32, FP64 and FP128, and one just
+# above 64 bits), which are tested with random values and all values with a single one instead
+WIDE_WIDTHS = [24, 53, 65, 106, 164]
+RANDOM_VECTORS = 1 << 14
+
+
+def check_leading_one_detector_bulk(parameters, values):
+    responses = run_bulk_regression("leading_one_detector", {"value": values}, parameters)
+
+    # The position is undefined when there is no one
+    has_one = np.array([value != 0 for value in values.tolist()])
+    expected_position = np.array([max(value.bit_length() - 1, 0) for value in values.tolist()], dtype=np.uint64)
+
+    assert_responses({"value": values}, responses, {"has_leading_one": has_one}, "leading_one_detector")
+    assert_responses({"value": values[has_one]}, {"position": responses["position"][has_one]}, {"position": expected_position[has_one]}, "leading_one_detector")
+
 
-@pytest.mark.parametrize("parameters", [{"WIDTH": w} for w in WIDTHS])
+@pytest.mark.parametrize("parameters", [{"WIDTH": w, "ARCHITECTURE": a} for w in WIDTHS for a in ARCHITECTURES])
 def test_leading_one_detector(parameters):
     run_module_test("leading_one_detector",
                            parameters=parameters,
                            use_basic_compile_args=False)
 
 
+@pytest.mark.parametrize("parameters", [{"WIDTH": str(w), "ARCHITECTURE": str(a)} for w in WIDTHS for a in ARCHITECTURES])
+def test_leading_one_detector_all_numbers(parameters):
+    check_leading_one_detector_bulk(parameters, np.arange(1 << int(parameters["WIDTH"]), dtype=np.uint64))
+
+
+@pytest.mark.parametrize("parameters", [{"WIDTH": str(w), "ARCHITECTURE": str(a)} for w in WIDE_WIDTHS for a in ARCHITECTURES])
+def test_leading_one_detector_wide(parameters):
+    width = int(parameters["WIDTH"])
+    rng = random.Random(width)
+
+    # The position of the leading one is uniformly distributed, the bits below it are random
+    values = [0, (1 << width) - 1] + [1 << i for i in range(width)]
+    values += [(1 << position) | rng.getrandbits(position) for position in (rng.randrange(width) for _ in range(RANDOM_VECTORS))]
+
+    check_leading_one_detector_bulk(parameters, np.array(values, dtype=object if width > 64 else np.uint64))
+
+
 if __name__ == "__main__":
-    test_leading_one_detector({"WIDTH": BASE_WIDTH})
+    test_leading_one_detector({"WIDTH": BASE_WIDTH, "ARCHITECTURE": 0})
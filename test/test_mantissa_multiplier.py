@@ -0,0 +1,47 @@
+import random
+
+import numpy as np
+import pytest
+
+from bulk import assert_responses, run_bulk_regression
+
+# 0: behavioral, 1: Booth with a Wallace tree, 2: Booth with a Dadda tree
+ARCHITECTURES = [0, 1, 2]
+
+# Widths that are tested exhaustively, among which odd and even ones (which have a different Booth encoding)
+SMALL_WIDTHS = [1, 2, 3, 4, 7, 8]
+
+# The mantissa widths (including the implicit bit) of FP16, FP32, FP64 and FP128, which are tested with random
+# values and corner cases
+WIDE_WIDTHS = [11, 24, 53, 113]
+RANDOM_VECTORS = 1 << 14
+
+
+def check_mantissa_multiplier_bulk(parameters, a, b):
+    responses = run_bulk_regression("mantissa_multiplier", {"a": a, "b": b}, parameters)
+    expected = np.array([x * y for x, y in zip(a.tolist(), b.tolist())], dtype=object if 2 * int(parameters["WIDTH"]) > 64 else np.uint64)
+
+    assert_responses({"a": a, "b": b}, responses, {"product": expected}, "mantissa_multiplier")
+
+
+@pytest.mark.parametrize("parameters", [{"WIDTH": str(w), "ARCHITECTURE": str(a)} for w in SMALL_WIDTHS for a in ARCHITECTURES])
+def test_mantissa_multiplier_all_numbers(parameters):
+    width = int(parameters["WIDTH"])
+    a, b = np.meshgrid(np.arange(1 << width, dtype=np.uint64), np.arange(1 << width, dtype=np.uint64))
+
+    check_mantissa_multiplier_bulk(parameters, a.ravel(), b.ravel())
+
+
+@pytest.mark.parametrize("parameters", [{"WIDTH": str(w), "ARCHITECTURE": str(a)} for w in WIDE_WIDTHS for a in ARCHITECTURES])
+def test_mantissa_multiplier_wide(parameters):
+    width = int(parameters["WIDTH"])
+    rng = random.Random(width)
+    maximum = (1 << width) - 1
+
+    # Zero, one, all ones and single ones (which select every Booth digit), followed by random values
+    corners = [0, 1, maximum] + [1 << i for i in range(width)]
+    pairs = [(x, y) for x in corners for y in corners]
+    pairs += [(rng.getrandbits(width), rng.getrandbits(width)) for _ in range(RANDOM_VECTORS)]
+
+    dtype = object if width > 64 else np.uint64
+    check_mantissa_multiplier_bulk(parameters, np.array([x for x, _ in pairs], dtype=dtype), np.array([y for _, y in pairs], dtype=dtype))
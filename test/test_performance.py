@@ -0,0 +1,69 @@
+import json
+import time
+
+from performance import SIMULATION_PERFORMANCE_FILE_NAME, combine_performance, compare_runs, get_bottleneck, get_performance_file, write_run_performance
+
+RESULTS_XML = """<testsuites name="results">
+  <testsuite name="all" package="all">
+    <testcase name="test_a" time="3.0" sim_time_ns="10" ratio_time="1" />
+    <testcase name="test_b" time="5.0" sim_time_ns="10" ratio_time="1" />
+  </testsuite>
+</testsuites>
+"""
+
+
+def test_write_run_performance(tmp_path):
+    start = time.time()
+
+    (tmp_path / "results.xml").write_text(RESULTS_XML)
+    (tmp_path / SIMULATION_PERFORMANCE_FILE_NAME).write_text(json.dumps({"vectors": 1000, "golden_model_time": 1.0, "simulator_time": 4.0}))
+
+    performance = write_run_performance(tmp_path, tmp_path / "results.xml", start, 10.0, 20.0, False)
+
+    assert performance == json.loads(get_performance_file(tmp_path).read_text())
+    assert performance["startup_time"] == 2.0
+    assert performance["python_time"] == 3.0
+    assert performance["vectors_per_second"] == 125.0
+    assert get_bottleneck(performance) == "build_time"
+
+
+def test_write_run_performance_ignores_earlier_simulations(tmp_path):
+    (tmp_path / "results.xml").write_text(RESULTS_XML)
+    (tmp_path / SIMULATION_PERFORMANCE_FILE_NAME).write_text(json.dumps({"vectors": 1000, "golden_model_time": 1.0, "simulator_time": 4.0}))
+
+    performance = write_run_performance(tmp_path, tmp_path / "results.xml", time.time() + 60, 10.0)
+
+    assert performance["vectors"] is None
+    assert performance["vectors_per_second"] is None
+
+
+def test_combine_performance():
+    performances = [
+        {"cached_build": True, "vectors": 1000, "simulation_time": 2.0, "test_time": None, "tests": {}, "golden_model_time": 0.5, "simulator_time": 1.0},
+        {"cached_build": False, "vectors": 3000, "simulation_time": 6.0, "test_time": None, "tests": {}, "golden_model_time": None, "simulator_time": 3.0},
+    ]
+
+    combined = combine_performance(performances)
+
+    assert combined["cached_build"] is False
+    assert combined["vectors"] == 4000 and combined["simulation_time"] == 8.0
+    assert combined["golden_model_time"] == 0.5 and combined["simulator_time"] == 4.0
+    assert combined["vectors_per_second"] == 500.0
+
+
+def test_compare_runs():
+    reference = {"results": {
+        "adder": {"vectors_per_second": 1000.0, "build_time": 20.0, "cached_build": False, "startup_time": 1.0},
+        "multiplier": {"vectors_per_second": 1000.0, "build_time": 20.0, "cached_build": False, "startup_time": 0.1},
+    }}
+    report = {"results": {
+        # Slower simulation, and a build that took longer as it was not cached
+        "adder": {"vectors_per_second": 700.0, "build_time": 30.0, "cached_build": False, "startup_time": 1.1},
+        # A cached build is not compared, and neither are changes of very small times
+        "multiplier": {"vectors_per_second": 900.0, "build_time": 0.0, "cached_build": True, "startup_time": 0.3},
+        "lanes": {"vectors_per_second": 1.0, "build_time": 100.0, "cached_build": False, "startup_time": 10.0},
+    }}
+
+    regressions = compare_runs(report, reference, tolerance=0.2)
+
+    assert [(regression["run"], regression["metric"]) for regression in regressions] == [("adder", "vectors_per_second"), ("adder", "build_time")]
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from bulk import assert_responses, run_bulk_regression
+from exhaustive import get_shard_inputs, get_total_vectors
+from rtl_emulator import decode_floats, encode_floats, floating_point_adder, floating_point_multiplier, floating_point_multiplier_adder, matmul
+
+RANDOM_VECTORS = 200 * 1000
+
+# All inputs are enumerated for these formats, including E4M3 with its special NaN and without infinities
+SMALL_FORMATS = [(5, 2, 1, 1), (5, 2, 0, 1), (5, 2, 1, 0), (4, 3, 1, 1), (4, 3, 0, 0), (3, 2, 1, 1)]
+
+# For these formats, random encodings are used; FP64 is emulated with arbitrarily wide integers
+LARGE_FORMATS = [(5, 10, 1, 1), (8, 23, 1, 1), (8, 23, 0, 0), (11, 52, 1, 1), (11, 52, 0, 1)]
+
+FLAGS = ["underflow_flag", "overflow_flag", "invalid_operation_flag"]
+
+
+def get_parameters(exp_bits, mant_bits, round_to_nearest, ignore_sign_bit_for_nan):
+    return {"EXPONENT_WIDTH": str(exp_bits), "MANTISSA_WIDTH": str(mant_bits), "ROUND_TO_NEAREST_TIES_TO_EVEN": str(round_to_nearest), "IGNORE_SIGN_BIT_FOR_NAN": str(ignore_sign_bit_for_nan)}
+
+
+def get_inputs(module_name, float_format, random):
+    float_width = float_format[0] + float_format[1] + 1
+
+    if not random:
+        return get_shard_inputs(module_name, float_width, 0, get_total_vectors(module_name, float_width))
+
+    rng = np.random.default_rng(0)
+    names = {"floating_point_adder": ["a", "b"], "floating_point_multiplier": ["a", "b"], "floating_point_multiplier_adder": ["a_1", "a_2", "b"]}[module_name]
+
+    # Uniformly distributed encodings
+    inputs = {name: rng.integers(0, 1 << 64, RANDOM_VECTORS, dtype=np.uint64) & np.uint64((1 << float_width) - 1) for name in names}
+
+    if module_name == "floating_point_adder":
+        inputs["subtract"] = rng.integers(0, 2, RANDOM_VECTORS, dtype=np.uint64)
+
+    return inputs
+
+
+@pytest.mark.parametrize("float_format,random", [(f, False) for f in SMALL_FORMATS] + [(f, True) for f in LARGE_FORMATS])
+def test_floating_point_adder_emulator(float_format, random):
+    inputs = get_inputs("floating_point_adder", float_format, random)
+    out, *flags = floating_point_adder(inputs["a"], inputs["b"], inputs["subtract"], *float_format)
+
+    responses = run_bulk_regression("floating_point_adder", inputs, get_parameters(*float_format))
+
+    assert_responses(inputs, responses, {"out": out, **dict(zip(FLAGS, flags))}, "floating_point_adder")
+
+
+@pytest.mark.parametrize("float_format,random", [(f, False) for f in SMALL_FORMATS] + [(f, True) for f in LARGE_FORMATS])
+def test_floating_point_multiplier_emulator(float_format, random):
+    inputs = get_inputs("floating_point_multiplier", float_format, random)
+    out, *flags = floating_point_multiplier(inputs["a"], inputs["b"], *float_format)
+
+    responses = run_bulk_regression("floating_point_multiplier", inputs, get_parameters(*float_format))
+
+    assert_responses(inputs, responses, {"out": out, **dict(zip(FLAGS, flags))}, "floating_point_multiplier")
+
+
+# Three operands do not allow enumerating all inputs, not even for FP8
+@pytest.mark.parametrize("float_format", SMALL_FORMATS + LARGE_FORMATS)
+def test_floating_point_multiplier_adder_emulator(float_format):
+    inputs = get_inputs("floating_point_multiplier_adder", float_format, True)
+    out, *flags = floating_point_multiplier_adder(inputs["a_1"], inputs["a_2"], inputs["b"], *float_format)
+
+    responses = run_bulk_regression("floating_point_multiplier_adder", inputs, get_parameters(*float_format))
+
+    assert_responses(inputs, responses, {"out": out, **dict(zip(FLAGS, flags))}, "floating_point_multiplier_adder")
+
+
+@pytest.mark.parametrize("dtype,exp_bits,mant_bits", [(np.float16, 5, 10), (np.float32, 8, 23), (np.float64, 11, 52)])
+def test_float_conversion(dtype, exp_bits, mant_bits):
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal(RANDOM_VECTORS) * np.exp2(rng.uniform(-160, 160, RANDOM_VECTORS))
+
+    with np.errstate(over="ignore"):
+        expected = values.astype(dtype)
+
+    assert np.array_equal(encode_floats(values, exp_bits, mant_bits), expected.view(f"uint{8 * np.dtype(dtype).itemsize}"))
+    assert np.array_equal(decode_floats(expected.view(f"uint{8 * np.dtype(dtype).itemsize}"), exp_bits, mant_bits), expected.astype(np.float64))
+
+
+def test_matmul():
+    rng = np.random.default_rng(0)
+    a = rng.standard_normal((16, 32)).astype(np.float32)
+    b = rng.standard_normal((32, 8)).astype(np.float32)
+
+    out = decode_floats(matmul(encode_floats(a, 8, 23), encode_floats(b, 8, 23)), 8, 23)
+
+    # Every product and sum is rounded to FP32, which bounds the difference with the exact result
+    assert np.allclose(out, a.astype(np.float64) @ b.astype(np.float64), rtol=0, atol=1e-4)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from stimulus import COVERAGE_MODULES, CoverageModel, classify_operands, generate_directed_stimulus, get_families, get_operand_classes, make_operands
+
+# FP8 (E4M3), FP16, BF16, FP32 and FP64. In E5M2 and formats with a single mantissa bit, some rounding bins
+# cannot be reached.
+FORMATS = [(4, 3), (5, 10), (8, 7), (8, 23), (11, 52)]
+MAX_VECTORS = 2000
+
+
+@pytest.mark.parametrize("module_name", list(COVERAGE_MODULES))
+@pytest.mark.parametrize("exp_bits, mant_bits", FORMATS)
+@pytest.mark.parametrize("round_to_nearest", [1, 0])
+def test_directed_stimulus_fills_all_bins(module_name, exp_bits, mant_bits, round_to_nearest):
+    inputs, coverage = generate_directed_stimulus(module_name, exp_bits, mant_bits, round_to_nearest)
+
+    assert coverage.is_full(), coverage.report()
+    assert len(inputs["a"]) <= MAX_VECTORS
+
+    # The kept vectors alone fill the bins
+    _, classify = COVERAGE_MODULES[module_name]
+    replayed = CoverageModel(coverage.families, coverage.target_hits)
+    replayed.select(classify(inputs, exp_bits, mant_bits, round_to_nearest))
+
+    assert replayed.is_full()
+
+
+@pytest.mark.parametrize("module_name", list(COVERAGE_MODULES))
+def test_uniform_encodings_leave_holes(module_name):
+    # Ten times as many uniformly distributed encodings as the directed stimulus needs do not hit all bins
+    exp_bits, mant_bits = 8, 23
+    rng = np.random.default_rng(0)
+    total = 10 * MAX_VECTORS
+
+    inputs = {name: rng.integers(0, 1 << (exp_bits + mant_bits + 1), total, dtype=np.uint64) for name in ["a", "b"]}
+    inputs["subtract"] = rng.integers(0, 2, total, dtype=np.uint64)
+
+    _, classify = COVERAGE_MODULES[module_name]
+    coverage = CoverageModel(get_families(module_name, exp_bits, mant_bits), target_hits=1)
+    coverage.select(classify(inputs, exp_bits, mant_bits))
+
+    assert coverage.get_holes()
+
+
+def test_make_operands():
+    rng = np.random.default_rng(0)
+
+    for exp_bits, mant_bits in [(2, 1), (5, 2), (8, 23), (11, 52)]:
+        classes = np.repeat(np.arange(len(get_operand_classes(mant_bits))), 100)
+
+        assert (classify_operands(make_operands(rng, classes, exp_bits, mant_bits), exp_bits, mant_bits) == classes).all()
+
+
+def test_coverage_model_select():
+    coverage = CoverageModel({"family": ["a", "b", "c"]}, target_hits=2)
+
+    selected = coverage.select({"family": np.array([0, 0, 0, 1, -1, 1])})
+
+    assert selected.tolist() == [True, True, False, True, False, True]
+    assert coverage.get_holes() == ["family/c"]
+    assert not coverage.is_full()
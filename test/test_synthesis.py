@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+from synthesis import BASELINE_FILE, compare_with_baseline, get_configuration_name, get_configurations, get_yosys_version, run_synthesis
+
+# Only the FP8 formats are synthesized in a regular test run, the complete matrix can be run from the
+# command line: python synthesis.py (add --update-baseline after an intended change in area or depth)
+FORMATS = [(5, 2), (4, 3)]
+
+
+def test_synthesis_against_baseline(tmp_path):
+    baseline = json.loads(BASELINE_FILE.read_text())
+
+    if get_yosys_version() != baseline["yosys"]:
+        pytest.skip(f"The baseline was created with {baseline['yosys']}, results of other Yosys versions are not comparable")
+
+    configurations = get_configurations(formats=FORMATS)
+    report = run_synthesis(configurations, results_file=tmp_path / "results.json")
+
+    missing = [get_configuration_name(configuration) for configuration in configurations if get_configuration_name(configuration) not in baseline["results"]]
+    assert not missing, f"Configurations without a baseline: {missing}"
+
+    regressions = compare_with_baseline(report, baseline)
+    assert not regressions, f"Area or logic depth increased with respect to the baseline: {regressions}"
@@ -0,0 +1,29 @@
+import time
+
+from waveforms import FAILING_VECTORS_FILE_NAME, MAX_RECORDED_FAILURES, FailureRecorder, read_failing_vectors
+
+
+def test_failure_recorder(tmp_path):
+    recorder = FailureRecorder(tmp_path / FAILING_VECTORS_FILE_NAME)
+
+    # Nothing is written when all vectors passed
+    recorder.save()
+
+    assert read_failing_vectors(tmp_path / FAILING_VECTORS_FILE_NAME) == []
+
+    for i in range(MAX_RECORDED_FAILURES + 10):
+        recorder.record({"a": i, "b": 1 << 63}, f"vector {i}")
+
+    recorder.save()
+    vectors = read_failing_vectors(tmp_path / FAILING_VECTORS_FILE_NAME)
+
+    assert len(vectors) == MAX_RECORDED_FAILURES
+    assert vectors[0] == {"inputs": {"a": 0, "b": 1 << 63}, "message": "vector 0"}
+
+
+def test_read_failing_vectors_ignores_earlier_simulations(tmp_path):
+    recorder = FailureRecorder(tmp_path / FAILING_VECTORS_FILE_NAME)
+    recorder.record({"a": 1})
+    recorder.save()
+
+    assert read_failing_vectors(tmp_path / FAILING_VECTORS_FILE_NAME, time.time() + 60) == []
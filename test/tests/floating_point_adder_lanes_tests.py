@@ -0,0 +1,34 @@
+import cocotb
+
+from common import floats_to_bits, float_add_reference
+from lanes import check_lanes
+from performance import get_recorder
+
+TOTAL_RANDOM_FLOATS = 100*1000
+POWERS = [-300, -12, -6, -3, 0, 6, 12, 24]
+
+
+@cocotb.test()
+async def test_random_floats(dut):
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+
+    exp_bits = int(dut.EXPONENT_WIDTH)
+    mant_bits = int(dut.MANTISSA_WIDTH)
+    round_to_nearest = int(dut.ROUND_TO_NEAREST_TIES_TO_EVEN)
+
+    for power in POWERS:
+        scale = 10.0 ** power
+
+        with get_recorder().golden_model():
+            a = floats_to_bits(rng.uniform(-scale, scale, TOTAL_RANDOM_FLOATS), exp_bits, mant_bits)
+            b = floats_to_bits(rng.uniform(-scale, scale, TOTAL_RANDOM_FLOATS), exp_bits, mant_bits)
+            subtract = rng.integers(0, 2, TOTAL_RANDOM_FLOATS, dtype=np.uint64)
+
+            out, underflow_flags, overflow_flags, invalid_operation_flags = float_add_reference(a, b, subtract, exp_bits, mant_bits, round_to_nearest)
+
+        await check_lanes(dut,
+                          {"a": a, "b": b, "subtract": subtract},
+                          {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags},
+                          widths={"subtract": 1, "underflow_flag": 1, "overflow_flag": 1, "invalid_operation_flag": 1})
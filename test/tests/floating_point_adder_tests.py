@@ -1,7 +1,12 @@
 import cocotb
+import numpy as np
 from cocotb.triggers import Timer
 
-from common import is_IEEE_754_32_bit_float, is_IEEE_754_64_bit_float, is_16_bit_float, get_bin_from_float_operation, assert_flags
+from common import is_IEEE_754_32_bit_float, is_IEEE_754_64_bit_float, is_IEEE_half_precision_float, floats_to_bits, float_add_reference, assert_flags
+from corpus import get_golden_vectors_key, load_golden_vectors, read_regression_vectors
+from performance import get_recorder
+from stimulus import generate_directed_stimulus
+from waveforms import get_failure_recorder
 
 
 # TODO: test rounding or not
@@ -16,9 +21,28 @@ async def check_input_combo(dut, a, b, subtract, expected, flags, assert_message
         dut.b.value = b_entry
         dut.subtract.value = subtract
 
-        await Timer(1, units="ns")
-        assert_flags(dut, flags, assert_message)
-        assert dut.out.value == expected, assert_message
+        with get_recorder().simulator(vectors=1):
+            await Timer(1, units="ns")
+
+        try:
+            assert_flags(dut, flags, assert_message)
+            assert dut.out.value == expected, assert_message
+        except AssertionError:
+            get_failure_recorder().record({"a": a_entry, "b": b_entry, "subtract": subtract}, assert_message, {"out": int(expected), "flags": [int(flag) for flag in flags]})
+            raise
+
+
+@cocotb.test()
+async def test_regression_corpus(dut):
+    # Vectors that failed in earlier runs, which are checked before all others to surface known bugs quickly
+    vectors = read_regression_vectors()
+
+    dut._log.info(f"{len(vectors)} vectors in the regression corpus")
+
+    for vector in vectors:
+        inputs, expected = vector["inputs"], vector["expected"]
+
+        await check_input_combo(dut, inputs["a"], inputs["b"], inputs["subtract"], expected["out"], tuple(expected["flags"]), vector["message"])
 
 
 @cocotb.test()
@@ -30,7 +54,8 @@ async def test_normal_numbers(dut):
         await check_input_combo(dut, 0x38D1B717, 0x3F6E147B, False, 0x3F6E1B09, (0, 0, 0), "0.0001 + 0.93 != 0.9301")
         await check_input_combo(dut, 0x3DFCDE47, 0xBF38A9F3, False, 0xBF190E2A, (0, 0, 0), "0.0001 + 0.93 != 0.9301")
         await check_input_combo(dut, 0xBF656347, 0xBF0E01E9, False, 0xBFB9B298, (0, 0, 0), "-0.8960460830977122 + -0.554716643116743 != -1.4507627487182617")
-    elif is_IEEE_754_64_bit_float(dut) or is_16_bit_float(dut):
+        await check_input_combo(dut, 0x3FC00000, 0x3F800000, False, 0x40200000, (0, 0, 0), "1.5 + 1.0 != 2.5")
+    elif is_IEEE_754_64_bit_float(dut) or is_IEEE_half_precision_float(dut):
         assert True, "This test is not implemented for 64-bit IEEE 754 floats or 16-bit floats"
     else:
         assert False, "This test is not implemented for this floating point format"
@@ -46,9 +71,10 @@ async def test_infinity(dut):
         await check_input_combo(dut, PLUS_INF, 0x40400000, False, PLUS_INF, (0, 1, 0), "+Inf + 3.0 != +Inf")
         await check_input_combo(dut, PLUS_INF, PLUS_INF, False, PLUS_INF, (0, 1, 0), "+Inf + +Inf != +Inf")
         await check_input_combo(dut, NEG_INF, PLUS_INF, False, QNAN, (0, 0, 1), "-Inf + +Inf != QNaN")
-        await check_input_combo(dut, PLUS_INF, NEG_INF, True, QNAN, (0, 0, 1), "+Inf - +Inf != QNaN")
+        await check_input_combo(dut, PLUS_INF, PLUS_INF, True, QNAN, (0, 0, 1), "+Inf - +Inf != QNaN")
+        await check_input_combo(dut, PLUS_INF, NEG_INF, True, PLUS_INF, (0, 1, 0), "+Inf - -Inf != +Inf")
         await check_input_combo(dut, NEG_INF, NEG_INF, False, NEG_INF, (0, 1, 0), "-Inf + -Inf = -Inf")
-    elif is_IEEE_754_64_bit_float(dut) or is_16_bit_float(dut):
+    elif is_IEEE_754_64_bit_float(dut) or is_IEEE_half_precision_float(dut):
         assert True, "This test is not implemented for 64-bit IEEE 754 floats or 16-bit floats"
     else:
         assert False, "This test is not implemented for this floating point format"
@@ -69,55 +95,83 @@ async def test_zero(dut):
         await check_input_combo(dut, SNAN, ZERO, False, QNAN, (0, 0, 1), "SNaN + 0.0 != QNaN")
         await check_input_combo(dut, ZERO, NEG_ZERO, False, ZERO, (0, 0, 0), "+0 + -0 != +0")
         await check_input_combo(dut, ZERO, ZERO, False, ZERO, (0, 0, 0), "+0 + +0 != +0")
-    elif is_IEEE_754_64_bit_float(dut) or is_16_bit_float(dut):
+    elif is_IEEE_754_64_bit_float(dut) or is_IEEE_half_precision_float(dut):
         assert True, "This test is not implemented for 64-bit IEEE 754 floats or 16-bit floats"
     else:
         assert False, "This test is not implemented for this floating point format"
 
 
-@cocotb.test()
-async def test_random_floats(dut):
-    import random
-    import numpy as np
+def generate_random_floats(exp_bits, mant_bits, round_to_nearest, seed):
+    # One row of vectors per power and operation
+    rng = np.random.default_rng(seed)
+    rows = {name: [] for name in ["a", "b", "a_bits", "b_bits", "subtract", "out", "underflow_flags", "overflow_flags", "invalid_operation_flags"]}
 
     for power in POWERS:
-        scale = 10 ** power
+        scale = 10.0 ** power
 
         for subtract in [False, True]:
-            for _ in range(TOTAL_RANDOM_FLOATS):
-                underflow_flag = 0
-                overflow_flag = 0
-                invalid_operation_flag = 0
-
-                a = random.uniform(-scale, scale)
-                b = random.uniform(-scale, scale)
-
-                skip_test = False
-                op = '-' if subtract else '+'
-
-                if is_IEEE_754_32_bit_float(dut):
-                    (a_str, b_str, result_str), result = get_bin_from_float_operation(a, b, op, 32)
-                elif is_IEEE_754_64_bit_float(dut):
-                    (a_str, b_str, result_str), result = get_bin_from_float_operation(a, b, op, 64)
-                elif is_16_bit_float(dut):
-                    (a_str, b_str, result_str), result = get_bin_from_float_operation(a, b, op, 16)
-                else:
-                    skip_test = True
-                    assert False, "This test is not implemented for this floating point format"
-
-                if not skip_test:
-                    a_int = int(a_str, 2)
-                    b_int = int(b_str, 2)
-                    result_int = int(result_str, 2)
-
-                    if result == np.inf or result == -np.inf:
-                        overflow_flag = True
-                    elif result == np.nan:
-                        invalid_operation_flag = True
-                    # TODO: add underflow flag test
-
-                    flags = (underflow_flag, overflow_flag, invalid_operation_flag)
-
-                    await check_input_combo(dut, a_int, b_int, subtract, result_int, flags, f"{a} {'-' if subtract else '+'} {b} != {result}")
-                else:
-                    break
+            a = rng.uniform(-scale, scale, TOTAL_RANDOM_FLOATS)
+            b = rng.uniform(-scale, scale, TOTAL_RANDOM_FLOATS)
+
+            a_bits = floats_to_bits(a, exp_bits, mant_bits)
+            b_bits = floats_to_bits(b, exp_bits, mant_bits)
+
+            result_bits, underflow_flags, overflow_flags, invalid_operation_flags = float_add_reference(a_bits, b_bits, subtract, exp_bits, mant_bits, round_to_nearest)
+
+            for name, values in zip(rows, [a, b, a_bits, b_bits, subtract, result_bits, underflow_flags, overflow_flags, invalid_operation_flags]):
+                rows[name].append(values)
+
+    return {name: np.stack(values) for name, values in rows.items()}
+
+
+@cocotb.test()
+async def test_random_floats(dut):
+    exp_bits = int(dut.EXPONENT_WIDTH)
+    mant_bits = int(dut.MANTISSA_WIDTH)
+    round_to_nearest = int(dut.ROUND_TO_NEAREST_TIES_TO_EVEN)
+
+    # Generated once, and reused by later runs
+    with get_recorder().golden_model():
+        key = get_golden_vectors_key("floating_point_adder", exp_bits, mant_bits, round_to_nearest, generate_random_floats, {"TOTAL_RANDOM_FLOATS": TOTAL_RANDOM_FLOATS, "POWERS": POWERS}, 0)
+        vectors = load_golden_vectors(key, lambda: generate_random_floats(exp_bits, mant_bits, round_to_nearest, 0))
+
+    a, b, a_bits, b_bits, result_bits = vectors["a"], vectors["b"], vectors["a_bits"], vectors["b_bits"], vectors["out"]
+
+    for row, subtract in enumerate(vectors["subtract"].tolist()):
+        for i in range(TOTAL_RANDOM_FLOATS):
+            flags = (int(vectors["underflow_flags"][row, i]), int(vectors["overflow_flags"][row, i]), int(vectors["invalid_operation_flags"][row, i]))
+
+            await check_input_combo(dut, int(a_bits[row, i]), int(b_bits[row, i]), subtract, int(result_bits[row, i]), flags, f"{a[row, i]} {'-' if subtract else '+'} {b[row, i]} != {hex(result_bits[row, i])}")
+
+
+def generate_coverage_directed_vectors(exp_bits, mant_bits, round_to_nearest, seed):
+    inputs, coverage = generate_directed_stimulus("floating_point_adder", exp_bits, mant_bits, round_to_nearest, seed=seed)
+    out, underflow_flags, overflow_flags, invalid_operation_flags = float_add_reference(inputs["a"], inputs["b"], inputs["subtract"], exp_bits, mant_bits, round_to_nearest)
+
+    return {**inputs, "out": out, "underflow_flags": underflow_flags, "overflow_flags": overflow_flags, "invalid_operation_flags": invalid_operation_flags, "coverage_report": np.array(coverage.report())}
+
+
+@cocotb.test()
+async def test_coverage_directed(dut):
+    # Operands built on their bit fields until every functional coverage bin is hit (operand classes,
+    # alignment and normalization, rounding and result classes), of which the expected values come from the
+    # IEEE 754 golden model
+    exp_bits = int(dut.EXPONENT_WIDTH)
+    mant_bits = int(dut.MANTISSA_WIDTH)
+    round_to_nearest = int(dut.ROUND_TO_NEAREST_TIES_TO_EVEN)
+
+    assert int(dut.IGNORE_SIGN_BIT_FOR_NAN) == 1, "This test is not implemented for NaNs that depend on the sign bit"
+
+    with get_recorder().golden_model():
+        key = get_golden_vectors_key("floating_point_adder", exp_bits, mant_bits, round_to_nearest, generate_coverage_directed_vectors, None, 0)
+        vectors = load_golden_vectors(key, lambda: generate_coverage_directed_vectors(exp_bits, mant_bits, round_to_nearest, 0))
+
+    inputs = {name: vectors[name] for name in ["a", "b", "subtract"]}
+    out, underflow_flags, overflow_flags, invalid_operation_flags = vectors["out"], vectors["underflow_flags"], vectors["overflow_flags"], vectors["invalid_operation_flags"]
+
+    dut._log.info(f"{len(out)} vectors\n{vectors['coverage_report']}")
+
+    for i in range(len(out)):
+        flags = (int(underflow_flags[i]), int(overflow_flags[i]), int(invalid_operation_flags[i]))
+
+        await check_input_combo(dut, int(inputs["a"][i]), int(inputs["b"][i]), int(inputs["subtract"][i]), int(out[i]), flags, f"{hex(inputs['a'][i])} {'-' if inputs['subtract'][i] else '+'} {hex(inputs['b'][i])} != {hex(out[i])}")
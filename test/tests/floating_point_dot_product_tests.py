@@ -0,0 +1,104 @@
+import cocotb
+import numpy as np
+from cocotb.triggers import Timer
+
+from common import assert_flags, floats_to_bits, float_dot_product_reference, get_quiet_nan
+from lanes import pack_lanes
+from performance import get_recorder
+from rtl_emulator import floating_point_dot_product
+
+TOTAL_RANDOM_VECTORS = 1000
+POWERS = [-12, -3, 0, 3]
+
+
+def get_formats(dut):
+    return int(dut.EXPONENT_WIDTH), int(dut.MANTISSA_WIDTH), int(dut.ACCUMULATOR_EXPONENT_WIDTH), int(dut.ACCUMULATOR_MANTISSA_WIDTH)
+
+
+async def check_vector(dut, a, b, expected, flags, assert_message):
+    float_width = int(dut.EXPONENT_WIDTH) + int(dut.MANTISSA_WIDTH) + 1
+
+    dut.a.value = pack_lanes(a, float_width)
+    dut.b.value = pack_lanes(b, float_width)
+
+    with get_recorder().simulator(vectors=1):
+        await Timer(1, units="ns")
+
+    assert_flags(dut, flags, assert_message)
+    assert dut.out.value == expected, f"{assert_message}: expected {hex(int(expected))}, got {hex(dut.out.value.integer)}"
+
+
+@cocotb.test()
+async def test_random_floats(dut):
+    # Compared bit for bit with the emulator, which follows the rounding steps of the adder tree
+    rng = np.random.default_rng(0)
+
+    n_inputs = int(dut.N_INPUTS)
+    exp_bits, mant_bits, acc_exp_bits, acc_mant_bits = get_formats(dut)
+    round_to_nearest = int(dut.ROUND_TO_NEAREST_TIES_TO_EVEN)
+
+    for power in POWERS:
+        scale = 2.0 ** power
+
+        with get_recorder().golden_model():
+            a = floats_to_bits(rng.uniform(-scale, scale, (TOTAL_RANDOM_VECTORS, n_inputs)), exp_bits, mant_bits)
+            b = floats_to_bits(rng.uniform(-scale, scale, (TOTAL_RANDOM_VECTORS, n_inputs)), exp_bits, mant_bits)
+
+            out, underflow_flags, overflow_flags, invalid_operation_flags = floating_point_dot_product(a, b, exp_bits, mant_bits, acc_exp_bits, acc_mant_bits, round_to_nearest)
+
+        for i in range(TOTAL_RANDOM_VECTORS):
+            await check_vector(dut, a[i], b[i], out[i], (underflow_flags[i], overflow_flags[i], invalid_operation_flags[i]), f"Dot product of {[hex(int(x)) for x in a[i]]} and {[hex(int(x)) for x in b[i]]} is not correct")
+
+
+@cocotb.test()
+async def test_exact_sums(dut):
+    # Small integers give products and partial sums that are all exact, so the result must be the exactly
+    # rounded dot product, whatever the order of the additions. Zero is left out, as the multiplier raises the
+    # underflow flag for a zero product.
+    rng = np.random.default_rng(1)
+
+    n_inputs = int(dut.N_INPUTS)
+    exp_bits, mant_bits, acc_exp_bits, acc_mant_bits = get_formats(dut)
+
+    integers = np.array([-3, -2, -1, 1, 2, 3], dtype=np.float64)
+    a = floats_to_bits(rng.choice(integers, (TOTAL_RANDOM_VECTORS, n_inputs)), exp_bits, mant_bits)
+    b = floats_to_bits(rng.choice(integers, (TOTAL_RANDOM_VECTORS, n_inputs)), exp_bits, mant_bits)
+
+    out, _, _, _ = float_dot_product_reference(a, b, exp_bits, mant_bits, acc_exp_bits, acc_mant_bits)
+
+    for i in range(TOTAL_RANDOM_VECTORS):
+        await check_vector(dut, a[i], b[i], out[i], (0, 0, 0), f"Dot product of {[hex(int(x)) for x in a[i]]} and {[hex(int(x)) for x in b[i]]} is not exact")
+
+
+@cocotb.test()
+async def test_special_values(dut):
+    n_inputs = int(dut.N_INPUTS)
+    exp_bits, mant_bits, acc_exp_bits, acc_mant_bits = get_formats(dut)
+
+    if (exp_bits, mant_bits) == (4, 3):
+        assert True, "E4M3 has no infinities"
+        return
+
+    infinity = ((1 << exp_bits) - 1) << mant_bits
+    one = ((1 << (exp_bits - 1)) - 1) << mant_bits
+    sign = 1 << (exp_bits + mant_bits)
+
+    acc_infinity = ((1 << acc_exp_bits) - 1) << acc_mant_bits
+    acc_sign = 1 << (acc_exp_bits + acc_mant_bits)
+    acc_quiet_nan = get_quiet_nan(acc_exp_bits, acc_mant_bits)
+
+    ones = [one] * n_inputs
+
+    vectors = [([infinity] + [one] * (n_inputs - 1), ones, acc_infinity, "An infinite product should give an infinite dot product"),
+               ([infinity | sign] + [one] * (n_inputs - 1), ones, acc_infinity | acc_sign, "A negative infinite product should give a negative infinite dot product"),
+               ([infinity] + [one] * (n_inputs - 1), [0] + [one] * (n_inputs - 1), acc_quiet_nan, "Infinity * 0 should give a NaN dot product")]
+
+    if n_inputs > 1:
+        vectors.append(([infinity, infinity | sign] + [one] * (n_inputs - 2), ones, acc_quiet_nan, "Opposite infinite products should give a NaN dot product"))
+
+    for a, b, expected, assert_message in vectors:
+        # The flags are the ones that the multipliers and adders raise for these values (for example, the adder raises
+        # the overflow flag for an infinite sum), so they are taken from the emulator
+        _, underflow_flag, overflow_flag, invalid_operation_flag = floating_point_dot_product(np.array(a, dtype=np.uint64), np.array(b, dtype=np.uint64), exp_bits, mant_bits, acc_exp_bits, acc_mant_bits, int(dut.ROUND_TO_NEAREST_TIES_TO_EVEN))
+
+        await check_vector(dut, a, b, expected, (underflow_flag, overflow_flag, invalid_operation_flag), assert_message)
@@ -0,0 +1,38 @@
+import cocotb
+
+from common import floats_to_bits, float_multiply_reference
+from lanes import check_lanes
+from performance import get_recorder
+
+TOTAL_RANDOM_FLOATS = 100*1000
+POWERS = [-300, -12, -6, -3, 0, 6, 12, 24]
+
+
+@cocotb.test()
+async def test_random_floats(dut):
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+
+    exp_bits = int(dut.EXPONENT_WIDTH)
+    mant_bits = int(dut.MANTISSA_WIDTH)
+    round_to_nearest = int(dut.ROUND_TO_NEAREST_TIES_TO_EVEN)
+
+    for power in POWERS:
+        scale_ub = 10.0 ** power
+        scale_lb = 10.0 ** (power - 1)
+
+        with get_recorder().golden_model():
+            a = rng.uniform(scale_lb, scale_ub, TOTAL_RANDOM_FLOATS) * rng.choice([-1.0, 1.0], TOTAL_RANDOM_FLOATS)
+            b = rng.uniform(scale_lb, scale_ub, TOTAL_RANDOM_FLOATS) * rng.choice([-1.0, 1.0], TOTAL_RANDOM_FLOATS)
+
+            a_bits = floats_to_bits(a, exp_bits, mant_bits)
+            b_bits = floats_to_bits(b, exp_bits, mant_bits)
+
+            out, underflow_flags, overflow_flags, invalid_operation_flags = float_multiply_reference(a_bits, b_bits, exp_bits, mant_bits, round_to_nearest, flush_to_zero=True)
+
+        for (x, y) in [(a_bits, b_bits), (b_bits, a_bits)]:
+            await check_lanes(dut,
+                              {"a": x, "b": y},
+                              {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags},
+                              widths={"underflow_flag": 1, "overflow_flag": 1, "invalid_operation_flag": 1})
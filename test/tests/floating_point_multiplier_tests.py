@@ -1,7 +1,12 @@
 import cocotb
+import numpy as np
 from cocotb.triggers import Timer
 
-from common import is_IEEE_754_32_bit_float, is_IEEE_754_64_bit_float, is_IEEE_half_precision_float, get_bin_from_float_operation, assert_flags
+from common import is_IEEE_754_32_bit_float, is_IEEE_754_64_bit_float, is_IEEE_half_precision_float, floats_to_bits, float_multiply_reference, is_unsupported_product, assert_flags
+from corpus import get_golden_vectors_key, load_golden_vectors, read_regression_vectors
+from performance import get_recorder
+from stimulus import generate_directed_stimulus
+from waveforms import get_failure_recorder
 
 TOTAL_RANDOM_FLOATS = 100*1000
 POWERS = [-300, -12, -6, -3, 0, 6, 12, 24]
@@ -12,9 +17,28 @@ async def check_input_combo(dut, a, b, expected, flags, assert_message, check_bo
         dut.a.value = a_entry
         dut.b.value = b_entry
 
-        await Timer(1, units="ns")
-        assert_flags(dut, flags, assert_message)
-        assert dut.out.value == expected, assert_message
+        with get_recorder().simulator(vectors=1):
+            await Timer(1, units="ns")
+
+        try:
+            assert_flags(dut, flags, assert_message)
+            assert dut.out.value == expected, assert_message
+        except AssertionError:
+            get_failure_recorder().record({"a": a_entry, "b": b_entry}, assert_message, {"out": int(expected), "flags": [int(flag) for flag in flags]})
+            raise
+
+
+@cocotb.test()
+async def test_regression_corpus(dut):
+    # Vectors that failed in earlier runs, which are checked before all others to surface known bugs quickly
+    vectors = read_regression_vectors()
+
+    dut._log.info(f"{len(vectors)} vectors in the regression corpus")
+
+    for vector in vectors:
+        inputs, expected = vector["inputs"], vector["expected"]
+
+        await check_input_combo(dut, inputs["a"], inputs["b"], expected["out"], tuple(expected["flags"]), vector["message"], check_both_ways=False)
 
 
 @cocotb.test()
@@ -123,43 +147,81 @@ async def test_zero(dut):
         assert False, "This test is not implemented for this floating point format"
 
 
+def generate_random_floats(exp_bits, mant_bits, round_to_nearest, seed):
+    # One row of vectors per power
+    rng = np.random.default_rng(seed)
+    rows = {name: [] for name in ["a", "b", "a_bits", "b_bits", "out", "underflow_flags", "overflow_flags", "invalid_operation_flags"]}
+
+    for power in POWERS:
+        scale_ub = 10.0 ** power
+        scale_lb = 10.0 ** (power - 1)
+
+        a = rng.uniform(scale_lb, scale_ub, TOTAL_RANDOM_FLOATS) * rng.choice([-1.0, 1.0], TOTAL_RANDOM_FLOATS)
+        b = rng.uniform(scale_lb, scale_ub, TOTAL_RANDOM_FLOATS) * rng.choice([-1.0, 1.0], TOTAL_RANDOM_FLOATS)
+
+        a_bits = floats_to_bits(a, exp_bits, mant_bits)
+        b_bits = floats_to_bits(b, exp_bits, mant_bits)
+
+        result_bits, underflow_flags, overflow_flags, invalid_operation_flags = float_multiply_reference(a_bits, b_bits, exp_bits, mant_bits, round_to_nearest, flush_to_zero=True)
+
+        for name, values in zip(rows, [a, b, a_bits, b_bits, result_bits, underflow_flags, overflow_flags, invalid_operation_flags]):
+            rows[name].append(values)
+
+    return {name: np.stack(values) for name, values in rows.items()}
+
+
 @cocotb.test()
 async def test_random_floats(dut):
-    import random
-    import numpy as np
+    exp_bits = int(dut.EXPONENT_WIDTH)
+    mant_bits = int(dut.MANTISSA_WIDTH)
+    round_to_nearest = int(dut.ROUND_TO_NEAREST_TIES_TO_EVEN)
+
+    # Generated once, and reused by later runs
+    with get_recorder().golden_model():
+        key = get_golden_vectors_key("floating_point_multiplier", exp_bits, mant_bits, round_to_nearest, generate_random_floats, {"TOTAL_RANDOM_FLOATS": TOTAL_RANDOM_FLOATS, "POWERS": POWERS}, 0)
+        vectors = load_golden_vectors(key, lambda: generate_random_floats(exp_bits, mant_bits, round_to_nearest, 0))
+
+    a, b, a_bits, b_bits, result_bits = vectors["a"], vectors["b"], vectors["a_bits"], vectors["b_bits"], vectors["out"]
+
+    for row in range(len(POWERS)):
+        for i in range(TOTAL_RANDOM_FLOATS):
+            flags = (int(vectors["underflow_flags"][row, i]), int(vectors["overflow_flags"][row, i]), int(vectors["invalid_operation_flags"][row, i]))
 
-    np.random.seed(0)
-    random.seed(0)
+            await check_input_combo(dut, int(a_bits[row, i]), int(b_bits[row, i]), int(result_bits[row, i]), flags, f"{a[row, i]} * {b[row, i]} != {hex(result_bits[row, i])}")
 
+
+def generate_coverage_directed_vectors(exp_bits, mant_bits, round_to_nearest, seed):
+    inputs, coverage = generate_directed_stimulus("floating_point_multiplier", exp_bits, mant_bits, round_to_nearest, seed=seed)
+    out, underflow_flags, overflow_flags, invalid_operation_flags = float_multiply_reference(inputs["a"], inputs["b"], exp_bits, mant_bits, round_to_nearest, flush_to_zero=True)
+    is_unsupported = is_unsupported_product(inputs["a"], inputs["b"], exp_bits, mant_bits, round_to_nearest)
+
+    return {**inputs, "out": out, "underflow_flags": underflow_flags, "overflow_flags": overflow_flags, "invalid_operation_flags": invalid_operation_flags, "is_unsupported": is_unsupported, "coverage_report": np.array(coverage.report())}
+
+
+@cocotb.test()
+async def test_coverage_directed(dut):
+    # Operands built on their bit fields until every functional coverage bin is hit (operand classes,
+    # exponent sums, rounding and result classes), of which the expected values come from the IEEE 754 golden
+    # model. The products the RTL does not support yet (see common.is_unsupported_product) are skipped.
     exp_bits = int(dut.EXPONENT_WIDTH)
     mant_bits = int(dut.MANTISSA_WIDTH)
+    round_to_nearest = int(dut.ROUND_TO_NEAREST_TIES_TO_EVEN)
 
-    for power in POWERS:
-        scale_ub = 10 ** power
-        scale_lb = 10 ** (power - 1)
-
-        for _ in range(TOTAL_RANDOM_FLOATS):
-            a = random.uniform(scale_lb, scale_ub)
-            b = random.uniform(scale_lb, scale_ub)
+    assert int(dut.IGNORE_SIGN_BIT_FOR_NAN) == 1, "This test is not implemented for NaNs that depend on the sign bit"
 
-            # get two random booleans
-            negative_a = random.choice([True, False])
-            negative_b = random.choice([True, False])
+    with get_recorder().golden_model():
+        key = get_golden_vectors_key("floating_point_multiplier", exp_bits, mant_bits, round_to_nearest, generate_coverage_directed_vectors, None, 0)
+        vectors = load_golden_vectors(key, lambda: generate_coverage_directed_vectors(exp_bits, mant_bits, round_to_nearest, 0))
 
-            if negative_a:
-                a = -a
+    inputs = {name: vectors[name] for name in ["a", "b"]}
+    out, underflow_flags, overflow_flags, invalid_operation_flags = vectors["out"], vectors["underflow_flags"], vectors["overflow_flags"], vectors["invalid_operation_flags"]
 
-            if negative_b:
-                a = -b
+    dut._log.info(f"{len(out)} vectors, of which {int(vectors['is_unsupported'].sum())} are not supported\n{vectors['coverage_report']}")
 
-            if is_IEEE_754_32_bit_float(dut) or is_IEEE_754_64_bit_float(dut) or is_IEEE_half_precision_float(dut):
-                width = exp_bits + mant_bits + 1
-                (a_str, b_str, result_str), result, flags = get_bin_from_float_operation(a, b, '*', width, exp_bits, mant_bits)
-            else:
-                assert False, f"This test is not implemented for this floating point format with exponent width {exp_bits} and mantissa width {mant_bits}"
+    for i in range(len(out)):
+        if vectors["is_unsupported"][i]:
+            continue
 
-            a_int = int(a_str, 2)
-            b_int = int(b_str, 2)
-            result_int = int(result_str, 2)
+        flags = (int(underflow_flags[i]), int(overflow_flags[i]), int(invalid_operation_flags[i]))
 
-            await check_input_combo(dut, a_int,b_int, result_int, flags, f"{a} * {b} != {result}")
+        await check_input_combo(dut, int(inputs["a"][i]), int(inputs["b"][i]), int(out[i]), flags, f"{hex(inputs['a'][i])} * {hex(inputs['b'][i])} != {hex(out[i])}", check_both_ways=False)
@@ -0,0 +1,54 @@
+import cocotb
+import numpy as np
+
+from performance import get_recorder
+from pipeline import start_pipeline, stream_operations
+from rtl_emulator import floating_point_adder, floating_point_multiplier
+
+TOTAL_OPERATIONS = 2000
+
+# Software emulation of every pipelined module, which is the top level of the simulation
+EMULATORS = {"floating_point_adder": floating_point_adder, "floating_point_multiplier": floating_point_multiplier}
+
+
+def get_operations(dut, seed):
+    exp_bits, mant_bits = int(dut.EXPONENT_WIDTH), int(dut.MANTISSA_WIDTH)
+    rng = np.random.default_rng(seed)
+
+    # Uniformly distributed encodings, so that special values are included as well
+    inputs = {
+        "a": rng.integers(0, 1 << 64, TOTAL_OPERATIONS, dtype=np.uint64) & np.uint64((1 << (exp_bits + mant_bits + 1)) - 1),
+        "b": rng.integers(0, 1 << 64, TOTAL_OPERATIONS, dtype=np.uint64) & np.uint64((1 << (exp_bits + mant_bits + 1)) - 1),
+    }
+
+    if dut._name == "floating_point_adder":
+        inputs["subtract"] = rng.integers(0, 2, TOTAL_OPERATIONS, dtype=np.uint64)
+
+    out, underflow_flags, overflow_flags, invalid_operation_flags = EMULATORS[dut._name](*inputs.values(), exp_bits, mant_bits, int(dut.ROUND_TO_NEAREST_TIES_TO_EVEN), int(dut.IGNORE_SIGN_BIT_FOR_NAN))
+
+    return inputs, {"out": out, "underflow_flag": underflow_flags, "overflow_flag": overflow_flags, "invalid_operation_flag": invalid_operation_flags}
+
+
+@cocotb.test()
+async def test_throughput_and_latency(dut):
+    await start_pipeline(dut)
+
+    with get_recorder().golden_model():
+        inputs, expected = get_operations(dut, 0)
+
+    stats = await stream_operations(dut, inputs, expected)
+
+    dut._log.info(f"PIPELINE_STAGES={int(dut.PIPELINE_STAGES)}: latency {stats['min_latency']} cycles, throughput {stats['throughput']:.3f} operations/cycle")
+
+    assert stats["min_latency"] == stats["max_latency"] == int(dut.PIPELINE_STAGES), f"Latency is not equal to the number of pipeline stages: {stats}"
+    assert stats["throughput"] == 1.0, f"Pipeline does not sustain one operation per cycle: {stats}"
+
+
+@cocotb.test()
+async def test_stalls(dut):
+    await start_pipeline(dut)
+
+    with get_recorder().golden_model():
+        inputs, expected = get_operations(dut, 1)
+
+    await stream_operations(dut, inputs, expected, valid_probability=0.7, ready_probability=0.5, seed=1)
@@ -0,0 +1,31 @@
+import os
+
+import cocotb
+from cocotb.triggers import Timer
+
+from waveforms import FAILING_VECTORS_FILE_ENV, read_failing_vectors
+
+# Every vector is applied for VECTOR_TIME, followed by GAP_TIME with all inputs at zero, so that consecutive
+# vectors are easy to tell apart in the waveform
+VECTOR_TIME = 10
+GAP_TIME = 2
+
+
+@cocotb.test()
+async def test_replay_failing_vectors(dut):
+    # Applies the vectors that failed in an earlier (untraced) simulation. The outputs are not checked again:
+    # the waveform of this simulation is what is of interest.
+    vectors = read_failing_vectors(os.environ[FAILING_VECTORS_FILE_ENV])
+
+    for i, vector in enumerate(vectors):
+        dut._log.info(f"Failing vector {i} at {i * (VECTOR_TIME + GAP_TIME)} ns: {vector['message']}")
+
+        for name, value in vector["inputs"].items():
+            getattr(dut, name).value = value
+
+        await Timer(VECTOR_TIME, units="ns")
+
+        for name in vector["inputs"]:
+            getattr(dut, name).value = 0
+
+        await Timer(GAP_TIME, units="ns")
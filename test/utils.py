@@ -1,10 +1,161 @@
-from typing import Optional
+import os
+import re
+import shutil
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional
 
 from pathlib import Path
 
+import pytest
 from cocotb_test.simulator import run
 
-def run_module_test(module_name: str, extension: str = "v", file_name: Optional[str] = None, parameters : Optional[dict] = None, include_src_dir: bool = False, use_basic_compile_args: bool = True, compile_args: Optional[list] = None, create_vcd: bool = False, simulator: str = "verilator"):
+from build_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_CACHE_SIZE, CachedVerilator, build_lock, evict_builds, get_build_key, get_transitive_sources, is_build_complete
+from corpus import REGRESSION_CORPUS_FILE_ENV, add_regression_vectors, get_regression_corpus_file
+from performance import PERFORMANCE_FILE_NAME, PERFORMANCE_FILE_PATTERN, merge_performance, write_run_performance
+from waveforms import FAILING_VECTORS_FILE_ENV, FAILING_VECTORS_FILE_NAME, REPLAY_DIR_NAME, REPLAY_RESULTS_FILE_NAME, TRACE_FORMATS, WAVEFORM_FILE_STEM, read_failing_vectors
+
+RUNS_DIR = Path(__file__).resolve().parent / "sim_build" / "runs"
+MERGED_RESULTS_FILE = Path(__file__).resolve().parent / "sim_build" / "results.xml"
+
+SIMULATORS = ["verilator", "icarus"]
+
+# Verilator build profiles: extra Verilator arguments (-CFLAGS sets the optimization level of the C++ compiler),
+# the number of threads of the model and whether to compile through ccache (if installed). "default" keeps the
+# flags that were always used, "fast_build" is for short simulations of which the build takes most of the time
+# and "fast_run" for long random regressions. The models are small, so synchronizing threads costs more than
+# evaluating them on one.
+BUILD_PROFILES = {
+    "default": {"compile_args": [], "threads": 1, "compiler_cache": False},
+    "fast_build": {"compile_args": ["-O0", "--x-assign", "fast", "--x-initial", "fast", "-CFLAGS", "-O0"], "threads": 1, "compiler_cache": True},
+    "fast_run": {"compile_args": ["-O3", "--x-assign", "fast", "--x-initial", "fast", "-CFLAGS", "-O2"], "threads": 1, "compiler_cache": True},
+    # Unknown (X) values get unique values instead of zeroes, to catch results that depend on them
+    "x_unique": {"compile_args": ["--x-assign", "unique", "--x-initial", "unique"], "threads": 1, "compiler_cache": True},
+}
+
+# Verilator lint waivers, such as -Wno-UNOPTFLAT, which are dropped for other simulators
+VERILATOR_WARNING_ARG = re.compile(r"-Wno-[A-Z]+")
+
+# Parametrization of pytest tests over the simulators, which skips the ones that are not installed
+SIMULATOR_PARAMS = [
+    pytest.param(simulator, marks=pytest.mark.skipif(shutil.which("iverilog" if simulator == "icarus" else simulator) is None, reason=f"{simulator} is not installed"))
+    for simulator in SIMULATORS
+]
+
+
+def get_build_jobs() -> int:
+    """Returns the number of parallel C++ compile jobs of a Verilator build: $BUILD_JOBS, or else the cores divided
+    over the pytest-xdist workers, as each of them may build a model at the same time."""
+
+    if os.getenv("BUILD_JOBS"):
+        return int(os.environ["BUILD_JOBS"])
+
+    return max(os.cpu_count() // int(os.getenv("PYTEST_XDIST_WORKER_COUNT", 1)), 1)
+
+
+def get_parameters_name(parameters: Optional[dict] = None) -> str:
+    """Returns a name for a parameter set that can be used as a directory name."""
+
+    if not parameters:
+        return "default"
+
+    name = "_".join(f"{key}={value}" for key, value in sorted(parameters.items()))
+
+    return re.sub(r"[^A-Za-z0-9_=.-]", "-", name)
+
+
+def get_test_name(module_name: str, test_module: Optional[str] = None) -> str:
+    """Returns the name under which the simulations of a module are stored (its run directories and regression
+    corpus). A test module can be shared by several modules, so these are kept apart below it."""
+
+    return module_name if test_module is None else f"{test_module}/{module_name}"
+
+
+def get_run_dir(module_name: str, parameters: Optional[dict] = None, simulator: str = "verilator") -> Path:
+    """Returns the isolated directory in which the simulation of a (module, parameter set) runs and stores its
+    results. Simulations with other simulators than Verilator get a directory of their own next to it."""
+
+    name = get_parameters_name(parameters)
+
+    return RUNS_DIR / module_name / (name if simulator == "verilator" else f"{name}-{simulator}")
+
+
+def _replay_failing_vectors(run_kwargs: dict, run_dir: Path, results_file: Path, simulation_start: float, get_build_dir: Callable[[str, List[str]], Path]) -> Optional[Path]:
+    """Re-simulates only the vectors that failed in an untraced simulation, in a build with tracing (in the
+    first format of TRACE_FORMATS that builds), and returns the waveform, or None if no failing vectors were
+    recorded. get_build_dir returns the build directory for a trace format and its compile arguments."""
+
+    failing_vectors_file = Path(results_file).parent / FAILING_VECTORS_FILE_NAME
+
+    if not read_failing_vectors(failing_vectors_file, simulation_start):
+        return None
+
+    replay_dir = run_dir / REPLAY_DIR_NAME
+    replay_dir.mkdir(parents=True, exist_ok=True)
+
+    for i, (trace_format, trace_args) in enumerate(TRACE_FORMATS.items()):
+        waveform_file = replay_dir / f"{WAVEFORM_FILE_STEM}.{trace_format}"
+        compile_args = run_kwargs["compile_args"] + trace_args
+        build_dir = get_build_dir(trace_format, compile_args)
+
+        replay_kwargs = dict(
+            run_kwargs,
+            module="tests.replay_tests",
+            compile_args=compile_args,
+            extra_args=[arg for arg in run_kwargs["extra_args"] if arg != "--trace"],
+            # Arguments of the Verilated model, which only traces when asked to
+            plus_args=["--trace", "--trace-file", str(waveform_file)],
+            extra_env={**run_kwargs["extra_env"], FAILING_VECTORS_FILE_ENV: str(failing_vectors_file)},
+            work_dir=str(replay_dir),
+        )
+
+        try:
+            with build_lock(build_dir):
+                CachedVerilator(sim_build=str(build_dir), results_file=str(replay_dir / REPLAY_RESULTS_FILE_NAME), **replay_kwargs).run()
+        except SystemExit:
+            # Try the next format only when this one could not be built
+            if is_build_complete(build_dir) or i == len(TRACE_FORMATS) - 1:
+                raise
+
+            continue
+
+        return waveform_file
+
+
+def _add_failures_to_corpus(run_kwargs: dict, results_file: Path, simulation_start: float):
+    # Vectors of which the expected results were recorded are checked first in every later simulation
+    vectors = [vector for vector in read_failing_vectors(Path(results_file).parent / FAILING_VECTORS_FILE_NAME, simulation_start) if "expected" in vector]
+
+    if vectors:
+        add_regression_vectors(Path(run_kwargs["extra_env"][REGRESSION_CORPUS_FILE_ENV]), vectors)
+
+
+def _raise_with_waveform(error: SystemExit, run_kwargs: dict, run_dir: Path, results_file: Path, simulation_start: float, get_build_dir: Callable[[str, List[str]], Path]):
+    # A failing replay should not hide the failure of the simulation itself
+    try:
+        waveform_file = _replay_failing_vectors(run_kwargs, run_dir, results_file, simulation_start, get_build_dir)
+    except (Exception, SystemExit) as replay_error:
+        raise SystemExit(f"{error} Replaying the failing vectors with tracing failed: {replay_error}") from error
+
+    if waveform_file is not None:
+        raise SystemExit(f"{error} Waveform of the failing vectors: {waveform_file}") from error
+
+
+def run_module_test(module_name: str, extension: str = "v", file_name: Optional[str] = None, parameters : Optional[dict] = None, include_src_dir: bool = False, use_basic_compile_args: bool = True, compile_args: Optional[list] = None, create_vcd: bool = False, trace_failures: bool = True, simulator: str = "verilator", build_profile: str = "default", threads: Optional[int] = None, test_module: Optional[str] = None, use_build_cache: bool = True, build_cache_dir: Optional[str] = None, max_build_cache_size: int = DEFAULT_MAX_CACHE_SIZE):
+    """Builds and simulates a module with its cocotb tests, with Verilator (in one of the BUILD_PROFILES, of
+    which threads overrides the number of threads) or Icarus Verilog. The simulation runs without tracing,
+    unless create_vcd is set; with trace_failures, the vectors that failed are then re-simulated in a traced
+    Verilator build, of which the waveform is written to replay/failing_vectors.fst (or .vcd) in the run directory.
+    Failing vectors are also added to the regression corpus of the test module and parameter set, which the
+    simulations of all simulators check first."""
+
+    if simulator not in SIMULATORS:
+        raise ValueError(f"Simulator {simulator} is not supported, supported simulators are: {', '.join(SIMULATORS)}")
+
+    if build_profile not in BUILD_PROFILES:
+        raise ValueError(f"Unknown build profile {build_profile}, available profiles are: {', '.join(BUILD_PROFILES)}")
+
     file_dir = Path(__file__).resolve().parent
     source_dir = str(file_dir / ".." / "src")
 
@@ -12,30 +163,166 @@ def run_module_test(module_name: str, extension: str = "v", file_name: Optional[
     # This is when you use 4 bits but you would need 5 bits, but this is in 99.99% of the cases as intended
     basic_compile_args = ['-Wno-WIDTHEXPAND'] if use_basic_compile_args and simulator == "verilator" else []
     extra_args = []
+    extra_env = {REGRESSION_CORPUS_FILE_ENV: str(get_regression_corpus_file(get_test_name(module_name, test_module), get_parameters_name(parameters)))}
+    includes = []
+    plus_args = []
+    waves = None
 
     if include_src_dir:
         if simulator == "verilator":
             basic_compile_args.insert(0, f"+incdir+{source_dir}")
         else:
-            raise ValueError(f"Include source directory is not supported for this ({simulator}) simulator")
-        
+            includes.append(source_dir)
+
     if create_vcd:
         if simulator == "verilator":
+            # Builds the model with tracing, and enables it when running the model (dump.vcd in the run directory)
             extra_args.append("--trace")
+            plus_args.append("--trace")
         else:
-            raise ValueError(f"Create VCD is not supported for this ({simulator}) simulator")
-    
+            waves = True
+
     compile_args = list(set(basic_compile_args + (compile_args or [])))
-        
+
+    if simulator == "verilator":
+        profile = BUILD_PROFILES[build_profile]
+        compile_args += profile["compile_args"] + ["--threads", str(threads or profile["threads"])]
+
+        # Compile the C++ model in parallel (unless $MAKEFLAGS is set already), and through ccache when the profile
+        # asks for it. Neither changes the build, so they are not part of the compile arguments (and the key of the
+        # build cache).
+        if "MAKEFLAGS" not in os.environ:
+            extra_env["MAKEFLAGS"] = f"-j{get_build_jobs()}"
+
+        if profile["compiler_cache"] and shutil.which("ccache"):
+            extra_env["OBJCACHE"] = "ccache"
+    else:
+        compile_args = [arg for arg in compile_args if not VERILATOR_WARNING_ARG.fullmatch(arg)]
+
     if file_name is None:
         file_name = f"{module_name}.{extension}"
 
-    return run(
-        simulator=simulator,
-        verilog_sources=[f"{source_dir}/{file_name}"],
+    # file_name may also be an absolute path, for example to a generated wrapper
+    verilog_sources = [str(Path(source_dir) / file_name)]
+
+    # Every (module, parameter set, simulator) gets its own run directory, such that simulations can run in parallel
+    run_dir = get_run_dir(get_test_name(module_name, test_module), parameters, simulator)
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    run_kwargs = dict(
+        verilog_sources=verilog_sources,
         toplevel=module_name,
-        module=f"tests.{module_name}_tests",
+        # The cocotb tests are in tests/<module_name>_tests.py, unless another test module is given
+        module=f"tests.{test_module or module_name}_tests",
         parameters=parameters,
-        compile_args=compile_args, # TODO: '--x-assign unique', '--x-initial unique'
-        extra_args=extra_args
+        includes=includes,
+        compile_args=compile_args,
+        extra_args=extra_args,
+        extra_env=extra_env,
+        plus_args=plus_args,
+        waves=waves,
+        # Icarus Verilog only recompiles when the top level source changed, not when an included one did
+        force_compile=simulator != "verilator",
+        work_dir=str(run_dir),
+        # The simulation no longer runs from this directory, so the test modules should be found explicitly
+        python_search=[str(file_dir)]
     )
+
+    simulation_start = time.time()
+
+    if not use_build_cache or simulator != "verilator":
+        # The build and the simulation happen in one go, so their times can not be told apart
+        try:
+            return run(simulator=simulator, sim_build=str(run_dir / "sim_build"), **run_kwargs)
+        except SystemExit as e:
+            _add_failures_to_corpus(run_kwargs, run_dir / "sim_build" / "results.xml", simulation_start)
+
+            if trace_failures and simulator == "verilator":
+                _raise_with_waveform(e, run_kwargs, run_dir, run_dir / "sim_build" / "results.xml", simulation_start, lambda trace_format, _: run_dir / REPLAY_DIR_NAME / f"sim_build_{trace_format}")
+
+            raise
+        finally:
+            write_run_performance(run_dir, run_dir / "sim_build" / "results.xml", simulation_start, time.time() - simulation_start)
+
+    # Reuse a previous build when none of the (included) sources, parameters and flags changed
+    cache_dir = Path(build_cache_dir) if build_cache_dir is not None else DEFAULT_CACHE_DIR
+    sources = get_transitive_sources(verilog_sources, [source_dir] if include_src_dir else None)
+    build_dir = cache_dir / get_build_key(sources, module_name, parameters, compile_args + extra_args, simulator)
+
+    build_start = time.time()
+
+    with build_lock(build_dir):
+        cached_build = is_build_complete(build_dir)
+
+        if not cached_build:
+            CachedVerilator(sim_build=str(build_dir), compile_only=True, **run_kwargs).run()
+
+    build_time = time.time() - build_start
+    simulation_start = time.time()
+
+    try:
+        with build_lock(build_dir, shared=True):
+            return CachedVerilator(sim_build=str(build_dir), results_file=str(run_dir / "results.xml"), **run_kwargs).run()
+    except SystemExit as e:
+        _add_failures_to_corpus(run_kwargs, run_dir / "results.xml", simulation_start)
+
+        if trace_failures:
+            _raise_with_waveform(e, run_kwargs, run_dir, run_dir / "results.xml", simulation_start, lambda _, args: cache_dir / get_build_key(sources, module_name, parameters, args, simulator))
+
+        raise
+    finally:
+        write_run_performance(run_dir, run_dir / "results.xml", simulation_start, time.time() - simulation_start, build_time, cached_build)
+        evict_builds(cache_dir, max_build_cache_size, keep=build_dir)
+
+
+def merge_results(results_files: List[str], output_file: Path = MERGED_RESULTS_FILE) -> Path:
+    """Merges the JUnit results files of several simulations into a single report."""
+
+    merged = ET.Element("testsuites", name="results")
+
+    for results_file in results_files:
+        if not os.path.isfile(results_file):
+            continue
+
+        run_dir = Path(results_file).resolve().parent
+
+        for test_suite in ET.parse(results_file).iter("testsuite"):
+            # Name the suite after its run directory, i.e. after the module and parameter set
+            if run_dir.is_relative_to(RUNS_DIR):
+                test_suite.set("name", str(run_dir.relative_to(RUNS_DIR)))
+
+            merged.append(test_suite)
+
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(merged).write(output_file, encoding="UTF-8", xml_declaration=True)
+
+    return output_file
+
+
+def _run_module_test_job(kwargs: dict):
+    try:
+        return run_module_test(**kwargs), None
+    except SystemExit as e:
+        results_files = sorted(get_run_dir(get_test_name(kwargs["module_name"], kwargs.get("test_module")), kwargs.get("parameters"), kwargs.get("simulator", "verilator")).rglob("*results.xml"), key=os.path.getmtime)
+
+        return str(results_files[-1]) if results_files else None, str(e)
+
+
+def run_module_tests_parallel(jobs: List[dict], max_workers: Optional[int] = None, output_file: Path = MERGED_RESULTS_FILE):
+    """Runs several run_module_test calls (given as lists of keyword arguments) in a pool of worker
+    processes, one simulation per CPU core by default. Returns the merged report and the errors per job.
+    The performance of the jobs is merged into performance.json next to the merged report."""
+
+    start_time = time.time()
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        outcomes = list(executor.map(_run_module_test_job, jobs))
+
+    errors = {i: error for i, (_, error) in enumerate(outcomes) if error is not None}
+
+    run_dirs = {get_run_dir(get_test_name(job["module_name"], job.get("test_module")), job.get("parameters"), job.get("simulator", "verilator")) for job in jobs}
+    performance_files = [f for run_dir in run_dirs for f in run_dir.glob(PERFORMANCE_FILE_PATTERN) if f.stat().st_mtime >= start_time]
+    merge_performance(sorted(str(f) for f in performance_files), Path(output_file).with_name(PERFORMANCE_FILE_NAME))
+
+    return merge_results([results_file for results_file, _ in outcomes if results_file is not None], output_file), errors
@@ -0,0 +1,74 @@
+import atexit
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+# Written next to results.xml by a simulation in which vectors failed, and read by the traced replay of those
+# vectors, which dumps its waveform to replay/failing_vectors.<format> in the run directory
+FAILING_VECTORS_FILE_NAME = "failing_vectors.json"
+REPLAY_DIR_NAME = "replay"
+REPLAY_RESULTS_FILE_NAME = "replay.xml"
+WAVEFORM_FILE_STEM = "failing_vectors"
+
+# Verilator flags per waveform format, in order of preference. FST is compressed, but needs Verilator to be
+# installed with its (lz4) dependencies; a replay only contains a few vectors, so VCD is fine as well.
+TRACE_FORMATS = {"fst": ["--trace-fst", "--trace-structs"], "vcd": ["--trace", "--trace-structs"]}
+
+# Environment variable through which the replay test finds the failing vectors
+FAILING_VECTORS_FILE_ENV = "FAILING_VECTORS_FILE"
+
+# A failing regression should not replay (and trace) more than this
+MAX_RECORDED_FAILURES = 100
+
+
+class FailureRecorder:
+    """Collects, inside a cocotb simulation, the input port values of the vectors that failed, and optionally
+    their expected results. They are written when the simulation ends, so that run_module_test can re-simulate
+    only those in a traced build and add them to the regression corpus (see corpus.py)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.vectors = []
+
+    def record(self, inputs: dict, message: str = "", expected: Optional[dict] = None):
+        if len(self.vectors) < MAX_RECORDED_FAILURES:
+            vector = {"inputs": {name: int(value) for name, value in inputs.items()}, "message": message}
+
+            if expected is not None:
+                vector["expected"] = expected
+
+            self.vectors.append(vector)
+
+    def save(self):
+        if self.vectors:
+            self.path.write_text(json.dumps(self.vectors, indent=2) + "\n")
+
+
+_recorder: Optional[FailureRecorder] = None
+
+
+def get_failure_recorder() -> FailureRecorder:
+    """Returns the failure recorder of the running simulation, which writes next to the cocotb results file."""
+
+    global _recorder
+
+    if _recorder is None:
+        results_file = os.getenv("COCOTB_RESULTS_FILE")
+        directory = Path(results_file).parent if results_file else Path.cwd()
+
+        _recorder = FailureRecorder(directory / FAILING_VECTORS_FILE_NAME)
+        atexit.register(_recorder.save)
+
+    return _recorder
+
+
+def read_failing_vectors(path: Path, simulation_start: float = 0.0) -> List[dict]:
+    """Returns the failing vectors written at or after simulation_start (a time.time() timestamp)."""
+
+    path = Path(path)
+
+    if not path.is_file() or path.stat().st_mtime < simulation_start:
+        return []
+
+    return json.loads(path.read_text())